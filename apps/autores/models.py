@@ -53,9 +53,14 @@ class Autor(models.Model):
     @property
     def total_obras(self):
         """Retorna el número total de obras del autor"""
+        # AutorViewSet lo anota para no contar autor a autor
+        if 'num_obras' in self.__dict__:
+            return self.num_obras
         return self.obras.count()
 
     @property
     def total_representaciones(self):
         """Retorna el número total de representaciones de sus obras"""
+        if 'num_representaciones' in self.__dict__:
+            return self.num_representaciones
         return sum(obra.representaciones.count() for obra in self.obras.all())
\ No newline at end of file
@@ -1,3 +1,5 @@
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Autor
@@ -11,7 +13,12 @@ class AutorViewSet(viewsets.ModelViewSet):
     Permite listar, crear, actualizar y eliminar autores.
     Incluye filtros por época, nombre, etc.
     """
-    queryset = Autor.objects.all()
+    # Totales anotados (ver Autor.total_obras); las representaciones salen
+    # de los agregados guardados en cada obra
+    queryset = Autor.objects.annotate(
+        num_obras=Count('obras', distinct=True),
+        num_representaciones=Coalesce(Sum('obras__representaciones_total'), 0),
+    )
     serializer_class = AutorSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['epoca']
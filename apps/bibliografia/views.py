@@ -11,7 +11,7 @@ class ReferenciaBibliograficaViewSet(viewsets.ModelViewSet):
     Permite listar, crear, actualizar y eliminar referencias bibliográficas.
     Incluye filtros por obra, tipo de referencia, autor, etc.
     """
-    queryset = ReferenciaBibliografica.objects.all()
+    queryset = ReferenciaBibliografica.objects.select_related('obra')
     serializer_class = ReferenciaBibliograficaSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = [
@@ -81,6 +81,9 @@ class Lugar(models.Model):
     @property
     def total_representaciones(self):
         """Retorna el número total de representaciones en este lugar"""
+        # LugarViewSet lo anota para no contar lugar a lugar
+        if 'num_representaciones' in self.__dict__:
+            return self.num_representaciones
         return self.representaciones.count()
 
     @property
@@ -1,3 +1,4 @@
+from django.db.models import Count
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Lugar
@@ -11,7 +12,8 @@ class LugarViewSet(viewsets.ModelViewSet):
     Permite listar, crear, actualizar y eliminar lugares.
     Incluye filtros por tipo de lugar, región, país, etc.
     """
-    queryset = Lugar.objects.all()
+    # Total anotado (ver Lugar.total_representaciones)
+    queryset = Lugar.objects.annotate(num_representaciones=Count('representaciones'))
     serializer_class = LugarSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['tipo_lugar', 'region', 'pais', 'es_capital']
@@ -8,6 +8,8 @@ from .models import (
     ComentarioUsuario,
     PropuestaCambioObra,
     VotoPropuestaCambioObra,
+    TareaFondo,
+    DecisionValidacion,
 )
 
 
@@ -233,4 +235,20 @@ class VotoPropuestaCambioObraAdmin(admin.ModelAdmin):
     list_display = ["id", "propuesta", "usuario", "voto", "fecha_creacion"]
     list_filter = ["voto", "fecha_creacion"]
     search_fields = ["usuario__username", "comentario", "propuesta__obra__titulo_limpio"]
-    readonly_fields = ["fecha_creacion"]
\ No newline at end of file
+    readonly_fields = ["fecha_creacion"]
+
+
+@admin.register(TareaFondo)
+class TareaFondoAdmin(admin.ModelAdmin):
+    list_display = ["id", "tipo", "estado", "progreso", "creada_por", "fecha_creacion", "fecha_fin"]
+    list_filter = ["tipo", "estado", "fecha_creacion"]
+    search_fields = ["mensaje", "error", "creada_por__username"]
+    readonly_fields = ["fecha_creacion", "fecha_inicio", "fecha_fin"]
+
+
+@admin.register(DecisionValidacion)
+class DecisionValidacionAdmin(admin.ModelAdmin):
+    list_display = ["id", "archivo", "tipo", "id_temporal", "estado", "usuario_nombre", "fecha"]
+    list_filter = ["estado", "tipo", "archivo"]
+    search_fields = ["id_temporal", "comentario", "usuario_nombre"]
+    readonly_fields = ["fecha"]
@@ -0,0 +1,137 @@
+"""
+Agregados de representaciones guardados en Obra.
+
+``total_representaciones``, ``primera_representacion``,
+``ultima_representacion`` y ``lugares_representacion`` se leen de columnas
+de Obra (CAMPOS_AGREGADOS) en lugar de consultar sus representaciones cada
+vez; listar N obras por la API ya no cuesta 4N consultas.
+
+Mantenimiento:
+    - Las señales (signals.py) recalculan las obras afectadas al guardar o
+      borrar una Representacion, o al renombrar o borrar un Lugar.
+    - Dentro de ``recalculo_diferido()`` las obras afectadas se acumulan y se
+      recalculan de una vez al salir (importaciones masivas).
+    - ``python manage.py recalcular_agregados`` reconstruye todas las obras.
+
+Obra.save() no escribe estas columnas salvo que se pidan en update_fields:
+una instancia cargada antes de añadir una representación no pisa el total.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db.models import Count, Max, Min
+
+CAMPOS_AGREGADOS = (
+    "representaciones_total",
+    "representaciones_primera",
+    "representaciones_ultima",
+    "representaciones_lugares",
+)
+TAMANO_LOTE = 1000
+
+_estado = threading.local()
+
+
+def _vacio():
+    return {
+        "representaciones_total": 0,
+        "representaciones_primera": None,
+        "representaciones_ultima": None,
+        "representaciones_lugares": [],
+    }
+
+
+def calcular(obra_ids):
+    """{obra_id: {campo: valor}} para ``obra_ids``, con dos consultas agrupadas."""
+    from apps.representaciones.models import Representacion
+
+    valores = {obra_id: _vacio() for obra_id in obra_ids}
+    representaciones = Representacion.objects.filter(obra_id__in=valores).order_by()
+    for fila in representaciones.values("obra_id").annotate(
+        total=Count("id"), primera=Min("fecha"), ultima=Max("fecha")
+    ):
+        valores[fila["obra_id"]].update(
+            representaciones_total=fila["total"],
+            representaciones_primera=fila["primera"],
+            representaciones_ultima=fila["ultima"],
+        )
+    lugares = representaciones.filter(lugar__isnull=False).values_list("obra_id", "lugar__nombre").distinct()
+    for obra_id, nombre in lugares:
+        valores[obra_id]["representaciones_lugares"].append(nombre)
+    for datos in valores.values():
+        datos["representaciones_lugares"].sort()
+    return valores
+
+
+def recalcular(obra_ids, instancias=()):
+    """Recalcula y guarda los agregados de ``obra_ids``; devuelve cuántas obras cambiaron.
+
+    Solo escribe las obras cuyo valor guardado difiere. ``instancias`` son
+    objetos Obra en memoria que se actualizan también (p. ej. ``rep.obra``).
+    """
+    from .models import Obra
+
+    obra_ids = sorted({obra_id for obra_id in obra_ids if obra_id is not None})
+    por_id = {obra.pk: obra for obra in instancias}
+    cambiadas = 0
+    for inicio in range(0, len(obra_ids), TAMANO_LOTE):
+        lote = obra_ids[inicio:inicio + TAMANO_LOTE]
+        nuevos = calcular(lote)
+        actuales = Obra.objects.filter(pk__in=lote).values_list("pk", *CAMPOS_AGREGADOS)
+        modificadas = []
+        for pk, *guardados in actuales:
+            datos = nuevos[pk]
+            if list(guardados) != [datos[campo] for campo in CAMPOS_AGREGADOS]:
+                modificadas.append(Obra(pk=pk, **datos))
+        if modificadas:
+            Obra.objects.bulk_update(modificadas, CAMPOS_AGREGADOS)
+            cambiadas += len(modificadas)
+        for pk in lote:
+            if pk in por_id:
+                for campo, valor in nuevos[pk].items():
+                    setattr(por_id[pk], campo, valor)
+    return cambiadas
+
+
+def recalcular_todas(tamano_lote=TAMANO_LOTE):
+    """Reconstruye los agregados de todas las obras, por lotes de id."""
+    from .models import Obra
+
+    cambiadas = 0
+    ultimo = 0
+    while True:
+        lote = list(Obra.objects.filter(pk__gt=ultimo).order_by("pk").values_list("pk", flat=True)[:tamano_lote])
+        if not lote:
+            return cambiadas
+        cambiadas += recalcular(lote)
+        ultimo = lote[-1]
+
+
+def obras_afectadas(obra_ids, instancias=()):
+    """Punto de entrada de las señales: recalcula ya, o acumula si hay un recálculo diferido."""
+    pendientes = getattr(_estado, "pendientes", None)
+    if pendientes is not None:
+        pendientes.update(obra_id for obra_id in obra_ids if obra_id is not None)
+        return
+    recalcular(obra_ids, instancias)
+
+
+@contextmanager
+def recalculo_diferido():
+    """Acumula las obras afectadas dentro del bloque y las recalcula al salir.
+
+    Las instancias en memoria no se actualizan. Si el bloque falla no se
+    recalcula nada (la transacción que lo envuelva se deshará igualmente).
+    """
+    if getattr(_estado, "pendientes", None) is not None:
+        # Anidado: lo recalcula el bloque exterior
+        yield
+        return
+    _estado.pendientes = set()
+    try:
+        yield
+        pendientes = _estado.pendientes
+    finally:
+        _estado.pendientes = None
+    recalcular(pendientes)
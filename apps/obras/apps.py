@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ObrasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.obras'
-    verbose_name = 'Obras Teatrales'
\ No newline at end of file
+    verbose_name = 'Obras Teatrales'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,254 @@
+"""
+Servir los artefactos del frontend (datos_obras.json, shards, data/...) con
+variantes precomprimidas, ETag fuerte, peticiones condicionales y Range.
+
+Precompresión:
+    ``precomprimir(ruta)`` escribe ``<ruta>.gz`` y, si el paquete ``brotli``
+    está instalado, ``<ruta>.br``. La variante recibe el mismo mtime que el
+    original: si no coinciden (el original se regeneró después) se ignora.
+    exportar_json precomprime lo que escribe; para el resto de data/ está
+    ``python manage.py precomprimir_estaticos``.
+
+Respuesta:
+    ``respuesta_archivo(request, ruta, content_type)`` elige la variante según
+    Accept-Encoding (br > gzip > identidad), añade ETag, Last-Modified y
+    Vary, responde 304 a If-None-Match / If-Modified-Since y 206 a un Range
+    de un solo intervalo (respetando If-Range).
+
+El ETag es el sha256 del original; se calcula una vez por (ruta, mtime,
+tamaño) y se guarda en memoria. Cada variante usa ese valor con un sufijo,
+porque son representaciones distintas del mismo recurso.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# (extensión del archivo, valor de Content-Encoding), por orden de preferencia
+VARIANTES = ((".br", "br"), (".gz", "gzip"))
+TAMANO_MINIMO = 1024
+MAX_ETAGS_EN_MEMORIA = 1024
+
+_etags = {}
+_etags_lock = threading.Lock()
+
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# ---------------------------------------------------------------------------
+# Precompresión
+# ---------------------------------------------------------------------------
+
+def _comprimir(contenido, codificacion):
+    if codificacion == "br":
+        return brotli.compress(contenido, quality=11)
+    # mtime=0: la misma entrada produce siempre el mismo .gz
+    return gzip.compress(contenido, compresslevel=9, mtime=0)
+
+
+def _variante_vigente(ruta, variante):
+    try:
+        return variante.stat().st_mtime_ns == ruta.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def precomprimir(ruta):
+    """Escribe las variantes .gz/.br de ``ruta`` si faltan o están desfasadas.
+
+    Devuelve la lista de variantes escritas. Los archivos pequeños o que no
+    ganan nada al comprimirse no tienen variante (y se borra la que hubiera).
+    """
+    ruta = Path(ruta)
+    info = ruta.stat()
+    contenido = None
+    escritas = []
+    for extension, codificacion in VARIANTES:
+        if codificacion == "br" and brotli is None:
+            continue
+        variante = ruta.with_name(ruta.name + extension)
+        if _variante_vigente(ruta, variante):
+            continue
+        if contenido is None:
+            contenido = ruta.read_bytes()
+        comprimido = _comprimir(contenido, codificacion) if info.st_size >= TAMANO_MINIMO else None
+        if comprimido is None or len(comprimido) >= info.st_size:
+            variante.unlink(missing_ok=True)
+            continue
+        tmp = variante.with_name(variante.name + ".tmp")
+        tmp.write_bytes(comprimido)
+        os.utime(tmp, ns=(info.st_atime_ns, info.st_mtime_ns))
+        tmp.replace(variante)
+        escritas.append(variante)
+    return escritas
+
+
+def precomprimir_directorio(directorio, patron="*.json"):
+    """Precomprime recursivamente los archivos de ``directorio`` que casan con ``patron``."""
+    escritas = []
+    for ruta in sorted(Path(directorio).rglob(patron)):
+        if ruta.is_file():
+            escritas.extend(precomprimir(ruta))
+    return escritas
+
+
+def ruta_original(nombre):
+    """Nombre del original de una variante ("x.json.gz" -> "x.json"); None si no es variante."""
+    for extension, _ in VARIANTES:
+        if nombre.endswith(extension):
+            return nombre[: -len(extension)]
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Respuesta
+# ---------------------------------------------------------------------------
+
+def _etag_base(ruta, info):
+    clave = (str(ruta), info.st_mtime_ns, info.st_size)
+    etag = _etags.get(clave)
+    if etag is None:
+        sha = hashlib.sha256()
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                sha.update(bloque)
+        etag = sha.hexdigest()[:32]
+        with _etags_lock:
+            if len(_etags) >= MAX_ETAGS_EN_MEMORIA:
+                _etags.clear()
+            _etags[clave] = etag
+    return etag
+
+
+def _codificaciones_aceptadas(cabecera):
+    """Codificaciones con q > 0 en Accept-Encoding."""
+    aceptadas = set()
+    for parte in (cabecera or "").split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        q = 1.0
+        for parametro in parametros.split(";"):
+            clave, _, valor = parametro.strip().partition("=")
+            if clave.strip() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            aceptadas.add(nombre)
+    return aceptadas
+
+
+def _elegir_variante(request, ruta):
+    aceptadas = _codificaciones_aceptadas(request.headers.get("Accept-Encoding"))
+    for extension, codificacion in VARIANTES:
+        if codificacion in aceptadas:
+            variante = ruta.with_name(ruta.name + extension)
+            if _variante_vigente(ruta, variante):
+                return variante, codificacion
+    return ruta, None
+
+
+def _etag_coincide(cabecera, etag):
+    if cabecera.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: W/"x" equivale a "x"
+    return any(e.strip().removeprefix("W/") == etag for e in cabecera.split(","))
+
+
+def _no_modificado(request, etag, mtime):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return _etag_coincide(if_none_match, etag)
+    desde = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return desde is not None and int(mtime) <= desde
+
+
+def _rango_solicitado(request, etag, mtime, tamano):
+    """(inicio, fin) inclusivos, None si se sirve completo o "invalido" si no es satisfacible."""
+    cabecera = request.headers.get("Range")
+    if not cabecera:
+        return None
+    if_range = request.headers.get("If-Range")
+    if if_range:
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            # If-Range exige comparación fuerte
+            if if_range.strip() != etag:
+                return None
+        else:
+            fecha = parse_http_date_safe(if_range)
+            if fecha is None or int(mtime) > fecha:
+                return None
+    coincidencia = _RANGO.match(cabecera.strip())
+    if not coincidencia:
+        # Varios intervalos o sintaxis desconocida: se ignora y se sirve entero
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if not inicio:
+        sufijo = int(fin)
+        if sufijo == 0:
+            return "invalido"
+        return max(0, tamano - sufijo), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return "invalido"
+    return inicio, fin
+
+
+def respuesta_archivo(request, ruta, content_type, cache_control="no-cache"):
+    """Respuesta para ``ruta`` con negociación de codificación, validadores y Range."""
+    ruta = Path(ruta)
+    info_original = ruta.stat()
+    servida, codificacion = _elegir_variante(request, ruta)
+    info = servida.stat() if servida != ruta else info_original
+
+    etag = '"%s%s"' % (_etag_base(ruta, info_original), f"-{codificacion}" if codificacion else "")
+    mtime = info_original.st_mtime
+
+    def _cabeceras(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(mtime)
+        response["Cache-Control"] = cache_control
+        response["Accept-Ranges"] = "bytes"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    if _no_modificado(request, etag, mtime):
+        return _cabeceras(HttpResponse(status=304))
+
+    rango = _rango_solicitado(request, etag, mtime, info.st_size)
+    if rango == "invalido":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{info.st_size}"
+        return _cabeceras(response)
+
+    if rango is None:
+        response = FileResponse(servida.open("rb"), content_type=content_type)
+        response["Content-Length"] = str(info.st_size)
+    else:
+        inicio, fin = rango
+        with open(servida, "rb") as f:
+            f.seek(inicio)
+            contenido = f.read(fin - inicio + 1)
+        response = HttpResponse(contenido, content_type=content_type, status=206)
+        response["Content-Range"] = f"bytes {inicio}-{fin}/{info.st_size}"
+    if codificacion:
+        response["Content-Encoding"] = codificacion
+    return _cabeceras(response)
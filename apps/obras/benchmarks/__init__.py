@@ -0,0 +1,16 @@
+"""
+Suite de benchmarks de las rutas críticas (comando benchmark_rutas_criticas).
+
+Cada optimización necesita un antes y un después medidos sobre los mismos
+datos: la suite crea el catálogo sintético (sintetico.py) a la escala
+pedida, mide cada caso y guarda la ejecución en un historial JSON para
+compararla con la anterior.
+
+    casos.py       qué se mide: serialización de /api/datos-obras/,
+                   exportar_json, importar_json, facetas, búsqueda por
+                   título, páginas PDF de una obra, mapas y redes, y los
+                   scripts de extracción (extract_mentions,
+                   parsear_fecha_espanola)
+    medicion.py    mediana, p95, pico de memoria y consultas de un caso
+    historial.py   historial de ejecuciones y comparación entre dos
+"""
@@ -0,0 +1,175 @@
+"""
+Casos de benchmark_rutas_criticas.
+
+Cada caso recibe los ``Datos`` de la ejecución, prepara fuera del tiempo
+medido lo que necesite (archivos, peticiones, muestras) y devuelve
+``(funcion, preparar)``: ``funcion`` es lo que se cronometra y ``preparar``
+(o None) se llama antes de cada pasada.
+
+Las muestras (obras con página, términos de búsqueda, fechas...) se eligen
+por id o con la semilla de la ejecución: dos ejecuciones con la misma
+escala miden exactamente lo mismo.
+"""
+
+import importlib.util
+import io
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import QuerySet
+from django.test import RequestFactory
+
+MUESTRA_OBRAS_PDF = 50
+MUESTRA_TERMINOS = 20
+MUESTRA_TEXTOS = 200
+MUESTRA_FECHAS = 20000
+
+CASOS = {}
+
+
+@dataclass
+class Datos:
+    directorio: Path
+    distribuciones: object
+    semilla: int = 0
+    obras_importar: int = 500
+
+
+def caso(nombre):
+    def registrar(funcion):
+        CASOS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+_scripts = {}
+
+
+def _script(nombre):
+    """Módulo de un script de data/fuentesix (no son paquetes importables)."""
+    if nombre not in _scripts:
+        ruta = Path(settings.BASE_DIR) / "data" / "fuentesix" / nombre
+        spec = importlib.util.spec_from_file_location(f"benchmark_{ruta.stem}", ruta)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        _scripts[nombre] = modulo
+    return _scripts[nombre]
+
+
+def _evaluar(contexto):
+    """Evalúa los querysets perezosos del contexto, como haría la plantilla."""
+    return {clave: list(valor) if isinstance(valor, QuerySet) else valor for clave, valor in contexto.items()}
+
+
+@caso("datos_obras_api")
+def _datos_obras_api(datos):
+    from ..views_api_json import _construir_datos_obras_json
+
+    # Serialización completa, sin la caché de la vista
+    return _construir_datos_obras_json, None
+
+
+@caso("exportar_json")
+def _exportar_json(datos):
+    salida = datos.directorio / "exportar" / "datos_obras.json"
+    return lambda: call_command("exportar_json", salida=str(salida), stdout=io.StringIO()), None
+
+
+@caso("importar_json")
+def _importar_json(datos):
+    from ..sintetico import GeneradorCatalogo, escribir_json
+
+    archivo = datos.directorio / "importar.json"
+    generador = GeneradorCatalogo(datos.distribuciones, datos.obras_importar, semilla=datos.semilla + 1)
+    with open(archivo, "w", encoding="utf-8") as f:
+        escribir_json(generador, f)
+
+    def importar():
+        with transaction.atomic():
+            call_command("importar_json", archivo=str(archivo), stdout=io.StringIO(), stderr=io.StringIO())
+            transaction.set_rollback(True)
+
+    return importar, None
+
+
+@caso("facetas")
+def _facetas(datos):
+    from ..views_busqueda import FACETAS, _resumen
+
+    return lambda: _resumen({}, list(FACETAS)), None
+
+
+@caso("busqueda_titulo")
+def _busqueda_titulo(datos):
+    from ..cache import incrementar_generacion
+    from ..models import Obra
+    from ..views_busqueda import busqueda_obras_api
+
+    palabras = sorted({
+        palabra.lower()
+        for titulo in Obra.objects.order_by("id").values_list("titulo_limpio", flat=True)[:5000]
+        for palabra in titulo.split() if len(palabra) >= 5 and palabra.isalpha()
+    })
+    terminos = random.Random(datos.semilla).sample(palabras, min(MUESTRA_TERMINOS, len(palabras)))
+    peticiones = [RequestFactory().get("/api/obras/search/", {"q": termino}) for termino in terminos]
+    # El total y las facetas se cachean por búsqueda: cada pasada empieza en frío
+    return lambda: [busqueda_obras_api(peticion) for peticion in peticiones], incrementar_generacion
+
+
+@caso("pagina_pdf")
+def _pagina_pdf(datos):
+    from ..models import Obra
+    from ..views import obra_pdf_pages_ajax
+
+    ids = list(
+        Obra.objects.filter(pagina_pdf__isnull=False).order_by("id").values_list("id", flat=True)[:MUESTRA_OBRAS_PDF]
+    )
+    peticion = RequestFactory().get("/")
+    return lambda: [obra_pdf_pages_ajax(peticion, "fuentesxi", obra_id) for obra_id in ids], None
+
+
+@caso("mapas_geograficos")
+def _mapas_geograficos(datos):
+    from ..views import _contexto_mapas_geograficos
+
+    return lambda: _evaluar(_contexto_mapas_geograficos({})), None
+
+
+@caso("redes_colaboracion")
+def _redes_colaboracion(datos):
+    from ..views import _contexto_redes_colaboracion
+
+    return lambda: _evaluar(_contexto_redes_colaboracion()), None
+
+
+@caso("extract_mentions")
+def _extract_mentions(datos):
+    from apps.lugares.models import Lugar
+
+    from ..models import PaginaPDF
+
+    modulo = _script("extraer_lugares_mecenas.py")
+    lugares, variantes = {}, defaultdict(set)
+    for pk, nombre in Lugar.objects.values_list("pk", "nombre"):
+        lugares[pk] = {"nombre": nombre}
+        variantes[modulo.normalize_text(nombre)].add(pk)
+    items = [
+        {"tipo": "pagina", "datos_json": {"texto_original": texto}, "metadata": {"pagina_pdf": numero}}
+        for numero, texto in PaginaPDF.objects.order_by("numero_pagina")
+        .values_list("numero_pagina", "texto_extraido")[:MUESTRA_TEXTOS]
+    ]
+    return lambda: modulo.extract_mentions(items, lugares, variantes, "benchmark"), None
+
+
+@caso("parsear_fecha_espanola")
+def _parsear_fecha_espanola(datos):
+    from apps.representaciones.models import Representacion
+
+    modulo = _script("extraer_datos_catalogo.py")
+    fechas = list(Representacion.objects.order_by("id").values_list("fecha", flat=True)[:MUESTRA_FECHAS])
+    return lambda: [modulo.parsear_fecha_espanola(fecha) for fecha in fechas], None
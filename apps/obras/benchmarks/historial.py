@@ -0,0 +1,73 @@
+"""
+Historial de ejecuciones de benchmark_rutas_criticas y comparación entre dos.
+
+El historial es un JSON con una lista de ejecuciones, de la más antigua a la
+más reciente:
+
+    {"ejecuciones": [
+        {"fecha": "2026-10-19T12:00:00+00:00", "etiqueta": "antes del índice",
+         "commit": "9b10300", "base_datos": "sqlite",
+         "escala": {"obras": 5000, "representaciones": 760, "semilla": 0},
+         "resultados": {"facetas": {"mediana_ms": 12.1, "p95_ms": 13.0,
+                                    "pico_kib": 88.2, "consultas": 6, "repeticiones": 5}, ...}},
+        ...
+    ]}
+
+Solo se comparan ejecuciones con la misma escala y base de datos: medir con
+otros datos no dice nada de la optimización.
+"""
+
+import json
+import os
+from pathlib import Path
+
+METRICAS = ("mediana_ms", "p95_ms", "pico_kib", "consultas")
+# El p95 de unas pocas pasadas es ruido: se muestra pero no decide si empeora
+METRICAS_DECISIVAS = ("mediana_ms", "pico_kib", "consultas")
+
+
+def cargar(ruta):
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return []
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f).get("ejecuciones", [])
+
+
+def guardar(ruta, ejecuciones):
+    """Escribe el historial completo (a un temporal y luego reemplaza)."""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(ruta.suffix + ".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"ejecuciones": ejecuciones}, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def comparables(una, otra):
+    return una["escala"] == otra["escala"] and una["base_datos"] == otra["base_datos"]
+
+
+def anterior_comparable(ejecuciones, ejecucion):
+    """Última ejecución del historial comparable con ``ejecucion`` (o None)."""
+    return next((e for e in reversed(ejecuciones) if e is not ejecucion and comparables(e, ejecucion)), None)
+
+
+def comparar(antes, despues, umbral):
+    """Filas (caso, métrica, antes, después, cambio %, empeora) de los casos medidos en ambas.
+
+    Una métrica de METRICAS_DECISIVAS empeora si sube más de ``umbral`` por
+    ciento (o si aparecen consultas donde no había).
+    """
+    filas = []
+    for caso, nuevo in despues["resultados"].items():
+        viejo = antes["resultados"].get(caso)
+        if viejo is None:
+            continue
+        for metrica in METRICAS:
+            a, d = viejo.get(metrica), nuevo.get(metrica)
+            if a is None or d is None:
+                continue
+            cambio = (d - a) / a * 100 if a else (0.0 if d == a else float("inf"))
+            filas.append((caso, metrica, a, d, cambio, metrica in METRICAS_DECISIVAS and cambio > umbral))
+    return filas
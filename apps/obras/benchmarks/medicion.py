@@ -0,0 +1,69 @@
+"""
+Medición de un caso: tiempos por pasada, pico de memoria y consultas.
+
+El tiempo se toma sin tracemalloc (lo ralentiza mucho); la memoria y las
+consultas salen de una pasada aparte, como en benchmark_exportacion. Las
+consultas se cuentan con un execute_wrapper: CaptureQueriesContext se queda
+en las 9.000 últimas y una importación hace muchas más.
+"""
+
+import gc
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+
+
+class _Contador:
+    def __init__(self):
+        self.consultas = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas += 1
+        return execute(sql, params, many, context)
+
+
+def percentil(valores, p):
+    """Percentil ``p`` (0-100) por rango más cercano: siempre un valor medido."""
+    ordenados = sorted(valores)
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """Mide ``funcion`` tras una pasada de calentamiento que no cuenta.
+
+    ``preparar`` (opcional) se llama antes de cada pasada, fuera del tiempo
+    medido (p. ej. para invalidar la caché).
+    """
+    def pasada():
+        if preparar:
+            preparar()
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        return time.perf_counter() - inicio
+
+    pasada()
+    tiempos = [pasada() for _ in range(repeticiones)]
+
+    if preparar:
+        preparar()
+    gc.collect()
+    contador = _Contador()
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper(contador):
+            funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "mediana_ms": round(statistics.median(tiempos) * 1000, 3),
+        "p95_ms": round(percentil(tiempos, 95) * 1000, 3),
+        "pico_kib": round(pico / 1024, 1),
+        "consultas": contador.consultas,
+        "repeticiones": repeticiones,
+    }
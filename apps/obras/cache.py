@@ -0,0 +1,160 @@
+"""
+Capa de caché propia del proyecto.
+
+Guarda resultados caros de calcular (payload de /api/datos-obras/, conteos de
+facetas, opciones de los desplegables, estadísticas) en el alias ``obras`` de
+``settings.CACHES``. El backend se elige con OBRAS_CACHE_BACKEND (lru, sqlite o
+redis); esta capa no depende de cuál sea.
+
+Invalidación por generación:
+    Todas las claves incluyen la "generación" actual del dataset. Cualquier
+    edición de Obra/Representacion/Autor/Lugar (ver signals.py) incrementa la
+    generación y, con ello, deja inaccesibles de golpe todas las entradas
+    anteriores. Con un backend compartido (sqlite/redis) todos los workers ven
+    la nueva generación en la siguiente petición.
+
+Uso:
+    from apps.obras.cache import obtener_o_calcular
+    stats = obtener_o_calcular("estadisticas", "catalogos", calcular_stats)
+"""
+
+import threading
+import time
+
+from django.core.cache import caches
+
+ALIAS = "obras"
+CLAVE_GENERACION = "obras:generacion"
+
+_AUSENTE = object()
+_lock = threading.Lock()
+_contadores = {}
+
+
+def _cache():
+    return caches[ALIAS]
+
+
+# ---------------------------------------------------------------------------
+# Generación del dataset
+# ---------------------------------------------------------------------------
+
+def generacion_actual():
+    """Devuelve la generación vigente, inicializándola si no existe.
+
+    Se inicializa con ``time.time_ns()`` para que, si la clave se pierde
+    (reinicio de Redis, purga del archivo SQLite), la nueva generación nunca
+    coincida con una antigua.
+    """
+    cache = _cache()
+    generacion = cache.get(CLAVE_GENERACION)
+    if generacion is None:
+        cache.add(CLAVE_GENERACION, time.time_ns(), timeout=None)
+        generacion = cache.get(CLAVE_GENERACION)
+        if generacion is None:
+            # Backend sin almacenamiento (DummyCache): cada lectura es una generación nueva.
+            generacion = time.time_ns()
+    return generacion
+
+
+def compartida():
+    """True si el backend lo ven todos los workers (sqlite/redis), no una caché del proceso."""
+    from django.core.cache.backends.dummy import DummyCache
+    from django.core.cache.backends.locmem import LocMemCache
+
+    return not isinstance(_cache(), (LocMemCache, DummyCache))
+
+
+def incrementar_generacion():
+    """Invalida todas las entradas cacheadas pasando a una generación nueva."""
+    cache = _cache()
+    try:
+        return cache.incr(CLAVE_GENERACION)
+    except ValueError:
+        generacion = time.time_ns()
+        cache.set(CLAVE_GENERACION, generacion, timeout=None)
+        return generacion
+
+
+# ---------------------------------------------------------------------------
+# Lectura con cálculo perezoso
+# ---------------------------------------------------------------------------
+
+def clave(espacio, clave_local, generacion=None):
+    if generacion is None:
+        generacion = generacion_actual()
+    return f"obras:{espacio}:{generacion}:{clave_local}"
+
+
+def obtener_o_calcular(espacio, clave_local, calcular, timeout=None):
+    """Devuelve el valor cacheado de ``espacio``/``clave_local`` o lo calcula.
+
+    ``calcular`` es un callable sin argumentos; su resultado se guarda bajo la
+    generación vigente en el momento de la lectura.
+    """
+    cache = _cache()
+    clave_completa = clave(espacio, clave_local)
+
+    inicio = time.perf_counter()
+    valor = cache.get(clave_completa, _AUSENTE)
+    latencia = time.perf_counter() - inicio
+
+    if valor is not _AUSENTE:
+        _registrar(espacio, acierto=True, latencia=latencia)
+        return valor
+
+    inicio_calculo = time.perf_counter()
+    valor = calcular()
+    calculo = time.perf_counter() - inicio_calculo
+    cache.set(clave_completa, valor, timeout=timeout)
+    _registrar(espacio, acierto=False, latencia=latencia, calculo=calculo)
+    return valor
+
+
+def invalidar(espacio, clave_local):
+    """Elimina una entrada concreta de la generación vigente."""
+    _cache().delete(clave(espacio, clave_local))
+
+
+# ---------------------------------------------------------------------------
+# Contadores (por proceso)
+# ---------------------------------------------------------------------------
+
+def _registrar(espacio, acierto, latencia, calculo=0.0):
+    with _lock:
+        c = _contadores.setdefault(espacio, {
+            "aciertos": 0,
+            "fallos": 0,
+            "latencia_total": 0.0,
+            "latencia_max": 0.0,
+            "calculo_total": 0.0,
+        })
+        if acierto:
+            c["aciertos"] += 1
+        else:
+            c["fallos"] += 1
+        c["latencia_total"] += latencia
+        c["latencia_max"] = max(c["latencia_max"], latencia)
+        c["calculo_total"] += calculo
+
+
+def estadisticas():
+    """Resumen de aciertos, fallos y latencias por espacio en este proceso."""
+    resumen = {}
+    with _lock:
+        for espacio, c in _contadores.items():
+            lecturas = c["aciertos"] + c["fallos"]
+            resumen[espacio] = {
+                "aciertos": c["aciertos"],
+                "fallos": c["fallos"],
+                "ratio_aciertos": round(c["aciertos"] / lecturas, 4) if lecturas else 0.0,
+                "latencia_media_ms": round(c["latencia_total"] / lecturas * 1000, 3) if lecturas else 0.0,
+                "latencia_max_ms": round(c["latencia_max"] * 1000, 3),
+                "calculo_medio_ms": round(c["calculo_total"] / c["fallos"] * 1000, 3) if c["fallos"] else 0.0,
+            }
+    return resumen
+
+
+def reiniciar_estadisticas():
+    with _lock:
+        _contadores.clear()
@@ -0,0 +1,179 @@
+"""
+Backend de caché Django sobre un archivo SQLite compartido.
+
+Pensado para despliegues de una sola máquina (Azure App Service con varios
+workers de gunicorn): todos los procesos leen y escriben el mismo archivo,
+así que una invalidación hecha por un worker la ven inmediatamente los demás,
+sin necesidad de Redis.
+
+Configuración (settings.CACHES):
+    "obras": {
+        "BACKEND": "apps.obras.cache_backends.SQLiteCache",
+        "LOCATION": "/home/cache_obras.sqlite3",
+        "OPTIONS": {"MAX_ENTRIES": 2000, "CULL_FREQUENCY": 3},
+    }
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """Caché persistente en SQLite (modo WAL) compartida entre procesos."""
+
+    tabla = "cache_obras"
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._ruta = location
+        self._local = threading.local()
+        self._escrituras = 0
+
+    # ------------------------------------------------------------------
+    # Conexión (una por hilo y por proceso: tras un fork se reabre)
+    # ------------------------------------------------------------------
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directorio = os.path.dirname(self._ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        conn = sqlite3.connect(self._ruta, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.tabla} ("
+            "clave TEXT PRIMARY KEY, valor BLOB NOT NULL, expira REAL)"
+        )
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _expiracion(self, timeout):
+        # BaseCache ya devuelve el instante absoluto de caducidad (o None).
+        return self.get_backend_timeout(timeout)
+
+    @staticmethod
+    def _vigente(expira):
+        return expira is None or expira > time.time()
+
+    # ------------------------------------------------------------------
+    # API de BaseCache
+    # ------------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        fila = self._conexion().execute(
+            f"SELECT valor, expira FROM {self.tabla} WHERE clave = ?", (key,)
+        ).fetchone()
+        if fila is None or not self._vigente(fila[1]):
+            return default
+        return pickle.loads(fila[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._escribir(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conn.execute(
+                f"SELECT expira FROM {self.tabla} WHERE clave = ?", (key,)
+            ).fetchone()
+            if fila is not None and self._vigente(fila[0]):
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.tabla} (clave, valor, expira) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expiracion(timeout)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conexion().execute(
+            f"UPDATE {self.tabla} SET expira = ? WHERE clave = ? AND (expira IS NULL OR expira > ?)",
+            (self._expiracion(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conexion().execute(f"DELETE FROM {self.tabla} WHERE clave = ?", (key,))
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        fila = self._conexion().execute(
+            f"SELECT expira FROM {self.tabla} WHERE clave = ?", (key,)
+        ).fetchone()
+        return fila is not None and self._vigente(fila[0])
+
+    def incr(self, key, delta=1, version=None):
+        """Incremento atómico entre procesos (transacción IMMEDIATE)."""
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._conexion()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conn.execute(
+                f"SELECT valor, expira FROM {self.tabla} WHERE clave = ?", (key,)
+            ).fetchone()
+            if fila is None or not self._vigente(fila[1]):
+                raise ValueError(f"Key '{key}' not found")
+            nuevo = pickle.loads(fila[0]) + delta
+            conn.execute(
+                f"UPDATE {self.tabla} SET valor = ? WHERE clave = ?",
+                (pickle.dumps(nuevo, pickle.HIGHEST_PROTOCOL), key),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return nuevo
+
+    def clear(self):
+        self._conexion().execute(f"DELETE FROM {self.tabla}")
+
+    def close(self, **kwargs):
+        # Las conexiones se reutilizan entre peticiones (una por hilo).
+        pass
+
+    # ------------------------------------------------------------------
+    # Escritura y limpieza
+    # ------------------------------------------------------------------
+
+    def _escribir(self, key, value, timeout):
+        self._conexion().execute(
+            f"INSERT OR REPLACE INTO {self.tabla} (clave, valor, expira) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expiracion(timeout)),
+        )
+        self._escrituras += 1
+        if self._escrituras % 50 == 0:
+            self._purgar()
+
+    def _purgar(self):
+        """Elimina entradas caducadas y, si se supera MAX_ENTRIES, las más antiguas."""
+        conn = self._conexion()
+        conn.execute(f"DELETE FROM {self.tabla} WHERE expira IS NOT NULL AND expira <= ?", (time.time(),))
+        total = conn.execute(f"SELECT COUNT(*) FROM {self.tabla}").fetchone()[0]
+        if total > self._max_entries:
+            sobrantes = total // self._cull_frequency if self._cull_frequency else total
+            conn.execute(
+                f"DELETE FROM {self.tabla} WHERE rowid IN "
+                f"(SELECT rowid FROM {self.tabla} ORDER BY rowid LIMIT ?)",
+                (sobrantes,),
+            )
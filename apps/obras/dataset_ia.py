@@ -0,0 +1,336 @@
+"""
+Dataset JSONL por shards para análisis offline con IA.
+
+La exportación con ``etiqueta_ia`` (exportar_comentarios.py) da un TXT para
+leer; los análisis de FUENTES IX (``*_analisis_ia.json``,
+``_sintesis_validacion.json``) se generan aparte. Esto escribe en un
+directorio obras, representaciones, fragmentos de páginas del PDF y
+comentarios etiquetados como JSONL (un registro por línea), en shards que no
+pasan de un presupuesto aproximado de tokens:
+
+    manifest.json
+    obra-0000-000.jsonl           {"tipo": "obra", "id": 1, "titulo": ..., "autor": ...}
+    representacion-0000-000.jsonl {"tipo": "representacion", "id": 7, "obra_id": 1, ...}
+    pagina-0000-000.jsonl         {"tipo": "pagina", "id": "12-0", "pagina": 12, "fragmento": 0, "texto": ...}
+    comentario-0000-000.jsonl     {"tipo": "comentario", "id": 3, "obras": [...], ...}
+
+Cada tipo se recorre por id y se divide en bloques de ``registros_por_bloque``
+ids; cada bloque lo escribe un proceso (``<tipo>-<bloque>-<parte>.jsonl``) con
+``.iterator()`` por lotes, sin cargar el tipo entero. Los límites de los
+bloques dependen solo de los ids, así que dos exportaciones de los mismos
+datos dan los mismos archivos byte a byte; el manifest no lleva fecha, sino
+el cursor de CambioDataset (delta.py) leído al empezar.
+
+Los tokens se estiman como ``len(texto) / CARACTERES_POR_TOKEN``. Un registro
+que por sí solo supera el presupuesto va en un shard propio; el texto de las
+páginas se parte antes en fragmentos de TOKENS_POR_FRAGMENTO.
+
+    python manage.py exportar_dataset_ia --salida /tmp/dataset --tokens-por-shard 50000
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+TIPOS = ("obra", "representacion", "pagina", "comentario")
+VERSION_MANIFEST = 1
+CARACTERES_POR_TOKEN = 4
+TOKENS_POR_SHARD = 100_000
+TOKENS_POR_FRAGMENTO = 1_000
+REGISTROS_POR_BLOQUE = 2_000
+TAMANO_LOTE = 500
+
+# Los índices se rellenan a 4 y 3 cifras, pero pueden pasar de ahí (un bloque
+# con mil partes o más): el patrón no limita las cifras
+PATRON_SHARD = re.compile(r"^(%s)-\d{4,}-\d{3,}\.jsonl$" % "|".join(TIPOS))
+
+
+def estimar_tokens(texto):
+    return -(-len(texto) // CARACTERES_POR_TOKEN)
+
+
+# ---------------------------------------------------------------------------
+# Registros por tipo
+# ---------------------------------------------------------------------------
+
+def _obras(fuente):
+    from .models import Obra
+
+    obras = Obra.objects.select_related("autor")
+    return obras.filter(fuente_principal=fuente) if fuente else obras
+
+
+def _registros_obra(obra):
+    yield {
+        "tipo": "obra",
+        "id": obra.id,
+        "titulo": obra.titulo_limpio or obra.titulo,
+        "titulo_alternativo": obra.titulo_alternativo or None,
+        "autor": obra.autor.nombre if obra.autor else None,
+        "tipo_obra": obra.tipo_obra or None,
+        "genero": obra.genero or None,
+        "subgenero": obra.subgenero or None,
+        "tema": obra.tema or None,
+        "fuente": obra.fuente_principal or None,
+        "fecha_creacion": obra.fecha_creacion_estimada or None,
+        "mecenas": obra.mecenas or None,
+        "compositor": obra.compositor or None,
+        "representaciones": {
+            "total": obra.representaciones_total,
+            "primera": obra.representaciones_primera,
+            "ultima": obra.representaciones_ultima,
+            "lugares": obra.representaciones_lugares,
+        },
+        "pagina_pdf": obra.pagina_pdf,
+        "texto_pdf": obra.texto_original_pdf or None,
+        "notas": obra.notas or None,
+        "observaciones": obra.observaciones or None,
+    }
+
+
+def _representaciones(fuente):
+    from apps.representaciones.models import Representacion
+
+    representaciones = Representacion.objects.select_related("lugar")
+    return representaciones.filter(obra__fuente_principal=fuente) if fuente else representaciones
+
+
+def _registros_representacion(rep):
+    yield {
+        "tipo": "representacion",
+        "id": rep.id,
+        "obra_id": rep.obra_id,
+        "fecha": rep.fecha or None,
+        "fecha_formateada": rep.fecha_formateada.isoformat() if rep.fecha_formateada else None,
+        "compania": rep.compañia or None,
+        "lugar": rep.lugar.nombre if rep.lugar else None,
+        "tipo_lugar": rep.tipo_lugar or None,
+        "tipo_funcion": rep.tipo_funcion or None,
+        "mecenas": rep.mecenas or None,
+        "fuente": rep.fuente or None,
+        "pagina_pdf": rep.pagina_pdf,
+        "texto_pdf": rep.texto_original_pdf or None,
+        "observaciones": rep.observaciones or None,
+    }
+
+
+def _paginas(fuente):
+    from .models import PaginaPDF
+
+    # Las páginas son del PDF de FUENTES IX: no se filtran por catálogo
+    return PaginaPDF.objects.exclude(texto_extraido="").only("id", "numero_pagina", "texto_extraido", "part_file")
+
+
+def fragmentos(texto, tokens=TOKENS_POR_FRAGMENTO):
+    """Parte ``texto`` por párrafos en trozos de como mucho ``tokens`` tokens estimados."""
+    maximo = tokens * CARACTERES_POR_TOKEN
+    actual = ""
+    for parrafo in re.split(r"\n\s*\n", texto.strip()):
+        parrafo = parrafo.strip()
+        while len(parrafo) > maximo:
+            if actual:
+                yield actual
+                actual = ""
+            yield parrafo[:maximo]
+            parrafo = parrafo[maximo:]
+        if not parrafo:
+            continue
+        if actual and len(actual) + 2 + len(parrafo) > maximo:
+            yield actual
+            actual = ""
+        actual = f"{actual}\n\n{parrafo}" if actual else parrafo
+    if actual:
+        yield actual
+
+
+def _registros_pagina(pagina):
+    for i, texto in enumerate(fragmentos(pagina.texto_extraido)):
+        yield {
+            "tipo": "pagina",
+            "id": f"{pagina.numero_pagina}-{i}",
+            "pagina": pagina.numero_pagina,
+            "fragmento": i,
+            "archivo": pagina.part_file or None,
+            "texto": texto,
+        }
+
+
+def _comentarios(fuente):
+    from .exportar_comentarios import comentarios_para_exportar
+    from .models import ComentarioUsuario
+
+    comentarios = ComentarioUsuario.objects.filter(etiqueta_ia=True)
+    if fuente:
+        # Un comentario entra si comenta alguna obra del catálogo (una sola vez)
+        comentarios = comentarios.filter(obras_seleccionadas__fuente_principal=fuente).distinct()
+    return comentarios_para_exportar(comentarios)
+
+
+def _registros_comentario(comentario):
+    from .exportar_comentarios import datos_comentario
+
+    yield {"tipo": "comentario", **datos_comentario(comentario)}
+
+
+FUENTES = {
+    "obra": (_obras, _registros_obra),
+    "representacion": (_representaciones, _registros_representacion),
+    "pagina": (_paginas, _registros_pagina),
+    "comentario": (_comentarios, _registros_comentario),
+}
+
+
+# ---------------------------------------------------------------------------
+# Bloques y shards
+# ---------------------------------------------------------------------------
+
+def planificar_bloques(tipos=TIPOS, fuente=None, registros_por_bloque=REGISTROS_POR_BLOQUE):
+    """Lista de bloques ``(tipo, indice, primer_id, ultimo_id)`` en orden de exportación."""
+    bloques = []
+    for tipo in tipos:
+        consulta = FUENTES[tipo][0]
+        ids = list(consulta(fuente).order_by("pk").values_list("pk", flat=True))
+        for indice, inicio in enumerate(range(0, len(ids), registros_por_bloque)):
+            tramo = ids[inicio:inicio + registros_por_bloque]
+            bloques.append((tipo, indice, tramo[0], tramo[-1]))
+    return bloques
+
+
+def _linea(registro):
+    return json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class _Shard:
+    def __init__(self, directorio, tipo, indice, parte):
+        self.archivo = f"{tipo}-{indice:04d}-{parte:03d}.jsonl"
+        self._f = open(Path(directorio) / self.archivo, "w", encoding="utf-8", newline="\n")
+        self._hash = hashlib.sha256()
+        self.tipo = tipo
+        self.registros = self.tokens = self.bytes = 0
+        self.primer_id = self.ultimo_id = None
+
+    def escribir(self, registro, linea, tokens):
+        datos = linea.encode("utf-8")
+        self._f.write(linea)
+        self._hash.update(datos)
+        self.registros += 1
+        self.tokens += tokens
+        self.bytes += len(datos)
+        if self.primer_id is None:
+            self.primer_id = registro["id"]
+        self.ultimo_id = registro["id"]
+
+    def cerrar(self):
+        self._f.close()
+        return {
+            "archivo": self.archivo,
+            "tipo": self.tipo,
+            "registros": self.registros,
+            "tokens": self.tokens,
+            "bytes": self.bytes,
+            "sha256": self._hash.hexdigest(),
+            "primer_id": self.primer_id,
+            "ultimo_id": self.ultimo_id,
+        }
+
+
+def escribir_bloque(directorio, bloque, fuente=None, tokens_por_shard=TOKENS_POR_SHARD):
+    """Escribe los shards de un bloque y devuelve sus entradas del manifest."""
+    from django.db import connection
+
+    tipo, indice, primer_id, ultimo_id = bloque
+    consulta, registros = FUENTES[tipo]
+    objetos = consulta(fuente).filter(pk__gte=primer_id, pk__lte=ultimo_id).order_by("pk")
+    shards = []
+    shard = None
+    try:
+        for objeto in objetos.iterator(chunk_size=TAMANO_LOTE):
+            for registro in registros(objeto):
+                linea = _linea(registro)
+                tokens = estimar_tokens(linea)
+                if shard is None or (shard.registros and shard.tokens + tokens > tokens_por_shard):
+                    if shard is not None:
+                        shards.append(shard.cerrar())
+                    shard = _Shard(directorio, tipo, indice, len(shards))
+                shard.escribir(registro, linea, tokens)
+        if shard is not None:
+            shards.append(shard.cerrar())
+            shard = None
+    finally:
+        if shard is not None:
+            shard.cerrar()
+        if multiprocessing.parent_process() is not None:
+            connection.close()
+    return shards
+
+
+def _iniciar_proceso():
+    # Con "spawn" el proceso hijo arranca sin Django configurado
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "teatro_espanol.settings")
+        django.setup()
+
+
+def _escribir_bloque(argumentos):
+    return escribir_bloque(*argumentos)
+
+
+def exportar_dataset(directorio, tipos=TIPOS, fuente=None, tokens_por_shard=TOKENS_POR_SHARD,
+                     registros_por_bloque=REGISTROS_POR_BLOQUE, procesos=1):
+    """Escribe shards y manifest.json en ``directorio``; devuelve el manifest.
+
+    Borra antes los shards de una exportación anterior en el mismo directorio.
+    """
+    from django.db import connections
+
+    from .delta import cursor_actual
+
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    for ruta in directorio.iterdir():
+        if PATRON_SHARD.match(ruta.name):
+            ruta.unlink()
+
+    cambio = cursor_actual()
+    bloques = planificar_bloques(tipos, fuente, registros_por_bloque)
+    argumentos = [(str(directorio), bloque, fuente, tokens_por_shard) for bloque in bloques]
+    if procesos > 1 and len(bloques) > 1:
+        # Los hijos abren sus propias conexiones: no deben heredar las del padre
+        connections.close_all()
+        metodos = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context("fork" if "fork" in metodos else "spawn")
+        with ProcessPoolExecutor(max_workers=min(procesos, len(bloques)), mp_context=contexto,
+                                 initializer=_iniciar_proceso) as pool:
+            resultados = list(pool.map(_escribir_bloque, argumentos))
+    else:
+        resultados = [_escribir_bloque(a) for a in argumentos]
+
+    shards = [shard for resultado in resultados for shard in resultado]
+    manifest = {
+        "version": VERSION_MANIFEST,
+        "cambio": cambio,
+        "fuente": fuente,
+        "tokens_por_shard": tokens_por_shard,
+        "caracteres_por_token": CARACTERES_POR_TOKEN,
+        "registros_por_bloque": registros_por_bloque,
+        "totales": {
+            tipo: {
+                "registros": sum(s["registros"] for s in shards if s["tipo"] == tipo),
+                "tokens": sum(s["tokens"] for s in shards if s["tipo"] == tipo),
+                "shards": sum(1 for s in shards if s["tipo"] == tipo),
+            }
+            for tipo in tipos
+        },
+        "shards": shards,
+    }
+    with open(directorio / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return manifest
@@ -0,0 +1,125 @@
+"""
+Registro de cambios del dataset y consultas de delta para /api/datos-obras/delta/.
+
+Las señales (signals.py) anotan en CambioDataset el id de cada obra dada de
+alta, editada o borrada, incluidas las que cambian solo por una
+representación, su autor o un lugar. Las anotaciones de una transacción se
+acumulan y se escriben de una vez al confirmarla; si se deshace, no queda
+rastro.
+
+Protocolo para un cliente con copia local (p. ej. IndexedDB):
+    1. Descarga /api/datos-obras/ y guarda ``metadata.cambio`` como cursor.
+    2. Más tarde pide /api/datos-obras/delta/?desde=<cursor>, sustituye las
+       ``obras`` recibidas, borra las ``eliminadas`` y guarda ``hasta``.
+    3. Si la respuesta trae ``reiniciar: true`` vuelve al paso 1.
+
+El registro se poda con ``podar_registro`` (tarea "reindexar"); un cursor
+anterior a lo conservado obliga a reiniciar.
+
+Confirmaciones tardías:
+    En PostgreSQL o MySQL el id se asigna al insertar, no al confirmar: una
+    transacción con un id menor puede confirmarse después de que un cliente
+    haya leído uno mayor como ``hasta``. Por eso ``cambios_desde`` vuelve a
+    mirar las anotaciones creadas hasta MARGEN_CONFIRMACION antes que la del
+    cursor (``inicio_con_margen``). El cliente puede recibir de nuevo alguna
+    obra ya actualizada (inocuo); no pierde ninguna mientras ninguna
+    transacción tarde más que el margen en confirmarse.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Subquery
+from django.utils import timezone
+
+from .models import CambioDataset
+
+
+class _LoteCambios:
+    """Cambios pendientes de la transacción en curso; se escriben al confirmar."""
+
+    def __init__(self):
+        self.cambios = {}
+
+    def __call__(self):
+        CambioDataset.objects.bulk_create(
+            CambioDataset(obra_id=obra_id, tipo=tipo) for obra_id, tipo in self.cambios.items()
+        )
+
+
+def registrar_cambios(obra_ids, tipo="actualizada"):
+    """Anota obras cambiadas; una sola fila por obra y transacción."""
+    obra_ids = [obra_id for obra_id in obra_ids if obra_id is not None]
+    if not obra_ids:
+        return
+    conexion = transaction.get_connection()
+    lote = next((e[1] for e in conexion.run_on_commit if isinstance(e[1], _LoteCambios)), None)
+    nuevo = lote is None
+    if nuevo:
+        lote = _LoteCambios()
+    for obra_id in obra_ids:
+        lote.cambios[obra_id] = tipo
+    if nuevo:
+        # Fuera de una transacción on_commit ejecuta el lote en el acto
+        transaction.on_commit(lote)
+
+
+MARGEN_CONFIRMACION = timedelta(minutes=5)
+
+
+def inicio_con_margen(consulta, desde):
+    """Id a partir del cual (excluido) releer ``consulta`` para no perder confirmaciones tardías.
+
+    ``consulta`` es un queryset con campo ``fecha``; el margen se cuenta desde
+    la fecha de la última fila con id <= ``desde``.
+    """
+    if desde <= 0:
+        return desde
+    # Una sola consulta: sin filas <= desde la subconsulta es NULL y no hay mínimo
+    fecha = Subquery(consulta.filter(id__lte=desde).order_by("-id").values("fecha")[:1])
+    primero = consulta.filter(id__lte=desde, fecha__gt=fecha - MARGEN_CONFIRMACION).aggregate(m=Min("id"))["m"]
+    return desde if primero is None else primero - 1
+
+
+def cursor_actual():
+    return CambioDataset.objects.aggregate(m=Max("id"))["m"] or 0
+
+
+@dataclass
+class Delta:
+    hasta: int
+    obra_ids: set = field(default_factory=set)
+    reiniciar: bool = False
+
+
+def cambios_desde(desde=None, desde_fecha=None):
+    """Obras con alguna anotación posterior al cursor ``desde`` o a ``desde_fecha``."""
+    rango = CambioDataset.objects.aggregate(primero=Min("id"), ultimo=Max("id"))
+    hasta = rango["ultimo"] or 0
+
+    if desde is not None:
+        # Cursor de otra base de datos, o anterior a lo que se ha podado
+        if desde > hasta or (rango["primero"] and desde < rango["primero"] - 1):
+            return Delta(hasta=hasta, reiniciar=True)
+        desde = inicio_con_margen(CambioDataset.objects.all(), desde)
+        cambios = CambioDataset.objects.filter(id__gt=desde, id__lte=hasta)
+    else:
+        if desde_fecha < timezone.now() - timedelta(days=dias_retencion()):
+            return Delta(hasta=hasta, reiniciar=True)
+        cambios = CambioDataset.objects.filter(fecha__gt=desde_fecha - MARGEN_CONFIRMACION, id__lte=hasta)
+
+    return Delta(hasta=hasta, obra_ids=set(cambios.values_list("obra_id", flat=True)))
+
+
+def dias_retencion():
+    return getattr(settings, "OBRAS_DELTA_DIAS_RETENCION", 30)
+
+
+def podar_registro():
+    """Borra anotaciones más antiguas que la retención (siempre conserva la última)."""
+    limite = timezone.now() - timedelta(days=dias_retencion())
+    ultimo = cursor_actual()
+    borradas, _ = CambioDataset.objects.filter(fecha__lt=limite, id__lt=ultimo).delete()
+    return borradas
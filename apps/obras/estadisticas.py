@@ -0,0 +1,104 @@
+"""
+Contadores de cabecera de las páginas de catálogo.
+
+catalogos_view, editor_view, catalogo_view, editor_catalogo_view y
+busqueda_avanzada_view muestran totales por fuente, con/sin música, etc.
+Aquí se calculan todos en una sola consulta de agregación condicional
+(``Count("id", filter=Q(...))``) y se guardan en la caché ``obras`` con la
+generación del dataset, así que tras la primera visita cuestan cero consultas
+hasta la siguiente edición.
+
+    from apps.obras.estadisticas import estadisticas_catalogo
+    stats = estadisticas_catalogo()   # {"total": ..., "fuentesxi": ..., ...}
+"""
+
+import hashlib
+import json
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .cache import obtener_o_calcular
+
+ESPACIO = "estadisticas"
+
+# Nombre del contador -> condición sobre Obra (None = todas)
+CONTADORES = {
+    "total": None,
+    "fuentesxi": Q(fuente_principal="FUENTESXI"),
+    "catcom": Q(fuente_principal="CATCOM"),
+    "ambas": Q(fuente_principal__in=["FUENTESXI", "CATCOM"]),
+    "con_musica": Q(musica_conservada=True),
+    "sin_musica": Q(musica_conservada=False),
+    "con_mecenas": ~Q(mecenas=""),
+    "con_compositor": ~Q(compositor=""),
+}
+
+
+def contar(obras, nombres=None):
+    """Contadores de CONTADORES (o solo ``nombres``) sobre ``obras``, en una consulta."""
+    nombres = list(CONTADORES) if nombres is None else nombres
+    return obras.order_by().aggregate(**{
+        nombre: Count("id", filter=CONTADORES[nombre]) if CONTADORES[nombre] is not None else Count("id")
+        for nombre in nombres
+    })
+
+
+def estadisticas_catalogo():
+    """Contadores de todo el catálogo (cacheados por generación)."""
+    from .models import Obra
+
+    return obtener_o_calcular(ESPACIO, "catalogo", lambda: contar(Obra.objects.all()))
+
+
+def estadisticas_fuente(fuente):
+    """Cabecera del editor de un catálogo (FUENTESXI o CATCOM), en una consulta."""
+    from .models import Obra
+
+    def calcular():
+        obras = Obra.objects.filter(fuente_principal=fuente).order_by()
+        return obras.aggregate(
+            total_obras=Count("id"),
+            total_representaciones=Coalesce(Sum("representaciones_total"), 0),
+            autores_unicos=Count("autor", distinct=True),
+            tipos_obra=Count("tipo_obra", distinct=True),
+            con_musica=Count("id", filter=CONTADORES["con_musica"]),
+            sin_musica=Count("id", filter=CONTADORES["sin_musica"]),
+        )
+
+    return obtener_o_calcular(ESPACIO, f"fuente-{fuente}", calcular)
+
+
+def conteos_secciones(fuente):
+    """Totales de cada sección del editor (los del menú lateral), cacheados por generación.
+
+    Coinciden con el ``total`` de la primera página de get_section_data_ajax:
+    autores y lugares son globales, representaciones y bibliografía del catálogo.
+    """
+    from apps.autores.models import Autor
+    from apps.bibliografia.models import ReferenciaBibliografica
+    from apps.lugares.models import Lugar
+    from apps.representaciones.models import Representacion
+
+    from .models import Obra
+
+    def calcular():
+        return {
+            "obras": Obra.objects.filter(fuente_principal=fuente).count(),
+            "autores": Autor.objects.count(),
+            "lugares": Lugar.objects.count(),
+            "representaciones": Representacion.objects.filter(obra__fuente_principal=fuente).count(),
+            "bibliografia": ReferenciaBibliografica.objects.filter(obra__fuente_principal=fuente).count(),
+        }
+
+    return obtener_o_calcular(ESPACIO, f"secciones-{fuente}", calcular)
+
+
+def estadisticas_busqueda(obras, parametros):
+    """Contadores de una búsqueda filtrada; ``parametros`` identifican la búsqueda en la caché."""
+    clave = hashlib.sha1(json.dumps(parametros, sort_keys=True).encode("utf-8")).hexdigest()
+    return obtener_o_calcular(
+        ESPACIO,
+        f"busqueda-{clave}",
+        lambda: contar(obras, ["total", "con_musica", "con_mecenas", "con_compositor"]),
+    )
@@ -0,0 +1,197 @@
+"""
+Notificaciones en vivo (server-sent events) para el index.
+
+Cada pestaña de admin consultaba /obras/comentarios-index/count-unseen/ cada
+dos minutos, y cada consulta era un COUNT(*) sobre ComentarioUsuario. Ahora
+el navegador abre /obras/eventos/ (EventSource) y el servidor empuja:
+
+    no_vistos             {"no_vistos"}                               (al conectar, staff)
+    comentario_creado     {"comentario_id", "no_vistos"}
+    comentario_visto      {"comentario_id", "no_vistos"}
+    comentario_pendiente  {"comentario_id", "no_vistos"}             (se desmarca el visto)
+    comentario_borrado    {"comentario_id", "no_vistos"}
+    propuesta_creada      {"propuesta_id", "obra_id", "campo"}        (solo staff)
+    propuesta_resuelta    {"propuesta_id", "obra_id", "estado"}       (solo staff)
+
+``no_vistos`` solo se envía al staff y solo cuando el contador cambia.
+
+Reparto:
+    - Las señales de ComentarioUsuario y PropuestaCambioObra (signals.py)
+      llaman a ``publicar`` al confirmarse la transacción.
+    - Sin OBRAS_EVENTOS_REDIS_URL, ``publicar`` entrega el evento a las
+      conexiones abiertas en el propio proceso.
+    - Con OBRAS_EVENTOS_REDIS_URL, el evento se publica en el canal CANAL y
+      un hilo por proceso lo reenvía a sus conexiones: con varios workers,
+      todos reciben todos los eventos.
+
+Contador de no vistos:
+    Con un backend compartido (sqlite/redis) se guarda en la caché ``obras``
+    y cada alta, visto o borrado lo ajusta con incr/decr; solo se cuenta en la
+    tabla cuando la clave no existe. La clave caduca a los
+    CADUCIDAD_NO_VISTOS segundos del COUNT (incr no renueva la caducidad): un
+    ``update()`` masivo o un fallo entre el commit y el on_commit desvían el
+    contador como mucho ese tiempo. Con el backend ``lru`` cada worker solo
+    vería sus propios ajustes y el contador se desviaría para siempre, así
+    que se hace el COUNT en cada lectura.
+
+El endpoint necesita un servidor ASGI (views_eventos.py).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import ALIAS, compartida
+
+logger = logging.getLogger(__name__)
+
+CANAL = "obras:eventos"
+CLAVE_NO_VISTOS = "obras:comentarios:no_vistos"
+# Segundos hasta volver a contar los no vistos en la tabla
+CADUCIDAD_NO_VISTOS = 300
+# Eventos en cola por conexión; un cliente que no lee pierde los más nuevos
+MAX_PENDIENTES = 100
+
+
+# ---------------------------------------------------------------------------
+# Conexiones del proceso
+# ---------------------------------------------------------------------------
+
+def _encolar(cola, evento):
+    try:
+        cola.put_nowait(evento)
+    except asyncio.QueueFull:
+        pass
+
+
+class Hub:
+    """Conexiones SSE abiertas en este proceso: una asyncio.Queue por conexión."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscriptores = {}
+
+    def suscribir(self, es_staff):
+        """Cola que recibirá los eventos; llamar desde el bucle de la conexión."""
+        cola = asyncio.Queue(maxsize=MAX_PENDIENTES)
+        with self._lock:
+            self._suscriptores[cola] = (asyncio.get_running_loop(), es_staff)
+        return cola
+
+    def cancelar(self, cola):
+        with self._lock:
+            self._suscriptores.pop(cola, None)
+
+    def __len__(self):
+        return len(self._suscriptores)
+
+    def entregar(self, evento):
+        """Reparte ``evento`` a las colas; se puede llamar desde cualquier hilo."""
+        with self._lock:
+            suscriptores = list(self._suscriptores.items())
+        for cola, (loop, es_staff) in suscriptores:
+            if evento.get("solo_staff") and not es_staff:
+                continue
+            try:
+                loop.call_soon_threadsafe(_encolar, cola, evento)
+            except RuntimeError:
+                # Bucle cerrado: la conexión ya no existe
+                self.cancelar(cola)
+
+
+hub = Hub()
+
+
+# ---------------------------------------------------------------------------
+# Publicación (en proceso o por Redis)
+# ---------------------------------------------------------------------------
+
+_redis = None
+_escucha = None
+_escucha_lock = threading.Lock()
+
+
+def _cliente_redis():
+    global _redis
+    if _redis is None:
+        import redis  # dependencia opcional (requirements.txt), solo con OBRAS_EVENTOS_REDIS_URL
+
+        _redis = redis.Redis.from_url(settings.OBRAS_EVENTOS_REDIS_URL)
+    return _redis
+
+
+def _escuchar_redis():
+    while True:
+        try:
+            pubsub = _cliente_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CANAL)
+            for mensaje in pubsub.listen():
+                hub.entregar(json.loads(mensaje["data"]))
+        except Exception:
+            logger.exception("Escucha de eventos en Redis interrumpida; reintentando")
+            time.sleep(5)
+
+
+def iniciar_escucha():
+    """Arranca (una vez por proceso) el hilo que reenvía los eventos de Redis al hub."""
+    global _escucha
+    if not settings.OBRAS_EVENTOS_REDIS_URL:
+        return
+    with _escucha_lock:
+        if _escucha is None:
+            _escucha = threading.Thread(target=_escuchar_redis, name="obras-eventos", daemon=True)
+            _escucha.start()
+
+
+def publicar(tipo, datos, solo_staff=False):
+    """Envía un evento a todas las conexiones (de este proceso o, con Redis, de todos)."""
+    evento = {"tipo": tipo, "datos": datos, "solo_staff": solo_staff}
+    if settings.OBRAS_EVENTOS_REDIS_URL:
+        try:
+            _cliente_redis().publish(CANAL, json.dumps(evento))
+            return
+        except Exception:
+            logger.exception("No se pudo publicar el evento %s en Redis", tipo)
+    hub.entregar(evento)
+
+
+def formatear(evento, es_staff):
+    """Texto SSE de ``evento`` para una conexión (sin ``no_vistos`` si no es staff)."""
+    datos = dict(evento["datos"])
+    if not es_staff:
+        datos.pop("no_vistos", None)
+    return f"event: {evento['tipo']}\ndata: {json.dumps(datos)}\n\n"
+
+
+# ---------------------------------------------------------------------------
+# Contador de comentarios no vistos
+# ---------------------------------------------------------------------------
+
+def no_vistos():
+    """Comentarios con visto_por_admin=False (de la caché compartida; COUNT si falta la clave)."""
+    from .models import ComentarioUsuario
+
+    if not compartida():
+        return ComentarioUsuario.objects.filter(visto_por_admin=False).count()
+    cache = caches[ALIAS]
+    valor = cache.get(CLAVE_NO_VISTOS)
+    if valor is None:
+        valor = ComentarioUsuario.objects.filter(visto_por_admin=False).count()
+        cache.add(CLAVE_NO_VISTOS, valor, timeout=CADUCIDAD_NO_VISTOS)
+    return valor
+
+
+def ajustar_no_vistos(delta):
+    """Suma ``delta`` al contador y devuelve el valor nuevo. Llamar tras confirmar el cambio."""
+    if not compartida():
+        return no_vistos()
+    try:
+        return caches[ALIAS].incr(CLAVE_NO_VISTOS, delta)
+    except ValueError:
+        # Sin clave: el recuento de la tabla ya incluye el cambio
+        return no_vistos()
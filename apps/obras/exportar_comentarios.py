@@ -0,0 +1,111 @@
+"""
+Exportación de comentarios en streaming (TXT para lectura, JSONL para máquinas).
+
+exportar_comentarios_ia y exportar_todos_comentarios construían el archivo
+entero en memoria con ``contenido += ...`` y cada ``exportar_para_ia`` volvía a
+contar las obras. Aquí la respuesta es un StreamingHttpResponse que recorre
+los comentarios con ``.iterator(chunk_size=TAMANO_LOTE)``: por cada lote, una
+consulta de comentarios (con usuario) y una de sus obras (con autor), y el
+texto sale en trozos de unos TAMANO_TROZO caracteres.
+
+    comentarios = comentarios_para_exportar(ComentarioUsuario.objects.filter(...))
+    return respuesta_exportacion(comentarios, ["EXPORTACIÓN ..."], "comentarios_ia_todos", formato)
+
+``formato`` es "txt" (el de siempre) o "jsonl": una línea JSON por comentario.
+
+``python manage.py benchmark_exportacion --crear 50000`` compara ambas formas.
+"""
+
+import json
+from datetime import datetime
+
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+
+TAMANO_LOTE = 500
+# Caracteres acumulados antes de entregar un trozo al servidor
+TAMANO_TROZO = 64 * 1024
+FORMATOS = ("txt", "jsonl")
+
+
+def comentarios_para_exportar(queryset):
+    """``queryset`` ordenado, con usuario y obras (solo los campos exportados, con autor)."""
+    from .models import Obra
+
+    obras = Obra.objects.select_related("autor").only(
+        "id", "titulo", "titulo_limpio", "tipo_obra", "genero", "fecha_creacion_estimada", "autor__nombre",
+    ).order_by("id")
+    return (
+        queryset.select_related("usuario")
+        .prefetch_related(Prefetch("obras_seleccionadas", queryset=obras))
+        .order_by("-fecha_creacion", "-id")
+    )
+
+
+def datos_comentario(comentario):
+    """Línea JSONL de un comentario (con sus obras prefetchadas)."""
+    usuario = comentario.usuario
+    return {
+        "id": comentario.id,
+        "titulo": comentario.titulo,
+        "usuario": usuario.get_full_name() or usuario.username,
+        "catalogo": comentario.catalogo,
+        "fecha": comentario.fecha_creacion.isoformat(),
+        "tipo": comentario.tipo,
+        "es_publico": comentario.es_publico,
+        "etiqueta_ia": comentario.etiqueta_ia,
+        "comentario": comentario.comentario,
+        "obras": [
+            {
+                "id": obra.id,
+                "titulo": obra.titulo_limpio or obra.titulo,
+                "autor": obra.autor.nombre if obra.autor else None,
+                "tipo_obra": obra.tipo_obra or None,
+                "genero": obra.genero or None,
+                "fecha": obra.fecha_creacion_estimada or None,
+            }
+            for obra in comentario.obras_seleccionadas.all()
+        ],
+    }
+
+
+def _agrupar(textos):
+    """Junta textos pequeños en trozos de ~TAMANO_TROZO caracteres."""
+    buffer, tamano = [], 0
+    for texto in textos:
+        buffer.append(texto)
+        tamano += len(texto)
+        if tamano >= TAMANO_TROZO:
+            yield "".join(buffer)
+            buffer, tamano = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def flujo_txt(comentarios, cabecera):
+    """Trozos del TXT: ``cabecera`` (líneas) y el bloque exportar_para_ia de cada comentario."""
+    yield "".join(f"{linea}\n" for linea in cabecera) + "=" * 70 + "\n\n"
+    yield from _agrupar(c.exportar_para_ia() for c in comentarios.iterator(chunk_size=TAMANO_LOTE))
+
+
+def flujo_jsonl(comentarios):
+    """Trozos del JSONL: una línea por comentario."""
+    yield from _agrupar(
+        json.dumps(datos_comentario(c), ensure_ascii=False) + "\n"
+        for c in comentarios.iterator(chunk_size=TAMANO_LOTE)
+    )
+
+
+def respuesta_exportacion(comentarios, cabecera, nombre, formato="txt"):
+    """StreamingHttpResponse descargable ``<nombre>_<timestamp>.<formato>``.
+
+    ``cabecera`` son las líneas iniciales del TXT (el JSONL no lleva cabecera).
+    """
+    if formato == "jsonl":
+        response = StreamingHttpResponse(flujo_jsonl(comentarios), content_type="application/x-ndjson; charset=utf-8")
+    else:
+        formato = "txt"
+        response = StreamingHttpResponse(flujo_txt(comentarios, cabecera), content_type="text/plain; charset=utf-8")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    response["Content-Disposition"] = f'attachment; filename="{nombre}_{timestamp}.{formato}"'
+    return response
@@ -0,0 +1,61 @@
+"""
+Listados de comentarios paginados por cursor.
+
+Los endpoints de comentarios (index_comentarios_global, index_comentarios_obra,
+get_comments_ajax, get_obra_comments) devolvían todos los comentarios y
+consultaban por cada uno sus obras seleccionadas y quién lo marcó como visto.
+Aquí cada página cuesta un número fijo de consultas, haya los comentarios que
+haya:
+
+    - la página: comentarios con ``usuario`` y ``visto_por`` (select_related)
+      y ``num_obras`` anotado;
+    - las obras seleccionadas de toda la página (Prefetch con solo id y
+      títulos, en ``obras_resumen``);
+    - el total.
+
+Orden: el más reciente primero, por (fecha_creacion, id), con los cursores de
+paginacion.py:
+
+    comentarios, siguiente, total = pagina_comentarios(queryset, request.GET)
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+from .paginacion import cortar_pagina, limite_de, ordenar_desde
+
+ORDEN = "-fecha_creacion"
+CAMPO = "fecha_creacion"
+
+
+def comentarios_con_resumen(queryset):
+    """``queryset`` de ComentarioUsuario con usuario, visto_por, num_obras y obras_resumen."""
+    from .models import ComentarioUsuario, Obra
+
+    # Subconsulta y no Count("obras_seleccionadas"): el queryset puede venir
+    # filtrado por una obra y el JOIN del filtro contaría solo esa
+    seleccion = ComentarioUsuario.obras_seleccionadas.through.objects.filter(comentariousuario_id=OuterRef("pk"))
+    num_obras = Subquery(
+        seleccion.order_by().values("comentariousuario_id").annotate(n=Count("id")).values("n"),
+        output_field=IntegerField(),
+    )
+    return (
+        queryset.select_related("usuario", "visto_por")
+        .annotate(num_obras=Coalesce(num_obras, 0))
+        .prefetch_related(Prefetch(
+            "obras_seleccionadas",
+            queryset=Obra.objects.only("id", "titulo", "titulo_limpio").order_by("id"),
+            to_attr="obras_resumen",
+        ))
+    )
+
+
+def pagina_comentarios(queryset, parametros):
+    """(comentarios, siguiente, total) de la página pedida con ``limite`` y ``cursor``.
+
+    Lanza ValueError si el límite o el cursor no son válidos.
+    """
+    limite = limite_de(parametros.get("limite"))
+    pagina = ordenar_desde(comentarios_con_resumen(queryset), ORDEN, CAMPO, parametros.get("cursor"))
+    comentarios, siguiente = cortar_pagina(list(pagina[: limite + 1]), limite, ORDEN, CAMPO)
+    return comentarios, siguiente, queryset.order_by().count()
@@ -0,0 +1,124 @@
+"""
+Filtros de obras compartidos por la búsqueda del servidor (/api/obras/search/).
+
+Reproducen los filtros del frontend (index_django.html y el catálogo):
+
+    q            texto en título, título limpio, título alternativo o autor
+    fuente       FUENTESXI / CATCOM / AMBAS (acepta también "FUENTES IX")
+    tipo         tipo_obra exacto
+    genero       género exacto
+    subgenero    subgénero exacto
+    autor        id de autor, o texto en nombre / nombre completo
+    compositor   texto en compositor
+    mecenas      texto en mecenas
+    lugar        id de lugar, o texto en el nombre del lugar de alguna representación
+    compania     texto en la compañía de alguna representación
+    musica       "true" / "false"
+    fecha_desde  año mínimo de alguna representación (fecha_formateada)
+    fecha_hasta  año máximo de alguna representación
+
+Los filtros sobre representaciones usan EXISTS en lugar de un JOIN + DISTINCT,
+así el queryset puede ordenarse y paginarse por índice sin duplicados.
+"""
+
+from datetime import date
+
+from django.db.models import Exists, OuterRef, Q
+
+from apps.representaciones.models import Representacion
+
+FILTROS = (
+    "q", "fuente", "tipo", "genero", "subgenero", "autor", "compositor",
+    "mecenas", "lugar", "compania", "musica", "fecha_desde", "fecha_hasta",
+)
+
+
+def normalizar_fuente(valor):
+    """Valor de fuente_principal para lo que envía la UI ("FUENTES IX" -> "FUENTESXI")."""
+    compacto = valor.strip().upper().replace(" ", "")
+    if compacto in ("FUENTESXI", "FUENTESIX"):
+        return "FUENTESXI"
+    return compacto
+
+
+def parametros_de_filtro(querydict):
+    """Filtros no vacíos de una QueryDict, en un dict ordenado (sirve como clave de caché)."""
+    return {nombre: querydict.get(nombre, "").strip() for nombre in FILTROS if querydict.get(nombre, "").strip()}
+
+
+def _anio(valor, nombre):
+    try:
+        anio = int(valor)
+    except ValueError:
+        raise ValueError(f"{nombre} debe ser un año")
+    if not 1000 <= anio <= 2999:
+        raise ValueError(f"{nombre} debe ser un año")
+    return anio
+
+
+def _existe_representacion(**filtros):
+    return Exists(Representacion.objects.filter(obra_id=OuterRef("pk"), **filtros))
+
+
+def filtrar_obras(obras, filtros):
+    """Aplica ``filtros`` (ver parametros_de_filtro) a un queryset de Obra.
+
+    Lanza ValueError si un valor no es válido.
+    """
+    q = filtros.get("q")
+    if q:
+        obras = obras.filter(
+            Q(titulo__icontains=q)
+            | Q(titulo_limpio__icontains=q)
+            | Q(titulo_alternativo__icontains=q)
+            | Q(autor__nombre__icontains=q)
+        )
+
+    if filtros.get("fuente"):
+        obras = obras.filter(fuente_principal=normalizar_fuente(filtros["fuente"]))
+    if filtros.get("tipo"):
+        obras = obras.filter(tipo_obra=filtros["tipo"])
+    if filtros.get("genero"):
+        obras = obras.filter(genero=filtros["genero"])
+    if filtros.get("subgenero"):
+        obras = obras.filter(subgenero=filtros["subgenero"])
+
+    autor = filtros.get("autor")
+    if autor:
+        if autor.isdigit():
+            obras = obras.filter(autor_id=int(autor))
+        else:
+            obras = obras.filter(Q(autor__nombre__icontains=autor) | Q(autor__nombre_completo__icontains=autor))
+
+    if filtros.get("compositor"):
+        obras = obras.filter(compositor__icontains=filtros["compositor"])
+    if filtros.get("mecenas"):
+        obras = obras.filter(mecenas__icontains=filtros["mecenas"])
+
+    musica = filtros.get("musica")
+    if musica:
+        if musica not in ("true", "false"):
+            raise ValueError("musica debe ser true o false")
+        obras = obras.filter(musica_conservada=(musica == "true"))
+
+    lugar = filtros.get("lugar")
+    if lugar:
+        if lugar.isdigit():
+            obras = obras.filter(_existe_representacion(lugar_id=int(lugar)))
+        else:
+            obras = obras.filter(_existe_representacion(lugar__nombre__icontains=lugar))
+    if filtros.get("compania"):
+        obras = obras.filter(_existe_representacion(compañia__icontains=filtros["compania"]))
+
+    desde = filtros.get("fecha_desde")
+    hasta = filtros.get("fecha_hasta")
+    if desde or hasta:
+        rango = {}
+        # Rango de fechas (no __year) para que pueda usar el índice de fecha_formateada
+        if desde:
+            rango["fecha_formateada__gte"] = date(_anio(desde, "fecha_desde"), 1, 1)
+        if hasta:
+            rango["fecha_formateada__lte"] = date(_anio(hasta, "fecha_hasta"), 12, 31)
+        obras = obras.filter(_existe_representacion(**rango))
+
+    return obras
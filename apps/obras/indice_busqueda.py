@@ -0,0 +1,265 @@
+"""
+Índice de búsqueda precalculado para el frontend.
+
+exportar_json lo escribe como un shard más (``indice.<hash>.json``, referenciado
+desde manifest.json), así el navegador no recorre todas las obras comparando
+cadenas en cada pulsación: busca en el vocabulario y cruza listas de ids.
+
+Formato:
+    {
+      "version": 3,
+      "ids": [1, 2, 5, ...],                 # posición -> id de obra (orden por id)
+      "campos": {
+        "titulo": {
+          "valores": ["la vida es sueño", ...],  # valores distintos en minúsculas, ordenados
+          "obras": [[0, 3, 1], ...],         # valor -> posiciones en ``ids``, en deltas
+          "tokens": ["a", "ida", "vida", ...],   # sufijos de palabra normalizados, ordenados
+          "postings": [[0, 4], ...],         # token -> índices en ``valores``, en deltas
+          "bloques": {"vi": [7, 9], ...}     # prefijo de 2 letras -> rango en ``tokens``
+        },
+        ...
+      },
+      "facetas": {
+        "tipo_obra": {"comedia": "<base64>", ...}   # bitmap sobre posiciones en ``ids``
+      }
+    }
+
+Semántica de la consulta (la misma en Python, en index_django.html y en
+filtros.filtrar_obras, que es la búsqueda del servidor):
+    - Una obra cumple un campo de texto si la consulta (sin espacios a los
+      lados) está contenida, sin distinguir mayúsculas, en alguno de sus
+      valores del campo. Como ``icontains``: los acentos cuentan.
+    - ``titulo`` es la caja de título de index_django.html: solo el título de
+      la obra. ``q`` es el parámetro homónimo de /api/obras/search/: título,
+      título limpio, título alternativo y nombre del autor. ``autor`` mira
+      nombre y nombre completo; ``lugar`` y ``compania``, todas las
+      representaciones; ``mecenas``, el de la obra.
+    - Las facetas son igualdad exacta con los valores del JSON exportado.
+    - Campos y facetas se combinan con AND.
+
+Los tokens se normalizan sin acentos ni signos y guardan todos los sufijos de
+cada palabra. Si un valor contiene la consulta, cada palabra normalizada de
+la consulta es prefijo de algún sufijo suyo: cruzar los tokens por prefijo da
+un superconjunto de los valores que coinciden, y la comprobación de subcadena
+sobre ``valores`` deja exactamente los de icontains.
+
+Los tests comparan ``consultar`` con filtrar_obras sobre la base de datos.
+"""
+
+import base64
+import bisect
+import re
+import unicodedata
+
+VERSION_INDICE = 3
+LONGITUD_BLOQUE = 2
+
+CAMPOS_TEXTO = ("titulo", "q", "autor", "lugar", "compania", "mecenas")
+CAMPOS_FACETA = ("tipo_obra", "fuente", "tipo_lugar")
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def minusculas(texto):
+    """Como compara icontains: minúsculas, con acentos y signos."""
+    return str(texto).lower() if texto else ""
+
+
+def normalizar(texto):
+    """Minúsculas, sin acentos ni signos: "Sueño, ¿y?" -> "sueno y"."""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    sin_marcas = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return _NO_ALFANUMERICO.sub(" ", sin_marcas.lower()).strip()
+
+
+def tokenizar(texto):
+    return normalizar(texto).split()
+
+
+def sufijos(texto):
+    return {palabra[i:] for palabra in tokenizar(texto) for i in range(len(palabra))}
+
+
+# ---------------------------------------------------------------------------
+# Extracción de campos desde el JSON exportado
+# ---------------------------------------------------------------------------
+
+def textos_de_obra(obra):
+    """Valores indexados por campo para una obra serializada (formato de datos_obras.json)."""
+    autor = obra.get("autor")
+    if isinstance(autor, dict):
+        nombre, nombre_completo = autor.get("nombre"), autor.get("nombre_completo")
+    else:
+        nombre, nombre_completo = autor, None
+    representaciones = obra.get("representaciones") or []
+    return {
+        "titulo": [obra.get("titulo")],
+        "q": [obra.get("titulo"), obra.get("titulo_original"), obra.get("titulo_alternativo"), nombre],
+        "autor": [nombre, nombre_completo],
+        "lugar": [rep.get("lugar") for rep in representaciones],
+        "compania": [rep.get("compania") for rep in representaciones],
+        "mecenas": [obra.get("mecenas")],
+    }
+
+
+def facetas_de_obra(obra):
+    return {campo: obra.get(campo) or "" for campo in CAMPOS_FACETA}
+
+
+# ---------------------------------------------------------------------------
+# Construcción
+# ---------------------------------------------------------------------------
+
+def _bitmap(posiciones, total):
+    bits = bytearray((total + 7) // 8)
+    for pos in posiciones:
+        bits[pos >> 3] |= 1 << (pos & 7)
+    return base64.b64encode(bytes(bits)).decode("ascii")
+
+
+def _deltas(posiciones):
+    anterior = 0
+    salida = []
+    for pos in posiciones:
+        salida.append(pos - anterior)
+        anterior = pos
+    return salida
+
+
+def _campo_serializado(obras_por_valor):
+    valores = sorted(obras_por_valor)
+    por_token = {}
+    for i, valor in enumerate(valores):
+        for token in sufijos(valor):
+            por_token.setdefault(token, []).append(i)
+    tokens = sorted(por_token)
+    bloques = {}
+    for i, token in enumerate(tokens):
+        prefijo = token[:LONGITUD_BLOQUE]
+        if prefijo in bloques:
+            bloques[prefijo][1] = i + 1
+        else:
+            bloques[prefijo] = [i, i + 1]
+    return {
+        "valores": valores,
+        "obras": [_deltas(sorted(obras_por_valor[valor])) for valor in valores],
+        "tokens": tokens,
+        "postings": [_deltas(por_token[token]) for token in tokens],
+        "bloques": bloques,
+    }
+
+
+def construir_indice(obras):
+    """Construye el índice a partir de la lista ``obras`` del JSON exportado."""
+    obras = sorted(obras, key=lambda o: o["id"])
+    obras_por_valor = {campo: {} for campo in CAMPOS_TEXTO}
+    facetas = {campo: {} for campo in CAMPOS_FACETA}
+
+    for pos, obra in enumerate(obras):
+        for campo, textos in textos_de_obra(obra).items():
+            for valor in {minusculas(texto) for texto in textos} - {""}:
+                obras_por_valor[campo].setdefault(valor, []).append(pos)
+        for campo, valor in facetas_de_obra(obra).items():
+            if valor:
+                facetas[campo].setdefault(valor, []).append(pos)
+
+    total = len(obras)
+    return {
+        "version": VERSION_INDICE,
+        "ids": [obra["id"] for obra in obras],
+        "campos": {campo: _campo_serializado(obras_por_valor[campo]) for campo in CAMPOS_TEXTO},
+        "facetas": {
+            campo: {valor: _bitmap(posiciones, total) for valor, posiciones in sorted(valores.items())}
+            for campo, valores in facetas.items()
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Consulta sobre el índice serializado (espejo del JS de index_django.html)
+# ---------------------------------------------------------------------------
+
+def _acumular(deltas):
+    pos = 0
+    for delta in deltas:
+        pos += delta
+        yield pos
+
+
+def _rango_prefijo(campo, prefijo):
+    tokens = campo["tokens"]
+    if len(prefijo) >= LONGITUD_BLOQUE:
+        bloque = campo["bloques"].get(prefijo[:LONGITUD_BLOQUE])
+        if not bloque:
+            return 0, 0
+        inicio, fin = bloque
+    else:
+        inicio, fin = 0, len(tokens)
+    i = bisect.bisect_left(tokens, prefijo, inicio, fin)
+    j = i
+    while j < fin and tokens[j].startswith(prefijo):
+        j += 1
+    return i, j
+
+
+def _valores_candidatos(campo, consulta):
+    """Índices de ``valores`` cuyos tokens admiten todas las palabras de ``consulta``."""
+    candidatos = None
+    for palabra in tokenizar(consulta):
+        indices = set()
+        for k in range(*_rango_prefijo(campo, palabra)):
+            indices.update(_acumular(campo["postings"][k]))
+        candidatos = indices if candidatos is None else candidatos & indices
+        if not candidatos:
+            return ()
+    # Sin letras ni números (p. ej. "¿") no hay tokens que cruzar
+    return range(len(campo["valores"])) if candidatos is None else candidatos
+
+
+def _posiciones_subcadena(campo, consulta):
+    exacta = minusculas(consulta)
+    resultado = set()
+    for k in _valores_candidatos(campo, consulta):
+        if exacta in campo["valores"][k]:
+            resultado.update(_acumular(campo["obras"][k]))
+    return resultado
+
+
+def _posiciones_bitmap(codificado):
+    bits = base64.b64decode(codificado)
+    return {
+        (i << 3) | b
+        for i, byte in enumerate(bits) if byte
+        for b in range(8) if byte & (1 << b)
+    }
+
+
+def consultar(indice, texto=None, facetas=None):
+    """Ids de obra que cumplen la consulta, en orden de id.
+
+    texto: {campo: consulta} con campos de CAMPOS_TEXTO.
+    facetas: {campo: valor} con campos de CAMPOS_FACETA.
+    """
+    candidatas = None
+    for campo, consulta in (texto or {}).items():
+        consulta = consulta.strip()
+        if not consulta:
+            continue
+        posiciones = _posiciones_subcadena(indice["campos"][campo], consulta)
+        candidatas = posiciones if candidatas is None else candidatas & posiciones
+        if not candidatas:
+            return []
+    for campo, valor in (facetas or {}).items():
+        if not valor:
+            continue
+        codificado = indice["facetas"][campo].get(valor)
+        posiciones = _posiciones_bitmap(codificado) if codificado else set()
+        candidatas = posiciones if candidatas is None else candidatas & posiciones
+        if not candidatas:
+            return []
+    ids = indice["ids"]
+    if candidatas is None:
+        return list(ids)
+    return [ids[pos] for pos in sorted(candidatas)]
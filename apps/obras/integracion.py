@@ -0,0 +1,271 @@
+"""
+Integración en la base de datos de items validados del análisis con IA.
+
+integrar_item_a_db hacía, por cada item, un get_or_create de la obra, un
+``nombre__icontains`` para el lugar y un create de la representación: validar
+un lote de cientos de items eran cientos de consultas sueltas, y el lugar
+podía acabar en uno que solo contenía el nombre ("Madrid" -> "Alcázar de
+Madrid"). Aquí, para todo el lote:
+
+    - los títulos de obras y los nombres de lugares existentes se leen una vez
+      a mapas en memoria por clave normalizada (sin acentos, mayúsculas ni
+      espacios de más), y cada referencia se resuelve contra ellos. Con pocas
+      referencias distintas (un clic en validar_item) solo se leen las filas
+      candidatas, con una expresión regular que ignora acentos y mayúsculas;
+      con más de MAX_FILTRADAS se lee la tabla entera;
+    - las obras y lugares que faltan se crean con ``bulk_create`` (una sola
+      vez aunque varios items los nombren);
+    - las representaciones se insertan por lotes, en la misma transacción;
+    - como ``bulk_create`` no dispara señales, se anotan a mano los cambios,
+      los agregados y la invalidación de la caché (ver signals.py).
+
+Cada item devuelve su resultado, en el mismo orden:
+
+    {"exito": true, "tipo": "obra", "id_creado": 12, "mensaje": "Obra creada (ID: 12)"}
+    {"exito": true, "tipo": "lugar", "id_creado": 3, "mensaje": "Lugar ya existente (ID: 3)"}
+    {"exito": false, "tipo": "representacion", "id_creado": null, "mensaje": "Falta el título de la obra"}
+
+Un item incompleto no impide los demás; un error al escribir deshace el lote
+entero y todos los items lo reportan.
+"""
+
+import operator
+import re
+import unicodedata
+from functools import reduce
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+
+from .agregados import obras_afectadas
+from .delta import registrar_cambios
+from .models import Obra
+
+TIPOS_INTEGRABLES = ("obra", "lugar", "representacion")
+TAMANO_LOTE = 500
+# Referencias distintas de un modelo hasta las que se buscan solo las filas candidatas
+MAX_FILTRADAS = 50
+# Letras que clave() deja sin acento, y las variantes que pueden tener en la tabla
+_VARIANTES = {
+    "a": "aáàâä", "e": "eéèêë", "i": "iíìîï", "o": "oóòôö", "u": "uúùûü", "n": "nñ", "c": "cç", "y": "yý",
+}
+
+
+def clave(texto):
+    """Clave de comparación: sin acentos, en minúsculas y con los espacios colapsados."""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.casefold().split())
+
+
+def _texto(datos, *campos):
+    for campo in campos:
+        valor = datos.get(campo)
+        if isinstance(valor, str) and valor.strip():
+            return valor.strip()
+    return ""
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _resultado(tipo, exito, id_creado=None, mensaje=""):
+    return {"exito": exito, "tipo": tipo, "id_creado": id_creado, "mensaje": mensaje}
+
+
+def patron(k):
+    """Expresión regular (para ``__iregex``) de los textos cuya clave() es ``k``."""
+    partes = []
+    for c in k:
+        if c == " ":
+            partes.append(r"\s+")
+        elif c in _VARIANTES:
+            partes.append(f"[{_VARIANTES[c]}]")
+        else:
+            partes.append(re.escape(c))
+    return r"^\s*" + "".join(partes) + r"\s*$"
+
+
+class _Resolutor:
+    """Ids existentes por clave normalizada y objetos por crear de un modelo.
+
+    ``resolver`` solo anota las referencias; ``guardar`` lee las filas
+    existentes que les corresponden y crea las que faltan.
+    """
+
+    def __init__(self, modelo, campo, campos_busqueda):
+        self.modelo = modelo
+        self.campo = campo
+        self.campos_busqueda = campos_busqueda
+        self.pedidos = {}
+        self.ids = {}
+        self.nuevos = {}
+
+    def resolver(self, texto, crear):
+        """Clave de ``texto`` y si es la primera referencia a ella (``crear()`` da el objeto por si falta)."""
+        k = clave(texto)
+        if k in self.pedidos:
+            return k, False
+        self.pedidos[k] = crear()
+        return k, True
+
+    def _cargar(self):
+        filas = self.modelo.objects.order_by("pk")
+        if len(self.pedidos) <= MAX_FILTRADAS:
+            filas = filas.filter(reduce(operator.or_, (
+                Q(**{f"{campo}__iregex": patron(k)}) for k in self.pedidos for campo in self.campos_busqueda
+            )))
+        for pk, *textos in filas.values_list("pk", *self.campos_busqueda):
+            for texto in textos:
+                k = clave(texto) if texto else None
+                if k in self.pedidos:
+                    self.ids.setdefault(k, pk)
+
+    def guardar(self):
+        """Resuelve las existentes; bulk_create de las que faltan y completa ``ids`` con las creadas."""
+        if not self.pedidos:
+            return
+        self._cargar()
+        self.nuevos = {k: obj for k, obj in self.pedidos.items() if k not in self.ids}
+        if not self.nuevos:
+            return
+        self.modelo.objects.bulk_create(self.nuevos.values(), batch_size=TAMANO_LOTE)
+        if any(obj.pk is None for obj in self.nuevos.values()):
+            # Backends sin RETURNING: se leen los ids recién creados
+            textos = [getattr(obj, self.campo) for obj in self.nuevos.values()]
+            filas = self.modelo.objects.filter(**{f"{self.campo}__in": textos}).values_list("pk", self.campo)
+            creados = {clave(texto): pk for pk, texto in filas}
+            for k, obj in self.nuevos.items():
+                obj.pk = creados[k]
+        for k, obj in self.nuevos.items():
+            self.ids[k] = obj.pk
+
+
+def _nueva_obra(titulo, metadata):
+    return Obra(
+        titulo=titulo,
+        titulo_limpio=titulo,
+        fuente_principal="FUENTESXI",
+        origen_datos="pdf",
+        pagina_pdf=_entero(metadata.get("pagina_pdf")),
+        texto_original_pdf=metadata.get("texto_original") or "",
+    )
+
+
+def _nuevo_lugar(nombre, datos, prefijo=""):
+    from apps.lugares.models import Lugar
+
+    tipo_lugar = _texto(datos, f"{prefijo}tipo_lugar", f"{prefijo}tipo").lower()
+    coordenadas = datos.get("coordenadas") if not prefijo else None
+    coordenadas = coordenadas if isinstance(coordenadas, dict) else {}
+    return Lugar(
+        # Lugar.save() normaliza así el nombre; bulk_create no lo llama
+        nombre=nombre.title(),
+        tipo_lugar=tipo_lugar if tipo_lugar in dict(Lugar.TIPO_LUGAR_CHOICES) else "otro",
+        region=_texto(datos, f"{prefijo}region"),
+        pais=_texto(datos, f"{prefijo}pais") or "España",
+        descripcion=_texto(datos, f"{prefijo}descripcion"),
+        coordenadas_lat=coordenadas.get("lat"),
+        coordenadas_lng=coordenadas.get("lng"),
+    )
+
+
+def integrar_items(items):
+    """Integra ``items`` (lista de (tipo, item) validados) y devuelve un resultado por item."""
+    from apps.lugares.models import Lugar
+    from apps.representaciones.models import Representacion
+
+    obras = _Resolutor(Obra, "titulo", ("titulo", "titulo_limpio"))
+    lugares = _Resolutor(Lugar, "nombre", ("nombre",))
+
+    resultados = [None] * len(items)
+    referencias = []  # (i, tipo, resolutor, clave, primera referencia)
+    representaciones = []  # (i, Representacion, clave obra, clave lugar)
+    for i, (tipo, item) in enumerate(items):
+        datos = item.get("datos_json") or {}
+        metadata = item.get("metadata") or {}
+
+        if tipo == "obra":
+            titulo = _texto(datos, "titulo", "obra_titulo")
+            if not titulo:
+                resultados[i] = _resultado(tipo, False, mensaje="Falta el título de la obra")
+                continue
+            k, primera = obras.resolver(titulo, lambda: _nueva_obra(titulo, metadata))
+            referencias.append((i, tipo, obras, k, primera))
+
+        elif tipo == "lugar":
+            nombre = _texto(datos, "nombre")
+            if not nombre:
+                resultados[i] = _resultado(tipo, False, mensaje="Falta el nombre del lugar")
+                continue
+            k, primera = lugares.resolver(nombre, lambda: _nuevo_lugar(nombre, datos))
+            referencias.append((i, tipo, lugares, k, primera))
+
+        elif tipo == "representacion":
+            titulo = _texto(datos, "obra_titulo")
+            if not titulo:
+                resultados[i] = _resultado(tipo, False, mensaje="Falta el título de la obra")
+                continue
+            k_obra, _ = obras.resolver(titulo, lambda: _nueva_obra(titulo, metadata))
+            nombre = _texto(datos, "lugar_nombre")
+            k_lugar = lugares.resolver(nombre, lambda: _nuevo_lugar(nombre, datos, "lugar_"))[0] if nombre else None
+            representacion = Representacion(
+                fecha=_texto(datos, "fecha_formateada", "fecha"),
+                compañia=_texto(datos, "compañia"),
+                tipo_funcion=_texto(datos, "tipo_funcion"),
+                publico=_texto(datos, "publico"),
+                observaciones=_texto(datos, "observaciones"),
+                pagina_pdf=_entero(metadata.get("pagina_pdf")),
+                texto_original_pdf=metadata.get("texto_original") or "",
+            )
+            representaciones.append((i, representacion, k_obra, k_lugar))
+
+        else:
+            resultados[i] = _resultado(tipo, False, mensaje=f"Tipo no integrable: {tipo}")
+
+    try:
+        with transaction.atomic():
+            obras.guardar()
+            lugares.guardar()
+            for _, representacion, k_obra, k_lugar in representaciones:
+                representacion.obra_id = obras.ids[k_obra]
+                representacion.lugar_id = lugares.ids[k_lugar] if k_lugar else None
+                representacion.completar_fechas()
+            Representacion.objects.bulk_create([r for _, r, _, _ in representaciones], batch_size=TAMANO_LOTE)
+            _anotar_cambios(
+                [obra.pk for obra in obras.nuevos.values()],
+                {r.obra_id for _, r, _, _ in representaciones},
+                bool(lugares.nuevos),
+            )
+    except DatabaseError as e:
+        for i, tipo, *_ in referencias:
+            resultados[i] = _resultado(tipo, False, mensaje=f"Error al integrar: {e}")
+        for i, *_ in representaciones:
+            resultados[i] = _resultado("representacion", False, mensaje=f"Error al integrar: {e}")
+        return resultados
+
+    nombres = {"obra": "Obra", "lugar": "Lugar"}
+    for i, tipo, resolutor, k, primera in referencias:
+        pk = resolutor.ids[k]
+        estado = "creada" if tipo == "obra" else "creado"
+        if not (primera and k in resolutor.nuevos):
+            estado = "ya existente"
+        resultados[i] = _resultado(tipo, True, pk, f"{nombres[tipo]} {estado} (ID: {pk})")
+    for i, representacion, _, _ in representaciones:
+        pk = representacion.pk
+        resultados[i] = _resultado("representacion", True, pk, f"Representación creada (ID: {pk})")
+    return resultados
+
+
+def _anotar_cambios(obras_creadas, obras_con_representaciones, lugares_creados):
+    """Lo que harían las señales de post_save de cada objeto creado."""
+    from .signals import invalidar_cache_dataset
+
+    registrar_cambios(sorted({*obras_creadas, *obras_con_representaciones}))
+    obras_afectadas(obras_con_representaciones)
+    if obras_creadas or obras_con_representaciones or lugares_creados:
+        invalidar_cache_dataset(sender=Obra)
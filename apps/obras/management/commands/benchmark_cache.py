@@ -0,0 +1,156 @@
+"""
+Management command para medir la caché del proyecto con varios procesos worker.
+
+Simula N workers de gunicorn leyendo claves de la caché ``obras`` con una
+distribución sesgada (unas pocas claves muy populares), mientras el worker 0
+invalida periódicamente la generación. Al terminar, todos los workers leen la
+generación vigente: con un backend compartido (sqlite/redis) deben coincidir;
+con "lru" cada proceso tiene la suya.
+
+Uso:
+    python manage.py benchmark_cache                              # backend lru, 4 workers
+    python manage.py benchmark_cache --backend sqlite --workers 8
+    python manage.py benchmark_cache --backend redis --lecturas 20000 --invalidar-cada 0
+"""
+
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _configuracion_backend(backend, directorio_tmp):
+    """Config de CACHES["obras"] aislada para no tocar la caché real."""
+    config = dict(settings.OBRAS_CACHE_BACKENDS[backend])
+    if backend == "sqlite":
+        config["LOCATION"] = os.path.join(directorio_tmp, "benchmark_cache.sqlite3")
+    elif backend == "redis":
+        config["KEY_PREFIX"] = "benchmark"
+    elif backend == "lru":
+        config["LOCATION"] = "benchmark-lru"
+    return config
+
+
+def _worker(indice, config, opciones, barrera, cola):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "teatro_espanol.settings")
+    import django
+
+    django.setup()
+
+    from django.test.utils import override_settings
+
+    with override_settings(CACHES={**settings.CACHES, "obras": config}):
+        from apps.obras import cache
+
+        cache.reiniciar_estadisticas()
+        rng = random.Random(opciones["semilla"] + indice)
+        valor = b"x" * opciones["tamano"]
+        latencias = []
+
+        for i in range(opciones["lecturas"]):
+            clave = f"k{int(rng.paretovariate(1.2)) % opciones['claves']}"
+            inicio = time.perf_counter()
+            cache.obtener_o_calcular("benchmark", clave, lambda: valor)
+            latencias.append(time.perf_counter() - inicio)
+
+            if indice == 0 and opciones["invalidar_cada"] and (i + 1) % opciones["invalidar_cada"] == 0:
+                cache.incrementar_generacion()
+
+        barrera.wait()
+        if indice == 0:
+            cache.incrementar_generacion()
+        barrera.wait()
+        generacion_final = cache.generacion_actual()
+
+        latencias.sort()
+        resumen = cache.estadisticas().get("benchmark", {})
+        cola.put({
+            "worker": indice,
+            "aciertos": resumen.get("aciertos", 0),
+            "fallos": resumen.get("fallos", 0),
+            "p50_ms": latencias[len(latencias) // 2] * 1000,
+            "p95_ms": latencias[int(len(latencias) * 0.95) - 1] * 1000,
+            "media_ms": statistics.fmean(latencias) * 1000,
+            "generacion_final": generacion_final,
+        })
+
+
+class Command(BaseCommand):
+    help = "Mide aciertos, fallos y latencia de la caché del proyecto con varios procesos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            default=settings.OBRAS_CACHE_BACKEND,
+            choices=["lru", "sqlite", "redis"],
+            help="Backend a medir (default: el configurado en OBRAS_CACHE_BACKEND)",
+        )
+        parser.add_argument("--workers", type=int, default=4, help="Número de procesos (default: 4)")
+        parser.add_argument("--lecturas", type=int, default=5000, help="Lecturas por worker (default: 5000)")
+        parser.add_argument("--claves", type=int, default=50, help="Claves distintas (default: 50)")
+        parser.add_argument("--tamano", type=int, default=20000, help="Bytes por valor (default: 20000)")
+        parser.add_argument(
+            "--invalidar-cada",
+            type=int,
+            default=1000,
+            help="El worker 0 invalida la generación cada N lecturas (0 = nunca)",
+        )
+        parser.add_argument("--semilla", type=int, default=1, help="Semilla aleatoria")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers debe ser >= 1")
+
+        metodos = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("fork" if "fork" in metodos else "spawn")
+
+        with tempfile.TemporaryDirectory() as directorio_tmp:
+            config = _configuracion_backend(options["backend"], directorio_tmp)
+            barrera = ctx.Barrier(options["workers"])
+            cola = ctx.Queue()
+
+            self.stdout.write(
+                f"Backend {options['backend']}: {options['workers']} workers x "
+                f"{options['lecturas']} lecturas ({options['claves']} claves, {options['tamano']} bytes)"
+            )
+            inicio = time.perf_counter()
+            procesos = [
+                ctx.Process(target=_worker, args=(i, config, options, barrera, cola))
+                for i in range(options["workers"])
+            ]
+            for p in procesos:
+                p.start()
+            resultados = [cola.get() for _ in procesos]
+            for p in procesos:
+                p.join()
+            duracion = time.perf_counter() - inicio
+
+        resultados.sort(key=lambda r: r["worker"])
+        self.stdout.write("")
+        self.stdout.write(f"{'worker':>6} {'aciertos':>9} {'fallos':>7} {'ratio':>6} "
+                          f"{'media ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for r in resultados:
+            lecturas = r["aciertos"] + r["fallos"]
+            ratio = r["aciertos"] / lecturas if lecturas else 0
+            self.stdout.write(
+                f"{r['worker']:>6} {r['aciertos']:>9} {r['fallos']:>7} {ratio:>6.2f} "
+                f"{r['media_ms']:>9.3f} {r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f}"
+            )
+
+        total = sum(r["aciertos"] + r["fallos"] for r in resultados)
+        generaciones = {r["generacion_final"] for r in resultados}
+        self.stdout.write("")
+        self.stdout.write(f"Lecturas totales: {total} en {duracion:.2f}s ({total / duracion:,.0f} lecturas/s)")
+        if len(generaciones) == 1:
+            self.stdout.write(self.style.SUCCESS(
+                "Invalidación visible en todos los workers (generación compartida)."
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(generaciones)} generaciones distintas al final: la caché no se comparte entre procesos."
+            ))
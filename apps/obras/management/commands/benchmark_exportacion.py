@@ -0,0 +1,125 @@
+"""
+Management command para comparar la exportación de comentarios en memoria y en streaming.
+
+Mide tiempo, consultas y memoria (pico de tracemalloc, en una pasada aparte)
+de generar el archivo completo con cada estrategia:
+
+    memoria       lo que hacían las vistas: list(queryset) y ``contenido += exportar_para_ia()``
+    txt           flujo_txt de exportar_comentarios.py (iterator por lotes)
+    jsonl         flujo_jsonl
+
+Uso:
+    python manage.py benchmark_exportacion                        # comentarios existentes
+    python manage.py benchmark_exportacion --crear 50000          # + 50.000 sintéticos (se deshacen)
+"""
+
+import gc
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.obras.exportar_comentarios import comentarios_para_exportar, flujo_jsonl, flujo_txt
+from apps.obras.models import ComentarioUsuario, Obra
+from apps.usuarios.models import Usuario
+
+
+class _Deshacer(Exception):
+    pass
+
+
+def _memoria(_):
+    comentarios = ComentarioUsuario.objects.select_related("usuario").prefetch_related(
+        "obras_seleccionadas__autor"
+    ).order_by("-fecha_creacion")
+    contenido = "EXPORTACIÓN DE COMENTARIOS PARA IA\n"
+    for comentario in comentarios:
+        contenido += comentario.exportar_para_ia()
+    return len(contenido)
+
+
+def _txt(comentarios):
+    return sum(len(trozo) for trozo in flujo_txt(comentarios, ["EXPORTACIÓN DE COMENTARIOS PARA IA"]))
+
+
+def _jsonl(comentarios):
+    return sum(len(trozo) for trozo in flujo_jsonl(comentarios))
+
+
+ESTRATEGIAS = {"memoria": _memoria, "txt": _txt, "jsonl": _jsonl}
+
+
+class Command(BaseCommand):
+    help = "Mide tiempo, consultas y memoria de exportar todos los comentarios (en memoria vs streaming)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--crear", type=int, default=0,
+                            help="Comentarios sintéticos a crear antes de medir (se deshacen al terminar)")
+        parser.add_argument("--estrategia", action="append", choices=sorted(ESTRATEGIAS),
+                            help="Medir solo esta estrategia (se puede repetir)")
+
+    def handle(self, *args, **options):
+        estrategias = options["estrategia"] or list(ESTRATEGIAS)
+        try:
+            with transaction.atomic():
+                if options["crear"]:
+                    self._crear(options["crear"])
+                self._medir_todas(estrategias)
+                raise _Deshacer
+        except _Deshacer:
+            pass
+
+    def _crear(self, cantidad):
+        usuario = Usuario.objects.create_user(username="benchmark-exportacion", email="benchmark@example.com")
+        obras = list(Obra.objects.values_list("id", flat=True)[:300])
+        if not obras:
+            obras = [
+                obra.id for obra in Obra.objects.bulk_create(
+                    [Obra(titulo=f"Obra {i}", titulo_limpio=f"benchmark-exportacion-{i}") for i in range(300)]
+                )
+            ]
+        texto = "Observación del investigador sobre la selección. " * 10
+        comentarios = ComentarioUsuario.objects.bulk_create(
+            [
+                ComentarioUsuario(usuario=usuario, catalogo="catcom", titulo=f"Comentario {i}",
+                                  comentario=texto, etiqueta_ia=True)
+                for i in range(cantidad)
+            ],
+            batch_size=1000,
+        )
+        Seleccion = ComentarioUsuario.obras_seleccionadas.through
+        Seleccion.objects.bulk_create(
+            [
+                Seleccion(comentariousuario_id=comentario.id, obra_id=obras[(i + k) % len(obras)])
+                for i, comentario in enumerate(comentarios)
+                for k in range(i % 3 + 1)
+            ],
+            batch_size=5000,
+        )
+
+    def _medir_todas(self, estrategias):
+        comentarios = comentarios_para_exportar(ComentarioUsuario.objects.all())
+        total = ComentarioUsuario.objects.count()
+        if not total:
+            raise CommandError("No hay comentarios: usa --crear N")
+        self.stdout.write(f"{total} comentarios")
+        self.stdout.write("")
+        self.stdout.write(f"{'estrategia':<10} {'caracteres':>12} {'consultas':>10} {'ms':>9} {'pico MiB':>9}")
+        for nombre in estrategias:
+            funcion = ESTRATEGIAS[nombre]
+            # Tiempo sin tracemalloc (lo ralentiza mucho); memoria en una segunda pasada
+            gc.collect()
+            inicio = time.perf_counter()
+            with CaptureQueriesContext(connection) as consultas:
+                caracteres = funcion(comentarios)
+            segundos = time.perf_counter() - inicio
+            gc.collect()
+            tracemalloc.start()
+            funcion(comentarios)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.stdout.write(
+                f"{nombre:<10} {caracteres:>12} {len(consultas):>10} {segundos * 1000:>9.0f} {pico / 2**20:>9.1f}"
+            )
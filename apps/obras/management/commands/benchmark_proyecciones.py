@@ -0,0 +1,126 @@
+"""
+Management command para comparar el coste de materializar listados de obras.
+
+Mide tiempo y memoria (pico de tracemalloc) por cada 1.000 filas con cada
+estrategia de proyecciones.py frente al modelo completo:
+
+    modelo        Obra + select_related("autor") + prefetch de representaciones
+    defer         obras_ligeras() + select_related("autor")
+    values        .values() con los mismos campos que FilaObraCatalogo
+    filas         filas_de(FilaObraCatalogo, ...)
+
+Uso:
+    python manage.py benchmark_proyecciones                       # obras existentes
+    python manage.py benchmark_proyecciones --crear 5000          # + 5.000 sintéticas (se deshacen)
+    python manage.py benchmark_proyecciones --repeticiones 10
+"""
+
+import gc
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.obras.models import Obra
+from apps.obras.proyecciones import FilaObraCatalogo, filas_de, obras_ligeras
+
+
+class _Deshacer(Exception):
+    pass
+
+
+def _modelo(obras):
+    filas = list(obras.select_related("autor").prefetch_related("representaciones__lugar"))
+    for obra in filas:
+        # Lo que lee la tarjeta del catálogo
+        primera = obra.representaciones.first()
+        _ = (obra.autor.nombre if obra.autor else None, primera.lugar if primera else None,
+             obra.representaciones.count())
+    return filas
+
+
+def _defer(obras):
+    return list(obras_ligeras(obras).select_related("autor"))
+
+
+def _values(obras):
+    return list(obras.values(
+        "id", "titulo", "autor__nombre", "mecenas", "fecha_creacion_estimada", "tipo_obra",
+        "genero", "musica_conservada", "compositor", "fuente_principal",
+    ))
+
+
+def _filas(obras):
+    return filas_de(FilaObraCatalogo, obras)
+
+
+ESTRATEGIAS = {"modelo": _modelo, "defer": _defer, "values": _values, "filas": _filas}
+
+
+def _medir(funcion, obras, repeticiones):
+    tiempos, picos, n = [], [], 0
+    for _ in range(repeticiones):
+        gc.collect()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        filas = funcion(obras)
+        tiempos.append(time.perf_counter() - inicio)
+        picos.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        n = len(filas)
+        del filas
+    return n, statistics.median(tiempos), statistics.median(picos)
+
+
+class Command(BaseCommand):
+    help = "Mide tiempo y memoria por 1.000 filas de cada proyección de listado de obras"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--crear", type=int, default=0,
+                            help="Obras sintéticas a crear antes de medir (se deshacen al terminar)")
+        parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones por estrategia (default: 5)")
+        parser.add_argument("--estrategia", action="append", choices=sorted(ESTRATEGIAS),
+                            help="Medir solo esta estrategia (se puede repetir)")
+
+    def handle(self, *args, **options):
+        if options["repeticiones"] < 1:
+            raise CommandError("--repeticiones debe ser >= 1")
+        estrategias = options["estrategia"] or list(ESTRATEGIAS)
+
+        try:
+            with transaction.atomic():
+                if options["crear"]:
+                    self._crear(options["crear"])
+                self._medir_todas(estrategias, options["repeticiones"])
+                raise _Deshacer
+        except _Deshacer:
+            pass
+
+    def _crear(self, cantidad):
+        texto = "Lorem ipsum dolor sit amet. " * 200
+        Obra.objects.bulk_create(
+            [
+                Obra(titulo=f"Obra sintética {i}", titulo_limpio=f"benchmark-proyecciones-{i}",
+                     fuente_principal="CATCOM", texto_original_pdf=texto, notas=texto, observaciones=texto)
+                for i in range(cantidad)
+            ],
+            batch_size=1000,
+        )
+
+    def _medir_todas(self, estrategias, repeticiones):
+        obras = Obra.objects.order_by("titulo")
+        total = obras.count()
+        if not total:
+            raise CommandError("No hay obras: usa --crear N")
+        self.stdout.write(f"{total} obras, {repeticiones} repeticiones (mediana)")
+        self.stdout.write("")
+        self.stdout.write(f"{'estrategia':<10} {'filas':>7} {'ms':>9} {'ms/1000':>9} {'KiB':>10} {'KiB/1000':>10}")
+        for nombre in estrategias:
+            n, segundos, pico = _medir(ESTRATEGIAS[nombre], obras, repeticiones)
+            por_mil = 1000 / n if n else 0
+            self.stdout.write(
+                f"{nombre:<10} {n:>7} {segundos * 1000:>9.1f} {segundos * 1000 * por_mil:>9.1f} "
+                f"{pico / 1024:>10.0f} {pico / 1024 * por_mil:>10.0f}"
+            )
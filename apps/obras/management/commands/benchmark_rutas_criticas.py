@@ -0,0 +1,186 @@
+"""
+Management command para medir las rutas críticas sobre el catálogo sintético.
+
+Crea el catálogo sintético a la escala pedida (se deshace al terminar), mide
+cada caso de apps/obras/benchmarks/casos.py (mediana, p95, pico de memoria y
+consultas), guarda la ejecución en el historial y la compara con la última
+comparable (misma escala y base de datos).
+
+Uso:
+    python manage.py benchmark_rutas_criticas                                  # 5.000 obras sintéticas
+    python manage.py benchmark_rutas_criticas --obras 100000 --etiqueta "antes del índice"
+    python manage.py benchmark_rutas_criticas --caso facetas --caso busqueda_titulo
+    python manage.py benchmark_rutas_criticas --existentes                     # datos de la DB
+    python manage.py benchmark_rutas_criticas --listar
+    python manage.py benchmark_rutas_criticas --comparar -2 -1                 # dos del historial
+    python manage.py benchmark_rutas_criticas --fallar-si-empeora --umbral 15  # para CI
+"""
+
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.obras.benchmarks import historial
+from apps.obras.benchmarks.casos import CASOS, Datos
+from apps.obras.benchmarks.medicion import medir
+from apps.obras.models import Obra
+from apps.obras.sintetico import Distribuciones, GeneradorCatalogo, guardar
+from apps.representaciones.models import Representacion
+
+
+class _Deshacer(Exception):
+    pass
+
+
+def _commit():
+    try:
+        salida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return salida.stdout.strip() if salida.returncode == 0 else ""
+
+
+class Command(BaseCommand):
+    help = "Mide las rutas críticas sobre el catálogo sintético y las compara con la ejecución anterior"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--obras", type=int, default=5000, help="Obras sintéticas (default: 5000)")
+        parser.add_argument("--representaciones", type=int, default=None,
+                            help="Representaciones sintéticas (default: las de la distribución real)")
+        parser.add_argument("--semilla", type=int, default=0, help="Semilla del catálogo sintético (default: 0)")
+        parser.add_argument("--existentes", action="store_true",
+                            help="Medir con los datos de la DB en lugar del catálogo sintético")
+        parser.add_argument("--importar-obras", type=int, default=500,
+                            help="Obras del JSON que mide importar_json (default: 500)")
+        parser.add_argument("--repeticiones", type=int, default=5, help="Pasadas medidas por caso (default: 5)")
+        parser.add_argument("--caso", action="append", choices=sorted(CASOS),
+                            help="Medir solo este caso (se puede repetir)")
+        parser.add_argument("--historial", default=str(settings.BASE_DIR / "benchmarks" / "historial.json"),
+                            help="Archivo del historial (default: benchmarks/historial.json)")
+        parser.add_argument("--etiqueta", default="", help="Descripción de la ejecución en el historial")
+        parser.add_argument("--no-guardar", action="store_true", help="No añadir la ejecución al historial")
+        parser.add_argument("--umbral", type=float, default=10.0,
+                            help="Subida en %% a partir de la cual una métrica empeora (default: 10)")
+        parser.add_argument("--fallar-si-empeora", action="store_true",
+                            help="Terminar con error si alguna métrica empeora más del umbral")
+        parser.add_argument("--listar", action="store_true", help="Listar las ejecuciones del historial")
+        parser.add_argument("--comparar", nargs=2, type=int, metavar=("ANTES", "DESPUES"),
+                            help="Comparar dos ejecuciones del historial por índice (admite negativos)")
+
+    def handle(self, *args, **options):
+        ejecuciones = historial.cargar(options["historial"])
+        if options["listar"]:
+            self._listar(ejecuciones)
+            return
+        if options["comparar"]:
+            try:
+                antes, despues = (ejecuciones[i] for i in options["comparar"])
+            except IndexError:
+                raise CommandError(f"El historial tiene {len(ejecuciones)} ejecuciones")
+            self._comparar(antes, despues, options)
+            return
+
+        for opcion in ("obras", "repeticiones", "importar_obras"):
+            if options[opcion] < 1:
+                raise CommandError(f"--{opcion.replace('_', '-')} debe ser al menos 1")
+        casos = options["caso"] or list(CASOS)
+
+        with tempfile.TemporaryDirectory() as directorio:
+            try:
+                with transaction.atomic():
+                    ejecucion = self._medir(casos, Path(directorio), options)
+                    raise _Deshacer
+            except _Deshacer:
+                pass
+
+        anterior = historial.anterior_comparable(ejecuciones, ejecucion)
+        if not options["no_guardar"]:
+            ejecuciones.append(ejecucion)
+            historial.guardar(options["historial"], ejecuciones)
+            self.stdout.write(f"Guardada como ejecución {len(ejecuciones) - 1} en {options['historial']}")
+        if anterior is None:
+            self.stdout.write("Sin ejecuciones anteriores comparables")
+        else:
+            self._comparar(anterior, ejecucion, options)
+
+    def _medir(self, casos, directorio, options):
+        distribuciones = Distribuciones.desde_archivo(settings.BASE_DIR / "datos_obras.json")
+        if options["existentes"]:
+            escala = {"existentes": True, "obras": Obra.objects.count(),
+                      "representaciones": Representacion.objects.count()}
+        else:
+            generador = GeneradorCatalogo(
+                distribuciones, options["obras"], representaciones=options["representaciones"],
+                semilla=options["semilla"],
+                titulos_existentes=Obra.objects.values_list("titulo_limpio", flat=True).iterator(),
+            )
+            self.stdout.write(
+                f"Creando {options['obras']} obras y {generador.total_representaciones} representaciones sintéticas..."
+            )
+            guardar(generador)
+            escala = {"obras": options["obras"], "representaciones": generador.total_representaciones,
+                      "semilla": options["semilla"]}
+        escala["importar_obras"] = options["importar_obras"]
+
+        datos = Datos(directorio, distribuciones, options["semilla"], options["importar_obras"])
+        self.stdout.write(f"{options['repeticiones']} repeticiones por caso")
+        self.stdout.write("")
+        self.stdout.write(f"{'caso':<24} {'mediana ms':>11} {'p95 ms':>10} {'pico KiB':>10} {'consultas':>10}")
+        resultados = {}
+        for nombre in casos:
+            funcion, preparar = CASOS[nombre](datos)
+            resultado = medir(funcion, options["repeticiones"], preparar)
+            resultados[nombre] = resultado
+            self.stdout.write(
+                f"{nombre:<24} {resultado['mediana_ms']:>11.1f} {resultado['p95_ms']:>10.1f} "
+                f"{resultado['pico_kib']:>10.0f} {resultado['consultas']:>10}"
+            )
+        self.stdout.write("")
+
+        return {
+            "fecha": timezone.now().isoformat(),
+            "etiqueta": options["etiqueta"],
+            "commit": _commit(),
+            "base_datos": connection.vendor,
+            "python": platform.python_version(),
+            "escala": escala,
+            "resultados": resultados,
+        }
+
+    def _listar(self, ejecuciones):
+        if not ejecuciones:
+            self.stdout.write("Historial vacío")
+        for i, ejecucion in enumerate(ejecuciones):
+            escala = ", ".join(f"{k}={v}" for k, v in ejecucion["escala"].items())
+            self.stdout.write(
+                f"{i:>4}  {ejecucion['fecha'][:19]}  {ejecucion.get('commit') or '-':<9} "
+                f"{ejecucion['base_datos']:<10} {escala}  {ejecucion.get('etiqueta', '')}"
+            )
+
+    def _comparar(self, antes, despues, options):
+        if not historial.comparables(antes, despues):
+            self.stdout.write(self.style.WARNING("Las ejecuciones no tienen la misma escala o base de datos"))
+        self.stdout.write(
+            f"Comparación con {antes.get('commit') or antes['fecha'][:19]} "
+            f"({antes.get('etiqueta') or 'sin etiqueta'}):"
+        )
+        self.stdout.write(f"{'caso':<24} {'métrica':<11} {'antes':>11} {'después':>11} {'cambio':>9}")
+        empeoran = []
+        for caso, metrica, a, d, cambio, empeora in historial.comparar(antes, despues, options["umbral"]):
+            linea = f"{caso:<24} {metrica:<11} {a:>11.1f} {d:>11.1f} {cambio:>+8.1f}%"
+            if empeora:
+                empeoran.append(f"{caso}.{metrica}")
+                self.stdout.write(self.style.ERROR(linea))
+            else:
+                self.stdout.write(linea)
+        if empeoran and options["fallar_si_empeora"]:
+            raise CommandError(f"Empeoran más de un {options['umbral']:g}%: {', '.join(empeoran)}")
@@ -0,0 +1,40 @@
+"""
+Management command para volcar el diario de validaciones a los archivos de síntesis.
+
+Escribe en cada item de data/fuentesix/*_sintesis_validacion.json su última
+decisión (DecisionValidacion) y el cursor de compactación en
+metadata_archivo (ver apps/obras/validacion.py). Se puede ejecutar en
+cualquier momento, también con investigadores validando: las decisiones que
+lleguen durante la compactación quedan para la siguiente.
+
+Uso:
+    python manage.py compactar_validaciones                        # todos los archivos
+    python manage.py compactar_validaciones --archivo X_sintesis_validacion.json
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.obras.validacion import archivos_sintesis, compactar
+
+
+class Command(BaseCommand):
+    help = "Vuelca las decisiones de validación pendientes a los archivos de síntesis"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--archivo",
+            action="append",
+            help="Compactar solo este archivo de síntesis (se puede repetir)",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for nombre in options["archivo"] or archivos_sintesis():
+            try:
+                cambiados = compactar(nombre)
+            except (ValueError, FileNotFoundError) as e:
+                raise CommandError(str(e))
+            total += cambiados
+            if cambiados:
+                self.stdout.write(f"{nombre}: {cambiados} items actualizados")
+        self.stdout.write(self.style.SUCCESS(f"Compactadas {total} decisiones"))
@@ -0,0 +1,88 @@
+"""
+Management command para exportar el dataset JSONL por shards para análisis con IA.
+
+Obras, representaciones, fragmentos de páginas del PDF y comentarios con
+etiqueta_ia, en archivos de como mucho --tokens-por-shard tokens estimados y
+un manifest.json (ver apps/obras/dataset_ia.py).
+
+Uso:
+    python manage.py exportar_dataset_ia                                  # dataset_ia/ en la raíz
+    python manage.py exportar_dataset_ia --salida /tmp/dataset --procesos 4
+    python manage.py exportar_dataset_ia --tipo obra --tipo representacion --fuente FUENTESXI
+    python manage.py exportar_dataset_ia --tokens-por-shard 30000         # shards más pequeños
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.obras.dataset_ia import REGISTROS_POR_BLOQUE, TIPOS, TOKENS_POR_SHARD, exportar_dataset
+
+
+class Command(BaseCommand):
+    help = "Exporta obras, representaciones, páginas y comentarios etiquetados a shards JSONL para IA"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--salida",
+            default="",
+            help="Directorio de salida (default: dataset_ia/ en la raíz del proyecto)",
+        )
+        parser.add_argument(
+            "--tipo",
+            action="append",
+            choices=TIPOS,
+            help="Exportar solo este tipo de registro (se puede repetir)",
+        )
+        parser.add_argument(
+            "--fuente",
+            default="",
+            help="Solo obras (y sus representaciones) de esta fuente_principal, p.ej. FUENTESXI",
+        )
+        parser.add_argument(
+            "--tokens-por-shard",
+            type=int,
+            default=TOKENS_POR_SHARD,
+            help=f"Tokens estimados como máximo por archivo (default: {TOKENS_POR_SHARD})",
+        )
+        parser.add_argument(
+            "--registros-por-bloque",
+            type=int,
+            default=REGISTROS_POR_BLOQUE,
+            help=f"Ids por bloque paralelo (default: {REGISTROS_POR_BLOQUE})",
+        )
+        parser.add_argument(
+            "--procesos",
+            type=int,
+            default=min(os.cpu_count() or 1, 4),
+            help="Procesos que escriben bloques en paralelo (default: núcleos, máx. 4)",
+        )
+
+    def handle(self, *args, **options):
+        if options["tokens_por_shard"] < 1 or options["registros_por_bloque"] < 1 or options["procesos"] < 1:
+            raise CommandError("--tokens-por-shard, --registros-por-bloque y --procesos deben ser >= 1")
+        salida = options["salida"] or str(settings.BASE_DIR / "dataset_ia")
+        tipos = [t for t in TIPOS if t in (options["tipo"] or TIPOS)]
+
+        inicio = time.perf_counter()
+        manifest = exportar_dataset(
+            salida,
+            tipos=tipos,
+            fuente=options["fuente"] or None,
+            tokens_por_shard=options["tokens_por_shard"],
+            registros_por_bloque=options["registros_por_bloque"],
+            procesos=options["procesos"],
+        )
+        segundos = time.perf_counter() - inicio
+
+        for tipo, totales in manifest["totales"].items():
+            self.stdout.write(
+                f"{tipo:<15} {totales['registros']:>8} registros {totales['tokens']:>10} tokens "
+                f"{totales['shards']:>5} shards"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Exportados {len(manifest['shards'])} shards -> {salida} ({segundos:.1f} s)"
+        ))
+        return salida
@@ -2,34 +2,53 @@
 Management command para exportar la DB a datos_obras.json.
 
 Genera el mismo formato { metadata, obras } que espera index.html,
-reutilizando la lógica de serialización de views_api_json.py.
+con la misma serialización por obra que /api/datos-obras/ (views_api_json.py).
 
 Uso:
     python manage.py exportar_json                           # escribe datos_obras.json en raíz
     python manage.py exportar_json --salida /tmp/export.json # ruta personalizada
     python manage.py exportar_json --indent 0                # sin indentación (más compacto)
+    python manage.py exportar_json --sin-shards              # solo el JSON monolítico
+
+Además de datos_obras.json escribe datos_obras/ con el manifest y los shards
+que carga el frontend bajo demanda (ver apps/obras/shards.py). Todo lo escrito
+se precomprime en .gz/.br para servirlo según Accept-Encoding
+(ver apps/obras/archivos_estaticos.py); --sin-precomprimir lo desactiva.
 """
 
 import json
-from datetime import datetime
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
 
 from apps.autores.models import Autor
 from apps.lugares.models import Lugar
 from apps.obras.models import Obra
+from apps.obras.archivos_estaticos import precomprimir, precomprimir_directorio
+from apps.obras.shards import escribir_shards
 from apps.representaciones.models import Representacion
-from apps.obras.views_api_json import (
-    _serializar_autor,
-    _serializar_representacion,
-    _normalizar_fuente_display,
-)
+from apps.obras.delta import cursor_actual
+from apps.obras.views_api_json import _serializar_obra, obras_para_serializar
+
+
+def _fecha_datos():
+    """Fecha de la última modificación del dataset (no la de exportación).
+
+    Así dos exportaciones sin cambios en la DB producen el mismo archivo byte a
+    byte, y publicar_github puede omitir la subida.
+    """
+    fechas = [m.objects.aggregate(f=Max("updated_at"))["f"] for m in (Obra, Autor, Lugar)]
+    fechas = [f for f in fechas if f]
+    return timezone.localtime(max(fechas)) if fechas else timezone.localtime()
 
 
 class Command(BaseCommand):
     help = "Exporta todas las obras de la DB a datos_obras.json"
+    # progreso: callable(porcentaje, mensaje) que pasan las tareas en segundo plano
+    stealth_options = ("progreso",)
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -48,6 +67,16 @@ class Command(BaseCommand):
             action="store_true",
             help="También copiar a frontend/github-pages/datos_obras.json",
         )
+        parser.add_argument(
+            "--sin-shards",
+            action="store_true",
+            help="No generar el directorio de shards (manifest + lista + detalle)",
+        )
+        parser.add_argument(
+            "--sin-precomprimir",
+            action="store_true",
+            help="No generar las variantes .gz/.br de los archivos exportados",
+        )
 
     def handle(self, *args, **options):
         salida = options["salida"]
@@ -55,84 +84,37 @@ class Command(BaseCommand):
             salida = str(settings.BASE_DIR / "datos_obras.json")
 
         indent = options["indent"] or None
+        progreso = options.get("progreso")
 
         self.stdout.write("Consultando base de datos...")
 
-        obras = (
-            Obra.objects
-            .select_related("autor")
-            .prefetch_related("representaciones__lugar")
-            .order_by("id")
-        )
+        cambio = cursor_actual()
+        total_obras = Obra.objects.count() if progreso else 0
 
         resultado = []
-        for obra in obras:
-            reps = obra.representaciones.all()
-
-            lugar_principal = ""
-            region_principal = ""
-            tipo_lugar_principal = ""
-            compania_principal = ""
-            if reps:
-                primera = reps[0]
-                if primera.lugar:
-                    lugar_principal = primera.lugar.nombre or ""
-                    region_principal = primera.lugar.region or ""
-                tipo_lugar_principal = primera.tipo_lugar or ""
-                compania_principal = primera.compañia or ""
-
-            obra_dict = {
-                "id": obra.id,
-                "titulo": obra.titulo_limpio or obra.titulo,
-                "titulo_original": obra.titulo,
-                "titulo_alternativo": obra.titulo_alternativo or "",
-                "autor": _serializar_autor(obra.autor),
-                "tipo_obra": obra.tipo_obra or "",
-                "genero": obra.genero or "",
-                "subgenero": obra.subgenero or "",
-                "fuente": _normalizar_fuente_display(obra.fuente_principal),
-                "origen_datos": obra.origen_datos or "",
-                "pagina_pdf": obra.pagina_pdf,
-                "texto_original_pdf": obra.texto_original_pdf or "",
-                "tema": obra.tema or "",
-                "musica_conservada": "Sí" if obra.musica_conservada else "No",
-                "compositor": obra.compositor or "",
-                "bibliotecas_musica": obra.bibliotecas_musica or "",
-                "bibliografia_musica": obra.bibliografia_musica or "",
-                "mecenas": obra.mecenas or "",
-                "fecha_creacion": obra.fecha_creacion_estimada or "",
-                "idioma": obra.idioma or "",
-                "versos": obra.versos,
-                "actos": obra.actos,
-                "notas": obra.notas or "",
-                "notas_bibliograficas": obra.notas_bibliograficas or "",
-                "edicion_principe": obra.edicion_principe or "",
-                "manuscritos_conocidos": obra.manuscritos_conocidos or "",
-                "ediciones_conocidas": obra.ediciones_conocidas or "",
-                "observaciones": obra.observaciones or "",
-                "lugar": lugar_principal,
-                "region": region_principal,
-                "tipo_lugar": tipo_lugar_principal,
-                "compania": compania_principal,
-                "total_representaciones": reps.count(),
-                "representaciones": [_serializar_representacion(r) for r in reps],
-            }
-            resultado.append(obra_dict)
+        for obra in obras_para_serializar():
+            if progreso and len(resultado) % 200 == 0:
+                progreso(80 * len(resultado) // max(total_obras, 1), f"Serializando obras ({len(resultado)}/{total_obras})")
+            resultado.append(_serializar_obra(obra))
 
+        fecha = _fecha_datos()
         metadata = {
             "version": "2.0",
-            "fecha_actualizacion": datetime.now().strftime("%Y-%m-%d"),
-            "fecha_completa": datetime.now().isoformat(),
+            "fecha_actualizacion": fecha.strftime("%Y-%m-%d"),
+            "fecha_completa": fecha.isoformat(),
             "total_obras": len(resultado),
             "total_autores": Autor.objects.count(),
             "total_lugares": Lugar.objects.count(),
             "total_representaciones": Representacion.objects.count(),
             "fuente": "Django DB",
             "fuentes": ["FUENTES IX", "CATCOM", "AMBAS"],
+            "cambio": cambio,
         }
 
         payload = {"metadata": metadata, "obras": resultado}
 
+        if progreso:
+            progreso(85, "Escribiendo JSON")
         salida_path = Path(salida)
         salida_path.parent.mkdir(parents=True, exist_ok=True)
         with open(salida_path, "w", encoding="utf-8") as f:
@@ -142,6 +124,9 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(
             f"Exportado {len(resultado)} obras -> {salida_path} ({size_kb:.1f} KB)"
         ))
+        escritos = [salida_path]
+        if not options["sin_shards"]:
+            escritos.append(self._escribir_shards(payload, salida_path))
 
         if options["tambien_frontend"]:
             frontend_path = settings.BASE_DIR / "frontend" / "github-pages" / "datos_obras.json"
@@ -149,5 +134,26 @@ class Command(BaseCommand):
             with open(frontend_path, "w", encoding="utf-8") as f:
                 json.dump(payload, f, ensure_ascii=False, indent=indent)
             self.stdout.write(self.style.SUCCESS(f"Copiado a {frontend_path}"))
+            escritos.append(frontend_path)
+            if not options["sin_shards"]:
+                escritos.append(self._escribir_shards(payload, frontend_path))
+
+        if not options["sin_precomprimir"]:
+            if progreso:
+                progreso(95, "Precomprimiendo")
+            variantes = []
+            for ruta in escritos:
+                variantes += precomprimir_directorio(ruta) if ruta.is_dir() else precomprimir(ruta)
+            self.stdout.write(f"Precomprimidos: {len(variantes)} archivos .gz/.br")
 
         return str(salida_path)
+
+    def _escribir_shards(self, payload, json_path):
+        """Shards junto al JSON: datos_obras.json -> datos_obras/manifest.json, ..."""
+        directorio = json_path.parent / json_path.stem
+        manifest = escribir_shards(payload, directorio)
+        lista_kb = (directorio / manifest["lista"]).stat().st_size / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f"Shards -> {directorio} (lista {lista_kb:.1f} KB, {len(manifest['detalle'])} bloques de detalle)"
+        ))
+        return directorio
@@ -0,0 +1,95 @@
+"""
+Management command para generar un catálogo sintético (pruebas de escala y de carga).
+
+Reproduce las distribuciones de datos_obras.json (ver apps/obras/sintetico.py)
+al tamaño pedido, de 10³ a 10⁶ obras y hasta 10⁷ representaciones. La misma
+semilla da siempre el mismo catálogo.
+
+Uso:
+    python manage.py generar_catalogo_sintetico --obras 100000                  # en la DB
+    python manage.py generar_catalogo_sintetico --obras 1000000 --representaciones 10000000
+    python manage.py generar_catalogo_sintetico --obras 50000 --salida sintetico.json
+    python manage.py importar_json --archivo sintetico.json                     # importar después
+"""
+
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from apps.obras.models import Obra, PaginaPDF
+from apps.obras.sintetico import Distribuciones, GeneradorCatalogo, escribir_json, guardar
+
+
+class Command(BaseCommand):
+    help = "Genera un catálogo sintético con las distribuciones de datos_obras.json (en la DB o en JSON)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--obras", type=int, default=None,
+                            help="Obras a generar (default: las del archivo de origen)")
+        parser.add_argument("--representaciones", type=int, default=None,
+                            help="Representaciones en total (default: las que salgan de la distribución real)")
+        parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador (default: 0)")
+        parser.add_argument("--origen", default="datos_obras.json",
+                            help="JSON del que se sacan las distribuciones (default: datos_obras.json)")
+        parser.add_argument("--salida", default=None,
+                            help="Escribir un JSON compatible con importar_json en lugar de insertar en la DB")
+        parser.add_argument("--lote", type=int, default=2000, help="Obras por lote de inserción (default: 2000)")
+
+    def handle(self, *args, **options):
+        origen = Path(options["origen"])
+        if not origen.is_absolute():
+            origen = settings.BASE_DIR / origen
+        if not origen.exists():
+            raise CommandError(f"Archivo no encontrado: {origen}")
+        for opcion in ("obras", "representaciones"):
+            if options[opcion] is not None and options[opcion] < 0:
+                raise CommandError(f"--{opcion} no puede ser negativo")
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser al menos 1")
+
+        distribuciones = Distribuciones.desde_archivo(origen)
+        obras = distribuciones.total_obras if options["obras"] is None else options["obras"]
+        salida = options["salida"]
+        if salida:
+            # Los títulos solo tienen que ser únicos dentro del archivo
+            titulos, primera_pagina = (), 1
+        else:
+            titulos = Obra.objects.values_list("titulo_limpio", flat=True).iterator()
+            primera_pagina = (PaginaPDF.objects.aggregate(m=Max("numero_pagina"))["m"] or 0) + 1
+
+        inicio = time.perf_counter()
+        generador = GeneradorCatalogo(
+            distribuciones,
+            obras,
+            representaciones=options["representaciones"],
+            semilla=options["semilla"],
+            titulos_existentes=titulos,
+            primera_pagina=primera_pagina,
+        )
+        self.stdout.write(
+            f"Generando {obras} obras y {generador.total_representaciones} representaciones "
+            f"(semilla {options['semilla']})..."
+        )
+
+        if salida:
+            ruta = Path(salida)
+            with open(ruta, "w", encoding="utf-8") as f:
+                escribir_json(generador, f)
+            self.stdout.write(self.style.SUCCESS(f"Escrito {ruta} en {time.perf_counter() - inicio:.1f} s"))
+            return
+
+        def progreso(hechas, total):
+            self.stdout.write(f"  ...{hechas}/{total} obras")
+
+        totales = guardar(generador, options["lote"], progreso)
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS("=== Resumen ==="))
+        self.stdout.write(f"  Autores creados:           {totales['autores']}")
+        self.stdout.write(f"  Lugares creados:           {totales['lugares']}")
+        self.stdout.write(f"  Obras creadas:             {totales['obras']}")
+        self.stdout.write(f"  Representaciones creadas:  {totales['representaciones']}")
+        self.stdout.write(f"  Páginas PDF creadas:       {totales['paginas']}")
+        self.stdout.write(f"  Tiempo:                    {time.perf_counter() - inicio:.1f} s")
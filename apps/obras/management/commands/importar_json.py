@@ -18,6 +18,7 @@ from django.db import transaction
 
 from apps.autores.models import Autor
 from apps.lugares.models import Lugar
+from apps.obras.agregados import recalculo_diferido
 from apps.obras.models import Obra
 from apps.representaciones.models import Representacion
 
@@ -63,6 +64,8 @@ def parsear_fecha(texto):
 
 class Command(BaseCommand):
     help = "Importa datos_obras.json a la DB relacional (obras, autores, lugares, representaciones)"
+    # progreso: callable(porcentaje, mensaje) que pasan las tareas en segundo plano
+    stealth_options = ("progreso",)
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -82,6 +85,7 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        progreso = options.get("progreso")
         archivo = Path(options["archivo"])
         if not archivo.is_absolute():
             archivo = settings.BASE_DIR / archivo
@@ -106,7 +110,8 @@ class Command(BaseCommand):
 
         if options["limpiar"]:
             self.stdout.write(self.style.WARNING("Limpiando tablas..."))
-            Representacion.objects.all().delete()
+            with recalculo_diferido():
+                Representacion.objects.all().delete()
             Obra.objects.all().delete()
             Lugar.objects.all().delete()
             Autor.objects.all().delete()
@@ -141,7 +146,8 @@ class Command(BaseCommand):
 
         self.stdout.write("Importando obras...")
 
-        with transaction.atomic():
+        # Los agregados de representaciones de cada obra se recalculan una vez al final
+        with transaction.atomic(), recalculo_diferido():
             for i, obra_json in enumerate(obras_json):
                 try:
                     self._importar_obra(
@@ -159,6 +165,8 @@ class Command(BaseCommand):
 
                 if (i + 1) % 500 == 0:
                     self.stdout.write(f"  ...{i + 1}/{len(obras_json)} procesadas")
+                if progreso and (i + 1) % 100 == 0:
+                    progreso(95 * (i + 1) // len(obras_json), f"Importando obras ({i + 1}/{len(obras_json)})")
 
         self.stdout.write("")
         self.stdout.write(self.style.SUCCESS("=== Resumen ==="))
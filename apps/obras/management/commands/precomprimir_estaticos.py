@@ -0,0 +1,52 @@
+"""
+Management command para precomprimir los JSON que sirve Django al frontend.
+
+exportar_json ya precomprime lo que genera; este comando cubre los archivos
+estáticos de data/ (fuentesix, mapeos de páginas...) y sirve para regenerar
+todas las variantes tras copiar datos a mano.
+
+Uso:
+    python manage.py precomprimir_estaticos                 # data/, datos_obras* y frontend/github-pages
+    python manage.py precomprimir_estaticos --ruta data/fuentesix
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.obras.archivos_estaticos import brotli, precomprimir, precomprimir_directorio
+
+
+class Command(BaseCommand):
+    help = "Genera variantes .gz/.br de los JSON servidos al frontend"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ruta",
+            action="append",
+            default=[],
+            help="Archivo o directorio (relativo a BASE_DIR); se puede repetir",
+        )
+
+    def handle(self, *args, **options):
+        base = Path(settings.BASE_DIR)
+        rutas = [base / r for r in options["ruta"]] or [
+            base / "data",
+            base / "datos_obras.json",
+            base / "datos_obras",
+            base / "frontend" / "github-pages",
+        ]
+        if brotli is None:
+            self.stdout.write(self.style.WARNING("brotli no está instalado: solo se generará .gz"))
+
+        total = 0
+        for ruta in rutas:
+            if not ruta.exists():
+                if options["ruta"]:
+                    raise CommandError(f"No existe: {ruta}")
+                continue
+            escritas = precomprimir_directorio(ruta) if ruta.is_dir() else precomprimir(ruta)
+            total += len(escritas)
+            self.stdout.write(f"{ruta.relative_to(base) if base in ruta.parents else ruta}: {len(escritas)} variantes")
+        self.stdout.write(self.style.SUCCESS(f"Precomprimidos {total} archivos"))
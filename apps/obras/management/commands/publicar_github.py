@@ -1,34 +1,53 @@
 """
-Management command para publicar datos_obras.json en GitHub via Contents API.
+Management command para publicar datos_obras.json en GitHub.
 
 Flujo:
     1. Ejecuta exportar_json para generar el JSON fresco
-    2. Sube el archivo al repo via GitHub Contents API (PUT)
-    3. Opcionalmente sube también a frontend/github-pages/datos_obras.json
+    2. Calcula el SHA de blob git de cada archivo y omite los que no cambiaron
+    3. Sube los archivos modificados:
+         - si hay shards (lo normal), vía Git Data API (blobs + tree + commit +
+           ref): un único commit con todos los archivos, que además borra del
+           repo los shards que ya no se usan
+         - sin shards, uno a uno vía Contents API (un commit por archivo),
+           salvo con --un-commit
+    4. Opcionalmente incluye también frontend/github-pages/datos_obras.json
+    5. Incluye los shards vigentes (datos_obras/manifest.json y los que referencia).
+       Los nombres llevan hash: con un commit por archivo cada publicación
+       dejaría decenas de commits y los shards viejos crecerían sin límite
 
 Requisitos (variables de entorno):
-    GITHUB_TOKEN   -- Personal Access Token con scope "repo"
-    GITHUB_REPO    -- owner/repo  (ej: ivansimo/comedia_cortesana)
-    GITHUB_BRANCH  -- rama destino (default: main)
+    GITHUB_TOKEN    -- Personal Access Token con scope "repo"
+    GITHUB_REPO     -- owner/repo  (ej: ivansimo/comedia_cortesana)
+    GITHUB_BRANCH   -- rama destino (default: main)
+    GITHUB_API_URL  -- URL base de la API (default: https://api.github.com)
 
 Uso:
     python manage.py publicar_github
     python manage.py publicar_github --solo-exportar   # genera JSON sin subir
     python manage.py publicar_github --mensaje "v2.1"  # commit message personalizado
+    python manage.py publicar_github --un-commit       # un solo commit aunque no haya shards
 """
 
 import base64
+import hashlib
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
 
+from apps.obras.shards import archivos_publicables
+
 
 GITHUB_API = "https://api.github.com"
+# Blobs creados a la vez con la Git Data API (--un-commit)
+MAX_SUBIDAS_PARALELAS = 4
+# Reintentos de PUT cuando otro commit movió la rama entre el GET y el PUT (409)
+REINTENTOS_CONFLICTO = 3
 
 
 def _get_env(name, default=None):
@@ -50,35 +69,160 @@ def _github_headers(token):
     }
 
 
-def _upload_file(token, repo, branch, repo_path, local_path, message):
-    """Sube (crea o actualiza) un archivo en GitHub via Contents API."""
-    url = f"{GITHUB_API}/repos/{repo}/contents/{repo_path}"
-    headers = _github_headers(token)
+def _git_blob_sha(content_bytes):
+    """SHA-1 que git asigna al contenido (el mismo "sha" que devuelve la Contents API)."""
+    h = hashlib.sha1()
+    h.update(b"blob %d\0" % len(content_bytes))
+    h.update(content_bytes)
+    return h.hexdigest()
 
-    current_sha = None
-    resp = requests.get(url, headers=headers, params={"ref": branch}, timeout=30)
-    if resp.status_code == 200:
-        current_sha = resp.json().get("sha")
 
-    content_bytes = Path(local_path).read_bytes()
-    payload = {
-        "message": message,
-        "content": base64.b64encode(content_bytes).decode("ascii"),
-        "branch": branch,
-    }
-    if current_sha:
-        payload["sha"] = current_sha
+def _crear_sesion(token, conexiones=4):
+    """Session con keep-alive y pool de conexiones compartido por los hilos de subida."""
+    session = requests.Session()
+    session.headers.update(_github_headers(token))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=conexiones)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _error_api(resp, accion):
+    return CommandError(f"GitHub API error {resp.status_code} al {accion}: {resp.text[:500]}")
+
+
+def _upload_file(session, api, repo, branch, repo_path, content_bytes, message):
+    """Sube (crea o actualiza) un archivo vía Contents API si su contenido cambió.
+
+    Devuelve {"path", "sha", "subido"}; "subido" es False cuando el blob remoto
+    ya tenía el mismo SHA y no se hizo el PUT.
+    """
+    url = f"{api}/repos/{repo}/contents/{repo_path}"
+    sha_local = _git_blob_sha(content_bytes)
+    contenido_b64 = None
+
+    for _ in range(REINTENTOS_CONFLICTO):
+        current_sha = None
+        resp = session.get(url, params={"ref": branch}, timeout=30)
+        if resp.status_code == 200:
+            current_sha = resp.json().get("sha")
+        if current_sha == sha_local:
+            return {"path": repo_path, "sha": sha_local, "subido": False}
+
+        if contenido_b64 is None:
+            contenido_b64 = base64.b64encode(content_bytes).decode("ascii")
+        payload = {"message": message, "content": contenido_b64, "branch": branch}
+        if current_sha:
+            payload["sha"] = current_sha
+
+        resp = session.put(url, json=payload, timeout=60)
+        if resp.status_code in (200, 201):
+            return {"path": repo_path, "sha": sha_local, "subido": True}
+        if resp.status_code != 409:
+            break
+    raise _error_api(resp, f"subir {repo_path}")
+
+
+def _subir_uno_a_uno(session, api, repo, branch, archivos, message):
+    """Sube cada archivo con la Contents API, de uno en uno.
+
+    Cada PUT es un commit que mueve la rama: dos a la vez sobre la misma rama
+    se pisan (409), así que aquí no se paraleliza.
+    """
+    return [
+        _upload_file(session, api, repo, branch, repo_path, contenido, message)
+        for repo_path, contenido in archivos
+    ]
+
+
+def _publicar_un_commit(session, api, repo, branch, archivos, message, podar=()):
+    """Publica todos los archivos en un único commit con la Git Data API.
+
+    ref -> commit -> tree actual; compara SHAs de blob y, si algo cambió,
+    crea blobs (en paralelo), un tree sobre el anterior, el commit y mueve la rama.
+    Los archivos remotos bajo algún prefijo de ``podar`` que no estén en
+    ``archivos`` se eliminan en el mismo commit (shards de exportaciones viejas).
+    Devuelve (resultados, sha_commit o None si no había cambios).
+    """
+    base = f"{api}/repos/{repo}/git"
+
+    resp = session.get(f"{base}/ref/heads/{branch}", timeout=30)
+    if resp.status_code != 200:
+        raise _error_api(resp, f"leer la rama {branch}")
+    sha_padre = resp.json()["object"]["sha"]
+
+    resp = session.get(f"{base}/commits/{sha_padre}", timeout=30)
+    if resp.status_code != 200:
+        raise _error_api(resp, "leer el commit actual")
+    sha_tree_base = resp.json()["tree"]["sha"]
 
-    resp = requests.put(url, headers=headers, json=payload, timeout=60)
-    if resp.status_code not in (200, 201):
-        raise CommandError(
-            f"GitHub API error {resp.status_code} al subir {repo_path}: {resp.text[:500]}"
+    resp = session.get(f"{base}/trees/{sha_tree_base}", params={"recursive": "1"}, timeout=60)
+    if resp.status_code != 200:
+        raise _error_api(resp, "leer el árbol actual")
+    remotos = {e["path"]: e["sha"] for e in resp.json().get("tree", []) if e.get("type") == "blob"}
+
+    resultados = []
+    cambiados = []
+    for repo_path, contenido in archivos:
+        sha_local = _git_blob_sha(contenido)
+        subido = remotos.get(repo_path) != sha_local
+        resultados.append({"path": repo_path, "sha": sha_local, "subido": subido})
+        if subido:
+            cambiados.append((repo_path, contenido, sha_local))
+    locales = {repo_path for repo_path, _ in archivos}
+    borrados = sorted(
+        ruta for ruta in remotos
+        if ruta not in locales and any(ruta.startswith(prefijo) for prefijo in podar)
+    )
+    if not cambiados and not borrados:
+        return resultados, None
+
+    def crear_blob(contenido, sha_local):
+        resp = session.post(
+            f"{base}/blobs",
+            json={"content": base64.b64encode(contenido).decode("ascii"), "encoding": "base64"},
+            timeout=60,
         )
-    return resp.json()
+        if resp.status_code != 201:
+            raise _error_api(resp, "crear blob")
+        if resp.json()["sha"] != sha_local:
+            raise CommandError("El SHA del blob creado no coincide con el calculado localmente")
+        return resp.json()["sha"]
+
+    with ThreadPoolExecutor(max_workers=max(min(len(cambiados), MAX_SUBIDAS_PARALELAS), 1)) as pool:
+        shas = list(pool.map(lambda c: crear_blob(c[1], c[2]), cambiados))
+
+    entradas = [
+        {"path": repo_path, "mode": "100644", "type": "blob", "sha": sha}
+        for (repo_path, _, _), sha in zip(cambiados, shas)
+    ]
+    # sha None elimina la ruta del árbol
+    entradas += [{"path": ruta, "mode": "100644", "type": "blob", "sha": None} for ruta in borrados]
+    resp = session.post(f"{base}/trees", json={"base_tree": sha_tree_base, "tree": entradas}, timeout=60)
+    if resp.status_code != 201:
+        raise _error_api(resp, "crear el árbol")
+    sha_tree = resp.json()["sha"]
+
+    resp = session.post(f"{base}/commits", json={
+        "message": message,
+        "tree": sha_tree,
+        "parents": [sha_padre],
+    }, timeout=60)
+    if resp.status_code != 201:
+        raise _error_api(resp, "crear el commit")
+    sha_commit = resp.json()["sha"]
+
+    # force=False: si la rama avanzó mientras tanto, GitHub rechaza el update (422)
+    resp = session.patch(f"{base}/refs/heads/{branch}", json={"sha": sha_commit, "force": False}, timeout=30)
+    if resp.status_code != 200:
+        raise _error_api(resp, f"actualizar la rama {branch}")
+    return resultados, sha_commit
 
 
 class Command(BaseCommand):
     help = "Exporta datos_obras.json y lo publica en GitHub"
+    # progreso: callable(porcentaje, mensaje) que pasan las tareas en segundo plano
+    stealth_options = ("progreso",)
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -97,12 +241,24 @@ class Command(BaseCommand):
             default=True,
             help="También subir frontend/github-pages/datos_obras.json (default: True)",
         )
+        parser.add_argument(
+            "--un-commit",
+            action="store_true",
+            help="Publicar todos los archivos en un solo commit (Git Data API; siempre que hay shards)",
+        )
 
     def handle(self, *args, **options):
         json_path = settings.BASE_DIR / "datos_obras.json"
+        progreso = options.get("progreso") or (lambda porcentaje, mensaje="": None)
 
         self.stdout.write("Paso 1: Exportando JSON desde la DB...")
-        call_command("exportar_json", salida=str(json_path), tambien_frontend=True)
+        call_command(
+            "exportar_json",
+            salida=str(json_path),
+            tambien_frontend=True,
+            stdout=self.stdout,
+            progreso=lambda porcentaje, mensaje="": progreso(porcentaje // 2, mensaje),
+        )
 
         if options["solo_exportar"]:
             self.stdout.write(self.style.SUCCESS("JSON generado (sin subir a GitHub)."))
@@ -111,6 +267,7 @@ class Command(BaseCommand):
         token = _get_env("GITHUB_TOKEN", default="")
         repo = _get_env("GITHUB_REPO", default="")
         branch = _get_env("GITHUB_BRANCH", default="main")
+        api = _get_env("GITHUB_API_URL", default=GITHUB_API).rstrip("/")
 
         if not token or not repo:
             raise CommandError(
@@ -118,8 +275,8 @@ class Command(BaseCommand):
                 "Configúralas en .env o en App Service > Configuration."
             )
 
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        contenido_json = json_path.read_bytes()
+        data = json.loads(contenido_json)
         n_obras = data.get("metadata", {}).get("total_obras", "?")
 
         now = datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -128,23 +285,48 @@ class Command(BaseCommand):
         else:
             commit_msg = f"Actualizar datos_obras.json ({n_obras} obras) - {now}"
 
-        self.stdout.write(f"Paso 2: Subiendo a {repo} (rama {branch})...")
-
-        _upload_file(token, repo, branch, "datos_obras.json", json_path, commit_msg)
-        self.stdout.write(self.style.SUCCESS("  datos_obras.json subido."))
-
+        archivos = [("datos_obras.json", contenido_json)]
+        rutas_json = ["datos_obras.json"]
         if options["tambien_frontend"]:
             frontend_path = settings.BASE_DIR / "frontend" / "github-pages" / "datos_obras.json"
             if frontend_path.exists():
-                _upload_file(
-                    token, repo, branch,
-                    "frontend/github-pages/datos_obras.json",
-                    frontend_path,
-                    commit_msg,
+                archivos.append(("frontend/github-pages/datos_obras.json", frontend_path.read_bytes()))
+                rutas_json.append("frontend/github-pages/datos_obras.json")
+
+        directorios_shards = [ruta[: -len(".json")] + "/" for ruta in rutas_json]
+        for directorio in directorios_shards:
+            local = settings.BASE_DIR / directorio
+            for nombre in archivos_publicables(local):
+                archivos.append((directorio + nombre, (local / nombre).read_bytes()))
+        # Con shards, siempre un commit que también poda los que dejaron de usarse
+        un_commit = options["un_commit"] or len(archivos) > len(rutas_json)
+
+        self.stdout.write(f"Paso 2: Subiendo {len(archivos)} archivo(s) a {repo} (rama {branch})...")
+        progreso(50, "Subiendo a GitHub")
+
+        with _crear_sesion(token, conexiones=MAX_SUBIDAS_PARALELAS) as session:
+            if un_commit:
+                resultados, sha_commit = _publicar_un_commit(
+                    session, api, repo, branch, archivos, commit_msg, podar=directorios_shards,
                 )
-                self.stdout.write(self.style.SUCCESS(
-                    "  frontend/github-pages/datos_obras.json subido."
-                ))
+            else:
+                resultados = _subir_uno_a_uno(session, api, repo, branch, archivos, commit_msg)
+                sha_commit = None
+
+        for r in resultados:
+            if r["subido"]:
+                self.stdout.write(self.style.SUCCESS(f"  {r['path']} subido."))
+            elif options["verbosity"] > 1:
+                self.stdout.write(f"  {r['path']} sin cambios (omitido).")
+        omitidos = sum(not r["subido"] for r in resultados)
+        if omitidos:
+            self.stdout.write(f"  {omitidos} archivo(s) sin cambios (omitidos).")
+        if sha_commit:
+            self.stdout.write(f"  Commit {sha_commit[:10]} con {sum(r['subido'] for r in resultados)} archivo(s).")
+
+        if not sha_commit and not any(r["subido"] for r in resultados):
+            self.stdout.write(self.style.SUCCESS("\nSin cambios: nada que publicar."))
+            return
 
         self.stdout.write(self.style.SUCCESS(
             f"\nPublicación completada: {n_obras} obras -> github.com/{repo}"
@@ -0,0 +1,33 @@
+"""
+Management command para reconstruir los agregados de representaciones de Obra.
+
+Las señales los mantienen al día; esto es para después de cargas que no pasan
+por el ORM (SQL directo, bulk_create, restaurar una copia) o para verificar.
+
+Uso:
+    python manage.py recalcular_agregados
+    python manage.py recalcular_agregados --obra 12 --obra 15
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.obras.agregados import TAMANO_LOTE, recalcular, recalcular_todas
+from apps.obras.models import Obra
+
+
+class Command(BaseCommand):
+    help = "Reconstruye total, primera/última fecha y lugares de representación guardados en cada obra"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--obra", type=int, action="append", help="Solo esta obra (se puede repetir)")
+        parser.add_argument("--lote", type=int, default=TAMANO_LOTE,
+                            help=f"Obras por lote (default: {TAMANO_LOTE})")
+
+    def handle(self, *args, **options):
+        if options["obra"]:
+            cambiadas = recalcular(options["obra"])
+            total = len(set(options["obra"]))
+        else:
+            cambiadas = recalcular_todas(options["lote"])
+            total = Obra.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"{cambiadas} de {total} obras actualizadas"))
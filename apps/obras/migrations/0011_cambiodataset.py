@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0010_tareafondo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioDataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('obra_id', models.IntegerField(db_index=True)),
+                ('tipo', models.CharField(choices=[('actualizada', 'Actualizada'), ('eliminada', 'Eliminada')], max_length=12)),
+                ('fecha', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Cambio del dataset',
+                'verbose_name_plural': 'Cambios del dataset',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0011_cambiodataset'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='obra',
+            index=models.Index(fields=['tipo_obra', 'titulo_limpio'], name='obra_tipo_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obra',
+            index=models.Index(fields=['fuente_principal', 'titulo_limpio'], name='obra_fuente_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obra',
+            index=models.Index(fields=['genero', 'titulo_limpio'], name='obra_genero_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='obra',
+            index=models.Index(fields=['subgenero', 'titulo_limpio'], name='obra_subgenero_titulo_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:41
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def calcular_agregados(apps, schema_editor):
+    """Rellena los agregados de las obras existentes (misma lógica que agregados.calcular)."""
+    Obra = apps.get_model('obras', 'Obra')
+    Representacion = apps.get_model('representaciones', 'Representacion')
+
+    valores = {}
+    for fila in Representacion.objects.order_by().values('obra_id').annotate(
+        total=Count('id'), primera=Min('fecha'), ultima=Max('fecha')
+    ):
+        valores[fila['obra_id']] = Obra(
+            pk=fila['obra_id'],
+            representaciones_total=fila['total'],
+            representaciones_primera=fila['primera'],
+            representaciones_ultima=fila['ultima'],
+            representaciones_lugares=[],
+        )
+    lugares = Representacion.objects.filter(lugar__isnull=False).order_by()
+    for obra_id, nombre in lugares.values_list('obra_id', 'lugar__nombre').distinct():
+        valores[obra_id].representaciones_lugares.append(nombre)
+    for obra in valores.values():
+        obra.representaciones_lugares.sort()
+    Obra.objects.bulk_update(
+        list(valores.values()),
+        ['representaciones_total', 'representaciones_primera', 'representaciones_ultima', 'representaciones_lugares'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('obras', '0012_indices_busqueda'),
+        ('representaciones', '0004_indices_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='obra',
+            name='representaciones_lugares',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Lugares donde se ha representado (calculado)'),
+        ),
+        migrations.AddField(
+            model_name='obra',
+            name='representaciones_primera',
+            field=models.CharField(blank=True, editable=False, help_text='Fecha de la primera representación (calculado)', max_length=50, null=True),
+        ),
+        migrations.AddField(
+            model_name='obra',
+            name='representaciones_total',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de representaciones (calculado)'),
+        ),
+        migrations.AddField(
+            model_name='obra',
+            name='representaciones_ultima',
+            field=models.CharField(blank=True, editable=False, help_text='Fecha de la última representación (calculado)', max_length=50, null=True),
+        ),
+        migrations.RunPython(calcular_agregados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('obras', '0013_agregados_representaciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionValidacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(max_length=255)),
+                ('tipo', models.CharField(choices=[('representacion', 'Representación'), ('obra', 'Obra'), ('lugar', 'Lugar')], max_length=20)),
+                ('id_temporal', models.CharField(max_length=255)),
+                ('estado', models.CharField(choices=[('validado', 'Validado'), ('rechazado', 'Rechazado')], max_length=20)),
+                ('comentario', models.TextField(blank=True, default='')),
+                ('usuario_nombre', models.CharField(blank=True, default='', max_length=150)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='decisiones_validacion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Decisión de validación',
+                'verbose_name_plural': 'Decisiones de validación',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['archivo', 'id'], name='decision_archivo_idx')],
+            },
+        ),
+    ]
@@ -157,6 +157,32 @@ class Obra(models.Model):
         blank=True, 
         help_text="Observaciones generales"
     )
+    # Agregados de representaciones, mantenidos por agregados.py
+    representaciones_total = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Número de representaciones (calculado)"
+    )
+    representaciones_primera = models.CharField(
+        max_length=50,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Fecha de la primera representación (calculado)"
+    )
+    representaciones_ultima = models.CharField(
+        max_length=50,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Fecha de la última representación (calculado)"
+    )
+    representaciones_lugares = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Lugares donde se ha representado (calculado)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -165,32 +191,51 @@ class Obra(models.Model):
         verbose_name = "Obra"
         verbose_name_plural = "Obras"
         ordering = ['titulo_limpio']
+        # Filtros de /api/obras/search/ (ver filtros.py). Cada índice termina en
+        # titulo_limpio para que filtrar y paginar por título recorra el índice
+        # en orden, sin ordenar todas las coincidencias.
+        indexes = [
+            models.Index(fields=['tipo_obra', 'titulo_limpio'], name='obra_tipo_titulo_idx'),
+            models.Index(fields=['fuente_principal', 'titulo_limpio'], name='obra_fuente_titulo_idx'),
+            models.Index(fields=['genero', 'titulo_limpio'], name='obra_genero_titulo_idx'),
+            models.Index(fields=['subgenero', 'titulo_limpio'], name='obra_subgenero_titulo_idx'),
+        ]
 
     def __str__(self):
         return self.titulo_limpio or self.titulo
 
+    def save(self, *args, **kwargs):
+        # Los agregados los escribe agregados.py: un save() de una instancia
+        # cargada antes no debe pisarlos con valores viejos
+        if (not args and not self._state.adding
+                and kwargs.get('update_fields') is None and not kwargs.get('force_insert')):
+            from .agregados import CAMPOS_AGREGADOS
+            excluidos = set(CAMPOS_AGREGADOS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.attname for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in excluidos
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def total_representaciones(self):
         """Retorna el número total de representaciones de esta obra"""
-        return self.representaciones.count()
+        return self.representaciones_total
 
     @property
     def primera_representacion(self):
         """Retorna la fecha de la primera representación"""
-        primera = self.representaciones.order_by('fecha').first()
-        return primera.fecha if primera else None
+        return self.representaciones_primera
 
     @property
     def ultima_representacion(self):
         """Retorna la fecha de la última representación"""
-        ultima = self.representaciones.order_by('-fecha').first()
-        return ultima.fecha if ultima else None
+        return self.representaciones_ultima
 
     @property
     def lugares_representacion(self):
         """Retorna la lista de lugares donde se ha representado"""
-        lugares = self.representaciones.values_list('lugar__nombre', flat=True).distinct()
-        return list(lugares)
+        return list(self.representaciones_lugares)
 
 
 class Manuscrito(models.Model):
@@ -435,32 +480,39 @@ class ComentarioUsuario(models.Model):
         return [obra.titulo_limpio for obra in self.obras_seleccionadas.all()]
     
     def exportar_para_ia(self):
-        """Exporta el comentario en formato texto para IA"""
-        obras = self.obras_seleccionadas.all()
+        """Exporta el comentario en formato texto para IA.
+
+        Usa las obras prefetchadas si las hay: con el ``Prefetch`` de
+        obras_seleccionadas con ``select_related("autor")`` (y el usuario con
+        select_related) de exportar_comentarios.comentarios_para_exportar no
+        hace consultas.
+        """
+        obras = list(self.obras_seleccionadas.all())
         
-        texto = f"=== COMENTARIO #{self.id} ===\n"
-        texto += f"Título: {self.titulo}\n"
-        texto += f"Usuario: {self.usuario.get_full_name() or self.usuario.username}\n"
-        texto += f"Catálogo: {self.catalogo}\n"
-        texto += f"Fecha: {self.fecha_creacion.strftime('%Y-%m-%d %H:%M')}\n"
-        texto += f"Obras seleccionadas: {obras.count()}\n\n"
-        
-        texto += "--- OBRAS ---\n"
+        partes = [
+            f"=== COMENTARIO #{self.id} ===\n",
+            f"Título: {self.titulo}\n",
+            f"Usuario: {self.usuario.get_full_name() or self.usuario.username}\n",
+            f"Catálogo: {self.catalogo}\n",
+            f"Fecha: {self.fecha_creacion.strftime('%Y-%m-%d %H:%M')}\n",
+            f"Obras seleccionadas: {len(obras)}\n\n",
+            "--- OBRAS ---\n",
+        ]
         for obra in obras:
-            texto += f"\nID: {obra.id}\n"
-            texto += f"Título: {obra.titulo_limpio or obra.titulo}\n"
-            texto += f"Autor: {obra.autor.nombre if obra.autor else 'Desconocido'}\n"
-            texto += f"Género: {obra.tipo_obra or 'N/A'}\n"
+            partes.append(f"\nID: {obra.id}\n")
+            partes.append(f"Título: {obra.titulo_limpio or obra.titulo}\n")
+            partes.append(f"Autor: {obra.autor.nombre if obra.autor else 'Desconocido'}\n")
+            partes.append(f"Género: {obra.tipo_obra or 'N/A'}\n")
             if obra.genero:
-                texto += f"Subgénero: {obra.genero}\n"
+                partes.append(f"Subgénero: {obra.genero}\n")
             if obra.fecha_creacion_estimada:
-                texto += f"Fecha: {obra.fecha_creacion_estimada}\n"
+                partes.append(f"Fecha: {obra.fecha_creacion_estimada}\n")
         
-        texto += f"\n--- COMENTARIO DEL INVESTIGADOR ---\n"
-        texto += f"{self.comentario}\n"
-        texto += "\n" + "="*50 + "\n\n"
+        partes.append("\n--- COMENTARIO DEL INVESTIGADOR ---\n")
+        partes.append(f"{self.comentario}\n")
+        partes.append("\n" + "="*50 + "\n\n")
         
-        return texto
+        return "".join(partes)
 
 
 class PropuestaCambioObra(models.Model):
@@ -537,4 +589,153 @@ class VotoPropuestaCambioObra(models.Model):
         unique_together = ["propuesta", "usuario"]
 
     def __str__(self):
-        return f"{self.usuario.username} - {self.propuesta_id} ({self.voto})"
\ No newline at end of file
+        return f"{self.usuario.username} - {self.propuesta_id} ({self.voto})"
+
+
+class TareaFondo(models.Model):
+    """Tarea larga (exportar, publicar, importar, reindexar) ejecutada fuera de la petición HTTP."""
+
+    TIPO_CHOICES = [
+        ("exportar", "Exportar datos_obras.json"),
+        ("publicar", "Publicar en GitHub"),
+        ("importar", "Importar JSON"),
+        ("reindexar", "Reindexar cachés"),
+    ]
+
+    ESTADO_CHOICES = [
+        ("pendiente", "Pendiente"),
+        ("en_curso", "En curso"),
+        ("completada", "Completada"),
+        ("fallida", "Fallida"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default="pendiente")
+    parametros = models.JSONField(default=dict, blank=True)
+    progreso = models.PositiveSmallIntegerField(default=0, help_text="Porcentaje completado (0-100)")
+    mensaje = models.CharField(max_length=255, blank=True, default="")
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    creada_por = models.ForeignKey(
+        "usuarios.Usuario",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tareas_fondo",
+    )
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = "obras"
+        verbose_name = "Tarea en segundo plano"
+        verbose_name_plural = "Tareas en segundo plano"
+        ordering = ["-fecha_creacion"]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.estado})"
+
+    @property
+    def terminada(self):
+        return self.estado in ("completada", "fallida")
+
+    def como_dict(self):
+        return {
+            "id": self.pk,
+            "tipo": self.tipo,
+            "estado": self.estado,
+            "progreso": self.progreso,
+            "mensaje": self.mensaje,
+            "resultado": self.resultado,
+            "error": self.error,
+            "terminada": self.terminada,
+            "fecha_creacion": self.fecha_creacion.isoformat() if self.fecha_creacion else None,
+            "fecha_inicio": self.fecha_inicio.isoformat() if self.fecha_inicio else None,
+            "fecha_fin": self.fecha_fin.isoformat() if self.fecha_fin else None,
+        }
+
+
+class CambioDataset(models.Model):
+    """Registro de cambios del dataset público, para /api/datos-obras/delta/.
+
+    Cada alta o edición de una obra (o de sus representaciones, su autor o
+    sus lugares) añade una fila "actualizada"; cada borrado, una "eliminada".
+    El id es el cursor que usan los clientes para pedir lo cambiado después.
+    """
+
+    TIPO_CHOICES = [
+        ("actualizada", "Actualizada"),
+        ("eliminada", "Eliminada"),
+    ]
+
+    obra_id = models.IntegerField(db_index=True)
+    tipo = models.CharField(max_length=12, choices=TIPO_CHOICES)
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        app_label = "obras"
+        verbose_name = "Cambio del dataset"
+        verbose_name_plural = "Cambios del dataset"
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"#{self.pk} obra {self.obra_id} {self.tipo}"
+
+
+class DecisionValidacion(models.Model):
+    """Decisión de un investigador sobre un item de un archivo de síntesis.
+
+    Diario de solo inserción (ver validacion.py): validar o rechazar un item
+    añade una fila en lugar de reescribir el *_sintesis_validacion.json;
+    ``compactar_validaciones`` vuelca después al archivo la última decisión de
+    cada item. Las filas no se modifican: el archivo guarda el id de la última
+    decisión volcada y, al leerlo, se superponen solo las posteriores.
+    """
+
+    TIPO_CHOICES = [
+        ("representacion", "Representación"),
+        ("obra", "Obra"),
+        ("lugar", "Lugar"),
+    ]
+    ESTADO_CHOICES = [
+        ("validado", "Validado"),
+        ("rechazado", "Rechazado"),
+    ]
+
+    archivo = models.CharField(max_length=255)
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    id_temporal = models.CharField(max_length=255)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES)
+    comentario = models.TextField(blank=True, default="")
+    usuario = models.ForeignKey(
+        "usuarios.Usuario",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="decisiones_validacion",
+    )
+    usuario_nombre = models.CharField(max_length=150, blank=True, default="")
+    fecha = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = "obras"
+        verbose_name = "Decisión de validación"
+        verbose_name_plural = "Decisiones de validación"
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["archivo", "id"], name="decision_archivo_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.archivo} {self.tipo} {self.id_temporal} ({self.estado})"
+
+    def como_validacion(self):
+        """Bloque ``validacion`` del item, con las mismas claves que escribía validar_item."""
+        return {
+            "estado": self.estado,
+            "fecha": self.fecha.isoformat(),
+            "usuario": self.usuario_nombre,
+            "usuario_id": str(self.usuario_id) if self.usuario_id else None,
+            "comentario": self.comentario,
+        }
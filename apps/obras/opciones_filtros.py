@@ -0,0 +1,80 @@
+"""
+Opciones de los desplegables de filtros (autor, tipo, género, lugar...).
+
+catalogo_view, editor_catalogo_view y busqueda_avanzada_view pintan las
+mismas listas con sus conteos. Se calculan todas juntas y se guardan en la
+caché ``obras`` por generación del dataset y catálogo: las señales de
+Obra/Representacion/Autor/Lugar (signals.py) incrementan la generación, así
+que una edición invalida las listas y, mientras no haya cambios, los
+desplegables no cuestan ninguna consulta.
+
+Cada lista es de dicts con las mismas claves que usaban las plantillas:
+
+    opciones = opciones_filtros("FUENTESXI")
+    opciones["autores_con_obras"]  -> [{"id": 1, "nombre": "Calderón", "num_obras": 12}, ...]
+    opciones["tipos_obra"]         -> [{"tipo_obra": "comedia", "total": 80}, ...]
+    opciones["companias"]          -> [{"compañia": "Escamilla", "total": 3}, ...]
+"""
+
+from django.db.models import Count
+
+from .cache import obtener_o_calcular
+
+ESPACIO = "opciones_filtros"
+
+
+def _conteo(obras, campo):
+    return list(
+        obras.exclude(**{f"{campo}__isnull": True}).exclude(**{campo: ""})
+        .values(campo).annotate(total=Count("id")).order_by(campo)
+    )
+
+
+def calcular_opciones(fuente=None):
+    """Todas las listas para el catálogo ``fuente`` (None = todas las obras), sin caché."""
+    from apps.autores.models import Autor
+    from apps.lugares.models import Lugar
+    from apps.representaciones.models import Representacion
+
+    from .models import Obra
+
+    obras = Obra.objects.order_by()
+    representaciones = Representacion.objects.order_by()
+    if fuente:
+        obras = obras.filter(fuente_principal=fuente)
+        representaciones = representaciones.filter(obra__fuente_principal=fuente)
+
+    lugares = [
+        {"id": fila["lugar_id"], "nombre": fila["lugar__nombre"], "total": fila["total"]}
+        for fila in representaciones.filter(lugar__isnull=False)
+        .values("lugar_id", "lugar__nombre")
+        .annotate(total=Count("obra", distinct=True)).order_by("lugar__nombre", "lugar_id")
+    ]
+    if not lugares:
+        # Sin representaciones importadas: se ofrecen todos los lugares
+        lugares = [dict(lugar, total=0) for lugar in Lugar.objects.order_by("nombre").values("id", "nombre")]
+
+    return {
+        "autores": list(Autor.objects.order_by("nombre").values("id", "nombre")),
+        "autores_con_obras": [
+            {"id": fila["autor_id"], "nombre": fila["autor__nombre"], "num_obras": fila["num_obras"]}
+            for fila in obras.filter(autor__isnull=False)
+            .values("autor_id", "autor__nombre")
+            .annotate(num_obras=Count("id")).order_by("autor__nombre", "autor_id")
+        ],
+        "tipos_obra": _conteo(obras, "tipo_obra"),
+        "generos": _conteo(obras, "genero"),
+        "subgeneros": _conteo(obras, "subgenero"),
+        "compositores": _conteo(obras, "compositor"),
+        "mecenas": _conteo(obras, "mecenas"),
+        "lugares": lugares,
+        "companias": list(
+            representaciones.exclude(compañia__isnull=True).exclude(compañia="")
+            .values("compañia").annotate(total=Count("id")).order_by("compañia")
+        ),
+    }
+
+
+def opciones_filtros(fuente=None):
+    """calcular_opciones cacheado por generación del dataset y catálogo."""
+    return obtener_o_calcular(ESPACIO, fuente or "todas", lambda: calcular_opciones(fuente))
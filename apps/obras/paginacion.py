@@ -0,0 +1,90 @@
+"""
+Paginación por clave (keyset) compartida por la búsqueda de obras y el editor.
+
+Cada página se pide con el cursor de la anterior, que guarda el valor de orden
+y el id de su última fila; la consulta filtra por (orden, id) posterior a ese
+par y lee ``limite + 1`` filas por índice. Así la página mil cuesta lo mismo
+que la primera, a diferencia de OFFSET.
+
+El cursor es opaco para el cliente: JSON ``[orden, valor, id]`` en base64 url-safe.
+Incluye el nombre del orden para rechazar un cursor usado con otro orden.
+"""
+
+import base64
+import json
+from datetime import date
+
+from django.db.models import Q
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+
+def limite_de(valor, por_defecto=LIMITE_POR_DEFECTO, maximo=LIMITE_MAXIMO):
+    """Tamaño de página pedido, acotado a 1..maximo. Lanza ValueError si no es entero."""
+    if valor in (None, ""):
+        return por_defecto
+    try:
+        limite = int(valor)
+    except ValueError:
+        raise ValueError("limite debe ser un entero")
+    return max(1, min(limite, maximo))
+
+
+def codificar_cursor(orden, valor, pk):
+    datos = json.dumps([orden, valor, pk], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(datos).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor, orden):
+    """(valor, id) de un cursor; ValueError si está mal formado o es de otro orden."""
+    try:
+        datos = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        orden_cursor, valor, pk = json.loads(datos)
+    except (ValueError, TypeError):
+        raise ValueError("cursor inválido")
+    if orden_cursor != orden or not isinstance(pk, int):
+        raise ValueError("cursor inválido para este orden")
+    return valor, pk
+
+
+def ordenar_desde(queryset, orden, campo, cursor=None):
+    """Ordena ``queryset`` por (campo, id) y, con cursor, deja solo lo posterior a él.
+
+    ``orden`` es el nombre público del orden ("titulo", "-id", ...): un "-"
+    inicial lo hace descendente. ``campo`` es el campo del modelo que le
+    corresponde; debe ser no nulo para que la comparación sea total.
+    """
+    descendente = orden.startswith("-")
+    if cursor:
+        valor, pk = decodificar_cursor(cursor, orden)
+        posterior = "lt" if descendente else "gt"
+        if campo == "id":
+            queryset = queryset.filter(**{f"id__{posterior}": pk})
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{campo}__{posterior}": valor}) | Q(**{campo: valor, f"id__{posterior}": pk})
+            )
+    signo = "-" if descendente else ""
+    if campo == "id":
+        return queryset.order_by(f"{signo}id")
+    return queryset.order_by(f"{signo}{campo}", f"{signo}id")
+
+
+def _valor_de(fila, campo):
+    valor = fila[campo] if isinstance(fila, dict) else getattr(fila, campo)
+    # Fechas en ISO: el filtro de ordenar_desde las acepta como texto
+    return valor.isoformat() if isinstance(valor, date) else valor
+
+
+def cortar_pagina(filas, limite, orden, campo):
+    """Recorta las ``limite + 1`` filas leídas a ``limite`` y calcula el cursor siguiente.
+
+    ``filas`` son dicts de ``.values()`` o instancias del modelo, con ``campo`` e ``id``.
+    Devuelve (filas, siguiente); siguiente es None en la última página.
+    """
+    if len(filas) <= limite:
+        return filas, None
+    filas = filas[:limite]
+    ultima = filas[-1]
+    return filas, codificar_cursor(orden, _valor_de(ultima, campo), _valor_de(ultima, "id"))
@@ -0,0 +1,210 @@
+"""
+Resolución y votación de propuestas de cambio por lotes.
+
+resolver_propuesta_obra y votar_propuesta_obra atienden una propuesta por
+petición, y cada aprobación hacía un ``obra.save()`` completo (más
+``autor.save()``). Revisar decenas de propuestas del panel de admin eran
+decenas de peticiones y escrituras de filas enteras. Aquí, en una sola
+petición y una sola transacción:
+
+    - las propuestas se leen en una consulta (con obra y autor);
+    - las aprobadas se agrupan por obra: un ``save(update_fields=...)`` por
+      obra y otro por autor, con solo los campos cambiados;
+    - las propuestas resueltas se actualizan con un ``bulk_update``;
+    - los votos nuevos van en un ``bulk_create`` y los que ya existían en un
+      ``bulk_update`` (mismo efecto que el update_or_create de la vista suelta).
+
+Acciones (mismas reglas que las vistas individuales):
+
+    {"propuesta_id": 1, "accion": "aprobar", "comentario": "..."}      superusuario
+    {"propuesta_id": 2, "accion": "rechazar"}                          superusuario
+    {"propuesta_id": 3, "accion": "votar", "voto": "a_favor"}          autenticado
+
+Cada acción devuelve su resultado, en el mismo orden:
+
+    {"propuesta_id": 1, "success": true, "estado": "aprobada_superuser"}
+    {"propuesta_id": 3, "success": true, "voto_id": 17}
+    {"propuesta_id": 9, "success": false, "error": "Propuesta no encontrada"}
+
+Una acción inválida no impide las demás; un error al escribir deshace el lote
+entero (la vista responde 400).
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .eventos import publicar
+from .models import PropuestaCambioObra, VotoPropuestaCambioObra
+
+MAX_ACCIONES_LOTE = 200
+ACCIONES = ("aprobar", "rechazar", "votar")
+VOTOS = ("a_favor", "en_contra")
+
+
+def _error(propuesta_id, mensaje):
+    return {"propuesta_id": propuesta_id, "success": False, "error": mensaje}
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _validar(acciones, propuestas, usuario):
+    """Resultado de error por acción inválida (None si es válida)."""
+    errores = []
+    vistas = set()
+    for accion in acciones:
+        propuesta_id = accion["propuesta_id"]
+        tipo = accion.get("accion")
+        propuesta = propuestas.get(propuesta_id)
+        if tipo not in ACCIONES:
+            error = "Acción inválida"
+        elif propuesta is None:
+            error = "Propuesta no encontrada"
+        elif propuesta_id in vistas:
+            error = "Propuesta repetida en el lote"
+        elif propuesta.estado != "pendiente":
+            error = "La propuesta ya fue resuelta"
+        elif tipo == "votar" and accion.get("voto") not in VOTOS:
+            error = "Voto inválido"
+        elif tipo == "aprobar" and not usuario.is_superuser:
+            error = "Solo superusuario puede aprobar definitivamente"
+        elif tipo == "rechazar" and not usuario.is_superuser:
+            error = "Solo superusuario puede rechazar"
+        else:
+            error = None
+        vistas.add(propuesta_id)
+        errores.append(_error(propuesta_id, error) if error else None)
+    return errores
+
+
+def _aplicar_en_memoria(propuesta, obra, cambios_obra, autores):
+    """Asigna el valor de ``propuesta`` en ``obra`` (o su autor) y anota el campo."""
+    from apps.autores.models import Autor
+
+    from .views import _to_python_field_value
+
+    campo, valor = propuesta.campo, propuesta.valor_nuevo
+    if campo.startswith("autor."):
+        subcampo = campo.split(".", 1)[1]
+        autor = obra.autor or Autor(nombre="Anónimo")
+        if not hasattr(autor, subcampo) or subcampo in {"id", "pk"}:
+            raise ValueError(f"Campo de autor no soportado: {campo}")
+        # Obras del mismo autor comparten instancia: un solo save por autor
+        autor, campos = autores.setdefault(autor.pk or id(autor), (autor, set()))
+        setattr(autor, subcampo, valor)
+        campos.add(subcampo)
+        if obra.autor is not autor:
+            obra.autor = autor
+            if autor.pk is None:
+                cambios_obra.add("autor")
+        return
+
+    if not hasattr(obra, campo) or campo in {"id", "pk"}:
+        raise ValueError(f"Campo no soportado: {campo}")
+    setattr(obra, campo, _to_python_field_value(obra, campo, valor))
+    cambios_obra.add(campo)
+
+
+def procesar_lote(usuario, acciones):
+    """Aplica ``acciones`` de ``usuario`` y devuelve la lista de resultados."""
+    acciones = [dict(a, propuesta_id=_entero(a.get("propuesta_id"))) for a in acciones]
+    propuestas = PropuestaCambioObra.objects.select_related("obra__autor").in_bulk(
+        [a["propuesta_id"] for a in acciones if a["propuesta_id"] is not None]
+    )
+    resultados = _validar(acciones, propuestas, usuario)
+
+    # Una instancia por obra, para acumular todos sus campos antes de guardar
+    obras = {}
+    cambios = {}
+    autores = {}
+    resueltas = []
+    votos = {}
+    ahora = timezone.now()
+    for i, accion in enumerate(acciones):
+        if resultados[i] is not None:
+            continue
+        propuesta = propuestas[accion["propuesta_id"]]
+        tipo = accion["accion"]
+        comentario = (accion.get("comentario") or "").strip()
+
+        if tipo == "aprobar":
+            obra = obras.setdefault(propuesta.obra_id, propuesta.obra)
+            campos = set()
+            try:
+                _aplicar_en_memoria(propuesta, obra, campos, autores)
+            except (TypeError, ValueError) as e:
+                resultados[i] = _error(propuesta.id, str(e))
+                continue
+            cambios.setdefault(obra.id, set()).update(campos)
+
+        if tipo == "votar":
+            votos[propuesta.id] = (accion["voto"], comentario)
+            resultados[i] = {"propuesta_id": propuesta.id, "success": True}
+            continue
+
+        propuesta.estado = "aprobada_superuser" if tipo == "aprobar" else "rechazada"
+        propuesta.resuelta_por = usuario
+        propuesta.fecha_resolucion = ahora
+        resueltas.append(propuesta)
+        if comentario:
+            votos[propuesta.id] = ("a_favor" if tipo == "aprobar" else "en_contra", comentario)
+        resultados[i] = {"propuesta_id": propuesta.id, "success": True, "estado": propuesta.estado}
+
+    with transaction.atomic():
+        for autor, campos in autores.values():
+            if autor.pk is None:
+                autor.save()
+            else:
+                autor.save(update_fields=sorted(campos))
+        for obra_id, campos in cambios.items():
+            if campos:
+                obras[obra_id].save(update_fields=sorted(campos))
+        if resueltas:
+            PropuestaCambioObra.objects.bulk_update(resueltas, ["estado", "resuelta_por", "fecha_resolucion"])
+            for propuesta in resueltas:
+                datos = {"propuesta_id": propuesta.id, "obra_id": propuesta.obra_id, "estado": propuesta.estado}
+                transaction.on_commit(partial(publicar, "propuesta_resuelta", datos, solo_staff=True))
+        ids_votos = _guardar_votos(usuario, votos)
+
+    for resultado in resultados:
+        if resultado["success"] and "estado" not in resultado:
+            resultado["voto_id"] = ids_votos[resultado["propuesta_id"]]
+    return resultados
+
+
+def _guardar_votos(usuario, votos):
+    """update_or_create de cada voto en dos consultas; devuelve {propuesta_id: voto_id}."""
+    if not votos:
+        return {}
+    existentes = {
+        v.propuesta_id: v
+        for v in VotoPropuestaCambioObra.objects.filter(usuario=usuario, propuesta_id__in=votos)
+    }
+    nuevos = []
+    for propuesta_id, (voto, comentario) in votos.items():
+        v = existentes.get(propuesta_id)
+        if v is None:
+            nuevos.append(VotoPropuestaCambioObra(
+                propuesta_id=propuesta_id, usuario=usuario, voto=voto, comentario=comentario,
+            ))
+        else:
+            v.voto, v.comentario = voto, comentario
+    if existentes:
+        VotoPropuestaCambioObra.objects.bulk_update(list(existentes.values()), ["voto", "comentario"])
+    if nuevos:
+        VotoPropuestaCambioObra.objects.bulk_create(nuevos)
+        if any(v.pk is None for v in nuevos):
+            # Backends sin RETURNING: se leen los ids recién creados
+            ids = dict(
+                VotoPropuestaCambioObra.objects.filter(usuario=usuario, propuesta_id__in=[v.propuesta_id for v in nuevos])
+                .values_list("propuesta_id", "id")
+            )
+            for v in nuevos:
+                v.pk = ids[v.propuesta_id]
+    return {v.propuesta_id: v.pk for v in [*existentes.values(), *nuevos]}
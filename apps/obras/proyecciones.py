@@ -0,0 +1,124 @@
+"""
+Proyecciones ligeras de Obra para los listados.
+
+Los listados (catálogo público, lista del editor, búsqueda AJAX) solo pintan
+unos pocos campos por obra, pero instanciar ``Obra`` carga también los
+TextField largos (texto_original_pdf, notas, observaciones...) y cada
+``obra.autor`` o ``obra.representaciones.first`` puede ser otra consulta.
+
+Aquí cada listado tiene su fila tipada (dataclass con ``__slots__``) y se
+construye con una sola consulta ``values_list`` con JOIN y subconsultas (el
+número de representaciones es la columna de agregados.py):
+
+    filas = filas_de(FilaObraCatalogo, obras.order_by("titulo"))
+    filas[0].autor, filas[0].lugar, filas[0].total_representaciones
+
+Donde sí hace falta el modelo (formularios, guardar), ``obras_ligeras``
+aplica ``defer()`` a CAMPOS_PESADOS.
+
+``python manage.py benchmark_proyecciones`` mide tiempo y memoria por cada
+1.000 filas con cada estrategia.
+"""
+
+from dataclasses import dataclass, fields
+from typing import ClassVar, Optional
+
+from django.db.models import OuterRef, Subquery
+
+from apps.representaciones.models import Representacion
+
+# TextField de Obra que ningún listado muestra
+CAMPOS_PESADOS = (
+    "edicion_principe",
+    "notas_bibliograficas",
+    "texto_original_pdf",
+    "bibliotecas_musica",
+    "bibliografia_musica",
+    "notas",
+    "manuscritos_conocidos",
+    "ediciones_conocidas",
+    "observaciones",
+)
+
+
+def obras_ligeras(queryset=None):
+    """Queryset de Obra sin CAMPOS_PESADOS (se cargan al acceder, con otra consulta)."""
+    if queryset is None:
+        from .models import Obra
+
+        queryset = Obra.objects.all()
+    return queryset.defer(*CAMPOS_PESADOS)
+
+
+def primera_representacion(campo):
+    """``campo`` de la primera representación de la obra (orden del modelo: la más reciente)."""
+    return Subquery(
+        Representacion.objects.filter(obra_id=OuterRef("pk"))
+        .order_by("-fecha_formateada", "id").values(campo)[:1]
+    )
+
+
+@dataclass(slots=True)
+class FilaObra:
+    """Fila de la lista de obras del editor y de busqueda_obras_ajax."""
+
+    id: int
+    titulo: str
+    titulo_limpio: str
+    autor: Optional[str]
+    tipo_obra: Optional[str]
+    genero: Optional[str]
+
+    EXPRESIONES: ClassVar[dict] = {"autor": "autor__nombre"}
+
+    @property
+    def titulo_mostrado(self):
+        return self.titulo_limpio or self.titulo
+
+
+@dataclass(slots=True)
+class FilaObraCatalogo:
+    """Tarjeta del catálogo público (obras/catalogo.html)."""
+
+    id: int
+    titulo: str
+    autor: Optional[str]
+    mecenas: Optional[str]
+    fecha_creacion_estimada: Optional[str]
+    tipo_obra: Optional[str]
+    genero: Optional[str]
+    musica_conservada: bool
+    compositor: Optional[str]
+    fuente_principal: str
+    lugar: Optional[str]
+    compania: Optional[str]
+    total_representaciones: int
+
+    EXPRESIONES: ClassVar[dict] = {
+        "autor": "autor__nombre",
+        "lugar": primera_representacion("lugar__nombre"),
+        "compania": primera_representacion("compañia"),
+        "total_representaciones": "representaciones_total",
+    }
+
+
+def filas_de(clase, queryset):
+    """Lista de ``clase`` (FilaObra, FilaObraCatalogo...) con los datos de ``queryset``.
+
+    Cada campo de la dataclass se lee de la columna del mismo nombre o de
+    ``clase.EXPRESIONES`` (ruta con ``__`` o expresión). Se respeta el orden
+    y los filtros del queryset; es una sola consulta.
+    """
+    nombres = [f.name for f in fields(clase)]
+    anotaciones = {}
+    columnas = []
+    for nombre in nombres:
+        expresion = clase.EXPRESIONES.get(nombre, nombre)
+        if isinstance(expresion, str):
+            columnas.append(expresion)
+        else:
+            anotaciones[f"_fila_{nombre}"] = expresion
+            columnas.append(f"_fila_{nombre}")
+    if anotaciones:
+        queryset = queryset.annotate(**anotaciones)
+    return [clase(*valores) for valores in queryset.values_list(*columnas)]
@@ -25,17 +25,18 @@ class ManuscritoSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Manuscrito
-        fields = ['id', 'ubicacion', 'signatura', 'fecha_manuscrito', 'tipo_manuscrito', 'descripcion']
+        fields = ['id', 'biblioteca', 'signatura', 'fecha_manuscrito', 'descripcion', 'notas']
 
 
 class TemaLiterarioSerializer(serializers.ModelSerializer):
     """Serializer para temas literarios"""
     
+    # Anotado en las consultas de los viewsets (ver temas_con_total)
     total_obras = serializers.ReadOnlyField()
     
     class Meta:
         model = TemaLiterario
-        fields = ['id', 'nombre', 'tipo_tema', 'descripcion', 'total_obras']
+        fields = ['id', 'nombre', 'descripcion', 'total_obras']
 
 
 class ObraTemaSerializer(serializers.ModelSerializer):
@@ -54,10 +55,11 @@ class ObraSerializer(serializers.ModelSerializer):
     autor = AutorSerializer(read_only=True)
     manuscritos = ManuscritoSerializer(many=True, read_only=True)
     temas_literarios = ObraTemaSerializer(many=True, read_only=True, source='obratema_set')
-    total_representaciones = serializers.ReadOnlyField()
-    primera_representacion = serializers.ReadOnlyField()
-    ultima_representacion = serializers.ReadOnlyField()
-    lugares_representacion = serializers.ReadOnlyField()
+    # Agregados guardados en Obra (ver agregados.py), sin consultas por obra
+    total_representaciones = serializers.IntegerField(source='representaciones_total', read_only=True)
+    primera_representacion = serializers.CharField(source='representaciones_primera', read_only=True)
+    ultima_representacion = serializers.CharField(source='representaciones_ultima', read_only=True)
+    lugares_representacion = serializers.ListField(source='representaciones_lugares', read_only=True)
     
     class Meta:
         model = Obra
@@ -79,7 +81,7 @@ class ObraListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listas de obras"""
     
     autor = AutorSerializer(read_only=True)
-    total_representaciones = serializers.ReadOnlyField()
+    total_representaciones = serializers.IntegerField(source='representaciones_total', read_only=True)
     temas_literarios = ObraTemaSerializer(many=True, read_only=True, source='obratema_set')
     
     class Meta:
@@ -0,0 +1,172 @@
+"""
+Dataset del frontend dividido en shards con hash de contenido.
+
+exportar_json genera, junto a datos_obras.json, un directorio ``datos_obras/``:
+
+    manifest.json                 -> índice (pequeño, se revalida en cada carga)
+    lista.<hash>.json             -> solo los campos de listado y filtros
+    detalle-<n>.<hash>.json       -> obras completas, agrupadas por bloques de id
+    indice.<hash>.json            -> índice de búsqueda precalculado (indice_busqueda.py)
+
+El frontend descarga el manifest y la lista para pintar la tabla, y pide el
+bloque de detalle de una obra solo al abrir su ficha. Como el nombre de cada
+shard incluye el hash de su contenido, se pueden cachear para siempre
+(Cache-Control: immutable); un cambio en los datos produce nombres nuevos.
+
+Formato de la lista (columnar, para no repetir claves en cada obra):
+    {"campos": ["id", "titulo", ...], "obras": [[1, "La vida es sueño", ...], ...]}
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from .archivos_estaticos import ruta_original
+from .indice_busqueda import construir_indice
+
+VERSION_MANIFEST = 1
+OBRAS_POR_BUCKET = 100
+LONGITUD_HASH = 16
+
+# Campos que usan la tabla, la ordenación y los filtros de index_django.html
+CAMPOS_LISTA = (
+    "id",
+    "titulo",
+    "autor",
+    "tipo_obra",
+    "fuente",
+    "fecha_creacion",
+    "lugar",
+    "region",
+    "tipo_lugar",
+    "compania",
+    "mecenas",
+    "total_representaciones",
+    "representacion",
+)
+CAMPOS_AUTOR_LISTA = ("nombre", "nombre_completo", "epoca")
+CAMPOS_REPRESENTACION_LISTA = ("fecha", "fecha_formateada", "lugar", "region")
+
+PATRON_SHARD = re.compile(r"^[a-z0-9_-]+\.[0-9a-f]{%d}\.json$" % LONGITUD_HASH)
+
+
+def _bytes_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _hash(contenido):
+    return hashlib.sha256(contenido).hexdigest()[:LONGITUD_HASH]
+
+
+def bucket_de(obra_id):
+    return int(obra_id) // OBRAS_POR_BUCKET
+
+
+def _representacion_resumen(obra):
+    """Primera representación con datos (la que usa el listado para fecha y lugar)."""
+    for rep in obra.get("representaciones") or []:
+        if rep and (rep.get("fecha") or rep.get("fecha_formateada") or rep.get("lugar") or rep.get("region")):
+            return {k: rep.get(k) or "" for k in CAMPOS_REPRESENTACION_LISTA}
+    return None
+
+
+def fila_lista(obra):
+    """Valores de CAMPOS_LISTA para una obra serializada."""
+    autor = obra.get("autor")
+    if isinstance(autor, dict):
+        autor = {k: autor.get(k) or "" for k in CAMPOS_AUTOR_LISTA}
+    fila = []
+    for campo in CAMPOS_LISTA:
+        if campo == "autor":
+            fila.append(autor)
+        elif campo == "representacion":
+            fila.append(_representacion_resumen(obra))
+        else:
+            fila.append(obra.get(campo))
+    return fila
+
+
+def _escribir(directorio, prefijo, data):
+    contenido = _bytes_json(data)
+    nombre = f"{prefijo}.{_hash(contenido)}.json"
+    ruta = directorio / nombre
+    if not ruta.exists():
+        tmp = ruta.with_suffix(".tmp")
+        tmp.write_bytes(contenido)
+        tmp.replace(ruta)
+    return nombre
+
+
+def _archivos_del_manifest(manifest):
+    archivos = {manifest["lista"], *manifest["detalle"].values()}
+    if manifest.get("indice"):
+        archivos.add(manifest["indice"])
+    return archivos
+
+
+def escribir_shards(payload, directorio):
+    """Escribe manifest, lista y bloques de detalle a partir de {metadata, obras}.
+
+    Conserva los shards del manifest anterior (un cliente que ya lo tenía puede
+    seguir pidiéndolos) y borra los de generaciones más antiguas.
+    Devuelve el manifest.
+    """
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta_manifest = directorio / "manifest.json"
+
+    anteriores = set()
+    if ruta_manifest.exists():
+        try:
+            anteriores = _archivos_del_manifest(json.loads(ruta_manifest.read_text(encoding="utf-8")))
+        except (ValueError, KeyError):
+            pass
+
+    obras = payload["obras"]
+    buckets = {}
+    for obra in obras:
+        buckets.setdefault(bucket_de(obra["id"]), {})[str(obra["id"])] = obra
+
+    lista = _escribir(directorio, "lista", {
+        "campos": list(CAMPOS_LISTA),
+        "obras": [fila_lista(obra) for obra in obras],
+    })
+    detalle = {
+        str(n): _escribir(directorio, f"detalle-{n}", {"bucket": n, "obras": buckets[n]})
+        for n in sorted(buckets)
+    }
+    indice = _escribir(directorio, "indice", construir_indice(obras))
+
+    manifest = {
+        "version": VERSION_MANIFEST,
+        "metadata": payload["metadata"],
+        "campos_lista": list(CAMPOS_LISTA),
+        "obras_por_bucket": OBRAS_POR_BUCKET,
+        "lista": lista,
+        "detalle": detalle,
+        "indice": indice,
+    }
+    tmp = ruta_manifest.with_suffix(".tmp")
+    tmp.write_bytes(_bytes_json(manifest))
+    tmp.replace(ruta_manifest)
+
+    vigentes = _archivos_del_manifest(manifest) | anteriores
+    for ruta in directorio.iterdir():
+        # También las variantes .gz/.br de los shards retirados
+        nombre = ruta_original(ruta.name) or ruta.name
+        if PATRON_SHARD.match(nombre) and nombre not in vigentes:
+            ruta.unlink()
+    return manifest
+
+
+def archivos_publicables(directorio):
+    """Nombres a publicar: manifest.json y los shards presentes en el directorio.
+
+    escribir_shards ya deja solo los del manifest vigente y el anterior, así
+    que el repo publicado conserva la misma ventana de compatibilidad.
+    """
+    directorio = Path(directorio)
+    if not (directorio / "manifest.json").exists():
+        return []
+    return ["manifest.json", *sorted(p.name for p in directorio.iterdir() if PATRON_SHARD.match(p.name))]
@@ -0,0 +1,178 @@
+"""
+Señales del app obras.
+
+Cualquier alta, edición o borrado de Obra, Representacion, Autor, Lugar o
+ReferenciaBibliografica (cuenta en los totales del editor) incrementa la
+generación del dataset (ver cache.py) cuando la transacción se confirma, de
+modo que las cachés de todos los workers quedan invalidadas.
+
+Además anotan en el registro de cambios (ver delta.py) qué obras se ven
+afectadas, para que los clientes puedan pedir solo lo cambiado, y
+recalculan los agregados de representaciones guardados en Obra (ver
+agregados.py).
+
+Los comentarios y las propuestas de cambio publican eventos para las
+conexiones SSE (ver eventos.py) y mantienen el contador de no vistos.
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+
+from apps.autores.models import Autor
+from apps.bibliografia.models import ReferenciaBibliografica
+from apps.lugares.models import Lugar
+from apps.representaciones.models import Representacion
+
+from .agregados import obras_afectadas
+from .cache import incrementar_generacion
+from .delta import registrar_cambios
+from .eventos import ajustar_no_vistos, publicar
+from .models import ComentarioUsuario, Obra, PropuestaCambioObra
+
+MODELOS_DATASET = (Obra, Representacion, Autor, Lugar, ReferenciaBibliografica)
+
+
+def invalidar_cache_dataset(sender, **kwargs):
+    # Una importación masiva dispara miles de señales dentro de la misma
+    # transacción: basta con un único incremento al confirmar.
+    conexion = transaction.get_connection()
+    if any(entrada[1] is incrementar_generacion for entrada in conexion.run_on_commit):
+        return
+    transaction.on_commit(incrementar_generacion)
+
+
+for _modelo in MODELOS_DATASET:
+    post_save.connect(invalidar_cache_dataset, sender=_modelo, dispatch_uid=f"cache_{_modelo.__name__}_save")
+    post_delete.connect(invalidar_cache_dataset, sender=_modelo, dispatch_uid=f"cache_{_modelo.__name__}_delete")
+
+
+def _obras_de_autor(autor):
+    return Obra.objects.filter(autor_id=autor.pk).values_list("id", flat=True)
+
+
+def _obras_de_lugar(lugar):
+    return Representacion.objects.filter(lugar_id=lugar.pk).values_list("obra_id", flat=True).distinct()
+
+
+def anotar_obra_guardada(sender, instance, **kwargs):
+    registrar_cambios([instance.pk])
+
+
+def anotar_obra_borrada(sender, instance, **kwargs):
+    registrar_cambios([instance.pk], "eliminada")
+
+
+def anotar_representacion(sender, instance, **kwargs):
+    registrar_cambios([instance.obra_id])
+
+
+def anotar_autor(sender, instance, **kwargs):
+    # En pre_delete: después, SET_NULL ya ha desvinculado las obras
+    registrar_cambios(list(_obras_de_autor(instance)))
+
+
+def anotar_lugar(sender, instance, **kwargs):
+    registrar_cambios(list(_obras_de_lugar(instance)))
+
+
+post_save.connect(anotar_obra_guardada, sender=Obra, dispatch_uid="delta_Obra_save")
+post_delete.connect(anotar_obra_borrada, sender=Obra, dispatch_uid="delta_Obra_delete")
+post_save.connect(anotar_representacion, sender=Representacion, dispatch_uid="delta_Representacion_save")
+post_delete.connect(anotar_representacion, sender=Representacion, dispatch_uid="delta_Representacion_delete")
+post_save.connect(anotar_autor, sender=Autor, dispatch_uid="delta_Autor_save")
+pre_delete.connect(anotar_autor, sender=Autor, dispatch_uid="delta_Autor_delete")
+post_save.connect(anotar_lugar, sender=Lugar, dispatch_uid="delta_Lugar_save")
+pre_delete.connect(anotar_lugar, sender=Lugar, dispatch_uid="delta_Lugar_delete")
+
+
+def _obra_en_memoria(representacion):
+    if Representacion.obra.is_cached(representacion):
+        return [representacion.obra]
+    return []
+
+
+def recordar_obra_cargada(sender, instance, **kwargs):
+    # Sin leer el atributo: en un .only() sin obra_id sería otra consulta
+    instance._obra_id_cargada = instance.__dict__.get("obra_id")
+
+
+def actualizar_agregados_representacion(sender, instance, **kwargs):
+    # Si la representación cambió de obra, la anterior también pierde una
+    obras_afectadas({instance.obra_id, getattr(instance, "_obra_id_cargada", None)}, _obra_en_memoria(instance))
+    instance._obra_id_cargada = instance.obra_id
+
+
+def actualizar_agregados_lugar(sender, instance, **kwargs):
+    # post_save (el nombre puede haber cambiado) y post_delete (SET_NULL ya aplicado)
+    obra_ids = getattr(instance, "_obras_agregados", None)
+    if obra_ids is None:
+        obra_ids = list(_obras_de_lugar(instance))
+    obras_afectadas(obra_ids)
+
+
+def recordar_obras_de_lugar(sender, instance, **kwargs):
+    instance._obras_agregados = list(_obras_de_lugar(instance))
+
+
+post_init.connect(recordar_obra_cargada, sender=Representacion, dispatch_uid="agregados_Representacion_init")
+post_save.connect(actualizar_agregados_representacion, sender=Representacion,
+                  dispatch_uid="agregados_Representacion_save")
+post_delete.connect(actualizar_agregados_representacion, sender=Representacion,
+                    dispatch_uid="agregados_Representacion_delete")
+post_save.connect(actualizar_agregados_lugar, sender=Lugar, dispatch_uid="agregados_Lugar_save")
+pre_delete.connect(recordar_obras_de_lugar, sender=Lugar, dispatch_uid="agregados_Lugar_pre_delete")
+post_delete.connect(actualizar_agregados_lugar, sender=Lugar, dispatch_uid="agregados_Lugar_delete")
+
+
+# ---------------------------------------------------------------------------
+# Eventos de comentarios y propuestas
+# ---------------------------------------------------------------------------
+
+def _evento_comentario(tipo, comentario_id, delta):
+    datos = {"comentario_id": comentario_id}
+    if delta:
+        datos["no_vistos"] = ajustar_no_vistos(delta)
+    publicar(tipo, datos)
+
+
+def recordar_estado_cargado(sender, instance, **kwargs):
+    # Sin leer los atributos: en un .only() que no los incluya sería otra consulta
+    instance._visto_cargado = instance.__dict__.get("visto_por_admin")
+    instance._estado_cargado = instance.__dict__.get("estado")
+
+
+def notificar_comentario_guardado(sender, instance, created, **kwargs):
+    antes = None if created else getattr(instance, "_visto_cargado", None)
+    instance._visto_cargado = instance.visto_por_admin
+    if created:
+        delta = 0 if instance.visto_por_admin else 1
+        transaction.on_commit(partial(_evento_comentario, "comentario_creado", instance.pk, delta))
+    elif antes is not None and antes != instance.visto_por_admin:
+        tipo = "comentario_visto" if instance.visto_por_admin else "comentario_pendiente"
+        delta = -1 if instance.visto_por_admin else 1
+        transaction.on_commit(partial(_evento_comentario, tipo, instance.pk, delta))
+
+
+def notificar_comentario_borrado(sender, instance, **kwargs):
+    delta = 0 if instance.visto_por_admin else -1
+    transaction.on_commit(partial(_evento_comentario, "comentario_borrado", instance.pk, delta))
+
+
+def notificar_propuesta(sender, instance, created, **kwargs):
+    antes = None if created else getattr(instance, "_estado_cargado", None)
+    instance._estado_cargado = instance.estado
+    if created:
+        datos = {"propuesta_id": instance.pk, "obra_id": instance.obra_id, "campo": instance.campo}
+        transaction.on_commit(partial(publicar, "propuesta_creada", datos, solo_staff=True))
+    elif antes == "pendiente" and instance.estado != "pendiente":
+        datos = {"propuesta_id": instance.pk, "obra_id": instance.obra_id, "estado": instance.estado}
+        transaction.on_commit(partial(publicar, "propuesta_resuelta", datos, solo_staff=True))
+
+
+for _modelo in (ComentarioUsuario, PropuestaCambioObra):
+    post_init.connect(recordar_estado_cargado, sender=_modelo, dispatch_uid=f"eventos_{_modelo.__name__}_init")
+post_save.connect(notificar_comentario_guardado, sender=ComentarioUsuario, dispatch_uid="eventos_Comentario_save")
+post_delete.connect(notificar_comentario_borrado, sender=ComentarioUsuario, dispatch_uid="eventos_Comentario_delete")
+post_save.connect(notificar_propuesta, sender=PropuestaCambioObra, dispatch_uid="eventos_Propuesta_save")
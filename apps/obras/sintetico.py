@@ -0,0 +1,588 @@
+"""
+Catálogo sintético para pruebas de escala y de carga.
+
+El único dataset real son las 2.369 obras y 358 representaciones de
+datos_obras.json: medir con él no dice nada de cómo se comportan las vistas
+con cien o mil veces más filas. Aquí se genera un catálogo del tamaño que se
+pida con las distribuciones del real:
+
+    - autores, tipos de obra, géneros, fuente y origen, número de
+      representaciones por obra, lugares, compañías, años... salen de sus
+      frecuencias en datos_obras.json;
+    - los títulos y el texto del PDF, de una cadena de Markov de palabras
+      aprendida de los títulos y textos reales;
+    - a mayor escala hay más autores, lugares y compañías distintos (crecen
+      con la raíz de la escala); los nuevos se reparten la probabilidad que
+      tienen en el real los valores vistos una sola vez (Good-Turing), así
+      que la cabeza de la distribución (Anónimo, Palacio...) no cambia;
+    - las obras de FUENTES IX con página se agrupan en páginas de PaginaPDF
+      cuyo texto es el de sus entradas, con fechas, compañías y lugares de
+      sus representaciones.
+
+Todo sale de un único ``random.Random(semilla)``: la misma semilla, escala y
+archivo de origen dan siempre el mismo catálogo.
+
+Salidas (ver el comando generar_catalogo_sintetico):
+    guardar()          inserta en la DB por lotes con bulk_create
+    escribir_json()    datos_obras.json compatible con importar_json, más las
+                       páginas en "paginas_pdf" (importar_json las ignora)
+"""
+
+import json
+import math
+import random
+import tempfile
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import accumulate
+
+TAMANO_LOTE = 2000
+MESES = (
+    "enero", "febrero", "marzo", "abril", "mayo", "junio",
+    "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+)
+ARTICULOS = ("El", "La", "Los", "Las")
+CAMPOS_OBRA = (
+    "tipo_obra", "genero", "subgenero", "tema", "musica_conservada", "compositor",
+    "mecenas", "fecha_creacion", "idioma", "versos", "actos", "notas",
+)
+CAMPOS_REPRESENTACION = ("tipo_funcion", "publico", "fuente", "pais")
+MAX_PALABRAS_TITULO = 14
+PALABRAS_TEXTO = (40, 120)
+LONGITUD_TEXTO_OBRA = 500
+PARTICULAS = ("de", "del", "la", "las", "los")
+INTENTOS = 10
+
+
+class _Categorica:
+    """Distribución empírica: valores con su frecuencia, muestreados por pesos acumulados."""
+
+    def __init__(self, conteo):
+        conteo = Counter(conteo) if not isinstance(conteo, Counter) else conteo
+        self.valores = list(conteo)
+        self.pesos = list(conteo.values())
+        self._acumulados = list(accumulate(self.pesos))
+
+    def __len__(self):
+        return len(self.valores)
+
+    def ampliar(self, nuevos):
+        """Añade ``nuevos`` con la masa de los valores vistos una vez (Good-Turing)."""
+        if not nuevos:
+            return
+        masa = sum(1 for peso in self.pesos if peso == 1) or 1
+        self.valores.extend(nuevos)
+        self.pesos.extend([masa / len(nuevos)] * len(nuevos))
+        self._acumulados = list(accumulate(self.pesos))
+
+    def muestra(self, rng):
+        return rng.choices(self.valores, cum_weights=self._acumulados)[0]
+
+
+class _Cadena:
+    """Cadena de Markov de palabras (bigramas) aprendida de un corpus de frases."""
+
+    def __init__(self, frases):
+        inicios = Counter()
+        siguientes = defaultdict(Counter)
+        for frase in frases:
+            palabras = frase.split()
+            if not palabras:
+                continue
+            inicios[palabras[0]] += 1
+            for actual, siguiente in zip(palabras, [*palabras[1:], None]):
+                siguientes[actual][siguiente] += 1
+        self.inicios = _Categorica(inicios)
+        self.siguientes = {palabra: _Categorica(conteo) for palabra, conteo in siguientes.items()}
+
+    def frase(self, rng, maximo):
+        palabras = []
+        palabra = self.inicios.muestra(rng)
+        while palabra is not None and len(palabras) < maximo:
+            palabras.append(palabra)
+            palabra = self.siguientes[palabra].muestra(rng)
+        return " ".join(palabras)
+
+
+def _es_nombre(texto, maximo=4):
+    """Nombre limpio ("Manuel de Mosquera"): sin notas ni varias personas ("Vallejo y parte de...")."""
+    palabras = texto.split()
+    return 0 < len(palabras) <= maximo and all(p[0].isupper() or p in PARTICULAS for p in palabras) \
+        and all(c.isalpha() or c in " -'" for c in texto)
+
+
+def sin_acentos(texto):
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+class Distribuciones:
+    """Frecuencias de un datos_obras.json (lista de obras en su formato)."""
+
+    def __init__(self, obras):
+        self.total_obras = len(obras)
+        self.autores = {}
+        autores = Counter()
+        for obra in obras:
+            autor = obra.get("autor") or {}
+            if isinstance(autor, str):
+                autor = {"nombre": autor}
+            nombre = autor.get("nombre") or "Anónimo"
+            self.autores.setdefault(nombre, dict(autor, nombre=nombre))
+            autores[nombre] += 1
+        self.autor = _Categorica(autores)
+        self.epoca = _Categorica(a.get("epoca") or "" for a in self.autores.values())
+        self.campos = {campo: _Categorica(obra.get(campo) for obra in obras) for campo in CAMPOS_OBRA}
+        self.fuente_origen = _Categorica((obra.get("fuente") or "", obra.get("origen_datos") or "") for obra in obras)
+        self.num_representaciones = _Categorica(len(obra.get("representaciones") or []) for obra in obras)
+
+        pdf = [obra for obra in obras if obra.get("origen_datos") == "pdf"]
+        paginadas = [obra for obra in pdf if obra.get("pagina_pdf")]
+        self.proporcion_paginadas = len(paginadas) / len(pdf) if pdf else 0
+        self.obras_por_pagina = _Categorica(Counter(obra["pagina_pdf"] for obra in paginadas).values() or [1])
+        self.titulos = _Cadena((obra.get("titulo") or "").rstrip(".") for obra in obras)
+        textos = {obra["texto_original_pdf"].rstrip(".") for obra in obras if obra.get("texto_original_pdf")}
+        self.textos = _Cadena(sorted(textos) or ["Sin texto"])
+
+        representaciones = [r for obra in obras for r in obra.get("representaciones") or [] if isinstance(r, dict)]
+        self.lugar = _Categorica(
+            (r.get("lugar") or "", r.get("region") or "", r.get("tipo_lugar") or "") for r in representaciones
+        )
+        self.compania = _Categorica(r.get("compania") or "" for r in representaciones)
+        self.campos_representacion = {
+            campo: _Categorica(r.get(campo) or "" for r in representaciones) for campo in CAMPOS_REPRESENTACION
+        }
+        fechadas = [r["fecha_formateada"] for r in representaciones if r.get("fecha_formateada")]
+        self.anio = _Categorica(int(fecha[:4]) for fecha in fechadas)
+        self.proporcion_sin_fecha = 1 - len(fechadas) / len(representaciones) if representaciones else 0
+        self.fecha_texto = _Categorica(
+            r.get("fecha") or "" for r in representaciones if not r.get("fecha_formateada")
+        ) if len(fechadas) < len(representaciones) else None
+
+        # Nombres de pila y apellidos ("Manuel" + "de Mosquera") para autores y compañías nuevos
+        pila, apellidos = Counter(), Counter()
+        for nombre in [*autores, *self.compania.valores]:
+            partes = nombre.split(" ", 1)
+            if len(partes) == 2 and _es_nombre(nombre):
+                pila[partes[0]] += 1
+                apellidos[partes[1]] += 1
+        self.pila = _Categorica(pila or {"Juan": 1})
+        self.apellidos = _Categorica(apellidos or {"de Castro": 1})
+
+    @classmethod
+    def desde_archivo(cls, ruta):
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        return cls(datos["obras"] if isinstance(datos, dict) else datos)
+
+
+class GeneradorCatalogo:
+    """Catálogo sintético de ``obras`` obras y ``representaciones`` representaciones.
+
+    Sin ``representaciones``, cada obra tiene tantas como una obra real al
+    azar (unas 0,15 por obra). ``titulos_existentes`` son títulos que no se
+    deben repetir (p. ej. los titulo_limpio de la DB) y ``primera_pagina`` el
+    primer número de PaginaPDF libre.
+    """
+
+    def __init__(self, distribuciones, obras, representaciones=None, semilla=0,
+                 titulos_existentes=(), primera_pagina=1):
+        self.dist = distribuciones
+        self.total_obras = obras
+        self.primera_pagina = primera_pagina
+        self.semilla = semilla
+        self._titulos_existentes = set(titulos_existentes)
+        rng = random.Random(semilla)
+
+        # Vocabularios: los reales más los nuevos de la escala
+        escala = max(obras / max(distribuciones.total_obras, 1), 1)
+        self.autor = self._copia(distribuciones.autor)
+        self.autores = dict(distribuciones.autores)
+        nuevos = self._personas(rng, self._extra(self.autor, escala), set(self.autores))
+        for nombre in nuevos:
+            self.autores[nombre] = {"nombre": nombre, "nombre_completo": nombre,
+                                    "epoca": distribuciones.epoca.muestra(rng)}
+        self.autor.ampliar(nuevos)
+        self.compania = self._copia(distribuciones.compania)
+        self.compania.ampliar(self._personas(rng, self._extra(self.compania, escala), set(self.compania.valores)))
+        self.lugar = self._copia(distribuciones.lugar)
+        self.lugar.ampliar(self._lugares(rng, self._extra(self.lugar, escala)))
+
+        self.por_obra = [distribuciones.num_representaciones.muestra(rng) for _ in range(obras)]
+        if representaciones is not None:
+            self._repartir(rng, representaciones)
+        self.total_representaciones = sum(self.por_obra)
+        self._estado = rng.getstate()
+
+    @staticmethod
+    def _copia(categorica):
+        copia = _Categorica({})
+        copia.valores, copia.pesos = list(categorica.valores), list(categorica.pesos)
+        copia._acumulados = list(categorica._acumulados)
+        return copia
+
+    @staticmethod
+    def _extra(categorica, escala):
+        return round(len(categorica) * (math.sqrt(escala) - 1))
+
+    def _personas(self, rng, cantidad, usados):
+        nuevos = []
+        for i in range(cantidad):
+            for _ in range(INTENTOS):
+                nombre = f"{self.dist.pila.muestra(rng)} {self.dist.apellidos.muestra(rng)}"
+                if nombre not in usados:
+                    break
+            else:
+                nombre = f"{nombre} {i + 2}"
+            usados.add(nombre)
+            nuevos.append(nombre)
+        return nuevos
+
+    def _lugares(self, rng, cantidad):
+        """Combinaciones nuevas de sitio y sala reales ("Buen Retiro" + "Saloncete")."""
+        sitios, salas = {}, Counter()
+        for (nombre, region, tipo), peso in zip(self.dist.lugar.valores, self.dist.lugar.pesos):
+            sitio, _, sala = nombre.partition(", ")
+            if _es_nombre(sitio, 3):
+                sitios.setdefault(sitio, [(region, tipo), 0])[1] += peso
+            if _es_nombre(sala, 3):
+                salas[sala] += peso
+        if not sitios:
+            return []
+        regiones = {sitio: region_tipo for sitio, (region_tipo, _) in sitios.items()}
+        sitios = _Categorica({sitio: peso for sitio, (_, peso) in sitios.items()})
+        salas = _Categorica(salas or {"Salón": 1})
+        usados = {(nombre, region) for nombre, region, _ in self.dist.lugar.valores}
+        nuevos = []
+        for i in range(cantidad):
+            for _ in range(INTENTOS):
+                sitio = sitios.muestra(rng)
+                region, tipo = regiones[sitio]
+                nombre = f"{sitio}, {salas.muestra(rng)}"
+                if (nombre, region) not in usados:
+                    break
+            else:
+                nombre = f"{nombre} {i + 2}"
+            usados.add((nombre, region))
+            nuevos.append((nombre, region, tipo))
+        return nuevos
+
+    def _repartir(self, rng, total):
+        """Ajusta ``por_obra`` a ``total`` conservando la forma de la distribución."""
+        actual = sum(self.por_obra)
+        if not self.por_obra:
+            return
+        if not actual:
+            self.por_obra = [1] * len(self.por_obra)
+            actual = len(self.por_obra)
+        factor = total / actual
+        pesos = self.por_obra
+        self.por_obra = [int(n * factor) for n in pesos]
+        resto = total - sum(self.por_obra)
+        if resto:
+            for i in rng.choices(range(len(pesos)), weights=pesos, k=resto):
+                self.por_obra[i] += 1
+
+    def _titulo(self, rng):
+        base = self.dist.titulos.frase(rng, MAX_PALABRAS_TITULO) or "Comedia"
+        base = base[0].upper() + base[1:]
+        clave = sin_acentos(base)
+        if clave in self._titulos_existentes:
+            n = 2
+            while f"{clave} ({n})" in self._titulos_existentes:
+                n += 1
+            base, clave = f"{base} ({n})", f"{clave} ({n})"
+        self._titulos_existentes.add(clave)
+        return base, clave
+
+    def _fecha(self, rng):
+        if self.dist.fecha_texto is not None and rng.random() < self.dist.proporcion_sin_fecha:
+            return self.dist.fecha_texto.muestra(rng), ""
+        anio, mes, dia = self.dist.anio.muestra(rng), rng.randrange(12), rng.randint(1, 28)
+        return f"{dia} de {MESES[mes]} de {anio}", f"{anio}-{mes + 1:02d}-{dia:02d}"
+
+    def _representacion(self, rng, numero):
+        fecha, fecha_formateada = self._fecha(rng)
+        lugar, region, tipo_lugar = self.lugar.muestra(rng)
+        compania = self.compania.muestra(rng)
+        representacion = {
+            "fecha": fecha,
+            "fecha_formateada": fecha_formateada,
+            "compania": compania,
+            "director_compañia": compania,
+            "lugar": lugar,
+            "tipo_lugar": tipo_lugar,
+            "region": region,
+            "observaciones": f"Número de representación: {numero}",
+            "mecenas": "",
+            "gestor_administrativo": "",
+            "personajes_historicos": [],
+            "organizadores_fiesta": [],
+            "entrada": "",
+            "duracion": "",
+            "notas": "",
+            "pagina_pdf": None,
+            "es_anterior_1650": bool(fecha_formateada) and fecha_formateada < "1650",
+            "es_anterior_1665": bool(fecha_formateada) and fecha_formateada < "1665",
+        }
+        for campo, distribucion in self.dist.campos_representacion.items():
+            representacion[campo] = distribucion.muestra(rng)
+        return representacion
+
+    def _entrada(self, rng, titulo, representaciones):
+        """Entrada del catálogo en el PDF: título invertido, representaciones y comentario."""
+        articulo, _, resto = titulo.partition(" ")
+        invertir = articulo in ARTICULOS and resto and not resto.startswith("(")
+        cabecera = f"{resto[0].upper()}{resto[1:]}, {articulo}" if invertir else titulo
+        lineas = []
+        for r in representaciones:
+            donde = f" en {r['lugar']}" if r["lugar"] else ""
+            quien = f"la compañía de {r['compania']}" if r["compania"] else "una compañía sin especificar"
+            lineas.append(f"Representada por {quien} el {r['fecha']}{donde} ({r['fuente']}).")
+        objetivo = rng.randint(*PALABRAS_TEXTO)
+        palabras = 0
+        comentario = []
+        while palabras < objetivo:
+            frase = self.dist.textos.frase(rng, objetivo - palabras)
+            palabras += len(frase.split()) or 1
+            comentario.append(frase)
+        lineas.append(". ".join(comentario) + ".")
+        return f"{cabecera}\n\n" + " \n".join(lineas)
+
+    def generar(self):
+        """Genera ("obra", datos) y ("pagina", datos) en el formato de datos_obras.json.
+
+        Cada página sale después de la última de sus obras.
+        """
+        rng = random.Random()
+        rng.setstate(self._estado)
+        numero_pagina = self.primera_pagina
+        entradas = []
+        capacidad = self.dist.obras_por_pagina.muestra(rng)
+        for n in self.por_obra:
+            titulo, titulo_original = self._titulo(rng)
+            autor = self.autores[self.autor.muestra(rng)]
+            fuente, origen = self.dist.fuente_origen.muestra(rng)
+            representaciones = [self._representacion(rng, i + 1) for i in range(n)]
+            obra = {
+                "titulo": f"{titulo}.",
+                "titulo_original": titulo_original,
+                "titulo_alternativo": "",
+                "autor": autor,
+                "fuente": fuente,
+                "origen_datos": origen,
+                "pagina_pdf": None,
+                "texto_original_pdf": "",
+            }
+            for campo, distribucion in self.dist.campos.items():
+                obra[campo] = distribucion.muestra(rng)
+            primera = representaciones[0] if representaciones else {}
+            obra.update(
+                lugar=primera.get("lugar", ""),
+                region=primera.get("region", ""),
+                tipo_lugar=primera.get("tipo_lugar", ""),
+                compania=primera.get("compania", ""),
+                total_representaciones=n,
+                representaciones=representaciones,
+            )
+
+            if origen == "pdf" and rng.random() < self.dist.proporcion_paginadas:
+                entrada = self._entrada(rng, titulo, representaciones)
+                obra["pagina_pdf"] = numero_pagina
+                obra["texto_original_pdf"] = (
+                    entrada if len(entrada) <= LONGITUD_TEXTO_OBRA else entrada[:LONGITUD_TEXTO_OBRA] + "..."
+                )
+                entradas.append(entrada)
+            yield "obra", obra
+
+            if len(entradas) >= capacidad:
+                yield "pagina", self._pagina(numero_pagina, entradas)
+                numero_pagina += 1
+                entradas = []
+                capacidad = self.dist.obras_por_pagina.muestra(rng)
+        if entradas:
+            yield "pagina", self._pagina(numero_pagina, entradas)
+
+    @staticmethod
+    def _pagina(numero, entradas):
+        return {
+            "numero_pagina": numero,
+            "texto_extraido": f"{numero}\n\n" + "\n\n".join(entradas),
+            "part_file": "sintetico",
+        }
+
+    def metadata(self):
+        return {
+            "version": "2.0",
+            "total_obras": self.total_obras,
+            "total_autores": len(self.autor),
+            "total_lugares": len(self.lugar),
+            "total_representaciones": self.total_representaciones,
+            "fuente": f"Sintético (semilla {self.semilla})",
+            "fuentes": ["FUENTES IX", "CATCOM", "AMBAS"],
+        }
+
+
+def escribir_json(generador, archivo):
+    """Escribe el catálogo en ``archivo`` (abierto en texto) sin tenerlo entero en memoria."""
+    archivo.write('{"metadata": ')
+    archivo.write(json.dumps(generador.metadata(), ensure_ascii=False))
+    archivo.write(', "obras": [')
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as paginas:
+        separador = ""
+        separador_paginas = ""
+        for tipo, datos in generador.generar():
+            if tipo == "obra":
+                archivo.write(separador + json.dumps(datos, ensure_ascii=False))
+                separador = ",\n"
+            else:
+                paginas.write(separador_paginas + json.dumps(datos, ensure_ascii=False))
+                separador_paginas = ",\n"
+        archivo.write('], "paginas_pdf": [')
+        paginas.seek(0)
+        for trozo in iter(lambda: paginas.read(1 << 16), ""):
+            archivo.write(trozo)
+    archivo.write("]}\n")
+
+
+def _crear(modelo, objetos, clave, leer_claves):
+    """bulk_create; devuelve {clave(obj): pk}, releyendo los ids en backends sin RETURNING."""
+    modelo.objects.bulk_create(objetos, batch_size=TAMANO_LOTE)
+    if any(obj.pk is None for obj in objetos):
+        return leer_claves([clave(obj) for obj in objetos])
+    return {clave(obj): obj.pk for obj in objetos}
+
+
+def guardar(generador, tamano_lote=TAMANO_LOTE, progreso=None):
+    """Inserta el catálogo en la DB por lotes, en una transacción; devuelve los totales.
+
+    bulk_create no dispara señales: los agregados de las obras, el registro
+    de cambios y la invalidación de la caché se anotan a mano por lote.
+    """
+    from django.db import transaction
+
+    from apps.autores.models import Autor
+    from apps.lugares.models import Lugar
+    from apps.representaciones.models import Representacion
+
+    from .agregados import recalcular
+    from .delta import registrar_cambios
+    from .management.commands.importar_json import normalizar_fuente, parsear_fecha, safe_bool, safe_int
+    from .models import Obra, PaginaPDF
+    from .signals import invalidar_cache_dataset
+
+    totales = Counter()
+    tipos_obra = dict(Obra.TIPO_OBRA_CHOICES)
+    fuentes = dict(Obra.FUENTE_CHOICES)
+    tipos_lugar = dict(Lugar.TIPO_LUGAR_CHOICES)
+    tipos_lugar_representacion = dict(Representacion.TIPO_LUGAR_CHOICES)
+
+    with transaction.atomic():
+        autores = {nombre.lower(): pk for pk, nombre in Autor.objects.values_list("pk", "nombre")}
+        nuevos = [
+            Autor(nombre=nombre, nombre_completo=datos.get("nombre_completo") or "", epoca=datos.get("epoca") or "")
+            for nombre, datos in generador.autores.items() if nombre.lower() not in autores
+        ]
+        autores.update(_crear(
+            Autor, nuevos, lambda a: a.nombre.lower(),
+            lambda claves: {n.lower(): pk for pk, n in Autor.objects.filter(nombre__in=[a.nombre for a in nuevos])
+                            .values_list("pk", "nombre")},
+        ))
+        totales["autores"] = len(nuevos)
+
+        lugares = {(n.lower(), r.lower()): pk for pk, n, r in Lugar.objects.values_list("pk", "nombre", "region")}
+        nuevos = []
+        for nombre, region, tipo in generador.lugar.valores:
+            # Lugar.save() normaliza así el nombre; bulk_create no lo llama
+            nombre = nombre.strip().title()
+            if nombre and (nombre.lower(), region.lower()) not in lugares:
+                lugares[(nombre.lower(), region.lower())] = None
+                nuevos.append(Lugar(nombre=nombre, region=region, pais="España",
+                                    tipo_lugar=tipo if tipo in tipos_lugar else "otro"))
+        lugares.update(_crear(
+            Lugar, nuevos, lambda lugar: (lugar.nombre.lower(), lugar.region.lower()),
+            lambda claves: {(n.lower(), r.lower()): pk for pk, n, r in
+                            Lugar.objects.filter(nombre__in=[c[0].title() for c in claves]).values_list("pk", "nombre", "region")},
+        ))
+        totales["lugares"] = len(nuevos)
+
+        def guardar_obras(lote):
+            obras = []
+            for datos in lote:
+                fuente = normalizar_fuente(datos["fuente"])
+                obras.append(Obra(
+                    titulo=datos["titulo"],
+                    titulo_limpio=datos["titulo_original"],
+                    autor_id=autores[(datos["autor"].get("nombre") or "Anónimo").lower()],
+                    tipo_obra=datos["tipo_obra"] if datos["tipo_obra"] in tipos_obra else "otro",
+                    genero=datos["genero"] or "",
+                    subgenero=datos["subgenero"] or "",
+                    fuente_principal=fuente if fuente in fuentes else "CATCOM",
+                    origen_datos=datos["origen_datos"] or "web",
+                    pagina_pdf=datos["pagina_pdf"],
+                    texto_original_pdf=datos["texto_original_pdf"],
+                    tema=datos["tema"] or "",
+                    musica_conservada=safe_bool(datos["musica_conservada"]),
+                    compositor=datos["compositor"] or "",
+                    mecenas=datos["mecenas"] or "",
+                    fecha_creacion_estimada=datos["fecha_creacion"] or "",
+                    idioma=datos["idioma"] or "español",
+                    versos=safe_int(datos["versos"]),
+                    actos=safe_int(datos["actos"]),
+                    notas=datos["notas"] or "",
+                ))
+            ids = _crear(
+                Obra, obras, lambda obra: obra.titulo_limpio,
+                lambda claves: dict(Obra.objects.filter(titulo_limpio__in=claves).values_list("titulo_limpio", "pk")),
+            )
+            representaciones = []
+            for datos in lote:
+                for r in datos["representaciones"]:
+                    lugar = (r["lugar"].strip().lower(), r["region"].strip().lower())
+                    tipo_lugar = r["tipo_lugar"].lower()
+                    representacion = Representacion(
+                        obra_id=ids[datos["titulo_original"]],
+                        fecha=r["fecha"],
+                        fecha_formateada=parsear_fecha(r["fecha_formateada"]),
+                        compañia=r["compania"],
+                        director_compañia=r["director_compañia"],
+                        lugar_id=lugares.get(lugar) if lugar[0] else None,
+                        tipo_lugar=tipo_lugar if tipo_lugar in tipos_lugar_representacion else "",
+                        fuente=r["fuente"],
+                        observaciones=r["observaciones"],
+                        tipo_funcion=r["tipo_funcion"],
+                        publico=r["publico"],
+                        personajes_historicos="[]",
+                        organizadores_fiesta="[]",
+                    )
+                    representacion.completar_fechas()
+                    representaciones.append(representacion)
+            Representacion.objects.bulk_create(representaciones, batch_size=TAMANO_LOTE)
+            obra_ids = list(ids.values())
+            recalcular([ids[datos["titulo_original"]] for datos in lote if datos["representaciones"]])
+            registrar_cambios(obra_ids)
+            totales["obras"] += len(obras)
+            totales["representaciones"] += len(representaciones)
+            if progreso:
+                progreso(totales["obras"], generador.total_obras)
+
+        obras, paginas = [], []
+        for tipo, datos in generador.generar():
+            if tipo == "obra":
+                obras.append(datos)
+                if len(obras) >= tamano_lote:
+                    guardar_obras(obras)
+                    obras = []
+            else:
+                paginas.append(PaginaPDF(**datos))
+                if len(paginas) >= tamano_lote:
+                    PaginaPDF.objects.bulk_create(paginas)
+                    totales["paginas"] += len(paginas)
+                    paginas = []
+        if obras:
+            guardar_obras(obras)
+        if paginas:
+            PaginaPDF.objects.bulk_create(paginas)
+            totales["paginas"] += len(paginas)
+        invalidar_cache_dataset(sender=Obra)
+    return totales
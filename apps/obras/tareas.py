@@ -0,0 +1,270 @@
+"""
+Tareas en segundo plano: exportar, publicar, importar y reindexar.
+
+Las vistas crean un registro TareaFondo y devuelven su id inmediatamente; el
+trabajo se ejecuta fuera de la petición y el navegador consulta su estado en
+/obras/tareas/<id>/.
+
+Ejecución:
+    - Con CELERY_BROKER_URL configurado, la tarea se envía a Celery
+      (apps/obras/tasks.py; worker: ``celery -A teatro_espanol worker``).
+    - Sin broker, se ejecuta en un pool de hilos del propio proceso web
+      (OBRAS_TAREAS_HILOS hilos por worker de gunicorn).
+    - Con OBRAS_TAREAS_SINCRONAS (tests) se ejecuta en línea.
+
+Progreso:
+    Cada ejecutor recibe ``progreso(porcentaje, mensaje)``. El valor se guarda
+    en la caché ``obras`` y, si no hay una transacción abierta, también en la
+    tabla; así la importación (que corre dentro de un atomic) sigue informando.
+
+Uso:
+    from apps.obras.tareas import encolar
+    tarea = encolar("publicar", usuario=request.user)
+"""
+
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from .cache import ALIAS, incrementar_generacion, obtener_o_calcular
+from .delta import podar_registro
+from .models import TareaFondo
+
+logger = logging.getLogger(__name__)
+
+# Tipos de los que solo puede haber una tarea activa a la vez
+TIPOS_EXCLUSIVOS = ("exportar", "publicar", "reindexar")
+# Pasado este tiempo una tarea "en curso" se considera abandonada (worker reiniciado)
+MINUTOS_TAREA_ABANDONADA = 60
+
+_ejecutor = None
+_ejecutor_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Progreso
+# ---------------------------------------------------------------------------
+
+def _clave_progreso(tarea_id):
+    return f"obras:tarea:{tarea_id}:progreso"
+
+
+class Progreso:
+    """Callable que registra el avance de una tarea (0-99; el 100 lo pone el final)."""
+
+    def __init__(self, tarea_id):
+        self.tarea_id = tarea_id
+        self._ultimo = None
+
+    def __call__(self, porcentaje, mensaje=""):
+        porcentaje = max(0, min(99, int(porcentaje)))
+        datos = {"progreso": porcentaje, "mensaje": (mensaje or "")[:255]}
+        if datos == self._ultimo:
+            return
+        self._ultimo = datos
+        caches[ALIAS].set(_clave_progreso(self.tarea_id), datos, timeout=3600)
+        if not connection.in_atomic_block:
+            TareaFondo.objects.filter(pk=self.tarea_id).update(**datos)
+
+
+def estado_tarea(tarea):
+    """Estado de la tarea para la API, con el progreso más reciente de la caché."""
+    datos = tarea.como_dict()
+    if not tarea.terminada:
+        reciente = caches[ALIAS].get(_clave_progreso(tarea.pk))
+        if reciente and reciente["progreso"] >= datos["progreso"]:
+            datos.update(reciente)
+    return datos
+
+
+# ---------------------------------------------------------------------------
+# Ejecutores
+# ---------------------------------------------------------------------------
+
+def _ruta_en_proyecto(ruta, por_defecto):
+    """Resuelve una ruta relativa a BASE_DIR, sin permitir salir del proyecto."""
+    base = Path(settings.BASE_DIR).resolve()
+    destino = (base / (ruta or por_defecto)).resolve()
+    if base != destino and base not in destino.parents:
+        raise ValueError(f"Ruta fuera del proyecto: {ruta}")
+    return destino
+
+
+def _exportar(tarea, progreso):
+    salida = _ruta_en_proyecto(tarea.parametros.get("salida"), "datos_obras.json")
+    out = io.StringIO()
+    call_command(
+        "exportar_json",
+        salida=str(salida),
+        tambien_frontend=bool(tarea.parametros.get("tambien_frontend", True)),
+        stdout=out,
+        progreso=progreso,
+    )
+    return {"salida": str(salida), "log": out.getvalue().strip()}
+
+
+def _publicar(tarea, progreso):
+    out = io.StringIO()
+    call_command(
+        "publicar_github",
+        mensaje=tarea.parametros.get("mensaje", ""),
+        stdout=out,
+        progreso=progreso,
+    )
+    return {"log": out.getvalue().strip()}
+
+
+def _importar(tarea, progreso):
+    archivo = _ruta_en_proyecto(tarea.parametros.get("archivo"), "datos_obras.json")
+    out = io.StringIO()
+    err = io.StringIO()
+    call_command(
+        "importar_json",
+        archivo=str(archivo),
+        limpiar=bool(tarea.parametros.get("limpiar")),
+        solo_nuevas=bool(tarea.parametros.get("solo_nuevas")),
+        stdout=out,
+        stderr=err,
+        progreso=progreso,
+    )
+    return {"archivo": str(archivo), "log": out.getvalue().strip(), "errores": err.getvalue().strip()}
+
+
+def _reindexar(tarea, progreso):
+    from .views_api_json import _construir_datos_obras_json
+
+    progreso(10, "Invalidando cachés")
+    generacion = incrementar_generacion()
+    progreso(40, "Regenerando payload de datos-obras")
+    payload = obtener_o_calcular("datos_obras", "completo", _construir_datos_obras_json)
+    progreso(80, "Podando registro de cambios")
+    cambios_podados = podar_registro()
+    return {"generacion": generacion, "bytes_datos_obras": len(payload), "cambios_podados": cambios_podados}
+
+
+EJECUTORES = {
+    "exportar": _exportar,
+    "publicar": _publicar,
+    "importar": _importar,
+    "reindexar": _reindexar,
+}
+
+
+def validar_parametros(tipo, parametros):
+    """Lanza ValueError si el tipo o los parámetros no son válidos."""
+    if tipo not in EJECUTORES:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+    if not isinstance(parametros, dict):
+        raise ValueError("Los parámetros deben ser un objeto JSON")
+    if tipo == "importar":
+        archivo = _ruta_en_proyecto(parametros.get("archivo"), "datos_obras.json")
+        if not archivo.exists():
+            raise ValueError(f"Archivo no encontrado: {archivo.name}")
+    if tipo == "exportar":
+        _ruta_en_proyecto(parametros.get("salida"), "datos_obras.json")
+
+
+# ---------------------------------------------------------------------------
+# Ejecución
+# ---------------------------------------------------------------------------
+
+def ejecutar_tarea(tarea_id):
+    """Ejecuta una tarea pendiente. Seguro ante reentregas: si ya la tomó otro, no hace nada."""
+    tomada = TareaFondo.objects.filter(pk=tarea_id, estado="pendiente").update(
+        estado="en_curso",
+        fecha_inicio=timezone.now(),
+    )
+    if not tomada:
+        return TareaFondo.objects.filter(pk=tarea_id).first()
+
+    tarea = TareaFondo.objects.get(pk=tarea_id)
+    try:
+        resultado = EJECUTORES[tarea.tipo](tarea, Progreso(tarea.pk))
+    except Exception as e:
+        logger.exception("Tarea %s (%s) fallida", tarea.pk, tarea.tipo)
+        tarea.estado = "fallida"
+        tarea.error = str(e)
+        tarea.mensaje = "Error"
+        campos = ["estado", "mensaje", "error", "fecha_fin"]
+    else:
+        tarea.estado = "completada"
+        tarea.progreso = 100
+        tarea.mensaje = "Completada"
+        tarea.resultado = resultado
+        campos = ["estado", "progreso", "mensaje", "resultado", "fecha_fin"]
+    tarea.fecha_fin = timezone.now()
+    tarea.save(update_fields=campos)
+    caches[ALIAS].delete(_clave_progreso(tarea.pk))
+    return tarea
+
+
+def _ejecutar_en_hilo(tarea_id):
+    try:
+        ejecutar_tarea(tarea_id)
+    finally:
+        # Cada hilo del pool abre su propia conexión; no dejarla colgada.
+        connections.close_all()
+
+
+def _pool():
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "OBRAS_TAREAS_HILOS", 2),
+                thread_name_prefix="tareas-obras",
+            )
+        return _ejecutor
+
+
+def _despachar(tarea_id):
+    if getattr(settings, "CELERY_BROKER_URL", ""):
+        try:
+            from .tasks import ejecutar_tarea_celery
+        except ImportError:
+            logger.warning("CELERY_BROKER_URL configurado pero celery no está instalado; usando hilos")
+        else:
+            ejecutar_tarea_celery.delay(tarea_id)
+            return
+    _pool().submit(_ejecutar_en_hilo, tarea_id)
+
+
+def encolar(tipo, parametros=None, usuario=None):
+    """Crea la tarea y la despacha cuando se confirme la transacción actual.
+
+    Para los tipos de TIPOS_EXCLUSIVOS, si ya hay una tarea activa del mismo
+    tipo se devuelve esa en lugar de crear otra (doble clic en "Publicar").
+    """
+    parametros = parametros or {}
+    validar_parametros(tipo, parametros)
+
+    if tipo in TIPOS_EXCLUSIVOS:
+        limite = timezone.now() - timedelta(minutes=MINUTOS_TAREA_ABANDONADA)
+        activa = TareaFondo.objects.filter(
+            tipo=tipo,
+            estado__in=("pendiente", "en_curso"),
+            fecha_creacion__gte=limite,
+        ).first()
+        if activa:
+            return activa
+
+    tarea = TareaFondo.objects.create(
+        tipo=tipo,
+        parametros=parametros,
+        creada_por=usuario if usuario is not None and usuario.is_authenticated else None,
+    )
+
+    if getattr(settings, "OBRAS_TAREAS_SINCRONAS", False):
+        return ejecutar_tarea(tarea.pk)
+
+    transaction.on_commit(lambda: _despachar(tarea.pk))
+    return tarea
@@ -0,0 +1,16 @@
+"""
+Tareas Celery del app obras.
+
+Solo envuelven a apps.obras.tareas.ejecutar_tarea: el estado y el progreso
+viven en TareaFondo, no en el backend de resultados de Celery. Este módulo
+solo se importa si CELERY_BROKER_URL está configurado.
+"""
+
+from celery import shared_task
+
+from .tareas import ejecutar_tarea
+
+
+@shared_task(name="obras.ejecutar_tarea", ignore_result=True)
+def ejecutar_tarea_celery(tarea_id):
+    ejecutar_tarea(tarea_id)
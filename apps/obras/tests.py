@@ -1,14 +1,18 @@
+import io
 import json
+import shutil
 import tempfile
 from pathlib import Path
 
-from django.test import TestCase, Client
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.core.cache import caches
 from django.core.management import call_command
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 
 from apps.autores.models import Autor
 from apps.lugares.models import Lugar
-from apps.obras.models import Obra, ComentarioUsuario, PropuestaCambioObra
+from apps.obras.models import Obra, ComentarioUsuario, PropuestaCambioObra, TareaFondo
 from apps.representaciones.models import Representacion
 from apps.usuarios.models import Usuario
 
@@ -17,6 +21,24 @@ from apps.usuarios.models import Usuario
 # Helpers
 # ---------------------------------------------------------------------------
 
+# La caché "obras" es por proceso y sobrevive de un test a otro: los tests que
+# cuentan consultas o leen datos cacheados parten de una caché vacía (CACHE_VACIA)
+# y los que prueban la propia caché usan una LRU aislada (CACHE_LRU).
+CACHE_VACIA = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "obras": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+CACHE_LRU = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "obras": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "obras-tests",
+        "TIMEOUT": None,
+    },
+}
+
+
 def _create_user(username="editor", email="editor@test.com", password="testpass123",
                  is_superuser=False, is_staff=False):
     user = Usuario.objects.create_user(
@@ -127,6 +149,7 @@ class ObraModelTest(TestCase):
 # 2. /api/datos-obras/ JSON endpoint
 # ===========================================================================
 
+@override_settings(CACHES=CACHE_VACIA)
 class DatosObrasAPITest(TestCase):
 
     def setUp(self):
@@ -439,3 +462,2259 @@ class ProposalTest(TestCase):
         self.assertEqual(resp.status_code, 200)
         prop.refresh_from_db()
         self.assertEqual(prop.estado, "rechazada")
+
+
+# ===========================================================================
+# 6. Caché del proyecto (generaciones, backends y contadores)
+# ===========================================================================
+
+class SQLiteCacheBackendTest(TestCase):
+
+    def setUp(self):
+        from apps.obras.cache_backends import SQLiteCache
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = SQLiteCache(str(Path(self.tmpdir.name) / "cache.sqlite3"), {"TIMEOUT": None})
+
+    def test_set_get_delete(self):
+        self.cache.set("a", {"x": 1})
+        self.assertEqual(self.cache.get("a"), {"x": 1})
+        self.assertTrue(self.cache.delete("a"))
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_add_does_not_overwrite(self):
+        self.assertTrue(self.cache.add("a", 1))
+        self.assertFalse(self.cache.add("a", 2))
+        self.assertEqual(self.cache.get("a"), 1)
+
+    def test_incr_is_shared_between_instances(self):
+        from apps.obras.cache_backends import SQLiteCache
+
+        otro = SQLiteCache(self.cache._ruta, {"TIMEOUT": None})
+        self.cache.set("gen", 10)
+        self.assertEqual(otro.incr("gen"), 11)
+        self.assertEqual(self.cache.get("gen"), 11)
+
+    def test_incr_missing_key_raises(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr("no-existe")
+
+    def test_expired_entries_are_misses(self):
+        self.cache.set("a", 1, timeout=-1)
+        self.assertIsNone(self.cache.get("a"))
+        self.assertFalse(self.cache.has_key("a"))
+
+
+@override_settings(CACHES=CACHE_LRU)
+class CacheGeneracionTest(TransactionTestCase):
+    """TransactionTestCase: la invalidación depende de on_commit real."""
+
+    def setUp(self):
+        from apps.obras import cache
+
+        caches["obras"].clear()
+        cache.reiniciar_estadisticas()
+
+    def test_hit_and_miss_counters(self):
+        from apps.obras import cache
+
+        llamadas = []
+        calcular = lambda: llamadas.append(1) or "valor"
+        self.assertEqual(cache.obtener_o_calcular("pruebas", "k", calcular), "valor")
+        self.assertEqual(cache.obtener_o_calcular("pruebas", "k", calcular), "valor")
+        self.assertEqual(len(llamadas), 1)
+        stats = cache.estadisticas()["pruebas"]
+        self.assertEqual(stats["aciertos"], 1)
+        self.assertEqual(stats["fallos"], 1)
+
+    def test_incrementar_generacion_invalidates(self):
+        from apps.obras import cache
+
+        cache.obtener_o_calcular("pruebas", "k", lambda: "viejo")
+        cache.incrementar_generacion()
+        self.assertEqual(cache.obtener_o_calcular("pruebas", "k", lambda: "nuevo"), "nuevo")
+
+    def test_edit_invalidates_datos_obras_payload(self):
+        _create_obra(titulo_limpio="Primera")
+        self.assertEqual(len(self.client.get("/api/datos-obras/").json()["obras"]), 1)
+        _create_obra(titulo_limpio="Segunda")
+        self.assertEqual(len(self.client.get("/api/datos-obras/").json()["obras"]), 2)
+
+    def test_datos_obras_payload_served_from_cache(self):
+        _create_obra(titulo_limpio="Primera")
+        self.client.get("/api/datos-obras/")
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/datos-obras/")
+        self.assertEqual(resp.status_code, 200)
+
+
+# ===========================================================================
+# 7. Tareas en segundo plano
+# ===========================================================================
+
+@override_settings(CACHES=CACHE_VACIA, OBRAS_TAREAS_SINCRONAS=True)
+class TareasFondoTest(TestCase):
+    """OBRAS_TAREAS_SINCRONAS está activo en tests: las tareas se ejecutan en línea."""
+
+    def setUp(self):
+        self.admin = _create_user(username="admin", email="admin@test.com", is_staff=True)
+        self.user = _create_user()
+        self.client = Client()
+
+    def _post_tarea(self, tipo, parametros=None):
+        return self.client.post(
+            "/obras/tareas/",
+            data=json.dumps({"tipo": tipo, "parametros": parametros or {}}),
+            content_type="application/json",
+        )
+
+    def test_requires_staff(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self._post_tarea("reindexar").status_code, 403)
+        self.assertFalse(TareaFondo.objects.exists())
+
+    def test_reindexar_runs_and_reports_result(self):
+        _create_obra()
+        self.client.force_login(self.admin)
+        resp = self._post_tarea("reindexar")
+        self.assertEqual(resp.status_code, 202)
+        data = resp.json()
+        tarea = TareaFondo.objects.get(pk=data["tarea_id"])
+        self.assertEqual(tarea.estado, "completada")
+        self.assertEqual(tarea.progreso, 100)
+        self.assertGreater(tarea.resultado["bytes_datos_obras"], 0)
+
+        estado = self.client.get(data["estado_url"]).json()["tarea"]
+        self.assertTrue(estado["terminada"])
+        self.assertEqual(estado["estado"], "completada")
+
+    def test_unknown_tipo_and_paths_outside_project_rejected(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self._post_tarea("borrar_todo").status_code, 400)
+        self.assertEqual(self._post_tarea("importar", {"archivo": "../../etc/passwd"}).status_code, 400)
+        self.assertFalse(TareaFondo.objects.exists())
+
+    def test_failed_job_records_error(self):
+        from unittest import mock
+        from apps.obras import tareas
+
+        def falla(tarea, progreso):
+            progreso(30, "A medias")
+            raise RuntimeError("GitHub caído")
+
+        self.client.force_login(self.admin)
+        with mock.patch.dict(tareas.EJECUTORES, {"publicar": falla}):
+            resp = self.client.post("/obras/publicar-github/")
+        self.assertEqual(resp.status_code, 202)
+        tarea = TareaFondo.objects.get(pk=resp.json()["tarea_id"])
+        self.assertEqual(tarea.estado, "fallida")
+        self.assertIn("GitHub caído", tarea.error)
+
+    def test_publicar_rejects_non_object_json(self):
+        self.client.force_login(self.admin)
+        resp = self.client.post("/obras/publicar-github/", data="[]", content_type="application/json")
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(TareaFondo.objects.exists())
+
+    def test_exclusive_tipo_reuses_active_task(self):
+        from apps.obras.tareas import encolar
+
+        activa = TareaFondo.objects.create(tipo="publicar", estado="en_curso")
+        self.assertEqual(encolar("publicar", usuario=self.admin).pk, activa.pk)
+        self.assertEqual(TareaFondo.objects.filter(tipo="publicar").count(), 1)
+
+    def test_status_visible_only_to_creator_or_staff(self):
+        otro = _create_user(username="otro", email="otro@test.com")
+        tarea = TareaFondo.objects.create(tipo="exportar", creada_por=self.user)
+        self.client.force_login(otro)
+        self.assertEqual(self.client.get(f"/obras/tareas/{tarea.pk}/").status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(f"/obras/tareas/{tarea.pk}/").status_code, 200)
+
+    @override_settings(OBRAS_TAREAS_SINCRONAS=False, CELERY_BROKER_URL="")
+    def test_without_broker_dispatches_to_thread_pool_on_commit(self):
+        from unittest import mock
+        from apps.obras import tareas
+
+        pool = mock.Mock()
+        with mock.patch.object(tareas, "_pool", return_value=pool):
+            with self.captureOnCommitCallbacks(execute=True):
+                tarea = tareas.encolar("reindexar")
+            self.assertEqual(tarea.estado, "pendiente")
+        pool.submit.assert_called_once_with(tareas._ejecutar_en_hilo, tarea.pk)
+
+
+# ===========================================================================
+# 8. publicar_github contra un servidor local que imita la API de GitHub
+# ===========================================================================
+
+class _GitHubFalso:
+    """Repo en memoria con los endpoints de Contents API y Git Data API que usa publicar_github."""
+
+    def __init__(self, repo="org/repo", rama="main"):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.repo = repo
+        self.rama = rama
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.peticiones = []
+        self._lock = threading.Lock()
+
+        arbol_vacio = self._guardar_tree({})
+        self.refs = {rama: self._guardar_commit(arbol_vacio, [])}
+
+        servidor_falso = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _responder(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self):
+                longitud = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(longitud) or b"{}")
+
+            def do_GET(self):
+                self._despachar("GET")
+
+            def do_PUT(self):
+                self._despachar("PUT")
+
+            def do_POST(self):
+                self._despachar("POST")
+
+            def do_PATCH(self):
+                self._despachar("PATCH")
+
+            def _despachar(self, metodo):
+                ruta = self.path.split("?")[0]
+                prefijo = f"/repos/{servidor_falso.repo}/"
+                servidor_falso.peticiones.append((metodo, ruta))
+                if not ruta.startswith(prefijo):
+                    return self._responder(404, {"message": "Not Found"})
+                with servidor_falso._lock:
+                    status, data = servidor_falso.atender(metodo, ruta[len(prefijo):], self._json() if metodo != "GET" else {})
+                self._responder(status, data)
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def cerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    # -- almacenamiento --------------------------------------------------
+
+    @staticmethod
+    def _sha1(data):
+        import hashlib
+
+        return hashlib.sha1(data).hexdigest()
+
+    def _guardar_blob(self, contenido):
+        sha = self._sha1(b"blob %d\0" % len(contenido) + contenido)
+        self.blobs[sha] = contenido
+        return sha
+
+    def _guardar_tree(self, entradas):
+        sha = self._sha1(json.dumps(sorted(entradas.items())).encode())
+        self.trees[sha] = dict(entradas)
+        return sha
+
+    def _guardar_commit(self, tree, padres):
+        sha = self._sha1(json.dumps([tree, padres, len(self.commits)]).encode())
+        self.commits[sha] = {"tree": tree, "parents": padres}
+        return sha
+
+    def archivos(self):
+        tree = self.trees[self.commits[self.refs[self.rama]]["tree"]]
+        return {ruta: self.blobs[sha] for ruta, sha in tree.items()}
+
+    def num_commits(self):
+        n, sha = 0, self.refs[self.rama]
+        while self.commits[sha]["parents"]:
+            n += 1
+            sha = self.commits[sha]["parents"][0]
+        return n
+
+    # -- API ---------------------------------------------------------------
+
+    def atender(self, metodo, ruta, data):
+        import base64
+
+        cabeza = self.refs[self.rama]
+        tree_actual = self.trees[self.commits[cabeza]["tree"]]
+
+        if ruta.startswith("contents/"):
+            ruta_archivo = ruta[len("contents/"):]
+            sha_actual = tree_actual.get(ruta_archivo)
+            if metodo == "GET":
+                return (200, {"sha": sha_actual, "path": ruta_archivo}) if sha_actual else (404, {})
+            if data.get("sha") != sha_actual:
+                return 409, {"message": "sha does not match"}
+            nuevo = dict(tree_actual)
+            nuevo[ruta_archivo] = self._guardar_blob(base64.b64decode(data["content"]))
+            self.refs[self.rama] = self._guardar_commit(self._guardar_tree(nuevo), [cabeza])
+            return (200 if sha_actual else 201), {"content": {"sha": nuevo[ruta_archivo]}}
+
+        if ruta == f"git/ref/heads/{self.rama}" and metodo == "GET":
+            return 200, {"object": {"sha": cabeza}}
+        if ruta.startswith("git/commits/") and metodo == "GET":
+            commit = self.commits.get(ruta.rsplit("/", 1)[1])
+            return (200, {"tree": {"sha": commit["tree"]}}) if commit else (404, {})
+        if ruta.startswith("git/trees/") and metodo == "GET":
+            tree = self.trees.get(ruta.rsplit("/", 1)[1])
+            if tree is None:
+                return 404, {}
+            return 200, {"tree": [{"path": p, "type": "blob", "sha": s} for p, s in tree.items()]}
+        if ruta == "git/blobs" and metodo == "POST":
+            return 201, {"sha": self._guardar_blob(base64.b64decode(data["content"]))}
+        if ruta == "git/trees" and metodo == "POST":
+            nuevo = dict(self.trees[data["base_tree"]])
+            for entrada in data["tree"]:
+                if entrada["sha"] is None:
+                    nuevo.pop(entrada["path"], None)
+                else:
+                    nuevo[entrada["path"]] = entrada["sha"]
+            return 201, {"sha": self._guardar_tree(nuevo)}
+        if ruta == "git/commits" and metodo == "POST":
+            return 201, {"sha": self._guardar_commit(data["tree"], data["parents"])}
+        if ruta == f"git/refs/heads/{self.rama}" and metodo == "PATCH":
+            if cabeza not in self.commits[data["sha"]]["parents"]:
+                return 422, {"message": "Update is not a fast forward"}
+            self.refs[self.rama] = data["sha"]
+            return 200, {"object": {"sha": data["sha"]}}
+        return 404, {"message": "Not Found"}
+
+
+class PublicarGithubCommandTest(TestCase):
+
+    def setUp(self):
+        import io
+        import os
+        from unittest import mock
+
+        self.github = _GitHubFalso()
+        self.addCleanup(self.github.cerrar)
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.base = Path(tmpdir.name)
+        (self.base / "frontend" / "github-pages").mkdir(parents=True)
+
+        ajustes = override_settings(BASE_DIR=self.base)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        entorno = mock.patch.dict(os.environ, {
+            "GITHUB_TOKEN": "t",
+            "GITHUB_REPO": self.github.repo,
+            "GITHUB_BRANCH": self.github.rama,
+            "GITHUB_API_URL": self.github.url,
+        })
+        entorno.start()
+        self.addCleanup(entorno.stop)
+        self._io = io
+
+        _create_obra(titulo_limpio="El alcalde de Zalamea")
+
+    def _publicar(self, **opciones):
+        out = self._io.StringIO()
+        call_command("publicar_github", stdout=out, **opciones)
+        return out.getvalue()
+
+    def _puts(self):
+        return [p for p in self.github.peticiones if p[0] == "PUT"]
+
+    def _locales(self):
+        """Archivos que deben acabar en el repo: los dos JSON y sus shards (sin variantes .gz/.br)."""
+        from apps.obras.archivos_estaticos import ruta_original
+
+        rutas = {}
+        for directorio in (self.base, self.base / "frontend" / "github-pages"):
+            for ruta in [directorio / "datos_obras.json", *(directorio / "datos_obras").iterdir()]:
+                if ruta_original(ruta.name):
+                    continue
+                rutas[ruta.relative_to(self.base).as_posix()] = ruta.read_bytes()
+        return rutas
+
+    def _sin_shards(self):
+        from unittest import mock
+
+        patcher = mock.patch(
+            "apps.obras.management.commands.publicar_github.archivos_publicables", return_value=[],
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_without_shards_uploads_json_with_contents_api(self):
+        self._sin_shards()
+        self._publicar()
+        esperados = {ruta: contenido for ruta, contenido in self._locales().items() if ruta.endswith("datos_obras.json")}
+        self.assertEqual(self.github.archivos(), esperados)
+        self.assertEqual(len(self._puts()), 2)
+
+    def test_contents_api_uploads_one_at_a_time(self):
+        import threading
+        from unittest import mock
+        from apps.obras.management.commands import publicar_github
+
+        self._sin_shards()
+        hilos = []
+
+        def subir(*args, **kwargs):
+            hilos.append(threading.current_thread())
+            return subir_original(*args, **kwargs)
+
+        subir_original = publicar_github._upload_file
+        with mock.patch.object(publicar_github, "_upload_file", side_effect=subir):
+            self._publicar()
+        # Cada PUT mueve la rama: en paralelo chocarían entre sí (409)
+        self.assertEqual(len(hilos), 2)
+        self.assertEqual(set(hilos), {threading.main_thread()})
+
+    def test_second_publish_without_changes_skips_put(self):
+        self._sin_shards()
+        self._publicar()
+        commits = self.github.num_commits()
+        self.github.peticiones.clear()
+        salida = self._publicar()
+        self.assertEqual(self._puts(), [])
+        self.assertIn("Sin cambios", salida)
+        self.assertEqual(self.github.num_commits(), commits)
+
+    def test_shards_are_published_in_one_commit_by_default(self):
+        self._publicar()
+        self.assertIn("frontend/github-pages/datos_obras/manifest.json", self._locales())
+        self.assertEqual(self.github.archivos(), self._locales())
+        self.assertEqual(self.github.num_commits(), 1)
+        self.assertEqual(self._puts(), [])
+
+    def test_changed_data_uploads_only_changed_shards(self):
+        self._publicar()
+        _create_obra(titulo_limpio="La dama duende")
+        self.github.peticiones.clear()
+        self._publicar()
+        self.assertEqual(self.github.num_commits(), 2)
+        blobs = [p for p in self.github.peticiones if p == ("POST", f"/repos/{self.github.repo}/git/blobs")]
+        self.assertLess(len(blobs), len(self._locales()))
+        self.assertIn(b"La dama duende", self.github.archivos()["datos_obras.json"])
+
+    def test_background_publish_prunes_stale_shards(self):
+        from apps.obras.models import TareaFondo
+        from apps.obras.tareas import _publicar
+
+        for titulo in ("La dama duende", "El médico de su honra", "El príncipe constante"):
+            _create_obra(titulo_limpio=titulo)
+            _publicar(TareaFondo(tipo="publicar", parametros={}), lambda porcentaje, mensaje="": None)
+        self.assertEqual(self.github.archivos(), self._locales())
+
+    def test_un_commit_publishes_all_files_in_single_commit(self):
+        self._publicar(un_commit=True)
+        self.assertEqual(self.github.num_commits(), 1)
+        self.assertEqual(self.github.archivos(), self._locales())
+        self.assertEqual(self._puts(), [])
+
+        self.github.peticiones.clear()
+        self._publicar(un_commit=True)
+        self.assertEqual(self.github.num_commits(), 1)
+        self.assertFalse(any(m == "POST" for m, _ in self.github.peticiones))
+
+    def test_un_commit_prunes_stale_shards(self):
+        self._publicar(un_commit=True)
+        for titulo in ("La dama duende", "El médico de su honra"):
+            _create_obra(titulo_limpio=titulo)
+            self._publicar(un_commit=True)
+        # El repo refleja exactamente los shards vigentes (más los del manifest anterior)
+        self.assertEqual(self.github.archivos(), self._locales())
+
+    def test_git_blob_sha_matches_git(self):
+        from apps.obras.management.commands.publicar_github import _git_blob_sha
+
+        # `printf 'hola\n' | git hash-object --stdin`
+        self.assertEqual(_git_blob_sha(b"hola\n"), "5c1b14949828006ed75a3e8858957f86a2f7e2eb")
+
+
+# ===========================================================================
+# 9. Shards del dataset del frontend
+# ===========================================================================
+
+class ShardsDatasetTest(TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = Path(tmpdir.name) / "datos_obras"
+        self.payload = {
+            "metadata": {"total_obras": 2},
+            "obras": [
+                {
+                    "id": 7, "titulo": "Obra A", "tipo_obra": "comedia", "fuente": "CATCOM",
+                    "autor": {"nombre": "Calderón", "epoca": "Barroco", "biografia": "Larga..."},
+                    "texto_original_pdf": "x" * 500,
+                    "representaciones": [{"fecha": "", "lugar": ""}, {"fecha": "1681", "lugar": "Palacio", "compania": "C"}],
+                },
+                {"id": 150, "titulo": "Obra B", "autor": None, "representaciones": []},
+            ],
+        }
+
+    def _leer(self, nombre):
+        return json.loads((self.dir / nombre).read_text(encoding="utf-8"))
+
+    def test_list_has_only_listing_fields(self):
+        from apps.obras.shards import escribir_shards
+
+        manifest = escribir_shards(self.payload, self.dir)
+        lista = self._leer(manifest["lista"])
+        obra = dict(zip(lista["campos"], lista["obras"][0]))
+        self.assertEqual(obra["titulo"], "Obra A")
+        self.assertNotIn("texto_original_pdf", obra)
+        self.assertNotIn("biografia", obra["autor"])
+        self.assertEqual(obra["representacion"]["lugar"], "Palacio")
+
+    def test_detail_grouped_by_id_bucket(self):
+        from apps.obras.shards import escribir_shards
+
+        manifest = escribir_shards(self.payload, self.dir)
+        self.assertEqual(set(manifest["detalle"]), {"0", "1"})
+        detalle = self._leer(manifest["detalle"]["0"])
+        self.assertEqual(detalle["obras"]["7"]["texto_original_pdf"], "x" * 500)
+
+    def test_names_are_content_hashed(self):
+        from apps.obras.shards import escribir_shards
+
+        primero = escribir_shards(self.payload, self.dir)
+        self.assertEqual(escribir_shards(self.payload, self.dir), primero)
+
+        self.payload["obras"][1]["titulo"] = "Obra B (corregida)"
+        segundo = escribir_shards(self.payload, self.dir)
+        self.assertNotEqual(segundo["lista"], primero["lista"])
+        self.assertNotEqual(segundo["detalle"]["1"], primero["detalle"]["1"])
+        self.assertEqual(segundo["detalle"]["0"], primero["detalle"]["0"])
+
+    def test_keeps_previous_generation_only(self):
+        from apps.obras.shards import escribir_shards
+
+        primero = escribir_shards(self.payload, self.dir)
+        self.payload["obras"][1]["titulo"] = "v2"
+        escribir_shards(self.payload, self.dir)
+        self.assertTrue((self.dir / primero["lista"]).exists())
+        self.payload["obras"][1]["titulo"] = "v3"
+        escribir_shards(self.payload, self.dir)
+        self.assertFalse((self.dir / primero["lista"]).exists())
+
+    def test_retired_shards_drop_compressed_variants(self):
+        from apps.obras.archivos_estaticos import precomprimir_directorio
+        from apps.obras.shards import escribir_shards
+
+        self.payload["obras"][0]["texto_original_pdf"] = "x" * 5000
+        primero = escribir_shards(self.payload, self.dir)
+        precomprimir_directorio(self.dir)
+        self.assertTrue((self.dir / (primero["detalle"]["0"] + ".gz")).exists())
+        for titulo in ("v2", "v3"):
+            self.payload["obras"][0]["titulo"] = titulo
+            escribir_shards(self.payload, self.dir)
+        self.assertFalse((self.dir / (primero["detalle"]["0"] + ".gz")).exists())
+
+    def test_exportar_json_writes_shards_next_to_json(self):
+        _create_obra()
+        salida = self.dir.parent / "export.json"
+        call_command("exportar_json", salida=str(salida), stdout=tempfile.TemporaryFile(mode="w+"))
+        manifest = json.loads((self.dir.parent / "export" / "manifest.json").read_text(encoding="utf-8"))
+        self.assertEqual(manifest["metadata"]["total_obras"], 1)
+
+
+# ===========================================================================
+# 10. Índice de búsqueda precalculado
+# ===========================================================================
+
+class IndiceBusquedaTest(TestCase):
+    """El índice serializado responde igual que la búsqueda del servidor (filtrar_obras).
+
+    ``titulo`` (la caja de título del frontend) no tiene parámetro en la API:
+    se compara con icontains sobre el título que exporta el JSON.
+    """
+
+    CONSULTAS_TEXTO = [
+        {}, {"q": "vida"}, {"q": "VIDA es"}, {"q": "sueño"}, {"q": "sueno"}, {"q": "s"},
+        {"q": "amor"}, {"q": "  amor "}, {"q": "a"}, {"q": "zz"}, {"q": "ida"}, {"q": "la vida es"},
+        {"q": "celos, aun"}, {"q": "¿y"}, {"q": "calder"}, {"q": "Calderón de"},
+        {"autor": "calderon"}, {"autor": "Calderón de la"}, {"autor": "lope"}, {"autor": "ve"},
+        {"lugar": "alcázar"}, {"lugar": "alcazar"}, {"lugar": "buen retiro"}, {"lugar": "de"},
+        {"compania": "escamilla"}, {"compania": "prado"}, {"mecenas": "duque"},
+        {"q": "amor", "autor": "calderón"}, {"q": "fiesta", "lugar": "coliseo"},
+        {"lugar": "alcázar", "compania": "prado"},
+        {"titulo": "vida"}, {"titulo": "amor"}, {"titulo": "calder"}, {"titulo": "ida es s"},
+        {"titulo": "celos, aun"}, {"titulo": "¿"}, {"titulo": "sueño", "autor": "calderón"},
+    ]
+    CONSULTAS_FACETA = [
+        {}, {"tipo_obra": "comedia"}, {"tipo_obra": "zarzuela"}, {"fuente": "FUENTES IX"},
+        {"tipo_obra": "comedia", "fuente": "CATCOM"}, {"tipo_obra": "auto"},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        calderon = Autor.objects.create(nombre="Calderón", nombre_completo="Pedro Calderón de la Barca")
+        lope = Autor.objects.create(nombre="Lope", nombre_completo="Lope de Vega")
+        alcazar = Lugar.objects.create(nombre="Alcázar de Madrid", region="Madrid")
+        retiro = Lugar.objects.create(nombre="Coliseo del Buen Retiro", region="Madrid")
+        titulos = [
+            ("La vida es sueño", calderon, "comedia", "CATCOM"),
+            ("Celos, aun del aire, matan", calderon, "zarzuela", "FUENTESXI"),
+            ("El mayor monstruo del mundo", calderon, "comedia", "FUENTESXI"),
+            ("Amor, honor y poder", calderon, "comedia", "CATCOM"),
+            ("El castigo sin venganza", lope, "comedia", "AMBAS"),
+            ("Fiesta de la vida", None, "loa", "CATCOM"),
+            ("¿Y el amor?", lope, "entremés", "CATCOM"),
+            ("Sueños hay que verdad son", calderon, "auto", "FUENTESXI"),
+        ]
+        for i, (titulo, autor, tipo, fuente) in enumerate(titulos):
+            obra = _create_obra(titulo, autor=autor, tipo=tipo, fuente=fuente)
+            if i % 2 == 0:
+                obra.titulo_alternativo = "Amor sin fin" if i == 4 else ""
+                obra.mecenas = "Duque de Medina" if i == 2 else ""
+                obra.save()
+                Representacion.objects.create(
+                    obra=obra, fecha="1680", lugar=alcazar if i % 4 == 0 else retiro,
+                    tipo_lugar="palacio" if i % 4 == 0 else "corral",
+                    compañia="Escamilla" if i == 0 else "",
+                )
+            if i in (0, 3):
+                # Segunda representación: lugar y compañía que no salen en la lista
+                Representacion.objects.create(obra=obra, fecha="1681", lugar=retiro, compañia="Prado")
+
+    def _indice(self):
+        from apps.obras.indice_busqueda import construir_indice
+        from apps.obras.views_api_json import _construir_datos_obras_json
+
+        indice = construir_indice(json.loads(_construir_datos_obras_json())["obras"])
+        # Se compara contra el índice tal y como lo recibe el navegador
+        return json.loads(json.dumps(indice))
+
+    def _servidor(self, texto, facetas):
+        """Ids que devuelve filtrar_obras para los mismos filtros que /api/obras/search/."""
+        from django.http import QueryDict
+
+        from apps.obras.filtros import filtrar_obras, parametros_de_filtro
+
+        from django.db.models import Value
+        from django.db.models.functions import Coalesce, NullIf
+
+        texto = dict(texto)
+        titulo = texto.pop("titulo", "").strip()
+        parametros = QueryDict(mutable=True)
+        parametros.update(texto)
+        if facetas.get("tipo_obra"):
+            parametros["tipo"] = facetas["tipo_obra"]
+        if facetas.get("fuente"):
+            parametros["fuente"] = facetas["fuente"]
+        obras = filtrar_obras(Obra.objects.order_by("id"), parametros_de_filtro(parametros))
+        if titulo:
+            obras = obras.annotate(
+                titulo_json=Coalesce(NullIf("titulo_limpio", Value("")), "titulo")
+            ).filter(titulo_json__icontains=titulo)
+        return list(obras.values_list("id", flat=True))
+
+    def test_index_matches_server_search(self):
+        from apps.obras.indice_busqueda import consultar
+
+        indice = self._indice()
+        for texto in self.CONSULTAS_TEXTO:
+            for facetas in self.CONSULTAS_FACETA:
+                with self.subTest(texto=texto, facetas=facetas):
+                    self.assertEqual(consultar(indice, texto, facetas), self._servidor(texto, facetas))
+
+    def test_matches_substrings_of_any_representation(self):
+        from apps.obras.indice_busqueda import consultar
+
+        indice = self._indice()
+        vida = Obra.objects.get(titulo_limpio="La vida es sueño").pk
+        self.assertIn(vida, consultar(indice, {"q": "ida es s"}))
+        self.assertNotIn(vida, consultar(indice, {"q": "sueno"}))
+        # La caja de título no busca en el autor, q sí
+        self.assertNotIn(vida, consultar(indice, {"titulo": "calderón"}))
+        self.assertIn(vida, consultar(indice, {"q": "calderón"}))
+        # La lista solo trae la primera representación (Alcázar, Escamilla)
+        self.assertIn(vida, consultar(indice, {"lugar": "retiro", "compania": "prado"}))
+
+    def test_api_total_matches_index(self):
+        from apps.obras.indice_busqueda import consultar
+
+        indice = self._indice()
+        for parametros in ({"q": "amor"}, {"lugar": "retiro", "tipo": "comedia"}):
+            with self.subTest(parametros=parametros):
+                resp = self.client.get("/api/obras/search/", parametros)
+                facetas = {"tipo_obra": parametros.get("tipo", "")}
+                texto = {campo: valor for campo, valor in parametros.items() if campo != "tipo"}
+                self.assertEqual(resp.json()["total"], len(consultar(indice, texto, facetas)))
+
+    def test_tipo_lugar_facet_uses_listed_representation(self):
+        from apps.obras.indice_busqueda import consultar
+
+        indice = self._indice()
+        esperadas = list(
+            Obra.objects.filter(titulo_limpio__in=["La vida es sueño", "El castigo sin venganza"])
+            .order_by("id").values_list("id", flat=True)
+        )
+        self.assertEqual(consultar(indice, facetas={"tipo_lugar": "palacio"}), esperadas)
+
+    def test_tokens_are_accent_folded_suffixes_with_prefix_blocks(self):
+        from apps.obras.indice_busqueda import sufijos
+
+        indice = self._indice()
+        campo = indice["campos"]["titulo"]
+        self.assertEqual(campo["valores"], sorted(set(campo["valores"])))
+        self.assertEqual(campo["tokens"], sorted(campo["tokens"]))
+        self.assertIn("sueno", campo["tokens"])
+        self.assertIn("ueno", campo["tokens"])
+        self.assertTrue(all(d >= 0 for p in campo["postings"] + campo["obras"] for d in p))
+        for token, deltas in zip(campo["tokens"], campo["postings"]):
+            indices = [sum(deltas[:i + 1]) for i in range(len(deltas))]
+            self.assertTrue(all(token in sufijos(campo["valores"][k]) for k in indices))
+        cubiertos = sum(fin - inicio for inicio, fin in campo["bloques"].values())
+        self.assertEqual(cubiertos, len(campo["tokens"]))
+
+    def test_manifest_references_index_shard(self):
+        from apps.obras.shards import escribir_shards
+        from apps.obras.views_api_json import _construir_datos_obras_json
+
+        with tempfile.TemporaryDirectory() as tmp:
+            payload = json.loads(_construir_datos_obras_json())
+            manifest = escribir_shards(payload, Path(tmp))
+            self.assertRegex(manifest["indice"], r"^indice\.[0-9a-f]{16}\.json$")
+            self.assertTrue((Path(tmp) / manifest["indice"]).exists())
+
+
+# ===========================================================================
+# 11. Delta de /api/datos-obras/ y registro de cambios
+# ===========================================================================
+
+class DeltaDatosObrasTest(TransactionTestCase):
+    """Transacciones reales: el registro se escribe al confirmar (on_commit)."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from unittest import mock
+
+        # Sin margen de confirmación: cada delta trae exactamente lo posterior al cursor
+        patcher = mock.patch("apps.obras.delta.MARGEN_CONFIRMACION", timedelta(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.autor = Autor.objects.create(nombre="Calderón")
+        self.lugar = Lugar.objects.create(nombre="Palacio", region="Madrid")
+        self.obras = [_create_obra(f"Obra {i}", autor=self.autor if i < 2 else None) for i in range(4)]
+        self.cursor = self.client.get("/api/datos-obras/").json()["metadata"]["cambio"]
+
+    def _delta(self, **params):
+        resp = self.client.get("/api/datos-obras/delta/", params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_updates_representations_and_tombstones(self):
+        a, b, c, _ = self.obras
+        a.titulo_limpio = "Obra editada"
+        a.save()
+        Representacion.objects.create(obra=b, fecha="1680", lugar=self.lugar)
+        c_id = c.pk
+        c.delete()
+
+        delta = self._delta(desde=self.cursor)
+        self.assertFalse(delta["reiniciar"])
+        self.assertEqual(sorted(o["id"] for o in delta["obras"]), [a.pk, b.pk])
+        self.assertEqual(delta["eliminadas"], [c_id])
+        self.assertEqual(delta["metadata"]["total_obras"], 3)
+
+        completo = {o["id"]: o for o in self.client.get("/api/datos-obras/").json()["obras"]}
+        for obra in delta["obras"]:
+            self.assertEqual(obra, completo[obra["id"]])
+
+        self.assertEqual(self._delta(desde=delta["hasta"])["obras"], [])
+
+    def test_author_and_place_changes_reach_their_obras(self):
+        Representacion.objects.create(obra=self.obras[3], fecha="1680", lugar=self.lugar)
+        cursor = self._delta(desde=self.cursor)["hasta"]
+
+        self.autor.nombre = "Pedro Calderón"
+        self.autor.save()
+        self.lugar.delete()
+        delta = self._delta(desde=cursor)
+        self.assertEqual(sorted(o["id"] for o in delta["obras"]), [self.obras[0].pk, self.obras[1].pk, self.obras[3].pk])
+        self.assertEqual(delta["obras"][0]["autor"]["nombre"], "Pedro Calderón")
+
+    def test_one_entry_per_obra_per_transaction_and_rollback_leaves_none(self):
+        from django.db import transaction
+        from apps.obras.models import CambioDataset
+
+        antes = CambioDataset.objects.count()
+        with transaction.atomic():
+            for i in range(3):
+                Representacion.objects.create(obra=self.obras[0], fecha=f"16{i}0")
+        self.assertEqual(CambioDataset.objects.count(), antes + 1)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.obras[1].delete()
+                raise RuntimeError
+        self.assertEqual(CambioDataset.objects.count(), antes + 1)
+
+    def test_since_timestamp(self):
+        from django.utils import timezone
+
+        marca = timezone.now()
+        self.obras[2].save()
+        delta = self._delta(desde_fecha=marca.isoformat())
+        self.assertEqual([o["id"] for o in delta["obras"]], [self.obras[2].pk])
+
+    def test_rescans_entries_just_below_the_cursor(self):
+        from datetime import timedelta
+        from unittest import mock
+        from apps.obras.models import CambioDataset
+
+        a, b = self.obras[:2]
+        a.save()
+        b.save()
+        tardia = CambioDataset.objects.get(obra_id=a.pk, id__gt=self.cursor)
+        # Como si ``tardia`` se hubiera confirmado después de leer el cursor de b
+        cursor = CambioDataset.objects.get(obra_id=b.pk, id__gt=self.cursor).pk
+        self.assertEqual(self._delta(desde=cursor)["obras"], [])
+        with mock.patch("apps.obras.delta.MARGEN_CONFIRMACION", timedelta(minutes=5)):
+            self.assertIn(tardia.obra_id, [o["id"] for o in self._delta(desde=cursor)["obras"]])
+            CambioDataset.objects.filter(pk__lte=tardia.pk).update(fecha=tardia.fecha - timedelta(minutes=10))
+            self.assertNotIn(tardia.obra_id, [o["id"] for o in self._delta(desde=cursor)["obras"]])
+
+    def test_restart_and_bad_parameters(self):
+        from apps.obras.models import CambioDataset
+
+        self.assertTrue(self._delta(desde=self.cursor + 1000)["reiniciar"])
+        self.assertTrue(self._delta(desde_fecha="2000-01-01T00:00:00")["reiniciar"])
+        CambioDataset.objects.filter(id__lte=2).delete()
+        self.assertTrue(self._delta(desde=0)["reiniciar"])
+
+        self.assertEqual(self.client.get("/api/datos-obras/delta/").status_code, 400)
+        self.assertEqual(self.client.get("/api/datos-obras/delta/", {"desde": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/datos-obras/delta/", {"desde_fecha": "ayer"}).status_code, 400)
+
+
+# ===========================================================================
+# 12. Búsqueda paginada en el servidor (/api/obras/search/)
+# ===========================================================================
+
+@override_settings(CACHES=CACHE_VACIA)
+class BusquedaObrasApiTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        import datetime
+
+        cls.calderon = Autor.objects.create(nombre="Calderón", nombre_completo="Pedro Calderón de la Barca")
+        cls.palacio = Lugar.objects.create(nombre="Palacio Real", region="Madrid")
+        cls.obras = []
+        for i in range(23):
+            obra = _create_obra(
+                f"Obra {i:02d}",
+                autor=cls.calderon if i % 2 else None,
+                tipo="comedia" if i % 3 else "zarzuela",
+                fuente="FUENTESXI" if i % 4 == 0 else "CATCOM",
+            )
+            if i % 3 == 0:
+                Representacion.objects.create(
+                    obra=obra, fecha=str(1650 + i), fecha_formateada=datetime.date(1650 + i, 5, 1),
+                    lugar=cls.palacio, compañia="Escamilla" if i % 2 else "",
+                )
+            cls.obras.append(obra)
+
+    def _get(self, **params):
+        resp = self.client.get("/api/obras/search/", params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def _todas(self, **params):
+        ids, cursor = [], None
+        while True:
+            data = self._get(**params, **({"cursor": cursor} if cursor else {}))
+            ids += [r["id"] for r in data["resultados"]]
+            cursor = data["siguiente"]
+            if not cursor:
+                return ids, data
+
+    def test_keyset_pages_cover_results_in_order(self):
+        for orden, clave in (("titulo", lambda o: (o.titulo_limpio, o.pk)), ("-id", lambda o: -o.pk)):
+            ids, _ = self._todas(orden=orden, limite=4, tipo="comedia", campos="id")
+            esperado = [o.pk for o in sorted((o for o in self.obras if o.tipo_obra == "comedia"), key=clave)]
+            self.assertEqual(ids, esperado)
+
+    def test_filters_match_queryset(self):
+        casos = [
+            ({"fuente": "FUENTES IX"}, lambda o: o.fuente_principal == "FUENTESXI"),
+            ({"autor": "Calderón de la"}, lambda o: o.autor_id is not None),
+            ({"autor": str(self.calderon.pk), "tipo": "zarzuela"}, lambda o: o.autor_id and o.tipo_obra == "zarzuela"),
+            ({"lugar": "palacio"}, lambda o: o.representaciones.exists()),
+            ({"compania": "escamilla"}, lambda o: o.representaciones.filter(compañia="Escamilla").exists()),
+            ({"fecha_desde": "1660", "fecha_hasta": "1665"},
+             lambda o: o.representaciones.filter(fecha_formateada__year__range=(1660, 1665)).exists()),
+            ({"q": "obra 1"}, lambda o: o.titulo_limpio.startswith("Obra 1")),
+        ]
+        for filtros, predicado in casos:
+            with self.subTest(filtros=filtros):
+                ids, data = self._todas(**filtros, limite=5)
+                esperado = {o.pk for o in self.obras if predicado(o)}
+                self.assertEqual(set(ids), esperado)
+                self.assertEqual(len(ids), len(esperado))
+                self.assertEqual(data["total"], len(esperado))
+
+    def test_sparse_fields_and_facets(self):
+        data = self._get(campos="id,titulo,fuente,total_representaciones", facetas="tipo_obra,fuente", limite=50)
+        self.assertEqual(set(data["resultados"][0]), {"id", "titulo", "fuente", "total_representaciones"})
+        self.assertEqual(data["facetas"]["tipo_obra"], {"comedia": 15, "zarzuela": 8})
+        self.assertEqual(data["facetas"]["fuente"], {"CATCOM": 17, "FUENTES IX": 6})
+        con_rep = {r["id"]: r["total_representaciones"] for r in data["resultados"]}
+        self.assertEqual(con_rep[self.obras[3].pk], 1)
+        self.assertEqual(con_rep[self.obras[1].pk], 0)
+        self.assertEqual(self._get(facetas="")["facetas"], {})
+
+    def test_page_query_count_is_fixed(self):
+        primera = self._get(limite=3, facetas="tipo_obra", campos="id,titulo,autor")
+        # página + total + una faceta (la caché de tests es dummy)
+        with self.assertNumQueries(3):
+            self.client.get("/api/obras/search/", {
+                "limite": 3, "facetas": "tipo_obra", "campos": "id,titulo,autor", "cursor": primera["siguiente"],
+            })
+
+    def test_invalid_parameters(self):
+        for params in ({"campos": "id,secreto"}, {"orden": "autor"}, {"cursor": "xx"},
+                       {"musica": "quizá"}, {"fecha_desde": "ayer"}, {"limite": "muchos"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get("/api/obras/search/", params).status_code, 400)
+        cursor = self._get(limite=1)["siguiente"]
+        self.assertEqual(self.client.get("/api/obras/search/", {"cursor": cursor, "orden": "id"}).status_code, 400)
+
+
+# ===========================================================================
+# 13. Secciones del editor paginadas por cursor
+# ===========================================================================
+
+@override_settings(CACHES=CACHE_VACIA)
+class EditorSeccionesPaginadasTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.bibliografia.models import ReferenciaBibliografica
+
+        cls.autores = [Autor.objects.create(nombre=f"Autor {i}") for i in range(3)]
+        cls.lugar = Lugar.objects.create(nombre="Corral del Príncipe", region="Madrid", pais="España")
+        Lugar.objects.create(nombre="Coliseo del Buen Retiro", region="Madrid")
+        cls.obras = []
+        for i in range(9):
+            obra = _create_obra(f"Obra {i}", autor=cls.autores[i % 3], fuente="FUENTESXI")
+            Representacion.objects.create(obra=obra, fecha=str(1660 + i), lugar=cls.lugar if i % 2 else None)
+            ReferenciaBibliografica.objects.create(obra=obra, titulo=f"Estudio {i}", autor="Varey")
+            cls.obras.append(obra)
+        _create_obra("Obra de otro catálogo", fuente="CATCOM")
+
+    def _todas(self, section, **params):
+        items, cursor = [], None
+        while True:
+            resp = self.client.get(f"/obras/editor/fuentesxi/{section}/",
+                                   {**params, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(resp.status_code, 200, resp.content)
+            data = resp.json()
+            items += data["items"]
+            cursor = data["siguiente"]
+            if not cursor:
+                return items, data
+
+    def test_pages_cover_every_section(self):
+        esperados = {"obras": 9, "autores": 3, "lugares": 2, "representaciones": 9, "bibliografia": 9}
+        for section, total in esperados.items():
+            with self.subTest(section=section):
+                items, data = self._todas(section, limite=2)
+                self.assertEqual(data["total"], total)
+                self.assertEqual(len({item["id"] for item in items}), total)
+                self.assertEqual(set(items[0]), {"id", "titulo", "subtitulo", "tipo", "extra"})
+
+    def test_rows_come_from_projections(self):
+        obras, _ = self._todas("obras", limite=4)
+        self.assertEqual([o["titulo"] for o in obras], [f"Obra {i}" for i in range(9)])
+        self.assertEqual(obras[0]["subtitulo"], "Autor 0")
+        autores, _ = self._todas("autores")
+        self.assertEqual([a["extra"] for a in autores], ["3 obras", "3 obras", "3 obras"])
+        reps, _ = self._todas("representaciones")
+        self.assertEqual(reps[0]["titulo"], "Obra 8")
+        self.assertEqual(reps[0]["subtitulo"], "Lugar desconocido - 1668")
+        self.assertEqual(reps[1]["subtitulo"], f"{self.lugar.nombre} - 1667")
+
+    def test_filters_apply_to_obras(self):
+        items, data = self._todas("obras", autor=str(self.autores[1].pk), lugar=str(self.lugar.pk))
+        self.assertEqual({i["id"] for i in items}, {self.obras[1].pk, self.obras[7].pk})
+        self.assertEqual(data["total"], 2)
+        count = self.client.get("/obras/editor/fuentesxi/count/", {"lugar": str(self.lugar.pk)}).json()
+        self.assertEqual(count["count"], 4)
+        self.assertTrue(count["filters_applied"]["lugar"])
+
+    def test_page_query_count_is_fixed(self):
+        for section in ("obras", "autores", "lugares", "representaciones", "bibliografia"):
+            with self.subTest(section=section):
+                primera = self.client.get(f"/obras/editor/fuentesxi/{section}/", {"limite": 1}).json()
+                # filas + total, sin consultas por fila
+                with self.assertNumQueries(2):
+                    self.client.get(f"/obras/editor/fuentesxi/{section}/",
+                                    {"limite": 1, "cursor": primera["siguiente"]})
+
+    def test_editor_page_is_a_shell_with_counts(self):
+        resp = self.client.get("/obras/editor/fuentesxi/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["conteos"], {
+            "obras": 9, "autores": 3, "lugares": 2, "representaciones": 9, "bibliografia": 9,
+        })
+        # Las filas llegan después por get_section_data_ajax
+        self.assertNotIn("obras", resp.context)
+        self.assertNotContains(resp, 'data-obra-id="%d"' % self.obras[0].pk)
+
+    def test_invalid_cursor(self):
+        cursor = self.client.get("/obras/editor/fuentesxi/obras/", {"limite": 1}).json()["siguiente"]
+        resp = self.client.get("/obras/editor/fuentesxi/autores/", {"cursor": cursor})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.client.get("/obras/editor/fuentesxi/obras/", {"limite": "x"}).status_code, 400)
+
+
+# ===========================================================================
+# 14. Proyecciones ligeras de los listados
+# ===========================================================================
+
+@override_settings(CACHES=CACHE_VACIA)
+class ProyeccionesListadoTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        import datetime
+
+        cls.autor = Autor.objects.create(nombre="Lope de Vega")
+        cls.corral = Lugar.objects.create(nombre="Corral de la Cruz")
+        cls.obras = [_create_obra(f"Obra {i}", autor=cls.autor if i % 2 else None) for i in range(6)]
+        Obra.objects.filter(pk=cls.obras[1].pk).update(texto_original_pdf="x" * 5000, mecenas="Olivares")
+        for anio, compania in ((1650, "Prado"), (1660, "Escamilla")):
+            Representacion.objects.create(
+                obra=cls.obras[1], fecha=str(anio), fecha_formateada=datetime.date(anio, 1, 1),
+                lugar=cls.corral, compañia=compania,
+            )
+
+    def test_filas_match_model(self):
+        from apps.obras.proyecciones import FilaObraCatalogo, filas_de
+
+        filas = filas_de(FilaObraCatalogo, Obra.objects.order_by("titulo"))
+        self.assertEqual([f.id for f in filas], [o.pk for o in self.obras])
+        fila = filas[1]
+        self.assertEqual((fila.autor, fila.mecenas, fila.total_representaciones), ("Lope de Vega", "Olivares", 2))
+        # La primera representación es la más reciente, como el orden del modelo
+        self.assertEqual((fila.lugar, fila.compania), (self.corral.nombre, "Escamilla"))
+        self.assertEqual((filas[0].autor, filas[0].lugar, filas[0].total_representaciones), (None, None, 0))
+        self.assertFalse(hasattr(fila, "__dict__"))
+
+    def test_obras_ligeras_defers_large_fields(self):
+        from apps.obras.proyecciones import CAMPOS_PESADOS, obras_ligeras
+
+        obra = obras_ligeras().get(pk=self.obras[1].pk)
+        self.assertTrue(set(CAMPOS_PESADOS) <= obra.get_deferred_fields())
+
+    def test_listing_views_use_fixed_queries(self):
+        for _ in range(5):
+            _create_obra(f"Extra {_}", autor=self.autor)
+        for url in ("/obras/catalogo/", "/obras/editor/catcom/", "/obras/catalogos/catcom/"):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as consultas:
+                    resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 200)
+                self.assertNotContains(resp, "x" * 100)
+                # Sin consultas por obra: repetir con más obras no cambia el número
+                _create_obra(f"Otra {url}", autor=self.autor)
+                with CaptureQueriesContext(connection) as consultas_despues:
+                    self.client.get(url)
+                self.assertEqual(len(consultas_despues), len(consultas))
+        resp = self.client.get("/obras/catalogo/")
+        self.assertContains(resp, "2 representaciones")
+        self.assertContains(resp, "Escamilla")
+
+
+# ===========================================================================
+# 15. Agregados de representaciones guardados en Obra
+# ===========================================================================
+
+class AgregadosRepresentacionesTest(TestCase):
+
+    def setUp(self):
+        self.obra = _create_obra("La dama duende")
+        self.otra = _create_obra("El alcalde de Zalamea")
+        self.cruz = Lugar.objects.create(nombre="Corral de la Cruz")
+        self.palacio = Lugar.objects.create(nombre="Buen Retiro")
+
+    def _guardados(self, obra):
+        obra = Obra.objects.get(pk=obra.pk)
+        return (obra.total_representaciones, obra.primera_representacion,
+                obra.ultima_representacion, obra.lugares_representacion)
+
+    def test_signals_keep_aggregates_current(self):
+        rep = Representacion.objects.create(obra=self.obra, fecha="1651", lugar=self.cruz)
+        Representacion.objects.create(obra=self.obra, fecha="1640", lugar=self.palacio)
+        Representacion.objects.create(obra=self.obra, fecha="1660", lugar=self.cruz)
+        self.assertEqual(self._guardados(self.obra),
+                         (3, "1640", "1660", [self.palacio.nombre, self.cruz.nombre]))
+        # La instancia en memoria de rep.obra también se actualiza
+        self.assertEqual(self.obra.total_representaciones, 3)
+
+        rep.obra = self.otra
+        rep.save()
+        self.assertEqual(self._guardados(self.otra), (1, "1651", "1651", [self.cruz.nombre]))
+        self.assertEqual(self._guardados(self.obra)[0], 2)
+
+        rep.delete()
+        self.assertEqual(self._guardados(self.otra), (0, None, None, []))
+
+    def test_lugar_rename_and_delete(self):
+        Representacion.objects.create(obra=self.obra, fecha="1651", lugar=self.cruz)
+        self.cruz.nombre = "Teatro de la Cruz"
+        self.cruz.save()
+        self.assertEqual(self._guardados(self.obra)[3], [self.cruz.nombre])
+        self.cruz.delete()
+        self.assertEqual(self._guardados(self.obra)[3], [])
+
+    def test_stale_instance_save_keeps_aggregates(self):
+        vieja = Obra.objects.get(pk=self.obra.pk)
+        Representacion.objects.create(obra_id=self.obra.pk, fecha="1651")
+        vieja.mecenas = "Conde Duque"
+        vieja.save()
+        obra = Obra.objects.get(pk=self.obra.pk)
+        self.assertEqual((obra.mecenas, obra.total_representaciones), ("Conde Duque", 1))
+
+    def test_deferred_recalculation_runs_once(self):
+        from apps.obras.agregados import recalculo_diferido
+
+        with recalculo_diferido():
+            for anio in range(1650, 1660):
+                Representacion.objects.create(obra=self.obra, fecha=str(anio))
+            self.assertEqual(self._guardados(self.obra)[0], 0)
+        self.assertEqual(self._guardados(self.obra)[:3], (10, "1650", "1659"))
+
+    def test_rebuild_command(self):
+        Representacion.objects.create(obra=self.obra, fecha="1651", lugar=self.cruz)
+        Obra.objects.update(representaciones_total=99, representaciones_lugares=["x"])
+        call_command("recalcular_agregados", stdout=open("/dev/null", "w"))
+        self.assertEqual(self._guardados(self.obra), (1, "1651", "1651", [self.cruz.nombre]))
+        self.assertEqual(self._guardados(self.otra), (0, None, None, []))
+
+    def test_serializer_reads_columns(self):
+        from apps.obras.serializers import ObraSerializer
+        from apps.representaciones.models import Representacion as Rep
+
+        Representacion.objects.create(obra=self.obra, fecha="1651", lugar=self.cruz)
+        obra = Obra.objects.get(pk=self.obra.pk)
+        with CaptureQueriesContext(connection) as consultas:
+            datos = ObraSerializer(obra).data
+        self.assertFalse([q for q in consultas if Rep._meta.db_table in q["sql"]])
+        self.assertEqual(
+            (datos["total_representaciones"], datos["primera_representacion"], datos["lugares_representacion"]),
+            (1, "1651", [self.cruz.nombre]),
+        )
+
+
+# ===========================================================================
+# 16. Estadísticas de cabecera en una sola consulta
+# ===========================================================================
+
+@override_settings(CACHES=CACHE_VACIA)
+class EstadisticasCatalogoTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            obra = _create_obra(f"Obra {i}", fuente=("FUENTESXI", "CATCOM", "AMBAS")[i % 3])
+            Obra.objects.filter(pk=obra.pk).update(
+                musica_conservada=bool(i % 2), mecenas="Olivares" if i < 2 else "",
+            )
+
+    def test_counters_match_separate_queries(self):
+        from apps.obras.estadisticas import estadisticas_catalogo
+
+        with self.assertNumQueries(1):
+            stats = estadisticas_catalogo()
+        obras = Obra.objects
+        self.assertEqual(stats, {
+            "total": obras.count(),
+            "fuentesxi": obras.filter(fuente_principal="FUENTESXI").count(),
+            "catcom": obras.filter(fuente_principal="CATCOM").count(),
+            "ambas": obras.filter(fuente_principal__in=["FUENTESXI", "CATCOM"]).count(),
+            "con_musica": obras.filter(musica_conservada=True).count(),
+            "sin_musica": obras.filter(musica_conservada=False).count(),
+            "con_mecenas": obras.exclude(mecenas="").count(),
+            "con_compositor": obras.exclude(compositor="").count(),
+        })
+
+    def test_filtered_and_per_fuente_counters(self):
+        from apps.obras.estadisticas import estadisticas_busqueda, estadisticas_fuente
+
+        obras = Obra.objects.filter(musica_conservada=True)
+        with self.assertNumQueries(1):
+            stats = estadisticas_busqueda(obras, {"musica_conservada": "true"})
+        self.assertEqual((stats["total"], stats["con_musica"], stats["con_mecenas"]), (3, 3, 1))
+        with self.assertNumQueries(1):
+            stats = estadisticas_fuente("CATCOM")
+        self.assertEqual((stats["total_obras"], stats["con_musica"], stats["sin_musica"]), (2, 1, 1))
+
+    def test_landing_pages_cost_one_stats_query(self):
+        for url in ("/obras/catalogos/", "/obras/editor/"):
+            with self.subTest(url=url), self.assertNumQueries(1):
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+
+    @override_settings(CACHES=CACHE_LRU)
+    def test_cached_per_generation(self):
+        from apps.obras import cache
+        from apps.obras.estadisticas import estadisticas_catalogo
+
+        caches["obras"].clear()
+        estadisticas_catalogo()
+        with self.assertNumQueries(0):
+            self.assertEqual(estadisticas_catalogo()["total"], 7)
+        Obra.objects.filter(fuente_principal="AMBAS").delete()
+        cache.incrementar_generacion()
+        with self.assertNumQueries(1):
+            self.assertEqual(estadisticas_catalogo()["total"], 5)
+
+    @override_settings(CACHES=CACHE_LRU)
+    def test_section_counts_follow_bibliography_changes(self):
+        from unittest import mock
+
+        from apps.bibliografia.models import ReferenciaBibliografica
+        from apps.obras.estadisticas import conteos_secciones
+
+        caches["obras"].clear()
+        obra = Obra.objects.filter(fuente_principal="FUENTESXI").first()
+        self.assertEqual(conteos_secciones("FUENTESXI")["bibliografia"], 0)
+
+        def confirmar(operacion):
+            # Cola de on_commit nueva: la del test ya tiene un incremento y se deduplicaría
+            with mock.patch.object(connection, "run_on_commit", []):
+                with self.captureOnCommitCallbacks(execute=True):
+                    return operacion()
+
+        referencia = confirmar(lambda: ReferenciaBibliografica.objects.create(obra=obra, titulo="Catálogo"))
+        self.assertEqual(conteos_secciones("FUENTESXI")["bibliografia"], 1)
+        confirmar(referencia.delete)
+        self.assertEqual(conteos_secciones("FUENTESXI")["bibliografia"], 0)
+
+
+# ===========================================================================
+# 17. Opciones de los desplegables cacheadas
+# ===========================================================================
+
+class OpcionesFiltrosTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.calderon = Autor.objects.create(nombre="Calderón")
+        cls.lope = Autor.objects.create(nombre="Lope")
+        cls.palacio = Lugar.objects.create(nombre="Palacio", region="Madrid")
+        a = _create_obra("Obra A", autor=cls.calderon, tipo="comedia", fuente="FUENTESXI")
+        b = _create_obra("Obra B", autor=cls.calderon, tipo="zarzuela", fuente="FUENTESXI")
+        c = _create_obra("Obra C", autor=cls.lope, tipo="comedia", fuente="CATCOM")
+        Obra.objects.filter(pk=c.pk).update(mecenas="Olivares")
+        Representacion.objects.create(obra=a, fecha="1680", lugar=cls.palacio, compañia="Escamilla")
+        Representacion.objects.create(obra=b, fecha="1681", lugar=cls.palacio, compañia="Escamilla")
+
+    def test_lists_with_counts(self):
+        from apps.obras.opciones_filtros import calcular_opciones
+
+        opciones = calcular_opciones()
+        self.assertEqual(
+            [(a["nombre"], a["num_obras"]) for a in opciones["autores_con_obras"]],
+            [("Calderón", 2), ("Lope", 1)],
+        )
+        self.assertEqual(opciones["tipos_obra"], [
+            {"tipo_obra": "comedia", "total": 2}, {"tipo_obra": "zarzuela", "total": 1},
+        ])
+        self.assertEqual(opciones["mecenas"], [{"mecenas": "Olivares", "total": 1}])
+        self.assertEqual(opciones["lugares"], [{"id": self.palacio.pk, "nombre": self.palacio.nombre, "total": 2}])
+        self.assertEqual(opciones["companias"], [{"compañia": "Escamilla", "total": 2}])
+
+    def test_scoped_by_fuente(self):
+        from apps.obras.opciones_filtros import calcular_opciones
+
+        opciones = calcular_opciones("CATCOM")
+        self.assertEqual([a["nombre"] for a in opciones["autores_con_obras"]], ["Lope"])
+        self.assertEqual(opciones["companias"], [])
+        # Sin representaciones en el catálogo se ofrecen todos los lugares
+        self.assertEqual([l["total"] for l in opciones["lugares"]], [0])
+
+    @override_settings(CACHES=CACHE_LRU)
+    def test_cached_until_generation_changes(self):
+        from apps.obras import cache
+        from apps.obras.opciones_filtros import opciones_filtros
+
+        caches["obras"].clear()
+        opciones_filtros()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(opciones_filtros()["autores"]), 2)
+        Autor.objects.create(nombre="Moreto")
+        cache.incrementar_generacion()
+        self.assertEqual(len(opciones_filtros()["autores"]), 3)
+
+    @override_settings(CACHES=CACHE_LRU)
+    def test_catalogo_page_reuses_cached_options(self):
+        caches["obras"].clear()
+        self.client.get("/obras/catalogo/")
+        with CaptureQueriesContext(connection) as consultas:
+            resp = self.client.get("/obras/catalogo/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Escamilla")
+        # Solo el listado de obras: estadísticas y desplegables salen de la caché
+        self.assertEqual(len(consultas), 1)
+
+
+# ===========================================================================
+# 18. Listados de comentarios paginados por cursor
+# ===========================================================================
+
+class ComentariosPaginadosTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _create_user()
+        cls.admin = _create_user("admin", "admin@test.com", is_staff=True)
+        cls.obras = [_create_obra(f"Obra {i}", fuente="FUENTESXI") for i in range(3)]
+        cls.comentarios = []
+        for i in range(7):
+            c = ComentarioUsuario.objects.create(
+                usuario=cls.user, catalogo="fuentesxi", titulo=f"C{i}", comentario=f"texto {i}",
+                visto_por=cls.admin if i % 2 else None,
+            )
+            c.obras_seleccionadas.set(cls.obras[: i % 3 + 1])
+            cls.comentarios.append(c)
+        # Fechas repetidas: el desempate por id mantiene el orden total
+        ComentarioUsuario.objects.filter(pk__in=[c.pk for c in cls.comentarios[2:5]]).update(
+            fecha_creacion=cls.comentarios[2].fecha_creacion
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _todas(self, url, limite):
+        items, cursor = [], None
+        while True:
+            params = {"limite": limite, **({"cursor": cursor} if cursor else {})}
+            data = self.client.get(url, params).json()
+            self.assertTrue(data["success"], data)
+            items += data["comentarios"]
+            cursor = data["siguiente"]
+            if not cursor:
+                return items, data
+
+    def test_global_feed_pages_newest_first(self):
+        items, data = self._todas("/obras/comentarios-index/global/", 2)
+        esperado = list(ComentarioUsuario.objects.order_by("-fecha_creacion", "-id").values_list("id", flat=True))
+        self.assertEqual([c["id"] for c in items], esperado)
+        self.assertEqual(data["total"], 7)
+        primero = next(c for c in items if c["id"] == self.comentarios[1].pk)
+        self.assertEqual(primero["obra"], {"id": self.obras[0].pk, "titulo": "Obra 0"})
+        self.assertEqual(primero["visto_por"], "admin")
+
+    def test_editor_feed_counts_and_titles(self):
+        items, _ = self._todas("/obras/editor/fuentesxi/comentarios/", 3)
+        por_titulo = {c["titulo"]: c for c in items}
+        self.assertEqual(len(por_titulo), 7)
+        self.assertEqual(por_titulo["C5"]["numero_obras"], 3)
+        self.assertEqual(por_titulo["C5"]["obras_titulos"], ["Obra 0", "Obra 1", "Obra 2"])
+        # Filtrar por una obra no recorta el número de obras seleccionadas
+        data = self.client.get(f"/obras/comentarios-index/obra/{self.obras[2].pk}/").json()
+        self.assertEqual(data["total"], 2)
+        self.assertEqual(data["comentarios"][0]["id"], self.comentarios[5].pk)
+
+    def test_page_query_count_is_fixed(self):
+        for url in ("/obras/comentarios-index/global/", "/obras/editor/fuentesxi/comentarios/"):
+            with self.subTest(url=url):
+                self.client.get(url)
+                primera = self.client.get(url, {"limite": 1}).json()
+                with CaptureQueriesContext(connection) as una:
+                    self.client.get(url, {"limite": 1, "cursor": primera["siguiente"]})
+                # Sin consultas por comentario: la página entera cuesta lo mismo que una fila
+                with CaptureQueriesContext(connection) as todas:
+                    self.client.get(url, {"limite": 200})
+                self.assertEqual(len(todas), len(una))
+
+    def test_invalid_cursor(self):
+        resp = self.client.get("/obras/comentarios-index/global/", {"cursor": "no-es-un-cursor"})
+        self.assertEqual(resp.status_code, 400)
+
+
+# ===========================================================================
+# 19. Notificaciones SSE y contador de no vistos
+# ===========================================================================
+
+@override_settings(CACHES=CACHE_VACIA)
+class EventosComentariosTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _create_user()
+        cls.admin = _create_user("admin", "admin@test.com", is_staff=True)
+        cls.obra = _create_obra()
+
+    def setUp(self):
+        from unittest import mock
+
+        from apps.obras.eventos import hub
+
+        # En lugar de repartir a conexiones, se guardan los eventos publicados
+        self.publicados = []
+        patcher = mock.patch.object(hub, "entregar", side_effect=self.publicados.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _comentario(self, **extra):
+        return ComentarioUsuario.objects.create(
+            usuario=self.user, catalogo="catcom", titulo="T", comentario="texto", **extra
+        )
+
+    def _cache_compartida(self):
+        # Solo con un backend compartido: una LRU por worker se desviaría
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(CACHES={**CACHE_LRU, "obras": {
+            "BACKEND": "apps.obras.cache_backends.SQLiteCache",
+            "LOCATION": str(Path(directorio.name) / "cache.sqlite3"),
+            "TIMEOUT": None,
+        }})
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_unseen_counter_is_incremental(self):
+        from apps.obras.eventos import no_vistos
+
+        self._cache_compartida()
+        self._comentario(visto_por_admin=True)
+        self.assertEqual(no_vistos(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            c = self._comentario()
+        with self.captureOnCommitCallbacks(execute=True):
+            c2 = self._comentario()
+        with self.assertNumQueries(0):
+            self.assertEqual(no_vistos(), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            c.visto_por_admin = True
+            c.save(update_fields=["visto_por_admin"])
+        with self.captureOnCommitCallbacks(execute=True):
+            c2.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(no_vistos(), 0)
+        self.assertEqual(
+            [(e["tipo"], e["datos"].get("no_vistos")) for e in self.publicados],
+            [("comentario_creado", 1), ("comentario_creado", 2), ("comentario_visto", 1), ("comentario_borrado", 0)],
+        )
+
+    def test_unseen_counter_recounts_after_expiry(self):
+        import time
+        from unittest import mock
+
+        from apps.obras.eventos import CADUCIDAD_NO_VISTOS, no_vistos
+
+        self._cache_compartida()
+        with self.captureOnCommitCallbacks(execute=True):
+            c = self._comentario()
+        self.assertEqual(no_vistos(), 1)
+        # Un update() masivo no pasa por las señales: el contador se desvía...
+        ComentarioUsuario.objects.filter(pk=c.pk).update(visto_por_admin=True)
+        self.assertEqual(no_vistos(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._comentario()
+        # ...hasta que caduca la clave, aunque se haya ajustado entretanto
+        despues = time.time() + CADUCIDAD_NO_VISTOS + 1
+        with mock.patch("apps.obras.cache_backends.time.time", return_value=despues):
+            self.assertEqual(no_vistos(), 1)
+
+    @override_settings(CACHES=CACHE_LRU)
+    def test_unseen_counter_counts_with_per_process_cache(self):
+        from apps.obras.eventos import no_vistos
+
+        caches["obras"].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            c = self._comentario()
+        # Otro worker lo marca como visto: esta LRU no se entera del ajuste
+        ComentarioUsuario.objects.filter(pk=c.pk).update(visto_por_admin=True)
+        with self.assertNumQueries(1):
+            self.assertEqual(no_vistos(), 0)
+        self.assertNotIn("obras:comentarios:no_vistos", caches["obras"])
+
+    def test_mark_seen_endpoint_publishes_event(self):
+        c = self._comentario()
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/obras/comentarios-index/{c.pk}/visto/")
+        self.assertEqual(self.publicados[-1]["tipo"], "comentario_visto")
+        self.assertEqual(self.publicados[-1]["datos"], {"comentario_id": c.pk, "no_vistos": 0})
+        self.assertEqual(self.client.get("/obras/comentarios-index/count-unseen/").json()["count"], 0)
+
+    def test_proposal_events_are_staff_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            prop = PropuestaCambioObra.objects.create(
+                obra=self.obra, campo="titulo", valor_nuevo="Nuevo", propuesta_por=self.user,
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.estado = "rechazada"
+            prop.save()
+        self.assertEqual([e["tipo"] for e in self.publicados], ["propuesta_creada", "propuesta_resuelta"])
+        self.assertTrue(all(e["solo_staff"] for e in self.publicados))
+
+    def test_hub_filters_staff_only_events(self):
+        import asyncio
+
+        from apps.obras.eventos import Hub
+
+        async def recibir():
+            hub = Hub()
+            cola_staff, cola_usuario = hub.suscribir(True), hub.suscribir(False)
+            hub.entregar({"tipo": "propuesta_creada", "datos": {}, "solo_staff": True})
+            hub.entregar({"tipo": "comentario_creado", "datos": {}, "solo_staff": False})
+            await asyncio.sleep(0)
+            return cola_staff.qsize(), cola_usuario.qsize()
+
+        self.assertEqual(asyncio.run(recibir()), (2, 1))
+
+
+@override_settings(CACHES=CACHE_VACIA)
+class EventosStreamTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _create_user()
+        cls.admin = _create_user("admin", "admin@test.com", is_staff=True)
+
+    def test_stream_requires_asgi(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get("/obras/eventos/").status_code, 503)
+
+    async def test_stream_pushes_events(self):
+        from asgiref.sync import sync_to_async
+
+        from apps.obras.eventos import publicar
+
+        self.assertEqual((await self.async_client.get("/obras/eventos/")).status_code, 401)
+        await sync_to_async(self.async_client.force_login)(self.admin)
+        await sync_to_async(ComentarioUsuario.objects.create)(
+            usuario=self.user, catalogo="catcom", titulo="T", comentario="texto"
+        )
+        resp = await self.async_client.get("/obras/eventos/")
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        flujo = resp.streaming_content
+        self.assertTrue((await anext(flujo)).startswith(b"retry:"))
+        self.assertEqual(await anext(flujo), b'event: no_vistos\ndata: {"no_vistos": 1}\n\n')
+        publicar("comentario_visto", {"comentario_id": 1, "no_vistos": 0})
+        self.assertEqual(await anext(flujo), b'event: comentario_visto\ndata: {"comentario_id": 1, "no_vistos": 0}\n\n')
+
+    async def test_stream_ends_and_unsubscribes(self):
+        from unittest import mock
+
+        from asgiref.sync import sync_to_async
+
+        from apps.obras.eventos import hub
+
+        await sync_to_async(self.async_client.force_login)(self.user)
+        abiertas = len(hub)
+        with mock.patch("apps.obras.views_eventos.DURACION_MAXIMA", 0.05):
+            resp = await self.async_client.get("/obras/eventos/")
+            self.assertEqual(len(hub), abiertas + 1)
+            # Sin contador para quien no es staff; al agotar la duración el navegador reconecta
+            partes = [parte async for parte in resp.streaming_content]
+        self.assertFalse(any(b"no_vistos" in parte for parte in partes))
+        self.assertEqual(len(hub), abiertas)
+
+
+# ===========================================================================
+# 20. Exportación de comentarios en streaming
+# ===========================================================================
+
+class ExportacionComentariosTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _create_user()
+        autor = Autor.objects.create(nombre="Calderón")
+        cls.obras = [_create_obra(f"Obra {i}", autor=autor if i else None) for i in range(3)]
+        for i in range(4):
+            c = ComentarioUsuario.objects.create(
+                usuario=cls.user, catalogo="catcom", titulo=f"C{i}", comentario=f"texto {i}",
+                etiqueta_ia=True, es_publico=True,
+            )
+            c.obras_seleccionadas.set(cls.obras[: i % 3 + 1])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _contenido(self, resp):
+        self.assertTrue(resp.streaming)
+        return b"".join(resp.streaming_content).decode("utf-8")
+
+    def test_txt_export_streams_same_blocks(self):
+        resp = self.client.get("/obras/comentarios/exportar-ia/")
+        self.assertIn("text/plain", resp["Content-Type"])
+        self.assertIn('.txt"', resp["Content-Disposition"])
+        contenido = self._contenido(resp)
+        self.assertTrue(contenido.startswith("EXPORTACIÓN DE COMENTARIOS PARA IA\n"))
+        self.assertIn("Total de comentarios: 4\n", contenido)
+        for c in ComentarioUsuario.objects.all():
+            self.assertIn(c.exportar_para_ia(), contenido)
+        self.assertIn("Autor: Desconocido\n", contenido)
+
+    def test_jsonl_export(self):
+        resp = self.client.get("/obras/comentarios/exportar-todos/", {"formato": "jsonl", "catalogo": "catcom"})
+        self.assertIn("application/x-ndjson", resp["Content-Type"])
+        self.assertIn('.jsonl"', resp["Content-Disposition"])
+        lineas = [json.loads(linea) for linea in self._contenido(resp).splitlines()]
+        self.assertEqual([l["titulo"] for l in lineas], ["C3", "C2", "C1", "C0"])
+        self.assertEqual([o["autor"] for o in lineas[1]["obras"]], [None, "Calderón", "Calderón"])
+
+    def test_query_count_does_not_grow_with_comments(self):
+        from apps.obras.exportar_comentarios import comentarios_para_exportar, flujo_txt
+
+        comentarios = comentarios_para_exportar(ComentarioUsuario.objects.all())
+        # Un lote: comentarios (con usuario) y sus obras (con autor)
+        with self.assertNumQueries(2):
+            "".join(flujo_txt(comentarios, ["cabecera"]))
+
+
+# ===========================================================================
+# 21. Dataset JSONL por shards para IA
+# ===========================================================================
+
+class DatasetIATest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        from apps.obras.models import PaginaPDF
+
+        user = _create_user()
+        autor = Autor.objects.create(nombre="Calderón")
+        lugar = Lugar.objects.create(nombre="Madrid")
+        cls.obras = [
+            _create_obra(f"Obra {i}", autor=autor, fuente="FUENTESXI" if i % 2 else "CATCOM") for i in range(6)
+        ]
+        for obra in cls.obras:
+            Representacion.objects.create(obra=obra, fecha="1680", lugar=lugar)
+        PaginaPDF.objects.create(numero_pagina=12, texto_extraido="Primer párrafo.\n\n" + "x" * 5000)
+        PaginaPDF.objects.create(numero_pagina=13, texto_extraido="")
+        for i, etiqueta in enumerate([True, False, True]):
+            c = ComentarioUsuario.objects.create(
+                usuario=user, catalogo="fuentesxi", titulo=f"C{i}", comentario="texto", etiqueta_ia=etiqueta,
+            )
+            c.obras_seleccionadas.set(cls.obras[:2])
+
+    def _exportar(self, **kwargs):
+        from apps.obras.dataset_ia import exportar_dataset
+
+        directorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directorio)
+        return directorio, exportar_dataset(directorio, **kwargs)
+
+    def _registros(self, directorio, manifest):
+        return [
+            json.loads(linea)
+            for shard in manifest["shards"]
+            for linea in (directorio / shard["archivo"]).read_text(encoding="utf-8").splitlines()
+        ]
+
+    def test_exports_every_type_in_order_with_manifest(self):
+        directorio, manifest = self._exportar()
+        registros = self._registros(directorio, manifest)
+        self.assertEqual([r["tipo"] for r in registros], ["obra"] * 6 + ["representacion"] * 6 + ["pagina"] * 3
+                         + ["comentario"] * 2)
+        self.assertEqual([r["id"] for r in registros[:6]], [o.id for o in self.obras])
+        self.assertEqual([r["titulo"] for r in registros if r["tipo"] == "comentario"], ["C0", "C2"])
+        self.assertEqual([r["id"] for r in registros if r["tipo"] == "pagina"], ["12-0", "12-1", "12-2"])
+        self.assertEqual(json.loads((directorio / "manifest.json").read_text()), manifest)
+        self.assertEqual(manifest["totales"]["representacion"]["registros"], 6)
+
+    def test_shards_respect_token_budget_and_are_deterministic(self):
+        from apps.obras.dataset_ia import estimar_tokens
+
+        directorio, manifest = self._exportar(tokens_por_shard=200, registros_por_bloque=4)
+        obras = [s for s in manifest["shards"] if s["tipo"] == "obra"]
+        self.assertGreater(len(obras), 2)
+        self.assertEqual(obras[0]["archivo"], "obra-0000-000.jsonl")
+        for shard in manifest["shards"]:
+            contenido = (directorio / shard["archivo"]).read_text(encoding="utf-8")
+            self.assertEqual(shard["tokens"], sum(estimar_tokens(l + "\n") for l in contenido.splitlines()))
+            self.assertTrue(shard["tokens"] <= 200 or shard["registros"] == 1)
+
+        # Misma exportación en el mismo directorio: mismos archivos, sin shards viejos
+        viejos = ["obra-9999-000.jsonl", "obra-0000-1000.jsonl", "pagina-10000-000.jsonl"]
+        for nombre in viejos:
+            (directorio / nombre).write_text("")
+        from apps.obras.dataset_ia import exportar_dataset
+        self.assertEqual(exportar_dataset(directorio, tokens_por_shard=200, registros_por_bloque=4), manifest)
+        self.assertFalse(any((directorio / nombre).exists() for nombre in viejos))
+
+    def test_command_filters_by_type_and_source(self):
+        directorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directorio)
+        call_command("exportar_dataset_ia", salida=str(directorio), tipo=["obra", "representacion"],
+                     fuente="FUENTESXI", procesos=1, stdout=io.StringIO())
+        manifest = json.loads((directorio / "manifest.json").read_text())
+        self.assertEqual(list(manifest["totales"]), ["obra", "representacion"])
+        registros = self._registros(directorio, manifest)
+        self.assertEqual({r["id"] for r in registros if r["tipo"] == "obra"},
+                         {o.id for o in self.obras if o.fuente_principal == "FUENTESXI"})
+        self.assertEqual(len(registros), 6)
+
+    def test_comments_filtered_by_source_of_their_works(self):
+        solo_catcom = ComentarioUsuario.objects.create(
+            usuario=ComentarioUsuario.objects.first().usuario, catalogo="catcom", titulo="C3",
+            comentario="texto", etiqueta_ia=True,
+        )
+        solo_catcom.obras_seleccionadas.set([self.obras[0], self.obras[2]])
+
+        directorio, manifest = self._exportar(tipos=["comentario"], fuente="FUENTESXI")
+        self.assertEqual(sorted(r["titulo"] for r in self._registros(directorio, manifest)), ["C0", "C2"])
+        directorio, manifest = self._exportar(tipos=["comentario"], fuente="CATCOM")
+        self.assertEqual(sorted(r["titulo"] for r in self._registros(directorio, manifest)), ["C0", "C2", "C3"])
+
+
+# ===========================================================================
+# 22. Propuestas resueltas y votadas por lotes
+# ===========================================================================
+
+class PropuestasLoteTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _create_user()
+        cls.admin = _create_user("admin", "admin@test.com", is_superuser=True, is_staff=True)
+        cls.autor = Autor.objects.create(nombre="Calderón")
+        cls.obra = _create_obra("Obra A", autor=cls.autor)
+        cls.otra = _create_obra("Obra B", autor=cls.autor)
+
+    def _propuesta(self, obra, campo, valor):
+        return PropuestaCambioObra.objects.create(obra=obra, campo=campo, valor_nuevo=valor, propuesta_por=self.user)
+
+    def _lote(self, user, acciones):
+        self.client.force_login(user)
+        return self.client.post("/obras/propuestas/lote/", data=json.dumps({"acciones": acciones}),
+                                content_type="application/json")
+
+    def test_admin_resolves_batch_with_one_write_per_obra(self):
+        from unittest import mock
+
+        props = [
+            self._propuesta(self.obra, "titulo", "Nuevo A"),
+            self._propuesta(self.obra, "actos", "3"),
+            self._propuesta(self.obra, "autor.nombre", "Pedro Calderón"),
+            self._propuesta(self.otra, "genero", "drama"),
+            self._propuesta(self.otra, "actos", "tres"),
+            self._propuesta(self.otra, "titulo", "Rechazado"),
+        ]
+        resuelta = self._propuesta(self.obra, "notas", "x")
+        resuelta.estado = "rechazada"
+        resuelta.save()
+        acciones = [{"propuesta_id": p.id, "accion": "aprobar"} for p in props[:5]]
+        acciones += [
+            {"propuesta_id": props[5].id, "accion": "rechazar", "comentario": "No"},
+            {"propuesta_id": resuelta.id, "accion": "aprobar"},
+            {"propuesta_id": 999999, "accion": "aprobar"},
+            {"propuesta_id": props[0].id, "accion": "rechazar"},
+        ]
+        with mock.patch("apps.obras.propuestas_lote.publicar") as publicar, \
+                CaptureQueriesContext(connection) as consultas, \
+                self.captureOnCommitCallbacks(execute=True):
+            resp = self._lote(self.admin, acciones)
+        data = resp.json()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(data["aplicadas"], 5)
+        self.assertEqual([r["success"] for r in data["resultados"]], [True] * 4 + [False, True] + [False] * 3)
+        self.assertEqual(data["resultados"][6]["error"], "La propuesta ya fue resuelta")
+        self.assertEqual(data["resultados"][7]["error"], "Propuesta no encontrada")
+        self.assertEqual(data["resultados"][8]["error"], "Propuesta repetida en el lote")
+
+        self.obra.refresh_from_db()
+        self.otra.refresh_from_db()
+        self.assertEqual((self.obra.titulo, self.obra.actos, self.obra.autor.nombre), ("Nuevo A", 3, "Pedro Calderón"))
+        self.assertEqual((self.otra.genero, self.otra.actos, self.otra.titulo), ("drama", None, "Obra B"))
+        estados = dict(PropuestaCambioObra.objects.values_list("id", "estado"))
+        self.assertEqual([estados[p.id] for p in props], ["aprobada_superuser"] * 4 + ["pendiente", "rechazada"])
+        self.assertEqual(props[5].votos.get().voto, "en_contra")
+        self.assertEqual(publicar.call_count, 5)
+
+        updates = [q["sql"] for q in consultas.captured_queries if q["sql"].startswith("UPDATE")]
+        tabla_obra = Obra._meta.db_table
+        self.assertEqual(sum(f'UPDATE "{tabla_obra}"' in sql for sql in updates), 2)
+        self.assertEqual(sum(f'UPDATE "{Autor._meta.db_table}"' in sql for sql in updates), 1)
+
+    def test_votes_are_bulk_created_or_updated_and_resolution_needs_superuser(self):
+        from apps.obras.models import VotoPropuestaCambioObra
+
+        props = [self._propuesta(self.obra, "genero", str(i)) for i in range(3)]
+        previo = VotoPropuestaCambioObra.objects.create(propuesta=props[0], usuario=self.user, voto="en_contra")
+        resp = self._lote(self.user, [
+            {"propuesta_id": props[0].id, "accion": "votar", "voto": "a_favor", "comentario": "Cambio"},
+            {"propuesta_id": str(props[1].id), "accion": "votar", "voto": "en_contra"},
+            {"propuesta_id": props[2].id, "accion": "aprobar"},
+            {"propuesta_id": props[2].id, "accion": "borrar"},
+        ])
+        resultados = resp.json()["resultados"]
+        self.assertEqual(resultados[0]["voto_id"], previo.id)
+        self.assertEqual(VotoPropuestaCambioObra.objects.get(id=resultados[1]["voto_id"]).propuesta, props[1])
+        self.assertEqual(resultados[2]["error"], "Solo superusuario puede aprobar definitivamente")
+        self.assertEqual(resultados[3]["error"], "Acción inválida")
+        previo.refresh_from_db()
+        self.assertEqual((previo.voto, previo.comentario), ("a_favor", "Cambio"))
+        self.assertEqual(PropuestaCambioObra.objects.filter(estado="pendiente").count(), 3)
+
+    def test_rejects_malformed_or_oversized_batches(self):
+        from apps.obras.propuestas_lote import MAX_ACCIONES_LOTE
+
+        self.assertEqual(self._lote(self.admin, "x").status_code, 400)
+        acciones = [{"propuesta_id": 1, "accion": "votar"}] * (MAX_ACCIONES_LOTE + 1)
+        self.assertEqual(self._lote(self.admin, acciones).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.post("/obras/propuestas/lote/", data="{}",
+                                          content_type="application/json").status_code, 401)
+
+
+# ===========================================================================
+# 23. Diario de decisiones de validación
+# ===========================================================================
+
+class DiarioValidacionTest(TestCase):
+    ARCHIVO = "prueba_sintesis_validacion.json"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _create_user()
+
+    def setUp(self):
+        from datetime import timedelta
+        from unittest import mock
+
+        base = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, base)
+        (base / "data" / "fuentesix").mkdir(parents=True)
+        self.ruta = base / "data" / "fuentesix" / self.ARCHIVO
+        self.ruta.write_text(json.dumps({
+            "metadata_archivo": {"archivo_fuente": "parte_001.txt"},
+            "representaciones": [{"id_temporal": f"rep_{i}", "datos_json": {}} for i in range(3)],
+            "obras": [{"id_temporal": "obra_1", "datos_json": {"titulo": "El Pastor Fido"}}],
+            "lugares": [{"id_temporal": "lugar_1", "datos_json": {"nombre": "Buen Retiro"}}],
+        }), encoding="utf-8")
+        ajustes = override_settings(BASE_DIR=base)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        # Sin margen de confirmación salvo en el test que lo prueba (ver delta.py)
+        margen = mock.patch("apps.obras.delta.MARGEN_CONFIRMACION", timedelta(0))
+        margen.start()
+        self.addCleanup(margen.stop)
+        self.client.force_login(self.user)
+
+    def _validar(self, id_temporal, accion="rechazar", tipo="representacion", **extra):
+        return self.client.post("/obras/validacion-analisis/validar-item/", data=json.dumps({
+            "tipo": tipo, "id_temporal": id_temporal, "accion": accion, "archivo_sintesis": self.ARCHIVO, **extra,
+        }), content_type="application/json").json()
+
+    def _pendientes(self, desde=0):
+        return self.client.get("/obras/validacion-analisis/api/decisiones/",
+                               {"archivo": self.ARCHIVO, "desde": desde}).json()
+
+    def test_item_decisions_are_journaled_without_rewriting_the_file(self):
+        from apps.obras.models import DecisionValidacion
+        from apps.obras.validacion import indice_items
+
+        original = self.ruta.read_bytes()
+        self.assertTrue(self._validar("rep_0", comentario="dudoso")["success"])
+        self.assertTrue(self._validar("rep_0", accion="rechazar", comentario="fecha errónea")["success"])
+        resp = self._validar("obra_1", accion="validar", tipo="obra")
+        self.assertTrue(resp["integracion"]["exito"])
+        self.assertTrue(Obra.objects.filter(titulo="El Pastor Fido").exists())
+        self.assertFalse(self._validar("rep_9")["success"])
+
+        self.assertEqual(self.ruta.read_bytes(), original)
+        self.assertEqual(DecisionValidacion.objects.count(), 3)
+        self.assertIs(indice_items(self.ruta), indice_items(self.ruta))
+
+        decisiones = {d["id_temporal"]: d for d in self._pendientes()["decisiones"]}
+        self.assertEqual(decisiones["rep_0"]["comentario"], "fecha errónea")
+        self.assertEqual(decisiones["obra_1"]["estado"], "validado")
+        self.assertEqual(decisiones["obra_1"]["usuario"], self.user.username)
+
+        detalle = self.client.get(f"/obras/validacion-analisis/{self.ARCHIVO}/")
+        self.assertEqual(detalle.context["representaciones"][0]["validacion"]["estado"], "rechazado")
+
+    def test_batch_creates_all_decisions_at_once(self):
+        from apps.obras.models import DecisionValidacion
+
+        resp = self.client.post("/obras/validacion-analisis/validar-lote/", data=json.dumps({
+            "archivo_sintesis": self.ARCHIVO, "accion": "rechazar",
+            "items": [{"tipo": "representacion", "id_temporal": i} for i in ("rep_1", "rep_2", "rep_9")],
+        }), content_type="application/json").json()
+        self.assertEqual(resp["total"], 2)
+        self.assertEqual(list(DecisionValidacion.objects.values_list("id_temporal", flat=True)), ["rep_1", "rep_2"])
+
+    def test_compaction_merges_latest_decisions_and_moves_cursor(self):
+        self._validar("rep_0")
+        self._validar("rep_0", accion="validar")
+        self._validar("rep_1")
+        call_command("compactar_validaciones", stdout=io.StringIO())
+
+        datos = json.loads(self.ruta.read_text(encoding="utf-8"))
+        reps = datos["representaciones"]
+        self.assertEqual([r.get("validacion", {}).get("estado") for r in reps], ["validado", "rechazado", None])
+        cursor = datos["metadata_archivo"]["validacion_compactada_hasta"]
+        self.assertEqual(self._pendientes(cursor)["decisiones"], [])
+
+        self._validar("rep_2")
+        self.assertEqual([d["id_temporal"] for d in self._pendientes(cursor)["decisiones"]], ["rep_2"])
+        out = io.StringIO()
+        call_command("compactar_validaciones", archivo=[self.ARCHIVO], stdout=out)
+        self.assertIn("1 items actualizados", out.getvalue())
+
+    def test_late_committed_decision_below_cursor_is_not_lost(self):
+        from datetime import timedelta
+        from unittest import mock
+        from apps.obras.models import DecisionValidacion
+
+        self._validar("rep_0")
+        self._validar("rep_1")
+        # Como si la compactación no hubiera visto aún la decisión de rep_0 (id menor)
+        datos = json.loads(self.ruta.read_text(encoding="utf-8"))
+        datos["metadata_archivo"]["validacion_compactada_hasta"] = DecisionValidacion.objects.latest("id").pk
+        datos["representaciones"][1]["validacion"] = DecisionValidacion.objects.latest("id").como_validacion()
+        self.ruta.write_text(json.dumps(datos), encoding="utf-8")
+
+        call_command("compactar_validaciones", stdout=io.StringIO())
+        self.assertNotIn("validacion", json.loads(self.ruta.read_text(encoding="utf-8"))["representaciones"][0])
+        with mock.patch("apps.obras.delta.MARGEN_CONFIRMACION", timedelta(minutes=5)):
+            out = io.StringIO()
+            call_command("compactar_validaciones", stdout=out)
+            self.assertIn("1 items actualizados", out.getvalue())
+            reps = json.loads(self.ruta.read_text(encoding="utf-8"))["representaciones"]
+            self.assertEqual([r.get("validacion", {}).get("estado") for r in reps], ["rechazado", "rechazado", None])
+            # Volver a pasar no reescribe nada
+            out = io.StringIO()
+            call_command("compactar_validaciones", stdout=out)
+            self.assertIn("Compactadas 0 decisiones", out.getvalue())
+
+    def test_rejects_names_outside_synthesis_directory(self):
+        self.assertFalse(self._validar("rep_0", archivo_sintesis="../../settings.py")["success"])
+        self.assertEqual(self.client.get("/obras/validacion-analisis/api/decisiones/",
+                                         {"archivo": "../x_sintesis_validacion.json"}).status_code, 400)
+
+
+# ===========================================================================
+# 24. Catálogo de archivos de síntesis (índices sidecar)
+# ===========================================================================
+
+class CatalogoSintesisTest(TestCase):
+    ARCHIVO = "catalogo_sintesis_validacion.json"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _create_user()
+
+    def setUp(self):
+        base = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, base)
+        (base / "data" / "fuentesix").mkdir(parents=True)
+        self.ruta = base / "data" / "fuentesix" / self.ARCHIVO
+        self._escribir(5)
+        ajustes = override_settings(BASE_DIR=base)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.client.force_login(self.user)
+
+    def _escribir(self, n):
+        self.datos = {
+            "metadata_archivo": {"archivo_fuente": "Fuentes IX, parte 1"},
+            "representaciones": [
+                {"id_temporal": f"rep_{i}", "confianza": ["alto", "medio", "bajo"][i % 3],
+                 "frases": [f"Representación en el Salón «{i}» — año 168{i}"]}
+                for i in range(n)
+            ],
+            "obras": [],
+            "lugares": [{"id_temporal": "lugar_1", "frases": ["Buen Retiro"]}],
+            "fecha_generacion": "2025-01-27T10:30:00",
+        }
+        self.ruta.write_text(json.dumps(self.datos, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def test_list_pages_read_only_the_sidecars(self):
+        from unittest import mock
+        from apps.obras import validacion
+
+        resp = self.client.get("/obras/validacion-analisis/api/archivos-sintesis/").json()
+        self.assertEqual(resp["archivos_sintesis"][0]["totales"], {"representaciones": 5, "obras": 0, "lugares": 1})
+        self.assertEqual(resp["archivos_sintesis"][0]["confianza"], {"alto": 2, "medio": 2, "bajo": 1})
+
+        with mock.patch.object(validacion, "_construir_ficha", wraps=validacion._construir_ficha) as construir:
+            lista = self.client.get("/obras/validacion-analisis/")
+            self.assertEqual(construir.call_count, 0)
+            self.assertEqual(lista.context["archivos_sintesis"][0]["total_representaciones"], 5)
+
+            # El archivo cambia: el índice se rehace una vez
+            self._escribir(7)
+            self.client.get("/obras/validacion-analisis/")
+            self.client.get("/obras/validacion-analisis/")
+            self.assertEqual(construir.call_count, 1)
+        self.assertEqual(validacion.ficha_sintesis(self.ARCHIVO)["totales"]["representaciones"], 7)
+
+    def test_items_are_read_by_offset(self):
+        from apps.obras.validacion import leer_items
+
+        self.assertEqual(leer_items(self.ARCHIVO, "representaciones"), self.datos["representaciones"])
+        self.assertEqual(leer_items(self.ARCHIVO, "representaciones", 3, 10), self.datos["representaciones"][3:])
+        self.assertEqual(leer_items(self.ARCHIVO, "lugares", 1, 5), [])
+
+    def test_detail_pages_through_items_with_pending_decisions(self):
+        from unittest import mock
+        from apps.obras.models import DecisionValidacion
+
+        DecisionValidacion.objects.create(archivo=self.ARCHIVO, tipo="representacion", id_temporal="rep_3",
+                                          estado="validado")
+        with mock.patch("apps.obras.views_validacion.ITEMS_POR_PAGINA", 2):
+            resp = self.client.get(f"/obras/validacion-analisis/{self.ARCHIVO}/", {"pagina": 2})
+        self.assertEqual(resp.context["paginas"], 3)
+        self.assertEqual([r["id_temporal"] for r in resp.context["representaciones"]], ["rep_2", "rep_3"])
+        self.assertEqual(resp.context["representaciones"][1]["validacion"]["estado"], "validado")
+        self.assertEqual(resp.context["lugares"], [])
+        self.assertEqual(resp.context["total_items"], 6)
+        self.assertContains(resp, "Representación #4")
+        self.assertContains(resp, "Página 2 de 3")
+
+    def test_unwritable_index_directory_falls_back_to_memory(self):
+        from unittest import mock
+        from apps.obras import validacion
+
+        with mock.patch.object(validacion, "_escribir_atomico", side_effect=OSError("Read-only file system")), \
+                mock.patch.object(validacion, "_construir_ficha", wraps=validacion._construir_ficha) as construir:
+            lista = self.client.get("/obras/validacion-analisis/")
+            self.assertEqual(lista.context["archivos_sintesis"][0]["total_representaciones"], 5)
+            resp = self.client.get(f"/obras/validacion-analisis/{self.ARCHIVO}/")
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(len(resp.context["representaciones"]), 5)
+            self.assertEqual(construir.call_count, 1)
+        self.assertEqual(list((self.ruta.parent / ".indices").glob("*")), [])
+
+
+# ===========================================================================
+# 25. Integración por lotes de items validados
+# ===========================================================================
+
+class IntegracionLoteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.obra = _create_obra("El Pastor Fido")
+        cls.lugar = Lugar.objects.create(nombre="Alcázar de Madrid", region="Comunidad de Madrid")
+        Lugar.objects.create(nombre="Buen Retiro", region="Comunidad de Madrid")
+
+    def _representacion(self, i, titulo="el pastor  fido", lugar="ALCAZAR DE MADRID"):
+        return ("representacion", {
+            "datos_json": {"obra_titulo": titulo, "fecha": f"{i} de mayo de 1687", "fecha_formateada": "1687-05-22",
+                           "lugar_nombre": lugar, "lugar_tipo": "palacio", "lugar_ciudad": "Madrid",
+                           "compañia": "compañía de Agustín Manuel"},
+            "metadata": {"pagina_pdf": 134, "texto_original": "El 22 de mayo de 1687..."},
+        })
+
+    def test_references_resolve_by_normalized_key_and_missing_ones_are_created_once(self):
+        from unittest import mock
+        from apps.obras.integracion import integrar_items
+
+        items = [
+            self._representacion(1),
+            self._representacion(2, titulo="Los Celos Hacen Estrellas", lugar="Coliseo del Buen Retiro"),
+            self._representacion(3, titulo="los celos hacen estrellas", lugar="coliseo del buen retiro"),
+            ("obra", {"datos_json": {"titulo": "El pastor Fido"}}),
+            ("lugar", {"datos_json": {"nombre": "Saloncete", "tipo": "palacio", "ciudad": "Madrid",
+                                      "coordenadas": {"lat": 40.41, "lng": -3.68}}}),
+            ("representacion", {"datos_json": {"fecha": "1687"}}),
+            ("autor", {"datos_json": {}}),
+        ]
+        with mock.patch("apps.obras.integracion.registrar_cambios") as registrar, \
+                mock.patch("apps.obras.signals.invalidar_cache_dataset") as invalidar:
+            resultados = integrar_items(items)
+
+        self.assertEqual([r["exito"] for r in resultados], [True] * 5 + [False, False])
+        self.assertEqual(resultados[3]["id_creado"], self.obra.pk)
+        self.assertIn("ya existente", resultados[3]["mensaje"])
+        self.assertEqual(resultados[5]["mensaje"], "Falta el título de la obra")
+
+        self.assertEqual(Obra.objects.filter(titulo__iexact="los celos hacen estrellas").count(), 1)
+        self.assertEqual(Lugar.objects.filter(nombre="Coliseo Del Buen Retiro").count(), 1)
+        saloncete = Lugar.objects.get(pk=resultados[4]["id_creado"])
+        self.assertEqual((saloncete.nombre, saloncete.tipo_lugar, saloncete.coordenadas_lat), ("Saloncete", "palacio", 40.41))
+
+        rep = Representacion.objects.get(pk=resultados[0]["id_creado"])
+        self.assertEqual((rep.obra_id, rep.lugar_id), (self.obra.pk, self.lugar.pk))
+        self.assertTrue(rep.es_anterior_1665 is False and rep.fecha_formateada.year == 1687)
+
+        # bulk_create no dispara señales: agregados y registro de cambios se anotan igual
+        self.obra.refresh_from_db()
+        self.assertEqual(self.obra.total_representaciones, 1)
+        self.assertEqual(self.obra.lugares_representacion, ["Alcázar De Madrid"])
+        celos = Obra.objects.get(titulo="Los Celos Hacen Estrellas")
+        self.assertEqual(celos.total_representaciones, 2)
+        registrar.assert_called_once_with(sorted([self.obra.pk, celos.pk]))
+        invalidar.assert_called_once()
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        from apps.obras.integracion import integrar_items
+
+        with CaptureQueriesContext(connection) as pocos:
+            integrar_items([self._representacion(i, titulo=f"Obra {i}", lugar=f"Lugar {i}") for i in range(3)])
+        with CaptureQueriesContext(connection) as muchos:
+            integrar_items([self._representacion(i, titulo=f"Otra {i}", lugar=f"Sitio {i}") for i in range(60)])
+        # Solo crecen los INSERT que SQLite parte por su límite de parámetros
+        self.assertLessEqual(len(muchos), len(pocos) + 4)
+        self.assertEqual(Representacion.objects.count(), 63)
+
+    def test_single_item_reads_only_candidate_rows(self):
+        from apps.obras.integracion import integrar_items
+
+        for i in range(30):
+            _create_obra(f"Relleno {i}")
+        _create_obra("  LA VIDA ES  SUENO ")
+        with CaptureQueriesContext(connection) as consultas:
+            resultado, = integrar_items([self._representacion(1, titulo="La vida es sueño", lugar="Alcazar de Madrid")])
+        self.assertTrue(resultado["exito"])
+        rep = Representacion.objects.get(pk=resultado["id_creado"])
+        self.assertEqual(rep.obra.titulo_limpio, "  LA VIDA ES  SUENO ")
+        self.assertEqual(rep.lugar_id, self.lugar.pk)
+        lecturas = [q["sql"] for q in consultas.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertTrue(lecturas and all("WHERE" in sql for sql in lecturas), lecturas)
+
+    def test_batch_view_integrates_validated_items(self):
+        user = _create_user()
+        base = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, base)
+        (base / "data" / "fuentesix").mkdir(parents=True)
+        archivo = "lote_sintesis_validacion.json"
+        (base / "data" / "fuentesix" / archivo).write_text(json.dumps({
+            "representaciones": [{"id_temporal": f"rep_{i}", **self._representacion(i)[1]} for i in range(3)],
+            "lugares": [{"id_temporal": "lugar_1", "datos_json": {"nombre": "Saloncete", "ciudad": "Madrid"}}],
+        }), encoding="utf-8")
+        self.client.force_login(user)
+        with override_settings(BASE_DIR=base):
+            resp = self.client.post("/obras/validacion-analisis/validar-lote/", data=json.dumps({
+                "archivo_sintesis": archivo, "accion": "validar",
+                "items": [{"tipo": "representacion", "id_temporal": f"rep_{i}"} for i in range(3)]
+                + [{"tipo": "lugar", "id_temporal": "lugar_1"}],
+            }), content_type="application/json").json()
+        self.assertTrue(all(r["exito"] for r in resp["resultados"]), resp)
+        self.assertEqual(self.obra.representaciones.count(), 3)
+        self.assertTrue(Lugar.objects.filter(nombre="Saloncete").exists())
+
+
+# ===========================================================================
+# 26. Catálogo sintético
+# ===========================================================================
+
+class CatalogoSinteticoTest(TestCase):
+    def _generador(self, obras=80, **kwargs):
+        from django.conf import settings
+        from apps.obras.sintetico import Distribuciones, GeneradorCatalogo
+
+        distribuciones = Distribuciones.desde_archivo(settings.BASE_DIR / "datos_obras.json")
+        return GeneradorCatalogo(distribuciones, obras, **kwargs)
+
+    def test_same_seed_gives_same_catalogue_at_the_requested_scale(self):
+        items = list(self._generador(representaciones=120, semilla=7).generar())
+        self.assertEqual(items, list(self._generador(representaciones=120, semilla=7).generar()))
+        self.assertNotEqual(items, list(self._generador(representaciones=120, semilla=8).generar()))
+
+        obras = [datos for tipo, datos in items if tipo == "obra"]
+        self.assertEqual(len(obras), 80)
+        self.assertEqual(sum(len(obra["representaciones"]) for obra in obras), 120)
+        self.assertEqual(len({obra["titulo_original"] for obra in obras}), 80)
+
+    def test_larger_scales_add_authors_places_and_companies(self):
+        pequeño, grande = self._generador(2000), self._generador(200000)
+        self.assertGreater(len(grande.autor), len(pequeño.autor))
+        self.assertGreater(len(grande.lugar), len(pequeño.lugar))
+        self.assertGreater(len(grande.compania), len(pequeño.compania))
+        # La cabeza de la distribución se conserva
+        self.assertEqual(grande.autor.valores[grande.autor.pesos.index(max(grande.autor.pesos))], "Anónimo")
+
+    def test_command_bulk_inserts_with_aggregates_and_pdf_pages(self):
+        from django.db.models import Sum
+        from apps.obras.models import PaginaPDF
+
+        for semilla in (1, 1):
+            call_command("generar_catalogo_sintetico", obras=60, representaciones=90, semilla=semilla,
+                         lote=25, stdout=io.StringIO())
+        self.assertEqual(Obra.objects.count(), 120)
+        self.assertEqual(Representacion.objects.count(), 180)
+        self.assertEqual(Obra.objects.aggregate(total=Sum("representaciones_total"))["total"], 180)
+        paginas = set(PaginaPDF.objects.values_list("numero_pagina", flat=True))
+        self.assertEqual(set(Obra.objects.exclude(pagina_pdf=None).values_list("pagina_pdf", flat=True)), paginas)
+
+    def test_json_output_is_importable(self):
+        salida = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, salida)
+        archivo = salida / "sintetico.json"
+        call_command("generar_catalogo_sintetico", obras=40, semilla=3, salida=str(archivo), stdout=io.StringIO())
+        datos = json.loads(archivo.read_text(encoding="utf-8"))
+        self.assertEqual(datos["metadata"]["total_obras"], 40)
+
+        call_command("importar_json", archivo=str(archivo), stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Obra.objects.count(), 40)
+        self.assertEqual(Representacion.objects.count(), datos["metadata"]["total_representaciones"])
+
+
+# ===========================================================================
+# 27. Benchmarks de las rutas críticas
+# ===========================================================================
+
+class BenchmarkRutasCriticasTest(TestCase):
+    def setUp(self):
+        directorio = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directorio)
+        self.historial = directorio / "historial.json"
+
+    def _ejecutar(self, *args, **opciones):
+        salida = io.StringIO()
+        call_command("benchmark_rutas_criticas", *args, historial=str(self.historial), stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_percentile_is_nearest_rank(self):
+        from apps.obras.benchmarks.medicion import percentil
+
+        self.assertEqual(percentil([3, 1, 2], 95), 3)
+        self.assertEqual(percentil(list(range(1, 21)), 95), 19)
+        self.assertEqual(percentil([5], 50), 5)
+
+    def test_every_case_runs_and_the_synthetic_catalogue_is_rolled_back(self):
+        from apps.obras.benchmarks.casos import CASOS
+
+        self._ejecutar(obras=30, repeticiones=1, importar_obras=10)
+        ejecucion = json.loads(self.historial.read_text(encoding="utf-8"))["ejecuciones"][0]
+        self.assertEqual(set(ejecucion["resultados"]), set(CASOS))
+        for resultado in ejecucion["resultados"].values():
+            self.assertLessEqual(resultado["mediana_ms"], resultado["p95_ms"])
+        self.assertEqual(ejecucion["escala"]["obras"], 30)
+        self.assertFalse(Obra.objects.exists())
+
+    def test_runs_are_compared_with_the_last_comparable_one(self):
+        from django.core.management.base import CommandError
+
+        opciones = {"obras": 20, "repeticiones": 1, "caso": ["facetas", "parsear_fecha_espanola"]}
+        self.assertIn("Sin ejecuciones anteriores comparables", self._ejecutar(**opciones))
+        self.assertIn("Sin ejecuciones anteriores comparables", self._ejecutar(**dict(opciones, semilla=1)))
+        salida = self._ejecutar(**opciones, etiqueta="después")
+        self.assertIn("Comparación con", salida)
+        self.assertIn("facetas", salida)
+
+        self.assertIn("después", self._ejecutar(listar=True))
+        self.assertIn("parsear_fecha_espanola", self._ejecutar(comparar=[0, -1]))
+        with self.assertRaises(CommandError):
+            self._ejecutar(comparar=[0, -1], umbral=-101, fallar_si_empeora=True)
@@ -2,6 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 from . import views_validacion
+from . import views_tareas
+from . import views_eventos
 
 router = DefaultRouter()
 router.register(r'obras', views.ObraViewSet)
@@ -13,11 +15,12 @@ urlpatterns = [
     path('', include(router.urls)),
     # Nuevas rutas del editor unificado
     path('editor/', views.editor_view, name='editor'),
+    # Antes de editor/<str:catalogo_id>/, que también casaría con busqueda/
+    path('editor/busqueda/', views.busqueda_obras_ajax, name='busqueda_obras_ajax'),
     path('editor/<str:catalogo_id>/', views.editor_catalogo_view, name='editor_catalogo'),
     path('editor/<str:catalogo_id>/obra/<int:obra_id>/', views.obra_edit_ajax, name='obra_edit_ajax'),
     path('editor/<str:catalogo_id>/obra/<int:obra_id>/pdf-pages/', views.obra_pdf_pages_ajax, name='obra_pdf_pages_ajax'),
     path('editor/<str:catalogo_id>/<str:section>/<int:item_id>/pdf-pages/', views.section_pdf_pages_ajax, name='section_pdf_pages_ajax'),
-    path('editor/busqueda/', views.busqueda_obras_ajax, name='busqueda_obras_ajax'),
     path('editor/<str:catalogo_id>/count/', views.count_obras_ajax, name='count_obras_ajax'),
     path('editor/<str:catalogo_id>/comentario/', views.save_comment_ajax, name='save_comment_ajax'),
     path('editor/<str:catalogo_id>/comentarios/', views.get_comments_ajax, name='get_comments_ajax'),
@@ -32,6 +35,7 @@ urlpatterns = [
     path('comentarios-index/', views.index_crear_comentario, name='index_crear_comentario'),
     path('comentarios-index/global/', views.index_comentarios_global, name='index_comentarios_global'),
     path('comentarios-index/count-unseen/', views.index_comentarios_count_unseen, name='index_comentarios_count_unseen'),
+    path('eventos/', views_eventos.eventos_stream, name='eventos_stream'),
     path('comentarios-index/obra/<int:obra_id>/', views.index_comentarios_obra, name='index_comentarios_obra'),
     path('comentarios-index/<int:comentario_id>/visto/', views.index_comentario_marcar_visto, name='index_comentario_marcar_visto'),
     path('comentarios-index/<int:comentario_id>/filtros/', views.index_comentario_filtros, name='index_comentario_filtros'),
@@ -40,6 +44,7 @@ urlpatterns = [
     path('comentarios/exportar-todos/', views.exportar_todos_comentarios, name='exportar_todos_comentarios'),
     # Propuestas de edición de obras (flujo validado)
     path('propuestas/', views.crear_propuesta_cambio_obra, name='crear_propuesta_cambio_obra'),
+    path('propuestas/lote/', views.resolver_propuestas_lote, name='resolver_propuestas_lote'),
     path('propuestas/admin/pendientes/', views.listar_todas_propuestas_pendientes, name='listar_todas_propuestas_pendientes'),
     path('propuestas/pendientes-usuario/', views.listar_propuestas_pendientes_usuario, name='listar_propuestas_pendientes_usuario'),
     path('propuestas/obra/<int:obra_id>/', views.listar_propuestas_obra, name='listar_propuestas_obra'),
@@ -47,6 +52,9 @@ urlpatterns = [
     path('propuestas/<int:propuesta_id>/resolver/', views.resolver_propuesta_obra, name='resolver_propuesta_obra'),
     # Publicar datos en GitHub
     path('publicar-github/', views.publicar_github_view, name='publicar_github'),
+    # Tareas en segundo plano (exportar, publicar, importar, reindexar)
+    path('tareas/', views_tareas.tareas_view, name='tareas'),
+    path('tareas/<int:tarea_id>/', views_tareas.tarea_estado_view, name='tarea_estado'),
     # Rutas existentes (mantenidas para compatibilidad)
     path('catalogos/', views.catalogos_view, name='catalogos'),
     path('catalogos/<str:catalogo_id>/', views.catalogo_detalle_view, name='catalogo_detalle'),
@@ -61,8 +69,10 @@ urlpatterns = [
     path('mapas-geograficos/', views.mapas_geograficos_view, name='mapas_geograficos'),
     # Rutas de validación de análisis de IA
     path('validacion-analisis/', views_validacion.validacion_analisis_list, name='validacion_analisis_list'),
-    path('validacion-analisis/<str:nombre_archivo>/', views_validacion.validacion_analisis_detail, name='validacion_analisis_detail'),
     path('validacion-analisis/api/archivos-sintesis/', views_validacion.archivos_sintesis_api, name='archivos_sintesis_api'),
     path('validacion-analisis/validar-item/', views_validacion.validar_item, name='validar_item'),
     path('validacion-analisis/validar-lote/', views_validacion.validar_lote, name='validar_lote'),
+    path('validacion-analisis/api/decisiones/', views_validacion.decisiones_api, name='decisiones_validacion_api'),
+    # Después de las rutas fijas: <str:nombre_archivo> también casaría con validar-item/
+    path('validacion-analisis/<str:nombre_archivo>/', views_validacion.validacion_analisis_detail, name='validacion_analisis_detail'),
 ]
@@ -0,0 +1,370 @@
+"""
+Diario de decisiones de validación sobre los archivos de síntesis.
+
+validar_item cargaba el *_sintesis_validacion.json entero en cada clic,
+buscaba el item recorriendo la lista y reescribía el archivo con indent=2;
+validar_lote repetía la carga y la escritura por item, y dos investigadores
+validando a la vez se pisaban el archivo. Ahora:
+
+    - Cada decisión es una fila de DecisionValidacion (un INSERT: seguro con
+      varios usuarios a la vez). El archivo no se toca al validar.
+    - Los items se buscan en un índice ``(tipo, id_temporal) -> item`` que se
+      construye una vez por archivo y proceso, y se rehace solo si cambia el
+      archivo (mtime/tamaño).
+    - ``python manage.py compactar_validaciones`` escribe en cada item la
+      última decisión (``item["validacion"]``, mismo formato de siempre) y
+      guarda en ``metadata_archivo["validacion_compactada_hasta"]`` el id de
+      la última decisión volcada. El archivo se reemplaza de forma atómica.
+    - Quien lee el archivo (vista de detalle, modal del index vía
+      /obras/validacion-analisis/api/decisiones/) superpone las decisiones
+      posteriores a ese id.
+    - Fuera de SQLite una decisión con id menor puede confirmarse después de
+      que la compactación haya guardado uno mayor. Por eso se releen también
+      las decisiones creadas hasta MARGEN_CONFIRMACION antes que la del
+      cursor (ver delta.py): volver a aplicar una ya volcada no cambia nada,
+      y la tardía no se pierde.
+
+Catálogo de archivos (sidecars):
+    Listar los archivos hacía ``json.load`` de cada uno solo para leer la
+    metadata y contar items. Ahora cada archivo tiene un índice pequeño en
+    ``data/fuentesix/.indices/<archivo>`` con la metadata, los totales y el
+    histograma de confianza, y al lado ``<archivo>.posiciones`` con la
+    posición en bytes de cada item (aparte, para que listar no las lea):
+
+        {"firma": [mtime_ns, tamaño], "metadata_archivo": {...},
+         "fecha_generacion": "...", "totales": {"representaciones": 19, ...},
+         "confianza": {"alto": 3, "medio": 16, "bajo": 0}}
+        {"firma": [...], "posiciones": {"representaciones": [[inicio, fin], ...], ...}}
+
+    Ambos se rehacen si la firma no coincide (el archivo cambió o se
+    compactó). Con las posiciones, ``leer_items`` lee una página de items con
+    seek, sin cargar el archivo entero. Si ``.indices/`` no se puede escribir
+    (solo lectura, disco lleno), el índice construido se queda en memoria del
+    proceso hasta que cambie la firma.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SUFIJO = "_sintesis_validacion.json"
+LISTAS = {"representacion": "representaciones", "obra": "obras", "lugar": "lugares"}
+CLAVE_CURSOR = "validacion_compactada_hasta"
+# Archivos indexados a la vez por proceso
+MAX_INDICES = 8
+VERSION_FICHA = 1
+NIVELES_CONFIANZA = ("alto", "medio", "bajo")
+
+
+def directorio_sintesis():
+    return Path(settings.BASE_DIR) / "data" / "fuentesix"
+
+
+def ruta_sintesis(nombre):
+    """Ruta de un archivo de síntesis; ValueError si el nombre no es uno válido."""
+    nombre = str(nombre or "")
+    if not nombre.endswith(SUFIJO) or Path(nombre).name != nombre:
+        raise ValueError("Archivo de síntesis no válido")
+    ruta = directorio_sintesis() / nombre
+    if not ruta.is_file():
+        raise FileNotFoundError(f"Archivo {nombre} no encontrado")
+    return ruta
+
+
+def archivos_sintesis():
+    directorio = directorio_sintesis()
+    if not directorio.is_dir():
+        return []
+    return sorted(p.name for p in directorio.iterdir() if p.name.endswith(SUFIJO))
+
+
+# ---------------------------------------------------------------------------
+# Índice de items por archivo
+# ---------------------------------------------------------------------------
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def _firma(ruta):
+    info = ruta.stat()
+    return info.st_mtime_ns, info.st_size
+
+
+def indice_items(ruta):
+    """``{(tipo, id_temporal): item}`` de ``ruta``, en memoria mientras el archivo no cambie."""
+    ruta = Path(ruta)
+    firma = _firma(ruta)
+    with _indices_lock:
+        guardado = _indices.get(ruta)
+    if guardado and guardado[0] == firma:
+        return guardado[1]
+    with open(ruta, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    indice = {
+        (tipo, item.get("id_temporal")): item
+        for tipo, lista in LISTAS.items()
+        for item in datos.get(lista, [])
+        if item.get("id_temporal")
+    }
+    with _indices_lock:
+        if ruta not in _indices and len(_indices) >= MAX_INDICES:
+            _indices.pop(next(iter(_indices)))
+        _indices[ruta] = (firma, indice)
+    return indice
+
+
+# ---------------------------------------------------------------------------
+# Decisiones
+# ---------------------------------------------------------------------------
+
+def nueva_decision(archivo, tipo, id_temporal, accion, usuario, comentario=""):
+    from .models import DecisionValidacion
+
+    return DecisionValidacion(
+        archivo=archivo,
+        tipo=tipo,
+        id_temporal=id_temporal,
+        estado="validado" if accion == "validar" else "rechazado",
+        comentario=comentario or "",
+        usuario=usuario if usuario.is_authenticated else None,
+        usuario_nombre=getattr(usuario, "username", "") or "usuario",
+    )
+
+
+def decisiones_pendientes(archivo, desde=0):
+    """Última decisión de cada item posterior a ``desde`` (con margen): ``{(tipo, id_temporal): decision}``."""
+    from .delta import inicio_con_margen
+    from .models import DecisionValidacion
+
+    decisiones = DecisionValidacion.objects.filter(archivo=archivo)
+    if desde:
+        decisiones = decisiones.filter(id__gt=inicio_con_margen(decisiones, desde))
+    ultimas = {}
+    for decision in decisiones.order_by("id"):
+        ultimas[(decision.tipo, decision.id_temporal)] = decision
+    return ultimas
+
+
+def cursor_de(datos):
+    return (datos.get("metadata_archivo") or {}).get(CLAVE_CURSOR) or 0
+
+
+def _aplicar(datos, decisiones):
+    """Escribe las decisiones en sus items; devuelve (cursor nuevo, items que cambiaron)."""
+    cambiados = 0
+    for tipo, lista in LISTAS.items():
+        for item in datos.get(lista, []):
+            decision = decisiones.get((tipo, item.get("id_temporal")))
+            if decision is not None and item.get("validacion") != decision.como_validacion():
+                item["validacion"] = decision.como_validacion()
+                cambiados += 1
+    return max([cursor_de(datos), *(d.id for d in decisiones.values())]), cambiados
+
+
+def superponer_decisiones(archivo, datos):
+    """Aplica sobre ``datos`` (el JSON ya cargado) las decisiones aún no compactadas.
+
+    Devuelve el id de la última decisión aplicada (o el cursor del archivo).
+    """
+    return _aplicar(datos, decisiones_pendientes(archivo, cursor_de(datos)))[0]
+
+
+def compactar(nombre):
+    """Vuelca al archivo las decisiones pendientes; devuelve cuántos items cambiaron."""
+    from .archivos_estaticos import precomprimir
+
+    ruta = ruta_sintesis(nombre)
+    with open(ruta, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    cursor = cursor_de(datos)
+    nuevo_cursor, cambiados = _aplicar(datos, decisiones_pendientes(nombre, cursor))
+    if not cambiados and nuevo_cursor == cursor:
+        return 0
+    # Las que se confirmen mientras tanto quedan pendientes (o en el margen, si su id es menor)
+    datos.setdefault("metadata_archivo", {})[CLAVE_CURSOR] = nuevo_cursor
+
+    tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, ruta)
+    precomprimir(ruta)
+    ficha_sintesis(nombre)
+    return cambiados
+
+
+# ---------------------------------------------------------------------------
+# Catálogo de archivos (sidecars)
+# ---------------------------------------------------------------------------
+
+def _ruta_ficha(ruta):
+    return ruta.parent / ".indices" / ruta.name
+
+
+def _escanear(texto):
+    """Metadata y posiciones (en caracteres) de los items de un archivo de síntesis.
+
+    Recorre el objeto de primer nivel con raw_decode: los items de las listas
+    se decodifican uno a uno para saber dónde empieza y acaba cada uno.
+    """
+    decoder = json.JSONDecoder()
+    espacios = re.compile(r"[ \t\n\r]*")
+    listas = set(LISTAS.values())
+    cabecera, posiciones = {}, {}
+
+    def saltar(i):
+        return espacios.match(texto, i).end()
+
+    i = saltar(0)
+    if texto[i:i + 1] != "{":
+        raise ValueError("El archivo de síntesis no es un objeto JSON")
+    i = saltar(i + 1)
+    while texto[i:i + 1] != "}":
+        clave, i = decoder.raw_decode(texto, i)
+        i = saltar(i)
+        i = saltar(i + 1)  # ":"
+        if clave in listas and texto[i:i + 1] == "[":
+            items = posiciones[clave] = []
+            i = saltar(i + 1)
+            while texto[i:i + 1] != "]":
+                item, fin = decoder.raw_decode(texto, i)
+                items.append((i, fin, item))
+                i = saltar(fin)
+                if texto[i:i + 1] == ",":
+                    i = saltar(i + 1)
+            i += 1
+        else:
+            cabecera[clave], i = decoder.raw_decode(texto, i)
+        i = saltar(i)
+        if texto[i:i + 1] == ",":
+            i = saltar(i + 1)
+    return cabecera, posiciones
+
+
+def _construir_ficha(ruta, firma):
+    """(ficha, posiciones) de ``ruta``."""
+    texto = ruta.read_bytes().decode("utf-8")
+    cabecera, posiciones = _escanear(texto)
+
+    # Posiciones en bytes (lo que usa seek), acumulando en orden
+    bytes_hasta, anterior = 0, 0
+
+    def a_bytes(posicion):
+        nonlocal bytes_hasta, anterior
+        bytes_hasta += len(texto[anterior:posicion].encode("utf-8"))
+        anterior = posicion
+        return bytes_hasta
+
+    # Las listas están en orden de aparición en el archivo
+    posiciones_bytes = {
+        lista: [[a_bytes(inicio), a_bytes(fin)] for inicio, fin, _ in items]
+        for lista, items in posiciones.items()
+    }
+
+    representaciones = [item for _, _, item in posiciones.get("representaciones", [])]
+    ficha = {
+        "version": VERSION_FICHA,
+        "archivo": ruta.name,
+        "firma": list(firma),
+        "metadata_archivo": cabecera.get("metadata_archivo") or {},
+        "fecha_generacion": cabecera.get("fecha_generacion"),
+        "totales": {lista: len(posiciones.get(lista, [])) for lista in LISTAS.values()},
+        "confianza": {
+            nivel: sum(1 for r in representaciones if r.get("confianza") == nivel) for nivel in NIVELES_CONFIANZA
+        },
+    }
+    return ficha, {
+        "version": VERSION_FICHA,
+        "firma": list(firma),
+        "posiciones": {lista: posiciones_bytes.get(lista, []) for lista in LISTAS.values()},
+    }
+
+
+def _leer_vigente(ruta, firma):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if datos.get("version") == VERSION_FICHA and datos.get("firma") == list(firma):
+        return datos
+    return None
+
+
+def _escribir_atomico(ruta, datos):
+    tmp = ruta.with_name(f".{ruta.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, ruta)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+_fichas_sin_sidecar = {}
+
+
+def _indexar(nombre, parte):
+    """Ficha (``parte="ficha"``) o posiciones de ``nombre``; rehace ambas si el archivo cambió."""
+    ruta = ruta_sintesis(nombre)
+    firma = _firma(ruta)
+    ruta_ficha = _ruta_ficha(ruta)
+    rutas = {"ficha": ruta_ficha, "posiciones": ruta_ficha.with_name(ruta_ficha.name + ".posiciones")}
+    vigente = _leer_vigente(rutas[parte], firma)
+    if vigente is not None:
+        return vigente
+    with _indices_lock:
+        en_memoria = _fichas_sin_sidecar.get(ruta)
+    if en_memoria and en_memoria["ficha"]["firma"] == list(firma):
+        return en_memoria[parte]
+
+    ficha, posiciones = _construir_ficha(ruta, firma)
+    try:
+        ruta_ficha.parent.mkdir(exist_ok=True)
+        _escribir_atomico(rutas["posiciones"], posiciones)
+        _escribir_atomico(rutas["ficha"], ficha)
+    except OSError:
+        logger.warning("No se pudo escribir el índice de %s; se mantiene en memoria", nombre, exc_info=True)
+        with _indices_lock:
+            if ruta not in _fichas_sin_sidecar and len(_fichas_sin_sidecar) >= MAX_INDICES:
+                _fichas_sin_sidecar.pop(next(iter(_fichas_sin_sidecar)))
+            _fichas_sin_sidecar[ruta] = {"ficha": ficha, "posiciones": posiciones}
+    return ficha if parte == "ficha" else posiciones
+
+
+def ficha_sintesis(nombre):
+    """Metadata, totales y confianza de un archivo de síntesis (de su sidecar)."""
+    return _indexar(nombre, "ficha")
+
+
+def catalogo_sintesis():
+    """Ficha de cada archivo de síntesis; los ilegibles se omiten."""
+    fichas = []
+    for nombre in archivos_sintesis():
+        try:
+            fichas.append(ficha_sintesis(nombre))
+        except (OSError, ValueError):
+            continue
+    return fichas
+
+
+def leer_items(nombre, lista, inicio=0, cantidad=None):
+    """Items ``[inicio:inicio + cantidad]`` de ``lista``, leídos con seek según el índice."""
+    posiciones = _indexar(nombre, "posiciones")["posiciones"][lista]
+    posiciones = posiciones[inicio:None if cantidad is None else inicio + cantidad]
+    items = []
+    if not posiciones:
+        return items
+    with open(ruta_sintesis(nombre), "rb") as f:
+        for desde, hasta in posiciones:
+            f.seek(desde)
+            items.append(json.loads(f.read(hasta - desde)))
+    return items
@@ -16,10 +16,28 @@ from .models import (
     VotoPropuestaCambioObra,
 )
 from .serializers import ObraSerializer, ManuscritoSerializer, TemaLiterarioSerializer, ObraTemaSerializer
-from django.db.models import Q
+from .estadisticas import conteos_secciones, estadisticas_busqueda, estadisticas_catalogo, estadisticas_fuente
+from .eventos import no_vistos
+from .exportar_comentarios import comentarios_para_exportar, respuesta_exportacion
+from .feed_comentarios import pagina_comentarios
+from .filtros import filtrar_obras, parametros_de_filtro
+from .opciones_filtros import opciones_filtros
+from .paginacion import cortar_pagina, limite_de, ordenar_desde
+from .propuestas_lote import MAX_ACCIONES_LOTE, procesar_lote
+from .proyecciones import FilaObra, FilaObraCatalogo, filas_de, obras_ligeras
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+
+def temas_con_total():
+    """Temas con ``total_obras`` anotado, para serializarlos sin contar uno a uno."""
+    return TemaLiterario.objects.annotate(total_obras=Count('obras'))
+
 
 class ObraViewSet(viewsets.ModelViewSet):
-    queryset = Obra.objects.all()
+    queryset = Obra.objects.select_related('autor').prefetch_related(
+        'manuscritos',
+        Prefetch('obratema_set', queryset=ObraTema.objects.prefetch_related(Prefetch('tema', queryset=temas_con_total()))),
+    )
     serializer_class = ObraSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['autor', 'tipo_obra', 'genero', 'fuente_principal', 'musica_conservada', 'mecenas', 'compositor']
@@ -32,23 +50,23 @@ class ManuscritoViewSet(viewsets.ModelViewSet):
     serializer_class = ManuscritoSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['obra']
-    search_fields = ['ubicacion', 'signatura', 'notas']
+    search_fields = ['biblioteca', 'signatura', 'notas']
     ordering_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
 
 class TemaLiterarioViewSet(viewsets.ModelViewSet):
     """ViewSet para temas literarios"""
-    queryset = TemaLiterario.objects.all()
+    queryset = temas_con_total()
     serializer_class = TemaLiterarioSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['tipo_tema']
+    filterset_fields = ['nombre']
     search_fields = ['nombre', 'descripcion']
-    ordering_fields = ['nombre', 'tipo_tema', 'total_obras']
-    ordering = ['tipo_tema', 'nombre']
+    ordering_fields = ['nombre', 'total_obras']
+    ordering = ['nombre']
 
 class ObraTemaViewSet(viewsets.ModelViewSet):
     """ViewSet para relaciones obra-tema"""
-    queryset = ObraTema.objects.all()
+    queryset = ObraTema.objects.prefetch_related(Prefetch('tema', queryset=temas_con_total()))
     serializer_class = ObraTemaSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['obra', 'tema', 'es_principal']
@@ -59,11 +77,7 @@ class ObraTemaViewSet(viewsets.ModelViewSet):
 def editor_view(request):
     """Vista principal del editor unificado"""
     # Estadísticas por fuente
-    stats = {
-        'total': Obra.objects.count(),
-        'fuentesxi': Obra.objects.filter(fuente_principal='FUENTESXI').count(),
-        'catcom': Obra.objects.filter(fuente_principal='CATCOM').count(),
-    }
+    stats = estadisticas_catalogo()
     
     # Información de cada catálogo
     catalogos = [
@@ -127,111 +141,24 @@ def editor_catalogo_view(request, catalogo_id):
     
     fuente = fuente_map[catalogo_id]
     
-    # Obtener datos para el editor
-    obras = Obra.objects.filter(fuente_principal=fuente).order_by('titulo_limpio')
-    
-    # Importar modelos y funciones necesarias
-    from apps.autores.models import Autor
-    from apps.lugares.models import Lugar
-    from apps.representaciones.models import Representacion
-    from apps.bibliografia.models import ReferenciaBibliografica
-    from django.db.models import Count as DjangoCount
-    
-    # Estadísticas del catálogo
-    stats = {
-        'total_obras': obras.count(),
-        'total_representaciones': sum(obra.total_representaciones for obra in obras),
-        'autores_unicos': obras.values('autor').distinct().count(),
-        'tipos_obra': obras.values('tipo_obra').distinct().count(),
-        'con_musica': obras.filter(musica_conservada=True).count(),
-        'sin_musica': obras.filter(musica_conservada=False).count(),
-    }
-    
-    # Obtener opciones para los selects
-    
-    autores = Autor.objects.all().order_by('nombre')
-    lugares = Lugar.objects.all().order_by('nombre')
-    representaciones = Representacion.objects.filter(obra__fuente_principal=fuente).order_by('-fecha_formateada')
-    bibliografia = ReferenciaBibliografica.objects.filter(obra__fuente_principal=fuente).order_by('autor')
-    
-    # Obtener autores que tienen obras en este catálogo
-    autores_con_obras = Autor.objects.filter(
-        obras__fuente_principal=fuente
-    ).annotate(
-        num_obras=DjangoCount('obras')
-    ).order_by('nombre').distinct()
-    
-    # Obtener tipos de obra únicos CON CONTADOR
-    tipos_obra_con_count = Obra.objects.exclude(
-        tipo_obra__isnull=True
-    ).exclude(
-        tipo_obra=''
-    ).values('tipo_obra').annotate(
-        total=DjangoCount('id')
-    ).order_by('tipo_obra')
-    
-    # Obtener géneros únicos CON CONTADOR
-    generos_con_count = Obra.objects.exclude(
-        genero__isnull=True
-    ).exclude(
-        genero=''
-    ).values('genero').annotate(
-        total=DjangoCount('id')
-    ).order_by('genero')
-    
-    # Obtener compositores únicos CON CONTADOR
-    compositores_con_count = Obra.objects.exclude(
-        compositor__isnull=True
-    ).exclude(
-        compositor=''
-    ).values('compositor').annotate(
-        total=DjangoCount('id')
-    ).order_by('compositor')
-    
-    # Obtener mecenas únicos CON CONTADOR
-    mecenas_con_count = Obra.objects.exclude(
-        mecenas__isnull=True
-    ).exclude(
-        mecenas=''
-    ).values('mecenas').annotate(
-        total=DjangoCount('id')
-    ).order_by('mecenas')
-    
-    # Obtener lugares únicos CON CONTADOR de obras que tienen representaciones
-    lugares_con_count = Lugar.objects.annotate(
-        total=DjangoCount('representaciones__obra', distinct=True)
-    ).filter(total__gt=0).order_by('nombre')
-    
-    # Si no hay representaciones, mostrar todos los lugares disponibles
-    if not lugares_con_count.exists():
-        lugares_con_count = Lugar.objects.annotate(
-            total=DjangoCount('id')
-        ).order_by('nombre')
-    
-    # Obtener compañías únicas de representaciones CON CONTADOR
-    companias_con_count = Representacion.objects.exclude(
-        compañia__isnull=True
-    ).exclude(
-        compañia=''
-    ).values('compañia').annotate(
-        total=DjangoCount('id')
-    ).order_by('compañia')
+    # La página es solo el armazón: estadísticas, conteos de cada sección y
+    # desplegables (todo cacheado por generación). Las listas se cargan por
+    # páginas desde get_section_data_ajax al abrir cada sección.
+    stats = estadisticas_fuente(fuente)
+    opciones = opciones_filtros(fuente)
     
     context = {
         'catalogo_id': catalogo_id,
         'fuente': fuente,
-        'obras': obras,  # Mostrar todas las obras
-        'autores': autores,
-        'autores_con_obras': autores_con_obras,
-        'tipos_obra_con_count': tipos_obra_con_count,
-        'generos_con_count': generos_con_count,
-        'compositores_con_count': compositores_con_count,
-        'mecenas_con_count': mecenas_con_count,
-        'lugares_con_count': lugares_con_count,
-        'companias_con_count': companias_con_count,
-        'lugares': lugares,
-        'representaciones': representaciones,
-        'bibliografia': bibliografia,
+        'conteos': conteos_secciones(fuente),
+        'autores': opciones['autores'],
+        'autores_con_obras': opciones['autores_con_obras'],
+        'tipos_obra_con_count': opciones['tipos_obra'],
+        'generos_con_count': opciones['generos'],
+        'compositores_con_count': opciones['compositores'],
+        'mecenas_con_count': opciones['mecenas'],
+        'lugares_con_count': opciones['lugares'],
+        'companias_con_count': opciones['companias'],
         'stats': stats,
         'tipo_obra_choices': Obra.TIPO_OBRA_CHOICES,
     }
@@ -352,19 +279,19 @@ def busqueda_obras_ajax(request):
         )
     
     obras_data = []
-    for obra in obras:  # Sin límite - se manejarán todos los resultados
+    for obra in filas_de(FilaObra, obras):  # Sin límite - se manejarán todos los resultados
         obras_data.append({
             'id': obra.id,
             'titulo': obra.titulo,
             'titulo_limpio': obra.titulo_limpio,
-            'autor': obra.autor.nombre if obra.autor else 'Desconocido',
+            'autor': obra.autor or 'Desconocido',
             'tipo_obra': obra.tipo_obra,
             'genero': obra.genero,
         })
     
     return JsonResponse({
         'obras': obras_data,
-        'total': obras.count()
+        'total': len(obras_data)
     })
 
 @require_http_methods(["GET"])
@@ -379,67 +306,22 @@ def count_obras_ajax(request, catalogo_id):
         return JsonResponse({'error': 'Catálogo no válido'})
     
     fuente = fuente_map[catalogo_id]
-    obras = Obra.objects.filter(fuente_principal=fuente)
     
-    # Aplicar filtros
-    query = request.GET.get('q', '').strip()
-    autor_id = request.GET.get('autor', '').strip()
-    tipo_obra = request.GET.get('tipo', '').strip()
-    genero = request.GET.get('genero', '').strip()
-    musica = request.GET.get('musica', '').strip()
-    compositor = request.GET.get('compositor', '').strip()
-    lugar_id = request.GET.get('lugar', '').strip()
-    mecenas = request.GET.get('mecenas', '').strip()
-    compania = request.GET.get('compania', '').strip()
-    
-    if query:
-        obras = obras.filter(
-            Q(titulo__icontains=query) |
-            Q(titulo_limpio__icontains=query) |
-            Q(autor__nombre__icontains=query) |
-            Q(titulo_alternativo__icontains=query)
-        )
-    
-    if autor_id:
-        obras = obras.filter(autor_id=autor_id)
-    
-    if tipo_obra:
-        obras = obras.filter(tipo_obra=tipo_obra)
-    
-    if genero:
-        obras = obras.filter(genero__icontains=genero)
-    
-    if musica == 'true':
-        obras = obras.filter(musica_conservada=True)
-    elif musica == 'false':
-        obras = obras.filter(musica_conservada=False)
-    
-    if compositor:
-        obras = obras.filter(compositor__icontains=compositor)
-    
-    if lugar_id:
-        # Filtrar por obras que tengan representaciones en ese lugar
-        obras = obras.filter(representaciones__lugar_id=lugar_id).distinct()
-    
-    if mecenas:
-        obras = obras.filter(mecenas__icontains=mecenas)
-    
-    if compania:
-        # Filtrar por obras que tengan representaciones de esa compañía
-        obras = obras.filter(representaciones__compañia__icontains=compania).distinct()
+    # Mismos filtros que la lista de la sección obras (get_section_data_ajax)
+    filtros = parametros_de_filtro(request.GET)
+    filtros.pop('fuente', None)
+    try:
+        obras = filtrar_obras(Obra.objects.filter(fuente_principal=fuente), filtros)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
     
     return JsonResponse({
         'count': obras.count(),
         'filters_applied': {
-            'query': query != '',
-            'autor': autor_id != '',
-            'tipo': tipo_obra != '',
-            'genero': genero != '',
-            'musica': musica != '',
-            'compositor': compositor != '',
-            'lugar': lugar_id != '',
-            'mecenas': mecenas != '',
-            'compania': compania != ''
+            'query': 'q' in filtros,
+            **{nombre: nombre in filtros for nombre in (
+                'autor', 'tipo', 'genero', 'musica', 'compositor', 'lugar', 'mecenas', 'compania'
+            )},
         }
     })
 
@@ -752,81 +634,31 @@ def section_pdf_pages_ajax(request, catalogo_id, section, item_id):
             'pages': []
         })
 
-def get_section_data_ajax(request, catalogo_id, section):
-    """Vista AJAX para obtener datos de diferentes secciones"""
-    fuente_map = {
-        'fuentesxi': 'FUENTESXI',
-        'catcom': 'CATCOM'
-    }
-    
-    if catalogo_id not in fuente_map:
-        return JsonResponse({'error': 'Catálogo no válido'})
-    
-    fuente = fuente_map[catalogo_id]
-    query = request.GET.get('q', '')
-    
+# Sección del editor -> (orden, campo del modelo para el cursor)
+ORDEN_SECCIONES = {
+    'obras': ('titulo', 'titulo_limpio'),
+    'autores': ('nombre', 'nombre'),
+    'lugares': ('nombre', 'nombre'),
+    'representaciones': ('-id', 'id'),
+    'bibliografia': ('id', 'id'),
+}
+
+
+def _queryset_seccion(section, fuente, request):
+    """Queryset filtrado de una sección del editor, ya proyectado con .values().
+
+    Cada fila trae lo necesario para pintar la lista (autor, lugar, número de
+    obras...) mediante JOIN o subconsulta, sin consultas adicionales por fila.
+    """
+    query = request.GET.get('q', '').strip()
+
     if section == 'obras':
-        from .models import Obra
-        items = Obra.objects.filter(fuente_principal=fuente)
-        
-        # Aplicar filtros de búsqueda de texto
-        if query:
-            items = items.filter(
-                Q(titulo__icontains=query) |
-                Q(titulo_limpio__icontains=query) |
-                Q(autor__nombre__icontains=query) |
-                Q(titulo_alternativo__icontains=query)
-            )
-        
-        # Aplicar filtros dropdown
-        autor_id = request.GET.get('autor', '')
-        tipo_obra = request.GET.get('tipo', '')
-        genero = request.GET.get('genero', '')
-        musica = request.GET.get('musica', '')
-        compositor = request.GET.get('compositor', '')
-        lugar_id = request.GET.get('lugar', '')
-        mecenas = request.GET.get('mecenas', '')
-        compania = request.GET.get('compania', '')
-        
-        if autor_id:
-            items = items.filter(autor_id=autor_id)
-        
-        if tipo_obra:
-            items = items.filter(tipo_obra=tipo_obra)
-        
-        if genero:
-            items = items.filter(genero__icontains=genero)
-        
-        if musica == 'true':
-            items = items.filter(musica_conservada=True)
-        elif musica == 'false':
-            items = items.filter(musica_conservada=False)
-        
-        if compositor:
-            items = items.filter(compositor__icontains=compositor)
-        
-        if lugar_id:
-            # Filtrar por obras que tengan representaciones en ese lugar
-            items = items.filter(representaciones__lugar_id=lugar_id).distinct()
-        
-        if mecenas:
-            items = items.filter(mecenas__icontains=mecenas)
-        
-        if compania:
-            # Filtrar por obras que tengan representaciones de esa compañía
-            items = items.filter(representaciones__compañia__icontains=compania).distinct()
-        
-        data = []
-        for item in items:  # Sin límite - mostrar todos los resultados filtrados
-            data.append({
-                'id': item.id,
-                'titulo': item.titulo_limpio or item.titulo,
-                'subtitulo': item.autor.nombre if item.autor else 'Autor desconocido',
-                'tipo': item.tipo_obra or 'Sin clasificar',
-                'extra': item.genero or '',
-            })
-    
-    elif section == 'autores':
+        filtros = parametros_de_filtro(request.GET)
+        filtros.pop('fuente', None)
+        items = filtrar_obras(Obra.objects.filter(fuente_principal=fuente), filtros)
+        return items.values('id', 'titulo', 'titulo_limpio', 'tipo_obra', 'genero', 'autor__nombre')
+
+    if section == 'autores':
         from apps.autores.models import Autor
         items = Autor.objects.all()
         if query:
@@ -835,18 +667,16 @@ def get_section_data_ajax(request, catalogo_id, section):
                 Q(nombre_completo__icontains=query) |
                 Q(biografia__icontains=query)
             )
-        
-        data = []
-        for item in items[:50]:
-            data.append({
-                'id': item.id,
-                'titulo': item.nombre,
-                'subtitulo': item.nombre_completo or '',
-                'tipo': item.epoca or 'Sin época',
-                'extra': f"{item.obras.count()} obras",
-            })
-    
-    elif section == 'lugares':
+        num_obras = Subquery(
+            Obra.objects.filter(autor_id=OuterRef('pk'))
+            .order_by().values('autor_id').annotate(n=Count('id')).values('n'),
+            output_field=IntegerField(),
+        )
+        return items.annotate(num_obras=Coalesce(num_obras, 0)).values(
+            'id', 'nombre', 'nombre_completo', 'epoca', 'num_obras'
+        )
+
+    if section == 'lugares':
         from apps.lugares.models import Lugar
         items = Lugar.objects.all()
         if query:
@@ -856,18 +686,9 @@ def get_section_data_ajax(request, catalogo_id, section):
                 Q(pais__icontains=query) |
                 Q(descripcion__icontains=query)
             )
-        
-        data = []
-        for item in items[:50]:
-            data.append({
-                'id': item.id,
-                'titulo': item.nombre,
-                'subtitulo': f"{item.region}, {item.pais}" if item.region and item.pais else item.region or item.pais or '',
-                'tipo': item.tipo_lugar or 'Sin tipo',
-                'extra': 'Capital' if item.es_capital else '',
-            })
-    
-    elif section == 'representaciones':
+        return items.values('id', 'nombre', 'region', 'pais', 'tipo_lugar', 'es_capital')
+
+    if section == 'representaciones':
         from apps.representaciones.models import Representacion
         items = Representacion.objects.filter(obra__fuente_principal=fuente)
         if query:
@@ -878,18 +699,11 @@ def get_section_data_ajax(request, catalogo_id, section):
                 Q(compañia__icontains=query) |
                 Q(fecha__icontains=query)
             )
-        
-        data = []
-        for item in items[:50]:
-            data.append({
-                'id': item.id,
-                'titulo': item.obra.titulo_limpio or item.obra.titulo,
-                'subtitulo': f"{item.lugar.nombre if item.lugar else 'Lugar desconocido'} - {item.fecha}",
-                'tipo': item.compañia or 'Sin compañía',
-                'extra': item.tipo_funcion or '',
-            })
-    
-    elif section == 'bibliografia':
+        return items.values(
+            'id', 'obra__titulo', 'obra__titulo_limpio', 'lugar__nombre', 'fecha', 'compañia', 'tipo_funcion'
+        )
+
+    if section == 'bibliografia':
         from apps.bibliografia.models import ReferenciaBibliografica
         items = ReferenciaBibliografica.objects.filter(obra__fuente_principal=fuente)
         if query:
@@ -899,23 +713,90 @@ def get_section_data_ajax(request, catalogo_id, section):
                 Q(editor__icontains=query) |
                 Q(editorial__icontains=query)
             )
-        
-        data = []
-        for item in items[:50]:
-            data.append({
-                'id': item.id,
-                'titulo': item.titulo,
-                'subtitulo': f"{item.autor} - {item.año_publicacion or 'Sin año'}",
-                'tipo': item.tipo_referencia or 'Sin tipo',
-                'extra': item.editorial or '',
-            })
+        return items.values('id', 'titulo', 'autor', 'año_publicacion', 'tipo_referencia', 'editorial')
+
+    return None
+
+
+def _item_seccion(section, fila):
+    """Fila de .values() -> item de la lista del editor (id, titulo, subtitulo, tipo, extra)."""
+    if section == 'obras':
+        return {
+            'id': fila['id'],
+            'titulo': fila['titulo_limpio'] or fila['titulo'],
+            'subtitulo': fila['autor__nombre'] or 'Autor desconocido',
+            'tipo': fila['tipo_obra'] or 'Sin clasificar',
+            'extra': fila['genero'] or '',
+        }
+    if section == 'autores':
+        return {
+            'id': fila['id'],
+            'titulo': fila['nombre'],
+            'subtitulo': fila['nombre_completo'] or '',
+            'tipo': fila['epoca'] or 'Sin época',
+            'extra': f"{fila['num_obras']} obras",
+        }
+    if section == 'lugares':
+        region, pais = fila['region'], fila['pais']
+        return {
+            'id': fila['id'],
+            'titulo': fila['nombre'],
+            'subtitulo': f"{region}, {pais}" if region and pais else region or pais or '',
+            'tipo': fila['tipo_lugar'] or 'Sin tipo',
+            'extra': 'Capital' if fila['es_capital'] else '',
+        }
+    if section == 'representaciones':
+        return {
+            'id': fila['id'],
+            'titulo': fila['obra__titulo_limpio'] or fila['obra__titulo'],
+            'subtitulo': f"{fila['lugar__nombre'] or 'Lugar desconocido'} - {fila['fecha']}",
+            'tipo': fila['compañia'] or 'Sin compañía',
+            'extra': fila['tipo_funcion'] or '',
+        }
+    return {
+        'id': fila['id'],
+        'titulo': fila['titulo'],
+        'subtitulo': f"{fila['autor']} - {fila['año_publicacion'] or 'Sin año'}",
+        'tipo': fila['tipo_referencia'] or 'Sin tipo',
+        'extra': fila['editorial'] or '',
+    }
+
+
+@require_http_methods(["GET"])
+def get_section_data_ajax(request, catalogo_id, section):
+    """Vista AJAX para obtener datos de diferentes secciones, paginados por cursor.
+
+    Parámetros: q y filtros de la sección, ``limite`` (1-200, defecto 50) y
+    ``cursor`` (el ``siguiente`` de la página anterior). Cada página cuesta dos
+    consultas, sea cual sea el tamaño del catálogo: las filas y el total.
+    """
+    fuente_map = {
+        'fuentesxi': 'FUENTESXI',
+        'catcom': 'CATCOM'
+    }
     
-    else:
+    if catalogo_id not in fuente_map:
+        return JsonResponse({'error': 'Catálogo no válido'})
+    
+    fuente = fuente_map[catalogo_id]
+    if section not in ORDEN_SECCIONES:
         return JsonResponse({'error': 'Sección no válida'})
+    orden, campo = ORDEN_SECCIONES[section]
     
+    try:
+        limite = limite_de(request.GET.get('limite'))
+        items = _queryset_seccion(section, fuente, request)
+        pagina = ordenar_desde(items, orden, campo, request.GET.get('cursor'))
+        # Las proyecciones de _queryset_seccion incluyen siempre el campo del cursor
+        filas = list(pagina[: limite + 1])
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    filas, siguiente = cortar_pagina(filas, limite, orden, campo)
     return JsonResponse({
-        'items': data,
-        'total': items.count(),
+        'items': [_item_seccion(section, fila) for fila in filas],
+        'total': items.order_by().count(),
+        'siguiente': siguiente,
         'section': section
     })
 
@@ -1237,12 +1118,7 @@ def obra_detail_view(request, obra_id):
 def catalogos_view(request):
     """Vista principal que muestra las portadas de los catálogos disponibles"""
     # Estadísticas por fuente
-    stats = {
-        'total': Obra.objects.count(),
-        'fuentesxi': Obra.objects.filter(fuente_principal='FUENTESXI').count(),
-        'catcom': Obra.objects.filter(fuente_principal='CATCOM').count(),
-        'ambas': Obra.objects.filter(fuente_principal__in=['FUENTESXI', 'CATCOM']).count(),
-    }
+    stats = estadisticas_catalogo()
     
     # Información de cada catálogo
     catalogos = [
@@ -1319,15 +1195,16 @@ def catalogo_detalle_view(request, catalogo_id):
             Q(titulo_alternativo__icontains=search)
         )
     
-    # Paginación simple
+    # Paginación simple (modelo sin los TextField largos, con su autor)
     from django.core.paginator import Paginator
-    paginator = Paginator(obras.order_by('titulo'), 20)
+    from apps.representaciones.models import Representacion
+    paginator = Paginator(obras_ligeras(obras).select_related('autor').order_by('titulo'), 20)
     obras_page = paginator.get_page(page)
     
     # Estadísticas del catálogo
     stats = {
         'total_obras': obras.count(),
-        'total_representaciones': sum(obra.total_representaciones for obra in obras),
+        'total_representaciones': Representacion.objects.filter(obra__fuente_principal=fuente).count(),
         'autores_unicos': obras.values('autor').distinct().count(),
         'tipos_obra': obras.values('tipo_obra').distinct().count(),
     }
@@ -1356,8 +1233,8 @@ def catalogo_view(request):
     mecenas = request.GET.get('mecenas', '')
     compania = request.GET.get('compania', '')
     
-    # Obtener obras con sus representaciones para mostrar información completa
-    obras = Obra.objects.select_related('autor').prefetch_related('representaciones__lugar').all()
+    # Las tarjetas se pintan desde filas ligeras (proyecciones.py), no desde Obra
+    obras = Obra.objects.all()
     
     # Aplicar filtros
     if fuente:
@@ -1403,87 +1280,13 @@ def catalogo_view(request):
         ).distinct()
     
     # Estadísticas generales
-    stats = {
-        'total': Obra.objects.count(),
-        'fuentesxi': Obra.objects.filter(fuente_principal='FUENTESXI').count(),
-        'catcom': Obra.objects.filter(fuente_principal='CATCOM').count(),
-        'ambas': Obra.objects.filter(fuente_principal__in=['FUENTESXI', 'CATCOM']).count(),
-        'con_musica': Obra.objects.filter(musica_conservada=True).count(),
-        'sin_musica': Obra.objects.filter(musica_conservada=False).count(),
-    }
+    stats = estadisticas_catalogo()
     
-    # Obtener opciones para los dropdowns
-    from apps.autores.models import Autor
-    from apps.lugares.models import Lugar
-    from apps.representaciones.models import Representacion
-    from django.db.models import Count as DjangoCount
-    
-    # Obtener autores CON CONTADOR
-    autores_con_obras = Autor.objects.annotate(
-        num_obras=DjangoCount('obras')
-    ).filter(num_obras__gt=0).order_by('nombre')
-    
-    # tipo_obra ahora se muestra como "Género" (comedia, auto, zarzuela...)
-    generos_principales_con_count = Obra.objects.exclude(
-        tipo_obra__isnull=True
-    ).exclude(
-        tipo_obra=''
-    ).values('tipo_obra').annotate(
-        total=DjangoCount('id')
-    ).order_by('tipo_obra')
-    
-    # genero ahora se muestra como "Subgénero" 
-    subgeneros_con_count = Obra.objects.exclude(
-        genero__isnull=True
-    ).exclude(
-        genero=''
-    ).values('genero').annotate(
-        total=DjangoCount('id')
-    ).order_by('genero')
-    
-    # Nuevo campo subgenero para clasificaciones más específicas
-    subgeneros_especificos_con_count = Obra.objects.exclude(
-        subgenero__isnull=True
-    ).exclude(
-        subgenero=''
-    ).values('subgenero').annotate(
-        total=DjangoCount('id')
-    ).order_by('subgenero')
-    
-    # Obtener compositores únicos CON CONTADOR
-    compositores_con_count = Obra.objects.exclude(
-        compositor__isnull=True
-    ).exclude(
-        compositor=''
-    ).values('compositor').annotate(
-        total=DjangoCount('id')
-    ).order_by('compositor')
-    
-    # Obtener mecenas únicos CON CONTADOR
-    mecenas_con_count = Obra.objects.exclude(
-        mecenas__isnull=True
-    ).exclude(
-        mecenas=''
-    ).values('mecenas').annotate(
-        total=DjangoCount('id')
-    ).order_by('mecenas')
-    
-    # Obtener lugares CON CONTADOR de obras que tienen representaciones
-    lugares_con_count = Lugar.objects.annotate(
-        total=DjangoCount('representaciones__obra', distinct=True)
-    ).order_by('nombre')
-    
-    # Obtener compañías únicas CON CONTADOR
-    companias_con_count = Representacion.objects.exclude(
-        compañia__isnull=True
-    ).exclude(
-        compañia=''
-    ).values('compañia').annotate(
-        total=DjangoCount('id')
-    ).order_by('compañia')
+    # Opciones de los desplegables (cacheadas por generación del dataset)
+    opciones = opciones_filtros()
     
     context = {
-        'obras': obras.order_by('titulo'),  # Sin límite - usar filtros para controlar resultados
+        'obras': filas_de(FilaObraCatalogo, obras.order_by('titulo')),  # Sin límite - usar filtros para controlar resultados
         'fuente_actual': fuente,
         'search_actual': search,
         'tipo_actual': tipo,
@@ -1495,14 +1298,14 @@ def catalogo_view(request):
         'mecenas_actual': mecenas,
         'compania_actual': compania,
         'stats': stats,
-        'autores_con_obras': autores_con_obras,
-        'generos_principales_con_count': generos_principales_con_count,  # tipo_obra mostrado como "Género"
-        'subgeneros_con_count': subgeneros_con_count,  # genero mostrado como "Subgénero"
-        'subgeneros_especificos_con_count': subgeneros_especificos_con_count,  # Nuevo campo
-        'compositores_con_count': compositores_con_count,
-        'mecenas_con_count': mecenas_con_count,
-        'lugares_con_count': lugares_con_count,
-        'companias_con_count': companias_con_count,
+        'autores_con_obras': opciones['autores_con_obras'],
+        'generos_principales_con_count': opciones['tipos_obra'],  # tipo_obra mostrado como "Género"
+        'subgeneros_con_count': opciones['generos'],  # genero mostrado como "Subgénero"
+        'subgeneros_especificos_con_count': opciones['subgeneros'],  # Nuevo campo
+        'compositores_con_count': opciones['compositores'],
+        'mecenas_con_count': opciones['mecenas'],
+        'lugares_con_count': opciones['lugares'],
+        'companias_con_count': opciones['companias'],
     }
     
     return render(request, 'obras/catalogo.html', context)
@@ -1689,7 +1492,7 @@ def busqueda_avanzada_view(request):
     
     # Filtros adicionales
     if tema:
-        obras = obras.filter(temas_literarios__tema__nombre__icontains=tema)
+        obras = obras.filter(obratema_set__tema__nombre__icontains=tema).distinct()
     
     if mecenas:
         obras = obras.filter(mecenas__icontains=mecenas)
@@ -1703,21 +1506,24 @@ def busqueda_avanzada_view(request):
         obras = obras.filter(musica_conservada=False)
     
     # Estadísticas de búsqueda
+    contadores = estadisticas_busqueda(obras, {
+        'q': query, 'tipo': tipo_busqueda, 'tema': tema, 'mecenas': mecenas,
+        'compositor': compositor, 'musica_conservada': musica_conservada,
+    })
     stats = {
-        'total_resultados': obras.count(),
-        'con_musica': obras.filter(musica_conservada=True).count(),
-        'con_mecenas': obras.exclude(mecenas='').count(),
-        'con_compositor': obras.exclude(compositor='').count(),
+        'total_resultados': contadores['total'],
+        'con_musica': contadores['con_musica'],
+        'con_mecenas': contadores['con_mecenas'],
+        'con_compositor': contadores['con_compositor'],
     }
     
     # Obtener temas disponibles para filtros
-    temas_disponibles = TemaLiterario.objects.all().order_by('tipo_tema', 'nombre')
-    
-    # Obtener mecenas únicos
-    mecenas_disponibles = Obra.objects.exclude(mecenas='').values_list('mecenas', flat=True).distinct().order_by('mecenas')
+    temas_disponibles = TemaLiterario.objects.all().order_by('nombre')
     
-    # Obtener compositores únicos
-    compositores_disponibles = Obra.objects.exclude(compositor='').values_list('compositor', flat=True).distinct().order_by('compositor')
+    # Mecenas y compositores únicos (de las opciones cacheadas de los desplegables)
+    opciones = opciones_filtros()
+    mecenas_disponibles = [fila['mecenas'] for fila in opciones['mecenas']]
+    compositores_disponibles = [fila['compositor'] for fila in opciones['compositores']]
     
     # Paginación
     from django.core.paginator import Paginator
@@ -1744,34 +1550,49 @@ def busqueda_avanzada_view(request):
 
 def redes_colaboracion_view(request):
     """Vista para análisis de redes de colaboración entre autores y compañías"""
-    from django.db.models import Count, Q
+    return render(request, 'obras/redes_colaboracion.html', _contexto_redes_colaboracion())
+
+
+def _contexto_redes_colaboracion():
+    """Redes autor-compañía de redes_colaboracion_view (también para benchmark_rutas_criticas)"""
+    from django.db.models import Count
+    from apps.autores.models import Autor
+    from apps.representaciones.models import Representacion
+    
+    # Representaciones por (autor, compañía) en una sola consulta agrupada;
+    # las dos redes se montan en memoria sin consultas por autor o compañía
+    pares = list(
+        Representacion.objects.exclude(compañia='').filter(obra__autor__isnull=False)
+        .values_list('obra__autor_id', 'compañia').annotate(count=Count('id'))
+        .order_by('-count', 'compañia')
+    )
+    compañias_por_autor = {}
+    autores_por_compañia = {}
+    for autor_id, compañia, count in pares:
+        compañias_por_autor.setdefault(autor_id, []).append((compañia, count))
+        autores_por_compañia.setdefault(compañia, []).append(autor_id)
+    autores_por_id = Autor.objects.in_bulk(list(compañias_por_autor))
     
     # Red de colaboración entre autores (obras co-escritas o relacionadas)
     autores_colaboracion = []
     autores = Autor.objects.annotate(
-        total_obras=Count('obras'),
-        total_representaciones=Count('obras__representaciones')
-    ).filter(total_obras__gt=0).order_by('-total_obras')[:20]
+        num_obras=Count('obras', distinct=True),
+        num_representaciones=Count('obras__representaciones')
+    ).filter(num_obras__gt=0).order_by('-num_obras')[:20]
     
     for autor in autores:
-        # Buscar otros autores que hayan trabajado en las mismas compañías
-        compañias_autor = Representacion.objects.filter(
-            obra__autor=autor
-        ).values_list('compañia', flat=True).distinct()
-        
+        # Otros autores que hayan trabajado en las mismas compañías
         colaboradores = []
-        for compañia in compañias_autor:
-            if compañia:
-                otros_autores = Autor.objects.filter(
-                    obras__representaciones__compañia=compañia
-                ).exclude(id=autor.id).distinct()
-                for otro_autor in otros_autores:
-                    if otro_autor not in [c['autor'] for c in colaboradores]:
-                        colaboradores.append({
-                            'autor': otro_autor,
-                            'compañia': compañia,
-                            'obras_comunes': 0  # Se puede calcular después
-                        })
+        vistos = {autor.id}
+        for compañia, _ in compañias_por_autor.get(autor.id, []):
+            for otro_id in autores_por_compañia[compañia]:
+                if otro_id not in vistos:
+                    vistos.add(otro_id)
+                    colaboradores.append({
+                        'autor': autores_por_id[otro_id],
+                        'compañia': compañia,
+                        'obras_comunes': 0  # Se puede calcular después
+                    })
         
         autores_colaboracion.append({
             'autor': autor,
@@ -1791,29 +1612,18 @@ def redes_colaboracion_view(request):
     
     for compañia_data in compañias:
         compañia_nombre = compañia_data['compañia']
+        autores_compañia = [autores_por_id[i] for i in autores_por_compañia.get(compañia_nombre, [])]
         
-        # Obtener autores que han trabajado con esta compañía
-        autores_compañia = Autor.objects.filter(
-            obras__representaciones__compañia=compañia_nombre
-        ).distinct()
-        
-        # Buscar otras compañías que hayan trabajado con los mismos autores
+        # Otras compañías que hayan trabajado con los mismos autores (3 por autor)
         compañias_relacionadas = []
         for autor in autores_compañia:
-            otras_compañias = Representacion.objects.filter(
-                obra__autor=autor
-            ).exclude(compañia=compañia_nombre).exclude(
-                compañia=''
-            ).values('compañia').annotate(
-                count=Count('id')
-            ).order_by('-count')[:3]
-            
-            for otra_compañia in otras_compañias:
-                if otra_compañia['compañia'] not in [c['compañia'] for c in compañias_relacionadas]:
+            otras_compañias = [par for par in compañias_por_autor[autor.id] if par[0] != compañia_nombre][:3]
+            for otra_compañia, count in otras_compañias:
+                if otra_compañia not in [c['compañia'] for c in compañias_relacionadas]:
                     compañias_relacionadas.append({
-                        'compañia': otra_compañia['compañia'],
+                        'compañia': otra_compañia,
                         'autor_comun': autor,
-                        'representaciones': otra_compañia['count']
+                        'representaciones': count
                     })
         
         compañias_colaboracion.append({
@@ -1827,33 +1637,34 @@ def redes_colaboracion_view(request):
     # Estadísticas generales
     stats = {
         'total_autores': Autor.objects.count(),
-        'autores_con_obras': Autor.objects.annotate(
-            total_obras=Count('obras')
-        ).filter(total_obras__gt=0).count(),
+        'autores_con_obras': Autor.objects.filter(obras__isnull=False).distinct().count(),
         'total_compañias': Representacion.objects.exclude(
             compañia=''
         ).values('compañia').distinct().count(),
         'total_representaciones': Representacion.objects.count(),
     }
     
-    context = {
+    return {
         'autores_colaboracion': autores_colaboracion,
         'compañias_colaboracion': compañias_colaboracion,
         'stats': stats,
     }
-    
-    return render(request, 'obras/redes_colaboracion.html', context)
 
 def mapas_geograficos_view(request):
     """Vista para mapas geográficos con seguimiento temporal de obras"""
-    from django.db.models import Count, Min, Max
-    from datetime import datetime
+    return render(request, 'obras/mapas_geograficos.html', _contexto_mapas_geograficos(request.GET))
+
+
+def _contexto_mapas_geograficos(parametros):
+    """Representaciones por lugar y año de mapas_geograficos_view (también para benchmark_rutas_criticas)"""
+    from apps.autores.models import Autor
+    from apps.representaciones.models import Representacion
     
     # Obtener parámetros de filtro
-    obra_id = request.GET.get('obra', '')
-    autor_id = request.GET.get('autor', '')
-    decada = request.GET.get('decada', '')
-    lugar_id = request.GET.get('lugar', '')
+    obra_id = parametros.get('obra', '')
+    autor_id = parametros.get('autor', '')
+    decada = parametros.get('decada', '')
+    lugar_id = parametros.get('lugar', '')
     
     # Base query para representaciones
     representaciones = Representacion.objects.select_related(
@@ -1966,7 +1777,7 @@ def mapas_geograficos_view(request):
         'total_autores': len(set(autor for data in lugares_temporales.values() for autor in data['autores_unicos'])),
     }
     
-    context = {
+    return {
         'lugares_temporales': lugares_temporales,
         'obras_disponibles': obras_disponibles,
         'autores_disponibles': autores_disponibles,
@@ -1980,8 +1791,6 @@ def mapas_geograficos_view(request):
             'lugar': lugar_id,
         }
     }
-    
-    return render(request, 'obras/mapas_geograficos.html', context)
 
 
 @require_http_methods(["POST"])
@@ -2085,7 +1894,7 @@ def save_comment_ajax(request, catalogo_id):
 
 @require_http_methods(["GET"])
 def get_comments_ajax(request, catalogo_id):
-    """Vista AJAX para obtener comentarios de usuario"""
+    """Vista AJAX para obtener comentarios de usuario, paginados por cursor (``limite``, ``cursor``)"""
     try:
         from django.contrib.auth.decorators import login_required
         
@@ -2097,10 +1906,10 @@ def get_comments_ajax(request, catalogo_id):
             }, status=401)
         
         # Obtener comentarios del usuario para este catálogo
-        comentarios = ComentarioUsuario.objects.filter(
-            usuario=request.user,
-            catalogo=catalogo_id
-        ).order_by('-fecha_creacion')
+        comentarios, siguiente, total = pagina_comentarios(
+            ComentarioUsuario.objects.filter(usuario=request.user, catalogo=catalogo_id),
+            request.GET,
+        )
         
         # Serializar comentarios
         comentarios_data = []
@@ -2111,15 +1920,19 @@ def get_comments_ajax(request, catalogo_id):
                 'comentario': comentario.comentario,
                 'fecha_creacion': comentario.fecha_creacion.strftime('%d/%m/%Y %H:%M'),
                 'es_publico': comentario.es_publico,
-                'numero_obras': comentario.numero_obras,
-                'obras_titulos': comentario.obras_titulos
+                'numero_obras': comentario.num_obras,
+                'obras_titulos': [obra.titulo_limpio for obra in comentario.obras_resumen]
             })
         
         return JsonResponse({
             'success': True,
-            'comentarios': comentarios_data
+            'comentarios': comentarios_data,
+            'siguiente': siguiente,
+            'total': total
         })
         
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -2200,7 +2013,7 @@ def save_obra_comment(request, obra_id):
 
 @require_http_methods(["GET"])
 def get_obra_comments(request, obra_id):
-    """Vista para obtener comentarios de una obra específica"""
+    """Vista para obtener comentarios de una obra específica, paginados por cursor"""
     try:
         # Verificar autenticación
         if not request.user.is_authenticated:
@@ -2215,11 +2028,14 @@ def get_obra_comments(request, obra_id):
         # Obtener comentarios de esta obra
         # Si el usuario es el autor, mostrar todos sus comentarios (públicos y privados)
         # También mostrar comentarios públicos de otros usuarios
-        comentarios = ComentarioUsuario.objects.filter(
-            obras_seleccionadas=obra
-        ).filter(
-            Q(usuario=request.user) | Q(es_publico=True)
-        ).select_related('usuario').order_by('-fecha_creacion')
+        comentarios, siguiente, total = pagina_comentarios(
+            ComentarioUsuario.objects.filter(
+                obras_seleccionadas=obra
+            ).filter(
+                Q(usuario=request.user) | Q(es_publico=True)
+            ),
+            request.GET,
+        )
         
         # Serializar comentarios
         comentarios_data = []
@@ -2236,9 +2052,13 @@ def get_obra_comments(request, obra_id):
         
         return JsonResponse({
             'success': True,
-            'comentarios': comentarios_data
+            'comentarios': comentarios_data,
+            'siguiente': siguiente,
+            'total': total
         })
         
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({
             'success': False,
@@ -2251,97 +2071,70 @@ def get_obra_comments(request, obra_id):
 # ============================================================================
 
 
+def _comentario_index(c, obra):
+    """Comentario en el formato del index JS; ``obra`` es la obra a mostrar o None."""
+    avatar_url = None
+    if getattr(c.usuario, "avatar", None):
+        try:
+            avatar_url = c.usuario.avatar.url
+        except Exception:
+            avatar_url = None
+
+    return {
+        "id": c.id,
+        "created_at": c.fecha_creacion.isoformat(),
+        "contenido": c.comentario,
+        "tipo": c.tipo,
+        "obra_id": obra.id if obra else None,
+        "filtros_busqueda": c.filtros_busqueda,
+        "perfiles_usuarios": {
+            "nombre_completo": c.usuario.get_full_name() or c.usuario.username,
+            "avatar_url": avatar_url,
+        },
+        "visto_por_admin": c.visto_por_admin,
+        "visto_at": c.visto_at.isoformat() if c.visto_at else None,
+        "visto_por": c.visto_por.username if c.visto_por else None,
+        "obra": {"id": obra.id, "titulo": obra.titulo} if obra else None,
+    }
+
+
 @require_http_methods(["GET"])
 def index_comentarios_obra(request, obra_id):
-    """Listado de comentarios de una obra (formato compatible con el index JS)."""
+    """Listado de comentarios de una obra (formato compatible con el index JS), paginado por cursor."""
     if not request.user.is_authenticated:
         return JsonResponse({"success": False, "error": "No autenticado"}, status=401)
 
     obra = get_object_or_404(Obra, id=obra_id)
 
-    comentarios = (
-        ComentarioUsuario.objects.filter(obras_seleccionadas=obra)
-        .select_related("usuario")
-        .order_by("-fecha_creacion")
-        .distinct()
-    )
-
-    payload = []
-    for c in comentarios:
-        avatar_url = None
-        if getattr(c.usuario, "avatar", None):
-            try:
-                avatar_url = c.usuario.avatar.url
-            except Exception:
-                avatar_url = None
-
-        payload.append(
-            {
-                "id": c.id,
-                "created_at": c.fecha_creacion.isoformat(),
-                "contenido": c.comentario,
-                "tipo": c.tipo,
-                "obra_id": obra.id,
-                "filtros_busqueda": c.filtros_busqueda,
-                "perfiles_usuarios": {
-                    "nombre_completo": c.usuario.get_full_name() or c.usuario.username,
-                    "avatar_url": avatar_url,
-                },
-                "visto_por_admin": c.visto_por_admin,
-                "visto_at": c.visto_at.isoformat() if c.visto_at else None,
-                "visto_por": c.visto_por.username if c.visto_por else None,
-                "obra": {"titulo": obra.titulo},
-            }
+    try:
+        comentarios, siguiente, total = pagina_comentarios(
+            ComentarioUsuario.objects.filter(obras_seleccionadas=obra), request.GET
         )
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
 
-    return JsonResponse({"success": True, "comentarios": payload})
+    payload = [_comentario_index(c, obra) for c in comentarios]
+    return JsonResponse({"success": True, "comentarios": payload, "siguiente": siguiente, "total": total})
 
 
 @require_http_methods(["GET"])
 def index_comentarios_global(request):
-    """Listado global de comentarios (formato compatible con el index JS)."""
+    """Listado global de comentarios (formato compatible con el index JS), paginado por cursor.
+
+    ``limite`` (1-200, defecto 50) y ``cursor`` (el ``siguiente`` de la página
+    anterior). Cada página cuesta tres consultas: comentarios, obras y total.
+    """
     if not request.user.is_authenticated:
         return JsonResponse({"success": False, "error": "No autenticado"}, status=401)
 
-    comentarios = ComentarioUsuario.objects.select_related("usuario").order_by("-fecha_creacion").distinct()
-
-    payload = []
-    for c in comentarios:
-        avatar_url = None
-        if getattr(c.usuario, "avatar", None):
-            try:
-                avatar_url = c.usuario.avatar.url
-            except Exception:
-                avatar_url = None
-
-        # El index crea 1 comentario por 1 obra, pero dejamos tolerancia por si hay varias.
-        obras = list(c.obras_seleccionadas.all()[:1])
-        if obras:
-            obra = obras[0]
-            obra_obj = {"id": obra.id, "titulo": obra.titulo}
-        else:
-            obra_obj = None
-
-        payload.append(
-            {
-                "id": c.id,
-                "created_at": c.fecha_creacion.isoformat(),
-                "contenido": c.comentario,
-                "tipo": c.tipo,
-                "obra_id": obra_obj["id"] if obra_obj else None,
-                "filtros_busqueda": c.filtros_busqueda,
-                "perfiles_usuarios": {
-                    "nombre_completo": c.usuario.get_full_name() or c.usuario.username,
-                    "avatar_url": avatar_url,
-                },
-                "visto_por_admin": c.visto_por_admin,
-                "visto_at": c.visto_at.isoformat() if c.visto_at else None,
-                "visto_por": c.visto_por.username if c.visto_por else None,
-                "obra": obra_obj,
-            }
-        )
+    try:
+        comentarios, siguiente, total = pagina_comentarios(ComentarioUsuario.objects.all(), request.GET)
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
 
-    return JsonResponse({"success": True, "comentarios": payload})
+    # El index crea 1 comentario por 1 obra, pero dejamos tolerancia por si hay varias.
+    payload = [_comentario_index(c, c.obras_resumen[0] if c.obras_resumen else None) for c in comentarios]
+    return JsonResponse({"success": True, "comentarios": payload, "siguiente": siguiente, "total": total})
 
 
 @require_http_methods(["POST"])
@@ -2402,8 +2195,8 @@ def index_comentarios_count_unseen(request):
     if not request.user.is_superuser and not request.user.is_staff:
         return JsonResponse({"success": True, "count": 0})
 
-    count = ComentarioUsuario.objects.filter(visto_por_admin=False).count()
-    return JsonResponse({"success": True, "count": count})
+    # Contador incremental (eventos.py): sin COUNT(*) salvo si la clave no está en caché
+    return JsonResponse({"success": True, "count": no_vistos()})
 
 
 @require_http_methods(["POST"])
@@ -2498,7 +2291,7 @@ def _apply_propuesta_a_obra(propuesta):
             obra.save(update_fields=["autor"])
         if hasattr(obra.autor, subcampo):
             setattr(obra.autor, subcampo, valor)
-            obra.autor.save()
+            obra.autor.save(update_fields=[subcampo])
             return
         raise ValueError(f"Campo de autor no soportado: {campo}")
 
@@ -2506,7 +2299,7 @@ def _apply_propuesta_a_obra(propuesta):
         raise ValueError(f"Campo no soportado: {campo}")
 
     setattr(obra, campo, _to_python_field_value(obra, campo, valor))
-    obra.save()
+    obra.save(update_fields=[campo])
 
 
 @require_http_methods(["POST"])
@@ -2595,6 +2388,33 @@ def listar_propuestas_obra(request, obra_id):
     return JsonResponse({"success": True, "propuestas": payload})
 
 
+@require_http_methods(["POST"])
+def resolver_propuestas_lote(request):
+    """Aprobar/rechazar/votar varias propuestas en una petición (ver propuestas_lote.py)."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"success": False, "error": "No autenticado"}, status=401)
+
+    try:
+        import json
+
+        data = json.loads(request.body or "{}")
+        acciones = data.get("acciones")
+        if not isinstance(acciones, list) or not all(isinstance(a, dict) for a in acciones):
+            return JsonResponse({"success": False, "error": "Faltan acciones"}, status=400)
+        if len(acciones) > MAX_ACCIONES_LOTE:
+            return JsonResponse(
+                {"success": False, "error": f"Como mucho {MAX_ACCIONES_LOTE} acciones por lote"}, status=400
+            )
+        resultados = procesar_lote(request.user, acciones)
+        return JsonResponse({
+            "success": True,
+            "resultados": resultados,
+            "aplicadas": sum(1 for r in resultados if r["success"]),
+        })
+    except Exception as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+
 @require_http_methods(["GET"])
 def listar_todas_propuestas_pendientes(request):
     """Lista todas las propuestas pendientes (solo superusuario, para panel admin)."""
@@ -2733,7 +2553,7 @@ def resolver_propuesta_obra(request, propuesta_id):
 
 @require_http_methods(["GET"])
 def exportar_comentarios_ia(request):
-    """🤖 Exporta comentarios etiquetados para IA como archivo TXT"""
+    """🤖 Exporta comentarios etiquetados para IA como archivo TXT (o JSONL con ?formato=jsonl)"""
     from django.http import HttpResponse
     from datetime import datetime
     
@@ -2746,9 +2566,7 @@ def exportar_comentarios_ia(request):
     usuario_id = request.GET.get('usuario', '')  # Filtrar por usuario específico
     
     # Obtener comentarios con etiqueta IA
-    comentarios = ComentarioUsuario.objects.filter(
-        etiqueta_ia=True
-    ).select_related('usuario').prefetch_related('obras_seleccionadas__autor').order_by('-fecha_creacion')
+    comentarios = ComentarioUsuario.objects.filter(etiqueta_ia=True)
     
     # Filtros opcionales
     if catalogo:
@@ -2757,30 +2575,23 @@ def exportar_comentarios_ia(request):
     if usuario_id:
         comentarios = comentarios.filter(usuario_id=usuario_id)
     
-    # Generar contenido del archivo TXT
-    contenido = f"EXPORTACIÓN DE COMENTARIOS PARA IA\n"
-    contenido += f"Fecha de exportación: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-    contenido += f"Total de comentarios: {comentarios.count()}\n"
-    contenido += "="*70 + "\n\n"
-    
-    for comentario in comentarios:
-        contenido += comentario.exportar_para_ia()
-    
-    # Crear respuesta HTTP con el archivo
-    response = HttpResponse(contenido, content_type='text/plain; charset=utf-8')
-    
-    # Nombre del archivo con timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"comentarios_ia_{catalogo if catalogo else 'todos'}_{timestamp}.txt"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    # El archivo se genera por trozos mientras se envía (exportar_comentarios.py)
+    cabecera = [
+        "EXPORTACIÓN DE COMENTARIOS PARA IA",
+        f"Fecha de exportación: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Total de comentarios: {comentarios.count()}",
+    ]
+    return respuesta_exportacion(
+        comentarios_para_exportar(comentarios),
+        cabecera,
+        f"comentarios_ia_{catalogo if catalogo else 'todos'}",
+        request.GET.get('formato', 'txt'),
+    )
 
 
 @require_http_methods(["GET"])
 def exportar_todos_comentarios(request):
-    """📥 Exporta TODOS los comentarios públicos como archivo TXT"""
-    from django.http import HttpResponse
+    """📥 Exporta TODOS los comentarios públicos como archivo TXT (o JSONL con ?formato=jsonl)"""
     from datetime import datetime
     
     # Obtener parámetros opcionales
@@ -2795,8 +2606,6 @@ def exportar_todos_comentarios(request):
         # Usuarios normales solo ven comentarios públicos
         comentarios = ComentarioUsuario.objects.filter(es_publico=True)
     
-    comentarios = comentarios.select_related('usuario').prefetch_related('obras_seleccionadas__autor').order_by('-fecha_creacion')
-    
     # Filtros opcionales
     if catalogo:
         comentarios = comentarios.filter(catalogo=catalogo)
@@ -2804,27 +2613,20 @@ def exportar_todos_comentarios(request):
     if usuario_id:
         comentarios = comentarios.filter(usuario_id=usuario_id)
     
-    # Generar contenido del archivo TXT
-    contenido = f"EXPORTACIÓN DE COMENTARIOS PÚBLICOS\n"
-    contenido += f"Fecha de exportación: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-    contenido += f"Total de comentarios: {comentarios.count()}\n"
+    # El archivo se genera por trozos mientras se envía (exportar_comentarios.py)
+    cabecera = [
+        "EXPORTACIÓN DE COMENTARIOS PÚBLICOS",
+        f"Fecha de exportación: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"Total de comentarios: {comentarios.count()}",
+    ]
     if catalogo:
-        contenido += f"Catálogo filtrado: {catalogo.upper()}\n"
-    contenido += "="*70 + "\n\n"
-    
-    for comentario in comentarios:
-        contenido += comentario.exportar_para_ia()
-    
-    # Crear respuesta HTTP con el archivo
-    response = HttpResponse(contenido, content_type='text/plain; charset=utf-8')
-    
-    # Nombre del archivo con timestamp
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    tipo = 'todos' if not catalogo else catalogo
-    filename = f"comentarios_{tipo}_{timestamp}.txt"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+        cabecera.append(f"Catálogo filtrado: {catalogo.upper()}")
+    return respuesta_exportacion(
+        comentarios_para_exportar(comentarios),
+        cabecera,
+        f"comentarios_{catalogo if catalogo else 'todos'}",
+        request.GET.get('formato', 'txt'),
+    )
 
 
 # ===========================================================================
@@ -2833,8 +2635,9 @@ def exportar_todos_comentarios(request):
 
 @require_http_methods(["POST"])
 def publicar_github_view(request):
-    """Ejecuta publicar_github y devuelve el resultado como JSON.
+    """Encola la publicación en GitHub y devuelve el id de la tarea (202).
 
+    El progreso se consulta en /obras/tareas/<id>/.
     Solo accesible para usuarios staff o superuser.
     """
     if not request.user.is_authenticated:
@@ -2842,20 +2645,18 @@ def publicar_github_view(request):
     if not (request.user.is_staff or request.user.is_superuser):
         return JsonResponse({"success": False, "error": "Solo para administradores"}, status=403)
 
-    import io
-    from django.core.management import call_command
+    import json
+    from .tareas import encolar
+    from .views_tareas import respuesta_tarea_encolada
 
-    out = io.StringIO()
-    err = io.StringIO()
-    try:
-        call_command("publicar_github", stdout=out, stderr=err)
-        return JsonResponse({
-            "success": True,
-            "message": out.getvalue().strip(),
-        })
-    except Exception as e:
-        return JsonResponse({
-            "success": False,
-            "error": str(e),
-            "details": err.getvalue().strip(),
-        }, status=500)
\ No newline at end of file
+    data = {}
+    if request.content_type == "application/json" and request.body:
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"success": False, "error": "JSON inválido"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"success": False, "error": "Se esperaba un objeto JSON"}, status=400)
+
+    tarea = encolar("publicar", {"mensaje": data.get("mensaje", "")}, usuario=request.user)
+    return respuesta_tarea_encolada(tarea, message="Publicación en cola")
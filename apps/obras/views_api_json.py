@@ -1,13 +1,17 @@
 """
 Vista API que genera el JSON completo de obras en el formato que index.html espera.
 
-Endpoint: /api/datos-obras/
-Devuelve: { metadata: {...}, obras: [...] }
+Endpoints:
+    /api/datos-obras/          -> { metadata: {...}, obras: [...] }
+    /api/datos-obras/delta/    -> solo lo cambiado desde un cursor (ver delta.py)
 """
 
 import json
 
-from django.http import JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_GET
 
 from apps.autores.models import Autor
@@ -15,6 +19,9 @@ from apps.lugares.models import Lugar
 from apps.obras.models import Obra
 from apps.representaciones.models import Representacion
 
+from apps.obras.cache import obtener_o_calcular
+from apps.obras.delta import cambios_desde, cursor_actual
+
 
 def _serializar_autor(autor):
     if not autor:
@@ -95,79 +102,146 @@ def _normalizar_fuente_display(fuente):
 
 @require_GET
 def datos_obras_api(request):
-    """Devuelve todas las obras con representaciones en formato JSON para index.html."""
-    obras = (
+    """Devuelve todas las obras con representaciones en formato JSON para index.html.
+
+    El JSON ya serializado se cachea por generación del dataset: solo se
+    reconstruye tras una edición.
+    """
+    contenido = obtener_o_calcular("datos_obras", "completo", _construir_datos_obras_json)
+    return HttpResponse(contenido, content_type="application/json")
+
+
+def obras_para_serializar():
+    """Queryset con las relaciones que necesita _serializar_obra."""
+    return (
         Obra.objects
         .select_related("autor")
         .prefetch_related("representaciones__lugar")
         .order_by("id")
     )
 
-    resultado = []
-    for obra in obras:
-        reps = obra.representaciones.all()
-
-        lugar_principal = ""
-        region_principal = ""
-        tipo_lugar_principal = ""
-        compania_principal = ""
-        if reps:
-            primera = reps[0]
-            if primera.lugar:
-                lugar_principal = primera.lugar.nombre or ""
-                region_principal = primera.lugar.region or ""
-            tipo_lugar_principal = primera.tipo_lugar or ""
-            compania_principal = primera.compañia or ""
-
-        obra_dict = {
-            "id": obra.id,
-            "titulo": obra.titulo_limpio or obra.titulo,
-            "titulo_original": obra.titulo,
-            "titulo_alternativo": obra.titulo_alternativo or "",
-            "autor": _serializar_autor(obra.autor),
-            "tipo_obra": obra.tipo_obra or "",
-            "genero": obra.genero or "",
-            "subgenero": obra.subgenero or "",
-            "fuente": _normalizar_fuente_display(obra.fuente_principal),
-            "origen_datos": obra.origen_datos or "",
-            "pagina_pdf": obra.pagina_pdf,
-            "texto_original_pdf": obra.texto_original_pdf or "",
-            "tema": obra.tema or "",
-            "musica_conservada": "Sí" if obra.musica_conservada else "No",
-            "compositor": obra.compositor or "",
-            "bibliotecas_musica": obra.bibliotecas_musica or "",
-            "bibliografia_musica": obra.bibliografia_musica or "",
-            "mecenas": obra.mecenas or "",
-            "fecha_creacion": obra.fecha_creacion_estimada or "",
-            "idioma": obra.idioma or "",
-            "versos": obra.versos,
-            "actos": obra.actos,
-            "notas": obra.notas or "",
-            "notas_bibliograficas": obra.notas_bibliograficas or "",
-            "edicion_principe": obra.edicion_principe or "",
-            "manuscritos_conocidos": obra.manuscritos_conocidos or "",
-            "ediciones_conocidas": obra.ediciones_conocidas or "",
-            "observaciones": obra.observaciones or "",
-            "lugar": lugar_principal,
-            "region": region_principal,
-            "tipo_lugar": tipo_lugar_principal,
-            "compania": compania_principal,
-            "total_representaciones": reps.count(),
-            "representaciones": [_serializar_representacion(r) for r in reps],
-        }
-        resultado.append(obra_dict)
-
-    metadata = {
+
+def _serializar_obra(obra):
+    """Obra en el formato de datos_obras.json (API completa, delta y exportar_json)."""
+    reps = obra.representaciones.all()
+
+    lugar_principal = ""
+    region_principal = ""
+    tipo_lugar_principal = ""
+    compania_principal = ""
+    if reps:
+        primera = reps[0]
+        if primera.lugar:
+            lugar_principal = primera.lugar.nombre or ""
+            region_principal = primera.lugar.region or ""
+        tipo_lugar_principal = primera.tipo_lugar or ""
+        compania_principal = primera.compañia or ""
+
+    return {
+        "id": obra.id,
+        "titulo": obra.titulo_limpio or obra.titulo,
+        "titulo_original": obra.titulo,
+        "titulo_alternativo": obra.titulo_alternativo or "",
+        "autor": _serializar_autor(obra.autor),
+        "tipo_obra": obra.tipo_obra or "",
+        "genero": obra.genero or "",
+        "subgenero": obra.subgenero or "",
+        "fuente": _normalizar_fuente_display(obra.fuente_principal),
+        "origen_datos": obra.origen_datos or "",
+        "pagina_pdf": obra.pagina_pdf,
+        "texto_original_pdf": obra.texto_original_pdf or "",
+        "tema": obra.tema or "",
+        "musica_conservada": "Sí" if obra.musica_conservada else "No",
+        "compositor": obra.compositor or "",
+        "bibliotecas_musica": obra.bibliotecas_musica or "",
+        "bibliografia_musica": obra.bibliografia_musica or "",
+        "mecenas": obra.mecenas or "",
+        "fecha_creacion": obra.fecha_creacion_estimada or "",
+        "idioma": obra.idioma or "",
+        "versos": obra.versos,
+        "actos": obra.actos,
+        "notas": obra.notas or "",
+        "notas_bibliograficas": obra.notas_bibliograficas or "",
+        "edicion_principe": obra.edicion_principe or "",
+        "manuscritos_conocidos": obra.manuscritos_conocidos or "",
+        "ediciones_conocidas": obra.ediciones_conocidas or "",
+        "observaciones": obra.observaciones or "",
+        "lugar": lugar_principal,
+        "region": region_principal,
+        "tipo_lugar": tipo_lugar_principal,
+        "compania": compania_principal,
+        "total_representaciones": reps.count(),
+        "representaciones": [_serializar_representacion(r) for r in reps],
+    }
+
+
+def _metadata_datos_obras(total_obras, cambio):
+    return {
         "version": "2.0",
-        "total_obras": len(resultado),
+        "total_obras": total_obras,
         "total_autores": Autor.objects.count(),
         "total_lugares": Lugar.objects.count(),
         "total_representaciones": Representacion.objects.count(),
         "fuente": "Django DB",
         "fuentes": ["FUENTES IX", "CATCOM", "AMBAS"],
+        # Cursor para pedir después /api/datos-obras/delta/?desde=<cambio>
+        "cambio": cambio,
     }
 
-    return JsonResponse(
-        {"metadata": metadata, "obras": resultado},
-        json_dumps_params={"ensure_ascii": False},
-    )
+
+def _construir_datos_obras_json():
+    # El cursor se lee antes que las obras: un cambio concurrente, como mucho,
+    # se vuelve a enviar en el siguiente delta.
+    cambio = cursor_actual()
+    resultado = [_serializar_obra(obra) for obra in obras_para_serializar()]
+    return json.dumps(
+        {"metadata": _metadata_datos_obras(len(resultado), cambio), "obras": resultado},
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+@require_GET
+def datos_obras_delta_api(request):
+    """Obras cambiadas y borradas desde un cursor (?desde=) o una fecha (?desde_fecha=).
+
+    Respuesta:
+        {"desde": 120, "hasta": 134, "reiniciar": false, "metadata": {...},
+         "obras": [...], "eliminadas": [17, 42]}
+
+    Con "reiniciar": true el cursor es anterior al registro conservado y el
+    cliente debe volver a descargar /api/datos-obras/.
+    """
+    desde = request.GET.get("desde")
+    desde_fecha = request.GET.get("desde_fecha")
+    if desde is not None:
+        try:
+            desde = int(desde)
+        except ValueError:
+            return JsonResponse({"error": "desde debe ser un entero"}, status=400)
+        if desde < 0:
+            return JsonResponse({"error": "desde debe ser un entero"}, status=400)
+    elif desde_fecha:
+        desde_fecha = parse_datetime(desde_fecha)
+        if desde_fecha is None:
+            return JsonResponse({"error": "desde_fecha debe ser una fecha ISO 8601"}, status=400)
+        if timezone.is_naive(desde_fecha):
+            desde_fecha = timezone.make_aware(desde_fecha)
+    else:
+        return JsonResponse({"error": "Falta desde o desde_fecha"}, status=400)
+
+    delta = cambios_desde(desde=desde, desde_fecha=desde_fecha)
+    if delta.reiniciar:
+        return JsonResponse({"desde": desde, "hasta": delta.hasta, "reiniciar": True})
+
+    # El tipo registrado es orientativo: manda si la obra existe ahora
+    obras = [_serializar_obra(obra) for obra in obras_para_serializar().filter(id__in=delta.obra_ids)]
+    eliminadas = sorted(delta.obra_ids - {obra["id"] for obra in obras})
+    return JsonResponse({
+        "desde": desde,
+        "hasta": delta.hasta,
+        "reiniciar": False,
+        "metadata": _metadata_datos_obras(Obra.objects.count(), delta.hasta),
+        "obras": obras,
+        "eliminadas": eliminadas,
+    }, encoder=DjangoJSONEncoder, json_dumps_params={"ensure_ascii": False})
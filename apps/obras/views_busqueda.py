@@ -0,0 +1,149 @@
+"""
+Búsqueda de obras en el servidor, filtrada y paginada.
+
+Endpoint: /api/obras/search/
+
+    GET /api/obras/search/?tipo=comedia&q=amor&campos=id,titulo,autor&limite=50
+    GET /api/obras/search/?...&cursor=<siguiente de la página anterior>
+
+Parámetros:
+    filtros      los de filtros.py (q, fuente, tipo, genero, autor, lugar, ...)
+    orden        "titulo" (defecto), "-titulo", "id" o "-id"
+    limite       filas por página (1-200, defecto 50)
+    cursor       valor opaco de "siguiente" para pedir la página siguiente
+    campos       subconjunto de CAMPOS separado por comas
+    facetas      subconjunto de FACETAS separado por comas ("" = ninguna)
+
+Respuesta:
+    {"resultados": [...], "siguiente": "<cursor>" | null, "total": 123,
+     "facetas": {"tipo_obra": {"comedia": 80, ...}, ...}}
+
+La paginación es por clave (keyset, ver paginacion.py): cada página filtra por
+(orden, id) mayor que la última fila vista, así que cuesta lo mismo la primera
+que la milésima.
+El total y las facetas dependen solo de los filtros; se calculan una vez por
+búsqueda y generación del dataset (caché "obras") y se reutilizan al paginar.
+"""
+
+import hashlib
+import json
+
+from django.db.models import CharField, Count, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .cache import obtener_o_calcular
+from .filtros import filtrar_obras, parametros_de_filtro
+from .models import Obra
+from .paginacion import cortar_pagina, limite_de, ordenar_desde
+from .views_api_json import _normalizar_fuente_display
+
+# Nombre en la respuesta -> expresión para .values()
+CAMPOS = {
+    "id": "id",
+    "titulo": Coalesce(NullIf("titulo_limpio", Value("")), "titulo", output_field=CharField()),
+    "titulo_original": "titulo",
+    "titulo_alternativo": "titulo_alternativo",
+    "autor": "autor__nombre",
+    "autor_id": "autor_id",
+    "tipo_obra": "tipo_obra",
+    "genero": "genero",
+    "subgenero": "subgenero",
+    "fuente": "fuente_principal",
+    "compositor": "compositor",
+    "mecenas": "mecenas",
+    "musica_conservada": "musica_conservada",
+    "fecha_creacion": "fecha_creacion_estimada",
+    "idioma": "idioma",
+    "total_representaciones": "representaciones_total",
+}
+CAMPOS_POR_DEFECTO = ("id", "titulo", "autor", "tipo_obra", "fuente", "fecha_creacion")
+
+# Faceta -> campo del modelo
+FACETAS = {
+    "tipo_obra": "tipo_obra",
+    "fuente": "fuente_principal",
+    "genero": "genero",
+    "subgenero": "subgenero",
+    "musica_conservada": "musica_conservada",
+}
+FACETAS_POR_DEFECTO = ("tipo_obra", "fuente")
+
+# Orden -> campo del modelo (el desempate siempre es id)
+ORDENES = {"titulo": "titulo_limpio", "id": "id"}
+
+
+def _lista(valor, permitidos, por_defecto, nombre):
+    if valor is None:
+        return list(por_defecto)
+    elegidos = [v.strip() for v in valor.split(",") if v.strip()]
+    desconocidos = [v for v in elegidos if v not in permitidos]
+    if desconocidos:
+        raise ValueError(f"{nombre} desconocidos: {', '.join(desconocidos)}")
+    return elegidos
+
+
+def _resumen(filtros, facetas):
+    """Total y conteos por faceta de una búsqueda (sin paginar)."""
+    obras = filtrar_obras(Obra.objects.all(), filtros)
+    resumen = {"total": obras.count(), "facetas": {}}
+    for faceta in facetas:
+        campo = FACETAS[faceta]
+        conteos = obras.order_by().values(campo).annotate(n=Count("id"))
+        valores = {}
+        for fila in conteos:
+            valor = fila[campo]
+            if faceta == "fuente":
+                valor = _normalizar_fuente_display(valor)
+            if valor in ("", None):
+                continue
+            clave = str(valor).lower() if isinstance(valor, bool) else valor
+            valores[clave] = valores.get(clave, 0) + fila["n"]
+        resumen["facetas"][faceta] = dict(sorted(valores.items(), key=lambda kv: (-kv[1], kv[0])))
+    return resumen
+
+
+@require_GET
+def busqueda_obras_api(request):
+    filtros = parametros_de_filtro(request.GET)
+    orden = request.GET.get("orden", "titulo")
+    try:
+        if orden.lstrip("-") not in ORDENES:
+            raise ValueError(f"orden desconocido: {orden}")
+        campos = _lista(request.GET.get("campos"), CAMPOS, CAMPOS_POR_DEFECTO, "campos")
+        facetas = _lista(request.GET.get("facetas"), FACETAS, FACETAS_POR_DEFECTO, "facetas")
+        limite = limite_de(request.GET.get("limite"))
+        campo_orden = ORDENES[orden.lstrip("-")]
+        obras = filtrar_obras(Obra.objects.all(), filtros)
+        obras = ordenar_desde(obras, orden, campo_orden, request.GET.get("cursor"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    expresiones = {nombre: CAMPOS[nombre] for nombre in campos}
+    simples = [e for e in expresiones.values() if isinstance(e, str)]
+    anotadas = {f"_{n}": e for n, e in expresiones.items() if not isinstance(e, str)}
+    # Se pide siempre el campo de orden e id para construir el cursor
+    filas = list(obras.values(*{*simples, campo_orden, "id"}, **anotadas)[: limite + 1])
+    filas, siguiente = cortar_pagina(filas, limite, orden, campo_orden)
+
+    resultados = []
+    for fila in filas:
+        resultado = {}
+        for nombre, expresion in expresiones.items():
+            valor = fila[expresion] if isinstance(expresion, str) else fila[f"_{nombre}"]
+            if nombre == "fuente":
+                valor = _normalizar_fuente_display(valor)
+            resultado[nombre] = valor
+        resultados.append(resultado)
+
+    clave = hashlib.sha1(
+        json.dumps([filtros, sorted(facetas)], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    resumen = obtener_o_calcular("busqueda_obras", clave, lambda: _resumen(filtros, facetas))
+    return JsonResponse({
+        "resultados": resultados,
+        "siguiente": siguiente,
+        "total": resumen["total"],
+        "facetas": resumen["facetas"],
+    }, json_dumps_params={"ensure_ascii": False})
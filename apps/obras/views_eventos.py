@@ -0,0 +1,76 @@
+"""
+Endpoint SSE de notificaciones (ver eventos.py).
+
+    GET /obras/eventos/   -> text/event-stream (usuarios autenticados)
+
+Es una vista asíncrona: cada conexión abierta es una corrutina que espera en
+su cola, no un hilo. Por eso solo se sirve bajo ASGI
+(``uvicorn teatro_espanol.asgi:application``, enrutando /obras/eventos/ a
+ese proceso); bajo WSGI responde 503 y el index sigue consultando
+/obras/comentarios-index/count-unseen/ periódicamente.
+
+Cada conexión dura como mucho DURACION_MAXIMA segundos; el navegador
+(EventSource) reconecta solo. Así una conexión cuyo cliente desapareció sin
+avisar no queda abierta indefinidamente.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .eventos import formatear, hub, iniciar_escucha, no_vistos
+
+# Segundos sin eventos tras los que se envía un comentario para mantener viva la conexión
+LATIDO = 20
+DURACION_MAXIMA = 300
+# Milisegundos que espera el navegador antes de reconectar
+REINTENTO_MS = 5000
+
+
+def _usuario(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None, False
+    return user, user.is_staff or user.is_superuser
+
+
+async def _flujo(cola, es_staff, inicial):
+    try:
+        yield f"retry: {REINTENTO_MS}\n\n"
+        if inicial is not None:
+            yield formatear({"tipo": "no_vistos", "datos": {"no_vistos": inicial}}, es_staff)
+        loop = asyncio.get_running_loop()
+        fin = loop.time() + DURACION_MAXIMA
+        while loop.time() < fin:
+            try:
+                evento = await asyncio.wait_for(cola.get(), timeout=min(LATIDO, fin - loop.time()))
+            except asyncio.TimeoutError:
+                yield ": latido\n\n"
+                continue
+            yield formatear(evento, es_staff)
+    finally:
+        hub.cancelar(cola)
+
+
+async def eventos_stream(request):
+    if request.method != "GET":
+        return JsonResponse({"success": False, "error": "Método no permitido"}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"success": False, "error": "Eventos no disponibles (servidor WSGI)"}, status=503)
+
+    user, es_staff = await sync_to_async(_usuario)(request)
+    if user is None:
+        return JsonResponse({"success": False, "error": "No autenticado"}, status=401)
+
+    iniciar_escucha()
+    # Suscribir antes de leer el contador: un evento intermedio llega igualmente
+    cola = hub.suscribir(es_staff)
+    inicial = await sync_to_async(no_vistos)() if es_staff else None
+
+    response = StreamingHttpResponse(_flujo(cola, es_staff, inicial), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # nginx / proxies de Azure: no acumular el flujo
+    response["X-Accel-Buffering"] = "no"
+    return response
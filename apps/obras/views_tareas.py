@@ -0,0 +1,74 @@
+"""
+Vistas JSON para las tareas en segundo plano (ver tareas.py).
+
+    GET  /obras/tareas/            -> últimas tareas (staff)
+    POST /obras/tareas/            -> encola {"tipo": ..., "parametros": {...}} (staff)
+    GET  /obras/tareas/<id>/       -> estado y progreso (staff o quien la creó)
+"""
+
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from .models import TareaFondo
+from .tareas import encolar, estado_tarea
+
+
+def _es_admin(user):
+    return user.is_authenticated and (user.is_staff or user.is_superuser)
+
+
+def respuesta_tarea_encolada(tarea, **extra):
+    """Respuesta 202 estándar para vistas que encolan una tarea."""
+    datos = {
+        "success": True,
+        "tarea_id": tarea.pk,
+        "estado_url": f"/obras/tareas/{tarea.pk}/",
+        "tarea": estado_tarea(tarea),
+    }
+    datos.update(extra)
+    return JsonResponse(datos, status=202)
+
+
+@require_http_methods(["GET", "POST"])
+def tareas_view(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({"success": False, "error": "No autenticado"}, status=401)
+    if not _es_admin(request.user):
+        return JsonResponse({"success": False, "error": "Solo para administradores"}, status=403)
+
+    if request.method == "GET":
+        tareas = TareaFondo.objects.all()
+        tipo = request.GET.get("tipo")
+        if tipo:
+            tareas = tareas.filter(tipo=tipo)
+        return JsonResponse({
+            "success": True,
+            "tareas": [estado_tarea(t) for t in tareas[:20]],
+        })
+
+    try:
+        data = json.loads(request.body or b"{}")
+    except json.JSONDecodeError:
+        return JsonResponse({"success": False, "error": "JSON inválido"}, status=400)
+
+    try:
+        tarea = encolar(data.get("tipo", ""), data.get("parametros") or {}, usuario=request.user)
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+    return respuesta_tarea_encolada(tarea)
+
+
+@require_http_methods(["GET"])
+def tarea_estado_view(request, tarea_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({"success": False, "error": "No autenticado"}, status=401)
+
+    tarea = TareaFondo.objects.filter(pk=tarea_id).first()
+    if tarea is None:
+        return JsonResponse({"success": False, "error": "Tarea no encontrada"}, status=404)
+    if not _es_admin(request.user) and tarea.creada_por_id != request.user.pk:
+        return JsonResponse({"success": False, "error": "Sin permiso"}, status=403)
+
+    return JsonResponse({"success": True, "tarea": estado_tarea(tarea)})
@@ -3,19 +3,30 @@ Vistas para validación de análisis de IA por investigadores
 """
 
 import json
-import os
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods
-from django.conf import settings
 from django.db import transaction
 from django.utils.dateparse import parse_datetime
 
-from .models import Obra
-from apps.representaciones.models import Representacion
-from apps.lugares.models import Lugar
+from .integracion import integrar_items
+from .models import DecisionValidacion
+from .validacion import (
+    LISTAS,
+    catalogo_sintesis,
+    decisiones_pendientes,
+    ficha_sintesis,
+    indice_items,
+    leer_items,
+    nueva_decision,
+    ruta_sintesis,
+    superponer_decisiones,
+)
+
+# Items de cada tipo por página en la vista de detalle
+ITEMS_POR_PAGINA = 50
 
 
 @login_required
@@ -24,15 +35,19 @@ def archivos_sintesis_api(request):
     """
     API JSON para listar archivos *_sintesis_validacion.json disponibles.
     Usado por el modal de Validación IA del frontend estilo index.html.
-    """
-    sintesis_dir = os.path.join(settings.BASE_DIR, 'data', 'fuentesix')
-    archivos = []
 
-    if os.path.exists(sintesis_dir):
-        for archivo in os.listdir(sintesis_dir):
-            if not archivo.endswith('_sintesis_validacion.json'):
-                continue
-            archivos.append({"name": archivo})
+    Los totales salen de los índices de cada archivo (validacion.py), sin
+    abrir los archivos.
+    """
+    archivos = [
+        {
+            "name": ficha["archivo"],
+            "totales": ficha["totales"],
+            "confianza": ficha["confianza"],
+            "fecha_generacion": ficha["fecha_generacion"],
+        }
+        for ficha in catalogo_sintesis()
+    ]
 
     # Ordenar por nombre (si quieres, luego lo ajustamos por fecha de metadata)
     archivos.sort(key=lambda x: x["name"], reverse=True)
@@ -44,31 +59,18 @@ def validacion_analisis_list(request):
     """
     Lista todos los archivos de síntesis disponibles para validación
     """
-    # Buscar archivos de síntesis en data/fuentesix
-    sintesis_dir = os.path.join(settings.BASE_DIR, 'data', 'fuentesix')
     archivos_sintesis = []
-    
-    if os.path.exists(sintesis_dir):
-        for archivo in os.listdir(sintesis_dir):
-            if archivo.endswith('_sintesis_validacion.json'):
-                ruta_completa = os.path.join(sintesis_dir, archivo)
-                try:
-                    with open(ruta_completa, 'r', encoding='utf-8') as f:
-                        datos = json.load(f)
-                    
-                    metadata = datos.get('metadata_archivo', {})
-                    archivos_sintesis.append({
-                        'archivo': archivo,
-                        'ruta': ruta_completa,
-                        'fecha_extraccion': metadata.get('fecha_extraccion', 'Desconocida'),
-                        'archivo_fuente': metadata.get('archivo_fuente', 'Desconocido'),
-                        'total_representaciones': len(datos.get('representaciones', [])),
-                        'total_obras': len(datos.get('obras', [])),
-                        'total_lugares': len(datos.get('lugares', [])),
-                        'fecha_generacion': datos.get('fecha_generacion', 'Desconocida')
-                    })
-                except Exception as e:
-                    continue
+    for ficha in catalogo_sintesis():
+        metadata = ficha['metadata_archivo']
+        archivos_sintesis.append({
+            'archivo': ficha['archivo'],
+            'fecha_extraccion': metadata.get('fecha_extraccion', 'Desconocida'),
+            'archivo_fuente': metadata.get('archivo_fuente', 'Desconocido'),
+            'total_representaciones': ficha['totales']['representaciones'],
+            'total_obras': ficha['totales']['obras'],
+            'total_lugares': ficha['totales']['lugares'],
+            'fecha_generacion': ficha['fecha_generacion'] or 'Desconocida'
+        })
     
     archivos_sintesis.sort(key=lambda x: x['fecha_generacion'], reverse=True)
     
@@ -81,37 +83,44 @@ def validacion_analisis_list(request):
 def validacion_analisis_detail(request, nombre_archivo):
     """
     Muestra síntesis detalladas de un archivo para validación
+
+    Pagina los items (?pagina=N, ITEMS_POR_PAGINA de cada tipo): solo se leen
+    del archivo los de la página, con las posiciones de su índice.
     """
-    sintesis_dir = os.path.join(settings.BASE_DIR, 'data', 'fuentesix')
-    ruta_archivo = os.path.join(sintesis_dir, nombre_archivo)
-    
-    if not os.path.exists(ruta_archivo):
+    try:
+        ficha = ficha_sintesis(nombre_archivo)
+    except (ValueError, FileNotFoundError):
         messages.error(request, f'Archivo {nombre_archivo} no encontrado')
         return redirect('validacion_analisis_list')
     
-    with open(ruta_archivo, 'r', encoding='utf-8') as f:
-        datos = json.load(f)
-    
-    # Organizar por tipo y estado de validación
-    representaciones = datos.get('representaciones', [])
-    obras = datos.get('obras', [])
-    lugares = datos.get('lugares', [])
+    totales = ficha['totales']
+    paginas = max(1, *(-(-total // ITEMS_POR_PAGINA) for total in totales.values()))
+    try:
+        pagina = min(max(int(request.GET.get('pagina', 1)), 1), paginas)
+    except ValueError:
+        pagina = 1
+    inicio = (pagina - 1) * ITEMS_POR_PAGINA
     
-    # Contar por nivel de confianza
-    confianza_stats = {
-        'alto': sum(1 for r in representaciones if r.get('confianza') == 'alto'),
-        'medio': sum(1 for r in representaciones if r.get('confianza') == 'medio'),
-        'bajo': sum(1 for r in representaciones if r.get('confianza') == 'bajo')
-    }
+    datos = {'metadata_archivo': ficha['metadata_archivo']}
+    for lista in LISTAS.values():
+        datos[lista] = leer_items(nombre_archivo, lista, inicio, ITEMS_POR_PAGINA)
+    # Decisiones registradas después de la última compactación
+    superponer_decisiones(nombre_archivo, datos)
     
     return render(request, 'obras/validacion_analisis_detail.html', {
         'archivo': nombre_archivo,
-        'metadata_archivo': datos.get('metadata_archivo', {}),
-        'representaciones': representaciones,
-        'obras': obras,
-        'lugares': lugares,
-        'confianza_stats': confianza_stats,
-        'total_items': len(representaciones) + len(obras) + len(lugares)
+        'metadata_archivo': ficha['metadata_archivo'],
+        'representaciones': datos['representaciones'],
+        'obras': datos['obras'],
+        'lugares': datos['lugares'],
+        'totales': totales,
+        'confianza_stats': ficha['confianza'],
+        'total_items': sum(totales.values()),
+        'pagina': pagina,
+        'paginas': paginas,
+        'inicio': inicio,
+        'pagina_anterior': pagina - 1 if pagina > 1 else None,
+        'pagina_siguiente': pagina + 1 if pagina < paginas else None,
     })
 
 
@@ -120,6 +129,9 @@ def validacion_analisis_detail(request, nombre_archivo):
 def validar_item(request):
     """
     Valida un item individual (representación, obra, lugar)
+
+    La decisión se añade al diario (DecisionValidacion); el archivo de
+    síntesis no se reescribe (ver validacion.py).
     """
     data = json.loads(request.body)
     
@@ -133,43 +145,13 @@ def validar_item(request):
         return JsonResponse({'success': False, 'error': 'Acción no válida'})
     
     try:
-        # Cargar archivo de síntesis
-        sintesis_dir = os.path.join(settings.BASE_DIR, 'data', 'fuentesix')
-        ruta_archivo = os.path.join(sintesis_dir, archivo_sintesis)
-        
-        with open(ruta_archivo, 'r', encoding='utf-8') as f:
-            datos_sintesis = json.load(f)
-        
-        # Encontrar el item
-        items = []
-        if tipo == 'representacion':
-            items = datos_sintesis.get('representaciones', [])
-        elif tipo == 'obra':
-            items = datos_sintesis.get('obras', [])
-        elif tipo == 'lugar':
-            items = datos_sintesis.get('lugares', [])
-        
-        item = next((i for i in items if i.get('id_temporal') == id_temporal), None)
+        item = indice_items(ruta_sintesis(archivo_sintesis)).get((tipo, id_temporal))
         
         if not item:
             return JsonResponse({'success': False, 'error': 'Item no encontrado'})
         
-        # Actualizar estado de validación
-        if 'validacion' not in item:
-            item['validacion'] = {}
-        
-            from datetime import datetime
-            item['validacion'] = {
-                'estado': 'validado' if accion == 'validar' else 'rechazado',
-                'fecha': datetime.now().isoformat(),
-                'usuario': request.user.username if hasattr(request.user, 'username') else 'usuario',
-                'usuario_id': str(request.user.id) if hasattr(request.user, 'id') else None,
-                'comentario': comentario
-            }
-        
-        # Guardar archivo actualizado
-        with open(ruta_archivo, 'w', encoding='utf-8') as f:
-            json.dump(datos_sintesis, f, indent=2, ensure_ascii=False)
+        decision = nueva_decision(archivo_sintesis, tipo, id_temporal, accion, request.user, comentario)
+        decision.save()
         
         # Si se valida, integrar a la DB
         if accion == 'validar':
@@ -177,12 +159,14 @@ def validar_item(request):
             return JsonResponse({
                 'success': True,
                 'mensaje': f'Item {accion}do correctamente',
+                'validacion': decision.como_validacion(),
                 'integracion': resultado_integracion
             })
         
         return JsonResponse({
             'success': True,
-            'mensaje': f'Item {accion}do correctamente'
+            'mensaje': f'Item {accion}do correctamente',
+            'validacion': decision.como_validacion()
         })
         
     except Exception as e:
@@ -192,115 +176,48 @@ def validar_item(request):
         })
 
 
+@login_required
+@require_http_methods(["GET"])
+def decisiones_api(request):
+    """
+    Decisiones de un archivo aún no volcadas en él (compactar_validaciones).
+
+    GET ?archivo=<nombre>&desde=<metadata_archivo.validacion_compactada_hasta>
+    """
+    archivo = request.GET.get('archivo', '')
+    try:
+        ruta_sintesis(archivo)
+        desde = int(request.GET.get('desde') or 0)
+    except (ValueError, FileNotFoundError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    decisiones = decisiones_pendientes(archivo, desde)
+    return JsonResponse({
+        'success': True,
+        'decisiones': [
+            {'tipo': d.tipo, 'id_temporal': d.id_temporal, **d.como_validacion()}
+            for d in decisiones.values()
+        ],
+        'hasta': max([desde, *(d.id for d in decisiones.values())])
+    })
+
+
 @transaction.atomic
 def integrar_item_a_db(item: dict, tipo: str, usuario):
     """
-    Integra un item validado a la base de datos
+    Integra un item validado a la base de datos (ver integracion.py)
     
     Returns:
         Dict con resultado de la integración
     """
-    datos_json = item.get('datos_json', {})
-    metadata = item.get('metadata', {})
-    
-    resultado = {
-        'exito': False,
-        'tipo': tipo,
-        'id_creado': None,
-        'mensaje': ''
-    }
-    
-    try:
-        if tipo == 'representacion':
-            # Crear o actualizar representación
-            obra_titulo = datos_json.get('obra_titulo', '')
-            
-            # Buscar obra existente o crear nueva
-            obra, creada = Obra.objects.get_or_create(
-                titulo=obra_titulo,
-                defaults={
-                    'titulo_limpio': obra_titulo,
-                    'fuente_principal': 'FUENTESXI',
-                    'origen_datos': 'pdf',
-                    'pagina_pdf': metadata.get('pagina_pdf'),
-                    'texto_original_pdf': metadata.get('texto_original', '')
-                }
-            )
-            
-            # Crear representación
-            fecha_str = datos_json.get('fecha_formateada') or datos_json.get('fecha', '')
-            lugar_nombre = datos_json.get('lugar_nombre', '')
-            
-            # Buscar lugar
-            lugar = None
-            if lugar_nombre:
-                lugar = Lugar.objects.filter(nombre__icontains=lugar_nombre).first()
-                if not lugar:
-                    lugar = Lugar.objects.create(
-                        nombre=lugar_nombre,
-                        tipo_lugar=datos_json.get('lugar_tipo', ''),
-                        region=datos_json.get('lugar_region', ''),
-                        ciudad=datos_json.get('lugar_ciudad', '')
-                    )
-            
-            representacion = Representacion.objects.create(
-                obra=obra,
-                fecha=fecha_str,
-                lugar=lugar,
-                compañia=datos_json.get('compañia', ''),
-                tipo_funcion=datos_json.get('tipo_funcion', ''),
-                publico=datos_json.get('publico', ''),
-                observaciones=datos_json.get('observaciones', ''),
-                pagina_pdf=metadata.get('pagina_pdf'),
-                texto_original_pdf=metadata.get('texto_original', '')
-            )
-            
-            resultado['exito'] = True
-            resultado['id_creado'] = representacion.id
-            resultado['mensaje'] = f'Representación creada (ID: {representacion.id})'
-        
-        elif tipo == 'obra':
-            # Crear obra
-            titulo = datos_json.get('titulo', datos_json.get('obra_titulo', ''))
-            obra = Obra.objects.create(
-                titulo=titulo,
-                titulo_limpio=titulo,
-                fuente_principal='FUENTESXI',
-                origen_datos='pdf',
-                pagina_pdf=metadata.get('pagina_pdf'),
-                texto_original_pdf=metadata.get('texto_original', '')
-            )
-            
-            resultado['exito'] = True
-            resultado['id_creado'] = obra.id
-            resultado['mensaje'] = f'Obra creada (ID: {obra.id})'
-        
-        elif tipo == 'lugar':
-            # Crear lugar
-            nombre = datos_json.get('nombre', '')
-            lugar = Lugar.objects.create(
-                nombre=nombre,
-                tipo_lugar=datos_json.get('tipo_lugar', ''),
-                region=datos_json.get('region', ''),
-                ciudad=datos_json.get('ciudad', ''),
-                pais=datos_json.get('pais', 'España')
-            )
-            
-            resultado['exito'] = True
-            resultado['id_creado'] = lugar.id
-            resultado['mensaje'] = f'Lugar creado (ID: {lugar.id})'
-        
-    except Exception as e:
-        resultado['mensaje'] = f'Error al integrar: {str(e)}'
-    
-    return resultado
+    return integrar_items([(tipo, item)])[0]
 
 
 @login_required
 @require_http_methods(["POST"])
 def validar_lote(request):
     """
-    Valida múltiples items a la vez
+    Valida múltiples items a la vez (una lectura del índice y un bulk_create)
     """
     data = json.loads(request.body)
     
@@ -308,67 +225,49 @@ def validar_lote(request):
     archivo_sintesis = data.get('archivo_sintesis')
     accion = data.get('accion', 'validar')  # 'validar' o 'rechazar'
     
-    resultados = []
+    if accion not in ['validar', 'rechazar']:
+        return JsonResponse({'success': False, 'error': 'Acción no válida'})
+    try:
+        indice = indice_items(ruta_sintesis(archivo_sintesis))
+    except (ValueError, FileNotFoundError) as e:
+        return JsonResponse({'success': False, 'error': str(e)})
     
+    encontrados = []
     for item_data in items_validar:
         tipo = item_data.get('tipo')
         id_temporal = item_data.get('id_temporal')
-        
-        # Cargar archivo de síntesis
-        sintesis_dir = os.path.join(settings.BASE_DIR, 'data', 'fuentesix')
-        ruta_archivo = os.path.join(sintesis_dir, archivo_sintesis)
-        
-        with open(ruta_archivo, 'r', encoding='utf-8') as f:
-            datos_sintesis = json.load(f)
-        
-        # Encontrar y validar item
-        items = []
-        if tipo == 'representacion':
-            items = datos_sintesis.get('representaciones', [])
-        elif tipo == 'obra':
-            items = datos_sintesis.get('obras', [])
-        elif tipo == 'lugar':
-            items = datos_sintesis.get('lugares', [])
-        
-        item = next((i for i in items if i.get('id_temporal') == id_temporal), None)
-        
+        item = indice.get((tipo, id_temporal))
         if item:
-            if 'validacion' not in item:
-                item['validacion'] = {}
-            
-            from datetime import datetime
-            item['validacion'] = {
-                'estado': 'validado' if accion == 'validar' else 'rechazado',
-                'fecha': datetime.now().isoformat(),
-                'usuario': request.user.username if hasattr(request.user, 'username') else 'usuario'
-            }
-            
-            if accion == 'validar':
-                resultado_integracion = integrar_item_a_db(item, tipo, request.user)
-                resultados.append({
-                    'id_temporal': id_temporal,
-                    'exito': resultado_integracion.get('exito', False),
-                    'mensaje': resultado_integracion.get('mensaje', '')
-                })
-            else:
-                resultados.append({
-                    'id_temporal': id_temporal,
-                    'exito': True,
-                    'mensaje': 'Rechazado correctamente'
-                })
-        
-        # Guardar archivo actualizado
-        with open(ruta_archivo, 'w', encoding='utf-8') as f:
-            json.dump(datos_sintesis, f, indent=2, ensure_ascii=False)
+            encontrados.append((tipo, id_temporal, item))
+    
+    DecisionValidacion.objects.bulk_create([
+        nueva_decision(archivo_sintesis, tipo, id_temporal, accion, request.user)
+        for tipo, id_temporal, _ in encontrados
+    ])
+    
+    # Todos los items validados se integran juntos
+    integraciones = iter(integrar_items([(tipo, item) for tipo, _, item in encontrados])
+                         if accion == 'validar' else [])
+    
+    resultados = []
+    for tipo, id_temporal, item in encontrados:
+        if accion == 'validar':
+            resultado_integracion = next(integraciones)
+            resultados.append({
+                'id_temporal': id_temporal,
+                'exito': resultado_integracion['exito'],
+                'id_creado': resultado_integracion['id_creado'],
+                'mensaje': resultado_integracion['mensaje']
+            })
+        else:
+            resultados.append({
+                'id_temporal': id_temporal,
+                'exito': True,
+                'mensaje': 'Rechazado correctamente'
+            })
     
     return JsonResponse({
         'success': True,
         'resultados': resultados,
         'total': len(resultados)
     })
-
-
-
-
-
-
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('representaciones', '0003_representacion_es_anterior_1650_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='representacion',
+            index=models.Index(fields=['obra', 'fecha_formateada'], name='rep_obra_fecha_idx'),
+        ),
+    ]
@@ -135,6 +135,10 @@ class Representacion(models.Model):
         verbose_name = "Representación"
         verbose_name_plural = "Representaciones"
         ordering = ['-fecha_formateada', 'obra__titulo_limpio']
+        indexes = [
+            # Filtro por intervalo de fechas de /api/obras/search/
+            models.Index(fields=['obra', 'fecha_formateada'], name='rep_obra_fecha_idx'),
+        ]
 
     def __str__(self):
         fecha_str = self.fecha_formateada.strftime('%d/%m/%Y') if self.fecha_formateada else self.fecha
@@ -163,6 +167,11 @@ class Representacion(models.Model):
         return None
 
     def save(self, *args, **kwargs):
+        self.completar_fechas()
+        super().save(*args, **kwargs)
+
+    def completar_fechas(self):
+        """Deduce fecha_formateada y los campos de época (bulk_create no llama a save)"""
         # Intentar parsear la fecha si no está formateada
         if not self.fecha_formateada and self.fecha:
             try:
@@ -182,6 +191,4 @@ class Representacion(models.Model):
         if self.fecha_formateada:
             year = self.fecha_formateada.year
             self.es_anterior_1650 = year < 1650
-            self.es_anterior_1665 = year < 1665
-        
-        super().save(*args, **kwargs)
\ No newline at end of file
+            self.es_anterior_1665 = year < 1665
\ No newline at end of file
@@ -11,7 +11,7 @@ class RepresentacionViewSet(viewsets.ModelViewSet):
     Permite listar, crear, actualizar y eliminar representaciones.
     Incluye filtros por obra, lugar, fecha, compañía, etc.
     """
-    queryset = Representacion.objects.all()
+    queryset = Representacion.objects.select_related('obra', 'lugar')
     serializer_class = RepresentacionSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = [
@@ -0,0 +1,7 @@
+try:
+    # Carga la app Celery con Django para que @shared_task la use (ver celery.py).
+    from .celery import app as celery_app
+except ImportError:  # celery no instalado: las tareas usan el pool de hilos
+    celery_app = None
+
+__all__ = ("celery_app",)
@@ -3,6 +3,11 @@ ASGI config for teatro_espanol project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Las notificaciones en vivo (/obras/eventos/, server-sent events) solo funcionan
+bajo ASGI, p. ej. ``uvicorn teatro_espanol.asgi:application`` con el proxy
+enviando /obras/eventos/ a ese proceso. El resto del sitio puede seguir en
+gunicorn/WSGI (Procfile).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -0,0 +1,19 @@
+"""
+Aplicación Celery del proyecto.
+
+Worker:
+    celery -A teatro_espanol worker -l info
+
+Solo se usa si CELERY_BROKER_URL está configurado; sin broker las tareas de
+apps/obras/tareas.py se ejecutan en un pool de hilos del proceso web.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "teatro_espanol.settings")
+
+app = Celery("teatro_espanol")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
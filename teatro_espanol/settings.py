@@ -139,6 +139,65 @@ else:
         }
     }
 
+# Caché del proyecto (payload de datos-obras, facetas, opciones de filtros, estadísticas)
+# OBRAS_CACHE_BACKEND:
+#   "lru"    -> LRU por proceso (desarrollo; cada worker tiene la suya)
+#   "sqlite" -> archivo SQLite compartido por todos los workers de una misma máquina (Azure)
+#   "redis"  -> Redis compartido (producción con varias instancias)
+#   "dummy"  -> sin caché (depurar; los tests la desactivan con override_settings)
+_en_azure = bool(_os_hosts.environ.get("WEBSITE_SITE_NAME"))
+REDIS_URL = config("REDIS_URL", default="redis://localhost:6379/0")
+OBRAS_CACHE_BACKEND = config("OBRAS_CACHE_BACKEND", default="sqlite" if _en_azure else "lru")
+OBRAS_CACHE_BACKENDS = {
+    "lru": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "obras-lru",
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+    "sqlite": {
+        "BACKEND": "apps.obras.cache_backends.SQLiteCache",
+        "LOCATION": config(
+            "OBRAS_CACHE_SQLITE",
+            default="/home/cache_obras.sqlite3" if _en_azure else str(BASE_DIR / "cache_obras.sqlite3"),
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "TIMEOUT": None,
+    },
+    "dummy": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    },
+}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "obras": OBRAS_CACHE_BACKENDS[OBRAS_CACHE_BACKEND],
+}
+
+# Tareas en segundo plano (exportar, publicar, importar, reindexar)
+# Con CELERY_BROKER_URL se encolan en Celery (worker: celery -A teatro_espanol worker);
+# sin broker se ejecutan en un pool de hilos dentro del propio proceso web.
+CELERY_BROKER_URL = config("CELERY_BROKER_URL", default="")
+CELERY_RESULT_BACKEND = None
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+OBRAS_TAREAS_HILOS = config("OBRAS_TAREAS_HILOS", default=2, cast=int)
+# Ejecuta las tareas en línea, sin cola (los tests lo activan para ser deterministas)
+OBRAS_TAREAS_SINCRONAS = config("OBRAS_TAREAS_SINCRONAS", default=False, cast=bool)
+
+# Notificaciones SSE (/obras/eventos/, ver apps/obras/eventos.py)
+# Con varios workers ASGI, Redis reparte los eventos entre todos; vacío = solo en el proceso
+OBRAS_EVENTOS_REDIS_URL = config("OBRAS_EVENTOS_REDIS_URL", default="")
+
+# Días que se conserva el registro de cambios de /api/datos-obras/delta/
+OBRAS_DELTA_DIAS_RETENCION = config("OBRAS_DELTA_DIAS_RETENCION", default=30, cast=int)
+
 # GitHub API settings (para publicar datos_obras.json al repo)
 GITHUB_TOKEN = config("GITHUB_TOKEN", default="")
 GITHUB_REPO = config("GITHUB_REPO", default="")
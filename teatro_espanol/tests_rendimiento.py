@@ -0,0 +1,449 @@
+"""
+Regresiones de consultas y latencia de todas las URLs.
+
+Siembra un catálogo sintético a dos escalas (obras con autor, representaciones
+en varios lugares, manuscritos, temas, bibliografía, páginas del PDF,
+comentarios, propuestas y tareas) y llama a cada URL de apps/obras/urls.py,
+teatro_espanol/urls.py y los routers DRF. Cada petición va en una transacción
+que se deshace, así que las que escriben no alteran a las siguientes.
+
+Falla si un endpoint:
+    - hace más consultas a la escala grande que a la pequeña (N+1);
+    - supera su presupuesto de consultas en rendimiento_baseline.json;
+    - no está en la baseline, o responde 500 (salvo ERRORES_CONOCIDOS).
+
+El tiempo de cada petición se anota junto al de la baseline; solo se avisa
+(no falla) cuando es LATENCIA_FACTOR veces mayor, porque depende de la máquina.
+
+Una URL nueva sin caso en CASOS ni motivo en EXCLUIDAS hace fallar
+test_every_url_has_a_case. Tras un cambio intencionado, se regenera la
+baseline con:
+
+    ACTUALIZAR_BASELINE=1 python manage.py test teatro_espanol.tests_rendimiento
+"""
+
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+
+from apps.autores.models import Autor
+from apps.bibliografia.models import ReferenciaBibliografica
+from apps.lugares.models import Lugar
+from apps.obras.models import (
+    ComentarioUsuario,
+    Manuscrito,
+    Obra,
+    ObraTema,
+    PaginaPDF,
+    PropuestaCambioObra,
+    TareaFondo,
+    TemaLiterario,
+    VotoPropuestaCambioObra,
+)
+from apps.obras.validacion import indice_items, ruta_sintesis
+from apps.representaciones.models import Representacion
+from apps.usuarios.models import Usuario
+
+BASELINE = Path(__file__).with_name("rendimiento_baseline.json")
+ESCALA_PEQUEÑA = 3
+ESCALA_GRANDE = 12
+LATENCIA_FACTOR = 3
+PASSWORD = "testpass123"
+ARCHIVO_SINTESIS = "rendimiento_sintesis_validacion.json"
+# Sin la caché "obras": se mide el cálculo, no una respuesta cacheada de otra escala
+CACHE_VACIA = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "obras": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+
+# (clave, nombre de URL, método, ruta, cuerpo JSON, status esperado). Ruta y
+# cuerpo se formatean con los ids de _Dataset.ids(); la clave identifica el
+# caso en la baseline (un nombre de URL puede tener varios casos). El status
+# evita que un 403/404 pase por una medida del camino real.
+CASOS = [
+    # teatro_espanol/urls.py
+    ("home", "home", "get", "/", None, 200),
+    ("busqueda_obras_api", "busqueda_obras_api", "get", "/api/obras/search/?q=Obra", None, 200),
+    ("datos_obras_api", "datos_obras_api", "get", "/api/datos-obras/", None, 200),
+    ("datos_obras_delta_api", "datos_obras_delta_api", "get", "/api/datos-obras/delta/?desde=0", None, 200),
+    ("datos_obras_json", "datos_obras_json", "get", "/datos_obras.json", None, 200),
+    ("datos_obras_shard[manifest]", "datos_obras_shard", "get", "/datos_obras/manifest.json", None, 200),
+    ("datos_obras_shard", "datos_obras_shard", "get", "/datos_obras/{lista}", None, 200),
+    ("datos_obras_shard[detalle]", "datos_obras_shard", "get", "/datos_obras/{detalle}", None, 200),
+    ("data_files", "data_files", "get", "/data/fuentesix/campo_auxiliar_fechas.json", None, 200),
+    ("comedia_html", "comedia_html", "get", "/comedia.html", None, 200),
+    ("favicon", "favicon", "get", "/favicon.ico", None, 204),
+    ("legacy_index_root", "legacy_index_root", "get", "/legacy/", None, 200),
+    ("legacy_index", "legacy_index", "get", "/legacy/index.html", None, 200),
+    ("legacy_datos_obras_json", "legacy_datos_obras_json", "get", "/legacy/datos_obras.json", None, 200),
+    ("legacy_datos_obras_shard", "legacy_datos_obras_shard", "get", "/legacy/datos_obras/{lista}", None, 200),
+    ("legacy_data_files", "legacy_data_files", "get", "/legacy/data/fuentesix/campo_auxiliar_fechas.json", None, 200),
+    ("legacy_favicon", "legacy_favicon", "get", "/legacy/favicon.ico", None, 204),
+    ("legacy_file", "legacy_file", "get", "/legacy/comedia.html", None, 200),
+    # Routers DRF
+    ("api-root", "api-root", "get", "/api/", None, 200),
+    ("obra-list", "obra-list", "get", "/api/obras/", None, 200),
+    ("obra-detail", "obra-detail", "get", "/api/obras/{obra}/", None, 200),
+    ("manuscrito-list", "manuscrito-list", "get", "/api/manuscritos/", None, 200),
+    ("manuscrito-detail", "manuscrito-detail", "get", "/api/manuscritos/{manuscrito}/", None, 200),
+    ("temaliterario-list", "temaliterario-list", "get", "/api/temas-literarios/", None, 200),
+    ("temaliterario-detail", "temaliterario-detail", "get", "/api/temas-literarios/{tema}/", None, 200),
+    ("obratema-list", "obratema-list", "get", "/api/obra-temas/", None, 200),
+    ("obratema-detail", "obratema-detail", "get", "/api/obra-temas/{obra_tema}/", None, 200),
+    ("representacion-list", "representacion-list", "get", "/api/representaciones/", None, 200),
+    ("representacion-detail", "representacion-detail", "get", "/api/representaciones/{representacion}/", None, 200),
+    ("lugar-list", "lugar-list", "get", "/api/lugares/", None, 200),
+    ("lugar-detail", "lugar-detail", "get", "/api/lugares/{lugar}/", None, 200),
+    ("autor-list", "autor-list", "get", "/api/autores/", None, 200),
+    ("autor-detail", "autor-detail", "get", "/api/autores/{autor}/", None, 200),
+    ("referenciabibliografica-list", "referenciabibliografica-list", "get", "/api/referencias/", None, 200),
+    ("referenciabibliografica-detail", "referenciabibliografica-detail", "get",
+     "/api/referencias/{referencia}/", None, 200),
+    # apps/usuarios/urls.py
+    # Con sesión iniciada, login y registro redirigen
+    ("usuarios:login", "login", "get", "/usuarios/login/", None, 302),
+    ("usuarios:registro", "registro", "get", "/usuarios/registro/", None, 302),
+    ("usuarios:logout", "logout", "get", "/usuarios/logout/", None, 302),
+    ("usuarios:perfil", "perfil", "get", "/usuarios/perfil/", None, 200),
+    ("usuarios:api_registro", "api_registro", "post", "/usuarios/api/registro/",
+     {"username": "nuevo", "email": "nuevo@test.com", "password": "SecurePass123!",
+      "password_confirm": "SecurePass123!"}, 500),
+    ("usuarios:api_login", "api_login", "post", "/usuarios/api/login/",
+     {"login_field": "admin", "password": PASSWORD}, 500),
+    ("usuarios:api_logout", "api_logout", "post", "/usuarios/api/logout/", None, 200),
+    ("usuarios:api_perfil", "api_perfil", "get", "/usuarios/api/perfil/", None, 200),
+    # Contraseña actual incorrecta: se mide la validación sin cerrar la sesión del cliente
+    ("usuarios:api_cambio_password", "api_cambio_password", "post", "/usuarios/api/cambio-password/",
+     {"password_actual": "incorrecta", "password_nueva": "OtraPass123!", "password_confirm": "OtraPass123!"}, 400),
+    ("usuarios:api_sesiones", "api_sesiones", "get", "/usuarios/api/sesiones/", None, 200),
+    ("usuarios:api_login_session", "api_login_session", "post", "/usuarios/api/login-session/",
+     {"login_field": "admin", "password": PASSWORD}, 200),
+    ("usuarios:api_logout_session", "api_logout_session", "post", "/usuarios/api/logout-session/", None, 200),
+    ("usuarios:api_session_user", "api_session_user", "get", "/usuarios/api/session-user/", None, 200),
+    ("usuarios:api_admin_listar_usuarios", "api_admin_listar_usuarios", "get", "/usuarios/api/admin/usuarios/",
+     None, 200),
+    ("usuarios:api_admin_cambiar_rol", "api_admin_cambiar_rol", "post", "/usuarios/api/admin/usuarios/{lector}/rol/",
+     {"rol": "editor"}, 200),
+    # apps/obras/urls.py: editor
+    ("editor", "editor", "get", "/obras/editor/", None, 200),
+    ("editor_catalogo", "editor_catalogo", "get", "/obras/editor/fuentesxi/", None, 200),
+    ("obra_edit_ajax", "obra_edit_ajax", "get", "/obras/editor/fuentesxi/obra/{obra}/", None, 200),
+    ("obra_pdf_pages_ajax", "obra_pdf_pages_ajax", "get", "/obras/editor/fuentesxi/obra/{obra}/pdf-pages/", None, 200),
+    ("section_pdf_pages_ajax", "section_pdf_pages_ajax", "get",
+     "/obras/editor/fuentesxi/representaciones/{representacion}/pdf-pages/", None, 200),
+    ("busqueda_obras_ajax", "busqueda_obras_ajax", "get", "/obras/editor/busqueda/?q=Obra", None, 200),
+    ("count_obras_ajax", "count_obras_ajax", "get", "/obras/editor/fuentesxi/count/", None, 200),
+    ("save_comment_ajax", "save_comment_ajax", "post", "/obras/editor/fuentesxi/comentario/",
+     {"titulo": "Nota", "comentario": "Dato nuevo", "elementos_seleccionados": [{"section": "obras",
+                                                                                 "item_id": "{obra}"}]}, 200),
+    ("get_comments_ajax", "get_comments_ajax", "get", "/obras/editor/fuentesxi/comentarios/", None, 200),
+    *[
+        (f"get_section_data_ajax[{seccion}]", "get_section_data_ajax", "get", f"/obras/editor/fuentesxi/{seccion}/",
+         None, 200)
+        for seccion in ("obras", "autores", "lugares", "representaciones", "bibliografia")
+    ],
+    ("edit_item_ajax[autores]", "edit_item_ajax", "get", "/obras/editor/fuentesxi/autores/{autor}/", None, 200),
+    ("edit_item_ajax[lugares]", "edit_item_ajax", "get", "/obras/editor/fuentesxi/lugares/{lugar}/", None, 200),
+    ("edit_item_ajax[representaciones]", "edit_item_ajax", "get",
+     "/obras/editor/fuentesxi/representaciones/{representacion}/", None, 200),
+    # Comentarios
+    ("save_obra_comment", "save_obra_comment", "post", "/obras/{obra}/comentario/",
+     {"titulo": "Nota", "comentario": "Buen dato"}, 200),
+    ("get_obra_comments", "get_obra_comments", "get", "/obras/{obra}/comentarios/", None, 200),
+    ("delete_comment", "delete_comment", "post", "/obras/comentario/{comentario_admin}/eliminar/", None, 200),
+    ("index_crear_comentario", "index_crear_comentario", "post", "/obras/comentarios-index/",
+     {"obra_id": "{obra}", "contenido": "Dato nuevo"}, 200),
+    ("index_comentarios_global", "index_comentarios_global", "get", "/obras/comentarios-index/global/", None, 200),
+    ("index_comentarios_count_unseen", "index_comentarios_count_unseen", "get",
+     "/obras/comentarios-index/count-unseen/", None, 200),
+    ("index_comentarios_obra", "index_comentarios_obra", "get", "/obras/comentarios-index/obra/{obra}/", None, 200),
+    ("index_comentario_marcar_visto", "index_comentario_marcar_visto", "post",
+     "/obras/comentarios-index/{comentario}/visto/", None, 200),
+    ("index_comentario_filtros", "index_comentario_filtros", "get", "/obras/comentarios-index/{comentario}/filtros/",
+     None, 200),
+    ("exportar_comentarios_ia", "exportar_comentarios_ia", "get", "/obras/comentarios/exportar-ia/", None, 200),
+    ("exportar_todos_comentarios", "exportar_todos_comentarios", "get", "/obras/comentarios/exportar-todos/", None, 200),
+    # Propuestas
+    ("crear_propuesta_cambio_obra", "crear_propuesta_cambio_obra", "post", "/obras/propuestas/",
+     {"obra_id": "{obra}", "campo": "genero", "valor_nuevo": "Zarzuela"}, 200),
+    ("resolver_propuestas_lote", "resolver_propuestas_lote", "post", "/obras/propuestas/lote/",
+     {"acciones": [{"propuesta_id": "{propuesta}", "accion": "aprobar"}]}, 200),
+    ("listar_todas_propuestas_pendientes", "listar_todas_propuestas_pendientes", "get",
+     "/obras/propuestas/admin/pendientes/", None, 200),
+    ("listar_propuestas_pendientes_usuario", "listar_propuestas_pendientes_usuario", "get",
+     "/obras/propuestas/pendientes-usuario/", None, 200),
+    ("listar_propuestas_obra", "listar_propuestas_obra", "get", "/obras/propuestas/obra/{obra}/", None, 200),
+    ("votar_propuesta_obra", "votar_propuesta_obra", "post", "/obras/propuestas/{propuesta}/votar/",
+     {"voto": "a_favor"}, 200),
+    ("resolver_propuesta_obra", "resolver_propuesta_obra", "post", "/obras/propuestas/{propuesta}/resolver/",
+     {"accion": "rechazar"}, 200),
+    # Tareas, catálogos y fichas
+    ("tareas", "tareas", "get", "/obras/tareas/", None, 200),
+    ("tarea_estado", "tarea_estado", "get", "/obras/tareas/{tarea}/", None, 200),
+    ("catalogos", "catalogos", "get", "/obras/catalogos/", None, 200),
+    ("catalogo_detalle", "catalogo_detalle", "get", "/obras/catalogos/fuentesxi/", None, 200),
+    ("catalogo", "catalogo", "get", "/obras/catalogo/", None, 200),
+    ("catalogo_count_ajax", "catalogo_count_ajax", "get", "/obras/catalogo/count/", None, 200),
+    ("obra_edit", "obra_edit", "get", "/obras/edit/{obra}/", None, 200),
+    ("obra_detail", "obra_detail", "get", "/obras/{obra}/", None, 200),
+    ("pagina_pdf", "pagina_pdf", "get", "/obras/pagina-pdf/{pagina}/", None, 200),
+    ("pagina_pdf_modal", "pagina_pdf_modal", "get", "/obras/pagina-pdf-modal/{pagina}/", None, 200),
+    ("busqueda_avanzada", "busqueda_avanzada", "get", "/obras/busqueda-avanzada/?q=Obra", None, 500),
+    ("redes_colaboracion", "redes_colaboracion", "get", "/obras/redes-colaboracion/", None, 500),
+    ("mapas_geograficos", "mapas_geograficos", "get", "/obras/mapas-geograficos/", None, 500),
+    # Validación de análisis de IA (sobre ARCHIVO_SINTESIS del directorio temporal)
+    ("validacion_analisis_list", "validacion_analisis_list", "get", "/obras/validacion-analisis/", None, 200),
+    ("archivos_sintesis_api", "archivos_sintesis_api", "get", "/obras/validacion-analisis/api/archivos-sintesis/",
+     None, 200),
+    ("validar_item", "validar_item", "post", "/obras/validacion-analisis/validar-item/",
+     {"tipo": "representacion", "id_temporal": "{item}", "accion": "rechazar", "archivo_sintesis": "{archivo}"}, 200),
+    ("validar_lote", "validar_lote", "post", "/obras/validacion-analisis/validar-lote/",
+     {"items": [{"tipo": "representacion", "id_temporal": "{item}"}], "accion": "validar",
+      "archivo_sintesis": "{archivo}"}, 200),
+    ("decisiones_validacion_api", "decisiones_validacion_api", "get",
+     "/obras/validacion-analisis/api/decisiones/?archivo={archivo}", None, 200),
+    ("validacion_analisis_detail", "validacion_analisis_detail", "get", "/obras/validacion-analisis/{archivo}/",
+     None, 200),
+]
+
+# URLs que no se miden, con el motivo
+EXCLUIDAS = {
+    "eventos_stream": "SSE: la respuesta no termina",
+    "publicar_github": "hace push al repositorio de GitHub Pages",
+    None: "static()/media() de desarrollo",
+}
+
+# Casos que hoy responden 500 por causas ajenas al rendimiento; sus consultas
+# (hasta el error) se vigilan igual
+ERRORES_CONOCIDOS = {
+    "usuarios:api_registro": "rest_framework.authtoken no está en INSTALLED_APPS",
+    "usuarios:api_login": "rest_framework.authtoken no está en INSTALLED_APPS",
+    "busqueda_avanzada": "falta la plantilla obras/busqueda_avanzada.html",
+    "redes_colaboracion": "falta la plantilla obras/redes_colaboracion.html",
+    "mapas_geograficos": "falta la plantilla obras/mapas_geograficos.html",
+}
+
+
+def _formatear(valor, ids):
+    if isinstance(valor, str):
+        texto = valor.format(**ids)
+        return int(texto) if texto.isdigit() and valor.startswith("{") else texto
+    if isinstance(valor, list):
+        return [_formatear(v, ids) for v in valor]
+    if isinstance(valor, dict):
+        return {k: _formatear(v, ids) for k, v in valor.items()}
+    return valor
+
+
+def _directorio_base(test):
+    """BASE_DIR temporal con los archivos que sirven las vistas, para no escribir en el repo.
+
+    Las vistas de archivos de teatro_espanol/urls.py leen su propio BASE_DIR,
+    así que se parchea junto al de settings.
+    """
+    base = Path(tempfile.mkdtemp())
+    test.addCleanup(shutil.rmtree, base)
+    frontend = base / "frontend" / "github-pages"
+    fuentesix = base / "data" / "fuentesix"
+    frontend.mkdir(parents=True)
+    fuentesix.mkdir(parents=True)
+    for ruta in (frontend / "index.html", frontend / "comedia.html", base / "comedia.html"):
+        ruta.write_text("<!DOCTYPE html><title>Comedia</title>", encoding="utf-8")
+    (fuentesix / "campo_auxiliar_fechas.json").write_text("{}", encoding="utf-8")
+    (fuentesix / ARCHIVO_SINTESIS).write_text(json.dumps({
+        "metadata_archivo": {"archivo_fuente": "parte_001.txt"},
+        "representaciones": [{"id_temporal": f"rep_{i}", "datos_json": {}} for i in range(3)],
+        "obras": [{"id_temporal": "obra_1", "datos_json": {"titulo": "El Pastor Fido"}}],
+        "lugares": [{"id_temporal": "lugar_1", "datos_json": {"nombre": "Buen Retiro"}}],
+    }), encoding="utf-8")
+    ajustes = override_settings(BASE_DIR=base)
+    ajustes.enable()
+    test.addCleanup(ajustes.disable)
+    parche = mock.patch("teatro_espanol.urls.BASE_DIR", base)
+    parche.start()
+    test.addCleanup(parche.stop)
+    return base
+
+
+def _nombres_de_url(resolver=None):
+    """Nombres de todas las URLs (sin el admin de Django)."""
+    for patron in (resolver or get_resolver()).url_patterns:
+        if isinstance(patron, URLResolver):
+            if getattr(patron, "app_name", None) != "admin":
+                yield from _nombres_de_url(patron)
+        else:
+            yield patron.name
+
+
+class _Dataset:
+    """Catálogo sintético que se amplía por tramos de obras."""
+
+    def __init__(self):
+        self.admin = Usuario.objects.create_user(
+            username="admin", email="admin@test.com", password=PASSWORD, is_superuser=True, is_staff=True,
+        )
+        self.obras = 0
+        self.primeros = {}
+
+    def ampliar(self, hasta):
+        for i in range(self.obras, hasta):
+            lector = Usuario.objects.create(username=f"lector{i}", email=f"lector{i}@test.com")
+            if i % 2 == 0:
+                self.autor = Autor.objects.create(nombre=f"Autor {i}", epoca="Siglo de Oro")
+                self.tema = TemaLiterario.objects.create(nombre=f"Tema {i}")
+            lugar = Lugar.objects.create(nombre=f"Lugar {i}", region="Madrid", tipo_lugar="palacio")
+            obra = Obra.objects.create(
+                titulo=f"Obra {i}",
+                titulo_limpio=f"Obra {i}",
+                autor=self.autor,
+                tipo_obra="comedia",
+                genero="Comedia",
+                fuente_principal="FUENTESXI" if i % 3 else "CATCOM",
+                pagina_pdf=i + 1,
+                texto_original_pdf=f"Se representó la Obra {i}",
+            )
+            representaciones = [
+                Representacion.objects.create(
+                    obra=obra, lugar=lugar, fecha=f"{1650 + i}-05-{10 + j}", compañia=f"Compañía {i % 4}",
+                    director_compañia=f"Autor de comedias {i % 4}", pagina_pdf=i + 1,
+                )
+                for j in range(2)
+            ]
+            manuscrito = Manuscrito.objects.create(obra=obra, biblioteca="BNE", signatura=f"MSS/{i}")
+            obra_tema = ObraTema.objects.create(obra=obra, tema=self.tema)
+            referencia = ReferenciaBibliografica.objects.create(
+                obra=obra, titulo=f"Estudio de la Obra {i}", autor="Shergold", tipo_referencia="libro",
+            )
+            pagina = PaginaPDF.objects.create(numero_pagina=i + 1, texto_extraido=f"Obra {i}. Compañía {i % 4}.")
+            comentario = ComentarioUsuario.objects.create(
+                usuario=lector, catalogo="fuentesxi", titulo=f"Nota {i}", comentario=f"Sobre la Obra {i}",
+                es_publico=True, etiqueta_ia=i % 2 == 0,
+            )
+            comentario.obras_seleccionadas.add(obra)
+            propuesta = PropuestaCambioObra.objects.create(
+                obra=obra, campo="genero", valor_anterior="Comedia", valor_nuevo="Tragedia", propuesta_por=lector,
+            )
+            VotoPropuestaCambioObra.objects.create(propuesta=propuesta, usuario=self.admin, voto="a_favor")
+            tarea = TareaFondo.objects.create(tipo="exportar", creada_por=self.admin)
+            if not self.primeros:
+                # delete_comment solo deja borrar al autor
+                propio = ComentarioUsuario.objects.create(
+                    usuario=self.admin, catalogo="fuentesxi", titulo="Propia", comentario="Borrable",
+                )
+                self.primeros = {
+                    "obra": obra.pk, "autor": self.autor.pk, "lugar": lugar.pk,
+                    "representacion": representaciones[0].pk, "manuscrito": manuscrito.pk, "tema": self.tema.pk,
+                    "obra_tema": obra_tema.pk, "referencia": referencia.pk, "pagina": pagina.numero_pagina,
+                    "comentario": comentario.pk, "propuesta": propuesta.pk, "tarea": tarea.pk,
+                    "lector": lector.pk, "comentario_admin": propio.pk,
+                }
+        self.obras = hasta
+        # datos_obras.json y sus shards (también los del frontend legacy) en el BASE_DIR temporal
+        call_command("exportar_json", tambien_frontend=True, stdout=io.StringIO())
+
+    def ids(self):
+        """Ids de los casos; los nombres de los shards cambian con cada exportación."""
+        manifest = json.loads((Path(settings.BASE_DIR) / "datos_obras" / "manifest.json").read_text(encoding="utf-8"))
+        item = next(k[1] for k in indice_items(ruta_sintesis(ARCHIVO_SINTESIS)) if k[0] == "representacion")
+        return {
+            **self.primeros, "archivo": ARCHIVO_SINTESIS, "item": item,
+            "lista": manifest["lista"], "detalle": next(iter(manifest["detalle"].values())),
+        }
+
+
+@override_settings(CACHES=CACHE_VACIA)
+class RendimientoEndpointsTest(TestCase):
+    """Query counts stay flat with dataset size and within the checked-in budget."""
+
+    def test_every_url_has_a_case(self):
+        con_caso = {nombre for _, nombre, *_ in CASOS}
+        sin_caso = sorted(
+            {nombre for nombre in _nombres_de_url() if nombre not in con_caso and nombre not in EXCLUIDAS}
+        )
+        self.assertEqual(sin_caso, [], "Añade un caso en CASOS (o un motivo en EXCLUIDAS)")
+
+    def _medir(self, dataset, ids):
+        """{clave: (status, consultas, ms)} de todos los casos."""
+        medidas = {}
+        self.client.raise_request_exception = False
+        # Sin los avisos de django.request de los 4xx/5xx esperados
+        logging.disable(logging.ERROR)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        for clave, _, metodo, ruta, cuerpo, _ in CASOS:
+            # Los casos de logout cierran la sesión del cliente
+            if "_auth_user_id" not in self.client.session:
+                self.client.force_login(dataset.admin)
+            extra = {}
+            if cuerpo is not None:
+                extra = {"data": json.dumps(_formatear(cuerpo, ids)), "content_type": "application/json"}
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    resp = getattr(self.client, metodo)(ruta.format(**ids), **extra)
+                    if resp.streaming:
+                        b"".join(resp.streaming_content)
+                    ms = (time.perf_counter() - inicio) * 1000
+                resp.close()
+                transaction.set_rollback(True)
+            medidas[clave] = (resp.status_code, len(consultas), ms)
+        return medidas
+
+    def test_query_counts_are_flat_and_within_budget(self):
+        _directorio_base(self)
+        dataset = _Dataset()
+        dataset.ampliar(ESCALA_PEQUEÑA)
+        # La primera petición crea la SesionUsuario: se mide el estado estable
+        self.client.force_login(dataset.admin)
+        self.client.get("/favicon.ico")
+        pequeña = self._medir(dataset, dataset.ids())
+        dataset.ampliar(ESCALA_GRANDE)
+        grande = self._medir(dataset, dataset.ids())
+
+        if os.environ.get("ACTUALIZAR_BASELINE"):
+            BASELINE.write_text(json.dumps({
+                "escalas": [ESCALA_PEQUEÑA, ESCALA_GRANDE],
+                "endpoints": {
+                    clave: {"consultas": consultas, "ms": round(ms, 1)}
+                    for clave, (_, consultas, ms) in sorted(grande.items())
+                },
+            }, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+        baseline = json.loads(BASELINE.read_text(encoding="utf-8"))["endpoints"]
+        esperados = {clave: status for clave, *_, status in CASOS}
+        errores = []
+        lentos = []
+        for clave, (status, consultas, ms) in grande.items():
+            presupuesto = baseline.get(clave)
+            for escala, medida in ((ESCALA_PEQUEÑA, pequeña[clave]), (ESCALA_GRANDE, grande[clave])):
+                if medida[0] != esperados[clave]:
+                    errores.append(f"{clave}: responde {medida[0]} con {escala} obras, se esperaba {esperados[clave]}")
+            if esperados[clave] >= 500 and clave not in ERRORES_CONOCIDOS:
+                errores.append(f"{clave}: espera {esperados[clave]} sin motivo en ERRORES_CONOCIDOS")
+            if consultas > pequeña[clave][1]:
+                errores.append(
+                    f"{clave}: {pequeña[clave][1]} consultas con {ESCALA_PEQUEÑA} obras, "
+                    f"{consultas} con {ESCALA_GRANDE}"
+                )
+            if presupuesto is None:
+                errores.append(f"{clave}: sin entrada en {BASELINE.name}")
+            elif consultas > presupuesto["consultas"]:
+                errores.append(f"{clave}: {consultas} consultas, presupuesto {presupuesto['consultas']}")
+            elif ms > presupuesto["ms"] * LATENCIA_FACTOR and ms > 50:
+                lentos.append(f"{clave}: {ms:.0f} ms (baseline {presupuesto['ms']:.0f} ms)")
+        if lentos:
+            sys.stderr.write("\nEndpoints más lentos que la baseline:\n  " + "\n  ".join(lentos) + "\n")
+        self.assertEqual(errores, [], "\n" + "\n".join(errores))
@@ -146,3 +146,114 @@ class DRFObraFilterTest(TestCase):
         data = resp.json()
         self.assertIn("count", data)
         self.assertIn("results", data)
+
+
+class DatosObrasShardsRouteTest(TestCase):
+    """GET /datos_obras/<nombre> serves the manifest (revalidated) and hashed shards (immutable)."""
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        from unittest import mock
+
+        from apps.obras.shards import escribir_shards
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        base = Path(tmpdir.name)
+        self.manifest = escribir_shards(
+            {"metadata": {}, "obras": [{"id": 1, "titulo": "X", "representaciones": []}]},
+            base / "datos_obras",
+        )
+        patcher = mock.patch("teatro_espanol.urls.BASE_DIR", base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_manifest_revalidates_with_etag(self):
+        resp = self.client.get("/datos_obras/manifest.json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Cache-Control"], "no-cache")
+        etag = resp["ETag"]
+        resp = self.client.get("/datos_obras/manifest.json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_hashed_shard_is_immutable(self):
+        resp = self.client.get(f"/datos_obras/{self.manifest['lista']}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("immutable", resp["Cache-Control"])
+        self.assertIn("max-age=31536000", resp["Cache-Control"])
+
+    def test_unhashed_or_missing_names_404(self):
+        self.assertEqual(self.client.get("/datos_obras/lista.json").status_code, 404)
+        self.assertEqual(self.client.get("/datos_obras/lista.0123456789abcdef.json").status_code, 404)
+
+
+class ArchivosPrecomprimidosRouteTest(TestCase):
+    """Static data views pick .gz variants, send validators and honour Range."""
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        from unittest import mock
+
+        from apps.obras.archivos_estaticos import precomprimir
+
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        base = Path(tmpdir.name)
+        self.contenido = ('{"obras": [%s]}' % ",".join('{"id": %d}' % i for i in range(500))).encode()
+        self.ruta = base / "datos_obras.json"
+        self.ruta.write_bytes(self.contenido)
+        precomprimir(self.ruta)
+        patcher = mock.patch("teatro_espanol.urls.BASE_DIR", base)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _cuerpo(self, resp):
+        return b"".join(resp.streaming_content) if resp.streaming else resp.content
+
+    def test_gzip_variant_when_accepted(self):
+        import gzip
+
+        resp = self.client.get("/datos_obras.json", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp["Vary"])
+        self.assertEqual(gzip.decompress(self._cuerpo(resp)), self.contenido)
+
+    def test_identity_without_accept_encoding(self):
+        resp = self.client.get("/datos_obras.json")
+        self.assertFalse(resp.has_header("Content-Encoding"))
+        self.assertEqual(self._cuerpo(resp), self.contenido)
+        self.assertTrue(resp.has_header("Last-Modified"))
+
+    def test_stale_variant_is_ignored(self):
+        import os
+
+        os.utime(self.ruta, ns=(0, self.ruta.stat().st_mtime_ns + 10**9))
+        resp = self.client.get("/datos_obras.json", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(resp.has_header("Content-Encoding"))
+
+    def test_etag_per_encoding_and_304(self):
+        identidad = self.client.get("/datos_obras.json")["ETag"]
+        comprimida = self.client.get("/datos_obras.json", HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+        self.assertNotEqual(identidad, comprimida)
+        resp = self.client.get("/datos_obras.json", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=comprimida)
+        self.assertEqual(resp.status_code, 304)
+        resp = self.client.get("/datos_obras.json", HTTP_IF_MODIFIED_SINCE=self.client.get("/datos_obras.json")["Last-Modified"])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_range_requests(self):
+        resp = self.client.get("/datos_obras.json", HTTP_RANGE="bytes=2-9")
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp.content, self.contenido[2:10])
+        self.assertEqual(resp["Content-Range"], f"bytes 2-9/{len(self.contenido)}")
+
+        resp = self.client.get("/datos_obras.json", HTTP_RANGE="bytes=-5")
+        self.assertEqual(resp.content, self.contenido[-5:])
+
+        resp = self.client.get("/datos_obras.json", HTTP_RANGE=f"bytes={len(self.contenido)}-")
+        self.assertEqual(resp.status_code, 416)
+
+        resp = self.client.get("/datos_obras.json", HTTP_RANGE="bytes=0-3", HTTP_IF_RANGE='"otro"')
+        self.assertEqual(resp.status_code, 200)
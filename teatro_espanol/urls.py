@@ -25,7 +25,10 @@ from pathlib import Path
 from django.shortcuts import render
 import mimetypes
 
-from apps.obras.views_api_json import datos_obras_api
+from apps.obras.archivos_estaticos import respuesta_archivo
+from apps.obras.shards import PATRON_SHARD
+from apps.obras.views_api_json import datos_obras_api, datos_obras_delta_api
+from apps.obras.views_busqueda import busqueda_obras_api
 
 @require_http_methods(["GET"])
 def home_view(request):
@@ -183,12 +186,25 @@ def home_view(request):
                             credentials: "same-origin",
                         });
                         const data = await resp.json();
-                        if (data.success) {
-                            res.style.color = "#27ae60";
-                            res.textContent = data.message || "Publicado correctamente.";
-                        } else {
+                        if (!data.success) {
                             res.style.color = "#c0392b";
                             res.textContent = "Error: " + (data.error || "Desconocido");
+                        } else {
+                            // La publicación corre en segundo plano: consultar su estado
+                            let tarea = data.tarea;
+                            while (!tarea.terminada) {
+                                res.textContent = (tarea.mensaje || "En cola...") + " (" + tarea.progreso + "%)";
+                                await new Promise(r => setTimeout(r, 2000));
+                                const estado = await fetch(data.estado_url, {credentials: "same-origin"});
+                                tarea = (await estado.json()).tarea;
+                            }
+                            if (tarea.estado === "completada") {
+                                res.style.color = "#27ae60";
+                                res.textContent = (tarea.resultado && tarea.resultado.log) || "Publicado correctamente.";
+                            } else {
+                                res.style.color = "#c0392b";
+                                res.textContent = "Error: " + (tarea.error || "Desconocido");
+                            }
                         }
                     } catch (e) {
                         res.style.color = "#c0392b";
@@ -730,12 +746,15 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("usuarios/", include("apps.usuarios.urls")),
     path("obras/", include("apps.obras.urls")),
+    # Antes del include: el router de obras interpretaría "search" como un id
+    path("api/obras/search/", busqueda_obras_api, name="busqueda_obras_api"),
     path("api/", include("apps.obras.urls")),
     path("api/", include("apps.representaciones.urls")),
     path("api/", include("apps.lugares.urls")),
     path("api/", include("apps.autores.urls")),
     path("api/", include("apps.bibliografia.urls")),
     path("api/datos-obras/", datos_obras_api, name="datos_obras_api"),
+    path("api/datos-obras/delta/", datos_obras_delta_api, name="datos_obras_delta_api"),
 ]
 
 # ---- Compatibilidad UI GitHub Pages en Django ----
@@ -755,16 +774,51 @@ def github_pages_index_view(request):
     return FileResponse(file_path.open("rb"), content_type="text/html; charset=utf-8")
 
 
-@require_http_methods(["GET"])
+@require_http_methods(["GET", "HEAD"])
 def github_pages_datos_obras_view(request):
-    """Sirve el respaldo JSON principal para el frontend estático."""
+    """Sirve el respaldo JSON principal para el frontend estático (gzip/br si está precomprimido)."""
     file_path = BASE_DIR / "datos_obras.json"
     if not file_path.exists():
         raise Http404("datos_obras.json no encontrado")
-    return FileResponse(file_path.open("rb"), content_type="application/json; charset=utf-8")
+    return respuesta_archivo(request, file_path, "application/json; charset=utf-8")
 
 
-@require_http_methods(["GET"])
+def _servir_shard_datos_obras(request, directorio, nombre):
+    """
+    Sirve el manifest y los shards generados por exportar_json.
+
+    - manifest.json: revalidación en cada carga (no-cache + ETag, 304 si no cambió).
+    - <nombre>.<hash>.json: el contenido nunca cambia para un nombre dado,
+      así que se cachea un año como immutable.
+    """
+    if nombre == "manifest.json":
+        file_path = directorio / nombre
+        if not file_path.is_file():
+            raise Http404("manifest.json no encontrado")
+        return respuesta_archivo(request, file_path, "application/json; charset=utf-8")
+
+    if not PATRON_SHARD.match(nombre):
+        raise Http404("Shard inválido")
+    file_path = directorio / nombre
+    if not file_path.is_file():
+        raise Http404("Shard no encontrado")
+    return respuesta_archivo(
+        request, file_path, "application/json; charset=utf-8",
+        cache_control="public, max-age=31536000, immutable",
+    )
+
+
+@require_http_methods(["GET", "HEAD"])
+def datos_obras_shard_view(request, nombre):
+    return _servir_shard_datos_obras(request, BASE_DIR / "datos_obras", nombre)
+
+
+@require_http_methods(["GET", "HEAD"])
+def legacy_datos_obras_shard_view(request, nombre):
+    return _servir_shard_datos_obras(request, BASE_DIR / "frontend" / "github-pages" / "datos_obras", nombre)
+
+
+@require_http_methods(["GET", "HEAD"])
 def github_pages_data_files_view(request, subpath):
     """
     Sirve archivos bajo data/ para mantener funcionalidad del index estático.
@@ -776,7 +830,7 @@ def github_pages_data_files_view(request, subpath):
     if not target.exists() or not target.is_file():
         raise Http404("Archivo no encontrado")
     content_type = "application/json; charset=utf-8" if target.suffix == ".json" else "text/plain; charset=utf-8"
-    return FileResponse(target.open("rb"), content_type=content_type)
+    return respuesta_archivo(request, target, content_type)
 
 
 @require_http_methods(["GET"])
@@ -785,7 +839,7 @@ def favicon_view(request):
     return HttpResponse(status=204)
 
 
-@require_http_methods(["GET"])
+@require_http_methods(["GET", "HEAD"])
 def github_pages_legacy_file_view(request, subpath):
     """
     Sirve archivos del frontend legacy bajo /legacy/.
@@ -813,12 +867,13 @@ def github_pages_legacy_file_view(request, subpath):
     content_type, _ = mimetypes.guess_type(str(target))
     if not content_type:
         content_type = "application/octet-stream"
-    return FileResponse(target.open("rb"), content_type=content_type)
+    return respuesta_archivo(request, target, content_type)
 
 
 # Rutas para servir archivos estáticos del frontend (index.html los referencia)
 urlpatterns += [
     path("datos_obras.json", github_pages_datos_obras_view, name="datos_obras_json"),
+    path("datos_obras/<str:nombre>", datos_obras_shard_view, name="datos_obras_shard"),
     path("data/<path:subpath>", github_pages_data_files_view, name="data_files"),
     path("comedia.html", lambda request: FileResponse(
         (BASE_DIR / "comedia.html").open("rb"),
@@ -832,6 +887,7 @@ urlpatterns += [
     path("legacy/", github_pages_index_view, name="legacy_index_root"),
     path("legacy/index.html", github_pages_index_view, name="legacy_index"),
     path("legacy/datos_obras.json", github_pages_datos_obras_view, name="legacy_datos_obras_json"),
+    path("legacy/datos_obras/<str:nombre>", legacy_datos_obras_shard_view, name="legacy_datos_obras_shard"),
     path("legacy/data/<path:subpath>", github_pages_data_files_view, name="legacy_data_files"),
     path("legacy/favicon.ico", favicon_view, name="legacy_favicon"),
     path("legacy/<path:subpath>", github_pages_legacy_file_view, name="legacy_file"),